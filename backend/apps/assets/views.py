@@ -82,7 +82,7 @@ class AssetViewSet(viewsets.ModelViewSet):
         Validates: Requirements 2.1, 2.2, 2.3, 2.5
         """
         from apps.authentication.models import Role
-        from apps.work_orders.models import WorkOrder
+        from apps.work_orders.access import filter_by_accessible_assets
         
         queryset = super().get_queryset()
         user = self.request.user
@@ -103,11 +103,7 @@ class AssetViewSet(viewsets.ModelViewSet):
         
         elif user.role.name == Role.OPERADOR:
             # Operators only see assets from their assigned work orders
-            accessible_asset_ids = WorkOrder.objects.filter(
-                assigned_to=user
-            ).values_list('asset_id', flat=True).distinct()
-            
-            return queryset.filter(id__in=accessible_asset_ids)
+            return filter_by_accessible_assets(queryset, user, lookup='pk')
         
         return queryset
     
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChecklistsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.checklists'
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import apps.checklists.signals
@@ -0,0 +1,266 @@
+"""
+Bulk export of checklist PDFs as a single ZIP bundle.
+
+Auditors request every checklist for an asset, template, site or month at
+once. Nothing heavy runs in the web request: request_bundle() queues the
+missing PDFs on the `render_checklist_pdf` queue and, once they are all
+ready, the `build_checklist_export` task writes the ZIP. Clients poll the
+export URL (202 while work is pending) until the bundle can be served.
+
+Bundles are cached on disk keyed by the set of response ids and their
+modification times (updated_at and pdf_generated_at): asking again for the
+same unchanged selection serves the stored file without touching the PDFs.
+"""
+import hashlib
+import logging
+import os
+import time
+import uuid
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.dateparse import parse_date
+
+from apps.checklists.models import ChecklistResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RESPONSES = 2000
+DEFAULT_CACHE_HOURS = 24
+BUILD_LOCK_SECONDS = 600
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def filter_responses(queryset, params):
+    """
+    Apply the export filters to a ChecklistResponse queryset.
+
+    Supported params: asset, template, location, start_date, end_date
+    (dates as YYYY-MM-DD, inclusive, on created_at). Only finished
+    checklists are exported.
+
+    Raises:
+        ValueError: If a date cannot be parsed
+    """
+    queryset = queryset.exclude(status=ChecklistResponse.STATUS_IN_PROGRESS)
+
+    for param, lookup in (('asset', 'asset_id'), ('template', 'template_id'),
+                          ('location', 'asset__location_id')):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+
+    for param, lookup in (('start_date', 'created_at__date__gte'),
+                          ('end_date', 'created_at__date__lte')):
+        value = params.get(param)
+        if value:
+            parsed = parse_date(value)
+            if parsed is None:
+                raise ValueError(f'Invalid {param}: {value}')
+            queryset = queryset.filter(**{lookup: parsed})
+
+    return queryset
+
+
+def bundle_key(responses):
+    """Cache key for a selection: response ids plus their modification times."""
+    digest = hashlib.sha256()
+    for response in sorted(responses, key=lambda r: r.pk):
+        generated = response.pdf_generated_at.isoformat() if response.pdf_generated_at else ''
+        digest.update(f'{response.pk}:{response.updated_at.isoformat()}:{generated};'.encode())
+    return digest.hexdigest()
+
+
+def export_root():
+    return Path(getattr(
+        settings, 'CHECKLIST_EXPORT_ROOT', Path(settings.MEDIA_ROOT) / 'exports' / 'checklists'
+    ))
+
+
+def cached_bundle_path(key):
+    return export_root() / f'{key}.zip'
+
+
+def _needs_render(response):
+    return not response.pdf_file or response.pdf_status != ChecklistResponse.PDF_READY
+
+
+def archive_name(response):
+    """File name of a response inside the bundle."""
+    date = response.created_at.strftime('%Y%m%d')
+    return f'{response.asset.name}/{response.template.code}_{date}_{response.pk}.pdf'.replace(' ', '_')
+
+
+class _StreamBuffer:
+    """Write-only, unseekable file object collecting the bytes zipfile produces."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(responses, cache_path=None):
+    """
+    Yield a ZIP archive of the responses' PDFs chunk by chunk.
+
+    PDFs are already compressed so entries are STORED. When cache_path is
+    given the bytes are also written to a temporary file that replaces
+    cache_path only once the archive is complete.
+    """
+    buffer = _StreamBuffer()
+    cache_file = None
+    partial = None
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        partial = cache_path.with_name(f'{cache_path.name}.{uuid.uuid4().hex}.part')
+        cache_file = open(partial, 'wb')
+
+    def emit():
+        data = buffer.take()
+        if data:
+            if cache_file is not None:
+                cache_file.write(data)
+            yield data
+
+    completed = False
+    try:
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as bundle:
+            for response in responses:
+                if not response.pdf_file:
+                    continue
+                with response.pdf_file.open('rb') as pdf, \
+                        bundle.open(archive_name(response), mode='w', force_zip64=True) as entry:
+                    for chunk in iter(lambda: pdf.read(READ_CHUNK_SIZE), b''):
+                        entry.write(chunk)
+                        yield from emit()
+                yield from emit()
+        yield from emit()
+        completed = True
+    finally:
+        if cache_file is not None:
+            cache_file.close()
+            if completed:
+                os.replace(partial, cache_path)
+            else:
+                partial.unlink(missing_ok=True)
+
+
+def iter_file(path):
+    with open(path, 'rb') as bundle:
+        for chunk in iter(lambda: bundle.read(READ_CHUNK_SIZE), b''):
+            yield chunk
+
+
+def write_bundle(responses, path):
+    """Write the ZIP of the responses' PDFs to path (atomically)."""
+    for _ in iter_zip(responses, cache_path=path):
+        pass
+    return path
+
+
+def _build_lock(key):
+    return f'checklists:export:build:{key}'
+
+
+def release_build_lock(key):
+    cache.delete(_build_lock(key))
+
+
+def _enqueue_bundle(response_ids, key):
+    """Send the bundle task once per key, or build inline when CHECKLIST_EXPORT_ASYNC is off."""
+    from apps.checklists.tasks import build_checklist_export
+
+    if not cache.add(_build_lock(key), True, timeout=BUILD_LOCK_SECONDS):
+        return  # Already being built
+
+    if not getattr(settings, 'CHECKLIST_EXPORT_ASYNC', True):
+        build_checklist_export(response_ids, key)
+        return
+
+    try:
+        build_checklist_export.delay(response_ids, key)
+    except Exception as e:
+        logger.error(f"Could not queue checklist bundle {key}: {e}")
+        release_build_lock(key)
+
+
+def request_bundle(queryset):
+    """
+    Make sure the ZIP for the selected responses exists or is on its way.
+
+    PDFs that are not ready are queued through request_checklist_pdf (which
+    skips those already queued); responses whose PDF FAILED are left out of
+    the bundle and reported. When every other PDF is ready the bundle task
+    is queued, once per key.
+
+    Returns:
+        dict: key, path (the cached bundle, or None while pending),
+        pending (ids still waiting for a PDF) and failed (ids whose PDF
+        could not be rendered)
+    """
+    from apps.checklists.services import request_checklist_pdf
+
+    responses = list(
+        queryset.prefetch_related(None).select_related('asset', 'template').order_by('created_at', 'pk')
+    )
+
+    failed = [r.pk for r in responses if _needs_render(r) and r.pdf_status == ChecklistResponse.PDF_FAILED]
+    missing = [r for r in responses if _needs_render(r) and r.pk not in failed]
+    for response in missing:
+        request_checklist_pdf(response)
+
+    if missing:
+        # Pick up PDFs rendered inline (CHECKLIST_PDF_ASYNC off) or by a fast worker
+        fresh = ChecklistResponse.objects.select_related('asset', 'template').in_bulk(
+            [response.pk for response in missing]
+        )
+        responses = [fresh.get(response.pk, response) for response in responses]
+        failed += [r.pk for r in responses if r.pk not in failed and r.pdf_status == ChecklistResponse.PDF_FAILED]
+
+    pending = [r.pk for r in responses if _needs_render(r) and r.pk not in failed]
+    key = bundle_key(responses)
+    result = {'key': key, 'path': None, 'pending': pending, 'failed': failed}
+    if pending:
+        return result
+
+    path = cached_bundle_path(key)
+    if not path.exists():
+        _enqueue_bundle([r.pk for r in responses if not _needs_render(r)], key)
+    if path.exists():
+        result['path'] = path
+    return result
+
+
+def purge_export_cache(max_age_hours=None):
+    """Delete cached bundles older than max_age_hours. Returns the number removed."""
+    if max_age_hours is None:
+        max_age_hours = getattr(settings, 'CHECKLIST_EXPORT_CACHE_HOURS', DEFAULT_CACHE_HOURS)
+    root = export_root()
+    if not root.exists():
+        return 0
+
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for path in root.iterdir():
+        if path.is_file() and path.stat().st_mtime < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
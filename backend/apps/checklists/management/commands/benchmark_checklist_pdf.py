@@ -0,0 +1,125 @@
+"""
+Benchmark checklist PDF rendering throughput.
+
+Creates a synthetic template and response inside a transaction that is
+rolled back at the end, renders the PDF repeatedly and reports PDFs/second.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.assets.models import Asset, Location
+from apps.authentication.models import User
+from apps.checklists import pdf_rendering
+from apps.checklists.models import (
+    ChecklistItemResponse,
+    ChecklistResponse,
+    ChecklistTemplate,
+    ChecklistTemplateItem,
+)
+from apps.checklists.services import generate_checklist_pdf
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure checklist PDF rendering throughput (PDFs/second)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=50, help='PDFs to render per mode')
+        parser.add_argument('--sections', type=int, default=8, help='Sections in the template')
+        parser.add_argument('--items', type=int, default=40, help='Items in the template')
+        parser.add_argument(
+            '--mode',
+            choices=['cold', 'warm', 'both'],
+            default='both',
+            help='cold: recompile the template layout for every PDF; warm: reuse it'
+        )
+
+    def handle(self, *args, **options):
+        modes = ['cold', 'warm'] if options['mode'] == 'both' else [options['mode']]
+        results = {}
+
+        try:
+            with transaction.atomic():
+                checklist_response = self._create_fixture(options['sections'], options['items'])
+                generate_checklist_pdf(checklist_response)  # Import/font warm-up
+
+                for mode in modes:
+                    results[mode] = self._run(checklist_response, options['renders'], mode == 'cold')
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self.stdout.write("📄 Benchmark de generación de PDFs de checklist")
+        self.stdout.write("=" * 60)
+        self.stdout.write(
+            f"{options['items']} items en {options['sections']} secciones, "
+            f"{options['renders']} PDFs por modo"
+        )
+        for mode, (elapsed, rate) in results.items():
+            self.stdout.write(f"   {mode:<5} {elapsed:8.2f}s  {rate:8.1f} PDFs/s")
+        if len(results) == 2:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Aceleración: {results['warm'][1] / results['cold'][1]:.2f}x"
+            ))
+
+    def _run(self, checklist_response, renders, cold):
+        started = time.perf_counter()
+        for _ in range(renders):
+            if cold:
+                pdf_rendering.clear_compiled_templates()
+            response = ChecklistResponse.objects.select_related(
+                'template', 'asset', 'completed_by'
+            ).get(pk=checklist_response.pk)
+            generate_checklist_pdf(response)
+        elapsed = time.perf_counter() - started
+        return elapsed, renders / elapsed
+
+    def _create_fixture(self, sections, items):
+        user = User.objects.filter(is_active=True).first()
+        location = Location.objects.create(name='Benchmark', address='Benchmark')
+        asset = Asset.objects.create(
+            name='Benchmark Asset',
+            vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+            model='Benchmark',
+            serial_number=f'BENCH-{int(time.time())}',
+            location=location,
+            installation_date=timezone.now().date(),
+            created_by=user
+        )
+        template = ChecklistTemplate.objects.create(
+            code=f'BENCH-{int(time.time())}',
+            name='Benchmark Checklist',
+            vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+        )
+        template_items = ChecklistTemplateItem.objects.bulk_create([
+            ChecklistTemplateItem(
+                template=template,
+                section=f'Sección {(order - 1) * sections // items + 1}',
+                order=order,
+                question=f'Verificar componente número {order} del equipo'
+            )
+            for order in range(1, items + 1)
+        ])
+        checklist_response = ChecklistResponse.objects.create(
+            template=template,
+            asset=asset,
+            completed_by=user,
+            status=ChecklistResponse.STATUS_APPROVED,
+            score=95
+        )
+        ChecklistItemResponse.objects.bulk_create([
+            ChecklistItemResponse(
+                checklist_response=checklist_response,
+                template_item=item,
+                response_value=['yes', 'no', 'na'][item.order % 3],
+                observations='Sin observaciones' if item.order % 4 else ''
+            )
+            for item in template_items
+        ])
+        return checklist_response
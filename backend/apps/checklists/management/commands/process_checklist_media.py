@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from apps.checklists import media
+from apps.checklists.models import ChecklistResponse
+from apps.checklists.tasks import process_checklist_media
+
+
+class Command(BaseCommand):
+    help = 'Generate photo variants and move base64 signatures to files for existing checklists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inline',
+            action='store_true',
+            help='Process in this process instead of queuing Celery tasks'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🖼️  Buscando checklists con imágenes sin procesar...")
+        self.stdout.write("=" * 60)
+
+        unprocessed_photos = Q(item_responses__photo__gt='') & (
+            Q(item_responses__photo_thumbnail='') | Q(item_responses__photo_thumbnail__isnull=True)
+        )
+        response_ids = list(
+            ChecklistResponse.objects.filter(Q(signature_data__gt='') | unprocessed_photos)
+            .values_list('id', flat=True).distinct().order_by('id')
+        )
+
+        if not response_ids:
+            self.stdout.write(self.style.SUCCESS("✅ No hay imágenes pendientes"))
+            return
+
+        self.stdout.write(f"📋 Encontrados {len(response_ids)} checklists")
+        photos = 0
+        signatures = 0
+        for response_id in response_ids:
+            if options['inline']:
+                result = media.process_checklist_media(response_id)
+                photos += result['photos']
+                signatures += int(result['signature'])
+            else:
+                process_checklist_media.delay(response_id)
+
+        if options['inline']:
+            self.stdout.write(self.style.SUCCESS(
+                f"🎉 Fotos procesadas: {photos}, firmas movidas a archivo: {signatures}"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"🎉 Tareas encoladas: {len(response_ids)}"))
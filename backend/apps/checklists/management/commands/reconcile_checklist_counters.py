@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from apps.checklists.models import ChecklistResponse
+
+
+class Command(BaseCommand):
+    help = 'Verify the denormalized checklist counters against the item responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite the counters (and score) of checklists that do not match'
+        )
+        parser.add_argument(
+            '--in-progress',
+            action='store_true',
+            help='Only check checklists that are still in progress'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Verificando contadores de checklists...")
+        self.stdout.write("=" * 60)
+
+        answered = Q(item_responses__response_value__gt='')
+        responses = ChecklistResponse.objects.select_related('template').annotate(
+            actual_response_count=Count('item_responses'),
+            actual_answered_count=Count('item_responses', filter=answered),
+            actual_passed_count=Count(
+                'item_responses',
+                filter=Q(item_responses__response_value__in=ChecklistResponse.PASSING_VALUES)
+            ),
+            actual_required_answered_count=Count(
+                'item_responses',
+                filter=answered & Q(item_responses__template_item__required=True)
+            )
+        ).order_by('pk')
+        if options['in_progress']:
+            responses = responses.filter(status=ChecklistResponse.STATUS_IN_PROGRESS)
+
+        checked = 0
+        mismatched = 0
+        for checklist in responses.iterator(chunk_size=500):
+            checked += 1
+            differences = {
+                field: (getattr(checklist, field), getattr(checklist, f'actual_{field}'))
+                for field in ChecklistResponse.RESPONSE_COUNTER_FIELDS
+                if getattr(checklist, field) != getattr(checklist, f'actual_{field}')
+            }
+            if not differences:
+                continue
+
+            mismatched += 1
+            detail = ', '.join(
+                f"{field} {stored} → {actual}" for field, (stored, actual) in differences.items()
+            )
+            self.stdout.write(self.style.WARNING(f"⚠️  Checklist #{checklist.id}: {detail}"))
+
+            if options['fix']:
+                for field, (_, actual) in differences.items():
+                    setattr(checklist, field, actual)
+                checklist.update_score_and_status(update_fields=list(differences))
+
+        self.stdout.write("")
+        self.stdout.write(f"📊 Checklists verificados: {checked}")
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS("✅ Todos los contadores son correctos"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"🔧 Contadores corregidos: {mismatched}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Checklists con contadores incorrectos: {mismatched} (use --fix para corregir)"
+            ))
@@ -0,0 +1,192 @@
+"""
+Image pipeline for checklist photos and signatures.
+
+Phones upload full-resolution photos (often several MB, with EXIF that
+includes GPS coordinates) and signatures arrive as base64 text. Processing
+runs in a Celery worker (see tasks.process_checklist_media):
+
+- Photos are re-encoded without EXIF (orientation applied first) and get a
+  medium variant for detail views and a thumbnail for lists.
+- Base64 signatures are decoded, cropped to the drawn strokes and stored as
+  a small grayscale PNG in signature_file; signature_data is cleared.
+
+Rows are written with queryset.update() so answers edited while an image
+is being processed are never overwritten.
+"""
+import base64
+import binascii
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from apps.checklists.models import ChecklistItemResponse, ChecklistResponse
+
+logger = logging.getLogger(__name__)
+
+PHOTO_MAX_SIZE = 2560
+PHOTO_QUALITY = 85
+MEDIUM_SIZE = 1280
+MEDIUM_QUALITY = 80
+THUMBNAIL_SIZE = 320
+THUMBNAIL_QUALITY = 70
+SIGNATURE_PADDING = 8
+
+
+def encode_jpeg(image, max_size, quality):
+    """Resize (keeping aspect ratio) and encode as progressive JPEG without metadata."""
+    image = image.copy()
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def open_photo(field_file):
+    """Open an uploaded photo upright and as RGB."""
+    with field_file.open('rb') as photo:
+        image = Image.open(photo)
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            # Flatten transparency on white
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        else:
+            image.load()
+    return image
+
+
+def process_item_photo(item_response):
+    """
+    Strip EXIF from a photo and generate its variants.
+
+    Returns:
+        bool: True if the photo was processed
+    """
+    if not item_response.photo or item_response.photo_thumbnail:
+        return False
+
+    original = item_response.photo
+    original_name = original.name
+    stem = os.path.splitext(os.path.basename(original_name))[0]
+    image = open_photo(original)
+
+    field = ChecklistItemResponse._meta.get_field('photo')
+    original.save(f'{stem}.jpg', ContentFile(encode_jpeg(image, PHOTO_MAX_SIZE, PHOTO_QUALITY)), save=False)
+    item_response.photo_medium.save(
+        f'{stem}_md.jpg', ContentFile(encode_jpeg(image, MEDIUM_SIZE, MEDIUM_QUALITY)), save=False
+    )
+    item_response.photo_thumbnail.save(
+        f'{stem}_th.jpg', ContentFile(encode_jpeg(image, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)), save=False
+    )
+
+    updated = ChecklistItemResponse.objects.filter(pk=item_response.pk, photo=original_name).update(
+        photo=item_response.photo.name,
+        photo_medium=item_response.photo_medium.name,
+        photo_thumbnail=item_response.photo_thumbnail.name
+    )
+    if not updated:
+        # The photo was replaced meanwhile: drop what was generated for the old one
+        for generated in (item_response.photo, item_response.photo_medium, item_response.photo_thumbnail):
+            generated.storage.delete(generated.name)
+        return False
+
+    if item_response.photo.name != original_name:
+        field.storage.delete(original_name)
+    return True
+
+
+def compact_signature(signature_data):
+    """
+    Decode a base64 signature and return it as a cropped grayscale PNG.
+
+    Raises:
+        ValueError: If the data is not a base64 image
+    """
+    encoded = signature_data.split(',', 1)[1] if ',' in signature_data else signature_data
+    try:
+        image = Image.open(BytesIO(base64.b64decode(encoded, validate=True)))
+        image.load()
+    except (binascii.Error, ValueError, OSError) as e:
+        raise ValueError(f'Firma inválida: {e}')
+
+    image = image.convert('LA')
+    # Crop to the strokes (non-transparent pixels), keeping a small margin
+    bbox = image.getchannel('A').getbbox()
+    if bbox and image.width > 10 and image.height > 10:
+        left, top, right, bottom = bbox
+        image = image.crop((
+            max(left - SIGNATURE_PADDING, 0),
+            max(top - SIGNATURE_PADDING, 0),
+            min(right + SIGNATURE_PADDING, image.width),
+            min(bottom + SIGNATURE_PADDING, image.height),
+        ))
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def process_signature(checklist_response):
+    """
+    Move a base64 signature into signature_file.
+
+    Returns:
+        bool: True if the signature was moved
+    """
+    signature_data = checklist_response.signature_data
+    if not signature_data:
+        return False
+
+    try:
+        content = compact_signature(signature_data)
+    except ValueError as e:
+        logger.warning(f"Checklist {checklist_response.id}: {e}")
+        return False
+
+    previous = checklist_response.signature_file.name if checklist_response.signature_file else None
+    checklist_response.signature_file.save(
+        f'signature_{checklist_response.id}.png', ContentFile(content), save=False
+    )
+    updated = ChecklistResponse.objects.filter(
+        pk=checklist_response.pk, signature_data=signature_data
+    ).update(signature_file=checklist_response.signature_file.name, signature_data='')
+    if not updated:
+        # Signed again meanwhile: the next run picks up the new signature
+        checklist_response.signature_file.storage.delete(checklist_response.signature_file.name)
+        return False
+
+    if previous:
+        checklist_response.signature_file.storage.delete(previous)
+    checklist_response.signature_data = ''
+    return True
+
+
+def process_checklist_media(response_id):
+    """
+    Process the signature and every unprocessed photo of a checklist.
+
+    Returns:
+        dict: Number of photos processed and whether the signature was moved
+    """
+    checklist_response = ChecklistResponse.objects.get(pk=response_id)
+    signature = process_signature(checklist_response)
+
+    photos = 0
+    pending = checklist_response.item_responses.exclude(
+        Q(photo='') | Q(photo__isnull=True)
+    ).filter(Q(photo_thumbnail='') | Q(photo_thumbnail__isnull=True))
+    for item_response in pending:
+        try:
+            if process_item_photo(item_response):
+                photos += 1
+        except (OSError, ValueError) as e:
+            # Unreadable image: keep the original as uploaded
+            logger.warning(f"Could not process photo of item response {item_response.id}: {e}")
+
+    logger.info(f"Checklist {response_id} media processed: {photos} photos, signature moved: {signature}")
+    return {'photos': photos, 'signature': signature}
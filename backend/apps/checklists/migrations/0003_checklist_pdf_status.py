@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+def mark_existing_pdfs_ready(apps, schema_editor):
+    """Responses that already have a PDF file are READY."""
+    ChecklistResponse = apps.get_model('checklists', 'ChecklistResponse')
+    ChecklistResponse.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(
+        pdf_status='READY'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0002_fix_vehicle_type_values'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='pdf_error',
+            field=models.TextField(blank=True, verbose_name='Error de PDF'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='pdf_generated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='PDF Generado'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='pdf_status',
+            field=models.CharField(choices=[('NOT_REQUESTED', 'No Solicitado'), ('PENDING', 'En Cola'), ('PROCESSING', 'Generando'), ('READY', 'Disponible'), ('FAILED', 'Error')], default='NOT_REQUESTED', max_length=20, verbose_name='Estado del PDF'),
+        ),
+        migrations.AddIndex(
+            model_name='checklistresponse',
+            index=models.Index(fields=['pdf_status'], name='checklist_r_pdf_sta_b59361_idx'),
+        ),
+        migrations.RunPython(mark_existing_pdfs_ready, migrations.RunPython.noop),
+    ]
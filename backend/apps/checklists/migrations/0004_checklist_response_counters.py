@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+COUNTER_FIELDS = [
+    'total_items', 'required_items', 'response_count',
+    'answered_count', 'passed_count', 'required_answered_count',
+]
+
+
+def populate_counters(apps, schema_editor):
+    """Compute the counters of existing responses."""
+    ChecklistTemplate = apps.get_model('checklists', 'ChecklistTemplate')
+    ChecklistResponse = apps.get_model('checklists', 'ChecklistResponse')
+
+    templates = {
+        row['id']: row
+        for row in ChecklistTemplate.objects.annotate(
+            total=Count('items'),
+            required=Count('items', filter=Q(items__required=True))
+        ).values('id', 'total', 'required')
+    }
+    answered = Q(item_responses__response_value__gt='')
+    responses = ChecklistResponse.objects.annotate(
+        responses=Count('item_responses'),
+        answered=Count('item_responses', filter=answered),
+        passed=Count('item_responses', filter=Q(item_responses__response_value__in=['yes', 'na'])),
+        required_answered=Count(
+            'item_responses', filter=answered & Q(item_responses__template_item__required=True)
+        )
+    ).order_by('pk')
+
+    batch = []
+    for response in responses.iterator(chunk_size=500):
+        template = templates.get(response.template_id, {'total': 0, 'required': 0})
+        response.total_items = template['total']
+        response.required_items = template['required']
+        response.response_count = response.responses
+        response.answered_count = response.answered
+        response.passed_count = response.passed
+        response.required_answered_count = response.required_answered
+        batch.append(response)
+        if len(batch) >= 500:
+            ChecklistResponse.objects.bulk_update(batch, COUNTER_FIELDS)
+            batch = []
+    if batch:
+        ChecklistResponse.objects.bulk_update(batch, COUNTER_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0003_checklist_pdf_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='answered_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items Respondidos'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='passed_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items Aprobados'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='required_answered_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items Requeridos Respondidos'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='required_items',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items Requeridos'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='response_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Respuestas'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='total_items',
+            field=models.PositiveIntegerField(default=0, verbose_name='Items de Plantilla'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
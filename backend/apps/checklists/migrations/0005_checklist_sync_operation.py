@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('checklists', '0004_checklist_response_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChecklistSyncOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='Clave de Idempotencia')),
+                ('kind', models.CharField(choices=[('CHECKLIST', 'Checklist'), ('ITEM', 'Respuesta de Item')], max_length=20, verbose_name='Tipo')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Sincronización')),
+                ('checklist_response', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_operations', to='checklists.checklistresponse', verbose_name='Respuesta de Checklist')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checklist_sync_operations', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Operación de Sincronización',
+                'verbose_name_plural': 'Operaciones de Sincronización',
+                'db_table': 'checklist_sync_operations',
+                'indexes': [models.Index(fields=['created_at'], name='checklist_s_created_0cb59d_idx')],
+                'unique_together': {('user', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0005_checklist_sync_operation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistitemresponse',
+            name='photo_medium',
+            field=models.ImageField(blank=True, null=True, upload_to='checklists/photos/%Y/%m/medium/', verbose_name='Foto (Mediana)'),
+        ),
+        migrations.AddField(
+            model_name='checklistitemresponse',
+            name='photo_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='checklists/photos/%Y/%m/thumbnails/', verbose_name='Foto (Miniatura)'),
+        ),
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='signature_file',
+            field=models.ImageField(blank=True, null=True, upload_to='checklists/signatures/%Y/%m/', verbose_name='Imagen de Firma'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklists', '0006_checklist_media_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checklistresponse',
+            name='pdf_requested_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='PDF Solicitado'),
+        ),
+    ]
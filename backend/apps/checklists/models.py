@@ -159,6 +159,24 @@ class ChecklistResponse(models.Model):
         (STATUS_REJECTED, 'Rechazado'),
     ]
     
+    # PDF rendering (done asynchronously by apps.checklists.tasks)
+    PDF_NOT_REQUESTED = 'NOT_REQUESTED'
+    PDF_PENDING = 'PENDING'
+    PDF_PROCESSING = 'PROCESSING'
+    PDF_READY = 'READY'
+    PDF_FAILED = 'FAILED'
+    
+    PDF_STATUSES = [
+        (PDF_NOT_REQUESTED, 'No Solicitado'),
+        (PDF_PENDING, 'En Cola'),
+        (PDF_PROCESSING, 'Generando'),
+        (PDF_READY, 'Disponible'),
+        (PDF_FAILED, 'Error'),
+    ]
+    
+    # Response values that count towards the score
+    PASSING_VALUES = ('yes', 'na')
+    
     # Related Objects
     template = models.ForeignKey(
         ChecklistTemplate,
@@ -207,8 +225,25 @@ class ChecklistResponse(models.Model):
         verbose_name='Estado'
     )
     
-    # Digital Signature
+    # Denormalized counters (score, status and completion are derived from these)
+    total_items = models.PositiveIntegerField(default=0, verbose_name='Items de Plantilla')
+    required_items = models.PositiveIntegerField(default=0, verbose_name='Items Requeridos')
+    response_count = models.PositiveIntegerField(default=0, verbose_name='Respuestas')
+    answered_count = models.PositiveIntegerField(default=0, verbose_name='Items Respondidos')
+    passed_count = models.PositiveIntegerField(default=0, verbose_name='Items Aprobados')
+    required_answered_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Items Requeridos Respondidos'
+    )
+    
+    # Digital Signature (base64 as uploaded; moved to signature_file by apps.checklists.media)
     signature_data = models.TextField(blank=True, verbose_name='Firma Digital')
+    signature_file = models.ImageField(
+        upload_to='checklists/signatures/%Y/%m/',
+        null=True,
+        blank=True,
+        verbose_name='Imagen de Firma'
+    )
     
     # PDF Generation
     pdf_file = models.FileField(
@@ -217,6 +252,15 @@ class ChecklistResponse(models.Model):
         blank=True,
         verbose_name='Archivo PDF'
     )
+    pdf_status = models.CharField(
+        max_length=20,
+        choices=PDF_STATUSES,
+        default=PDF_NOT_REQUESTED,
+        verbose_name='Estado del PDF'
+    )
+    pdf_error = models.TextField(blank=True, verbose_name='Error de PDF')
+    pdf_requested_at = models.DateTimeField(null=True, blank=True, verbose_name='PDF Solicitado')
+    pdf_generated_at = models.DateTimeField(null=True, blank=True, verbose_name='PDF Generado')
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')
@@ -232,38 +276,124 @@ class ChecklistResponse(models.Model):
             models.Index(fields=['work_order']),
             models.Index(fields=['completed_by']),
             models.Index(fields=['status']),
+            models.Index(fields=['pdf_status']),
             models.Index(fields=['-created_at']),
         ]
     
     def __str__(self):
         return f"{self.template.code} - {self.asset} - {self.created_at.strftime('%Y-%m-%d')}"
     
+    # Counters that track individual item responses
+    RESPONSE_COUNTER_FIELDS = ['response_count', 'answered_count', 'passed_count', 'required_answered_count']
+    SCORE_FIELDS = ['score', 'status', 'completed_at', 'updated_at']
+    
+    @classmethod
+    def counter_values(cls, response_value, required):
+        """Contribution of one item response to each response counter."""
+        answered = bool(response_value)
+        return {
+            'response_count': 1,
+            'answered_count': int(answered),
+            'passed_count': int(response_value in cls.PASSING_VALUES),
+            'required_answered_count': int(answered and required),
+        }
+    
+    def set_counters(self, template_items, responses):
+        """
+        Set the denormalized counters in memory.
+        
+        Args:
+            template_items: All ChecklistTemplateItem of the template
+            responses: (response_value, required) pairs, one per item response
+        """
+        self.total_items = len(template_items)
+        self.required_items = sum(1 for item in template_items if item.required)
+        for field in self.RESPONSE_COUNTER_FIELDS:
+            setattr(self, field, 0)
+        
+        for response_value, required in responses:
+            for field, value in self.counter_values(response_value, required).items():
+                setattr(self, field, getattr(self, field) + value)
+    
+    def record_item_response(self, required, response_value, previous_value=None):
+        """
+        Apply one created or updated item response to the stored counters.
+        
+        The counters are incremented atomically with F-expressions and then
+        re-read, so concurrent answers on the same checklist are not lost.
+        
+        Args:
+            required: Whether the template item is required
+            response_value: New response value
+            previous_value: Value before the update, None for a new response
+        """
+        deltas = self.counter_values(response_value, required)
+        if previous_value is not None:
+            for field, value in self.counter_values(previous_value, required).items():
+                deltas[field] -= value
+        
+        changes = {
+            field: models.F(field) + delta
+            for field, delta in deltas.items()
+            if delta
+        }
+        if changes:
+            ChecklistResponse.objects.filter(pk=self.pk).update(**changes)
+            self.refresh_from_db(fields=self.RESPONSE_COUNTER_FIELDS)
+    
+    def save(self, *args, **kwargs):
+        # Snapshot the size of the template when the response is created
+        if self._state.adding and not self.total_items:
+            self.refresh_template_counts()
+        super().save(*args, **kwargs)
+    
+    def refresh_template_counts(self):
+        """Recompute total_items and required_items from the template (not saved)."""
+        counts = self.template.items.aggregate(
+            total=models.Count('id'),
+            required=models.Count('id', filter=models.Q(required=True))
+        )
+        self.total_items = counts['total']
+        self.required_items = counts['required']
+    
+    def refresh_counters(self):
+        """Recompute the denormalized counters from the database (not saved)."""
+        self.refresh_template_counts()
+        answered = ~models.Q(response_value='')
+        counts = self.item_responses.aggregate(
+            responses=models.Count('id'),
+            answered=models.Count('id', filter=answered),
+            passed=models.Count('id', filter=models.Q(response_value__in=self.PASSING_VALUES)),
+            required_answered=models.Count(
+                'id', filter=answered & models.Q(template_item__required=True)
+            )
+        )
+        self.response_count = counts['responses']
+        self.answered_count = counts['answered']
+        self.passed_count = counts['passed']
+        self.required_answered_count = counts['required_answered']
+    
     def calculate_score(self):
         """Calculate the score based on responses."""
-        total_items = self.item_responses.count()
-        if total_items == 0:
+        if self.response_count == 0:
             return 0
         
-        # Count items that passed (yes or na)
-        passed_items = self.item_responses.filter(
-            models.Q(response_value='yes') | models.Q(response_value='na')
-        ).count()
-        
-        score = (passed_items / total_items) * 100
+        # Items that passed (yes or na) over all responses
+        score = (self.passed_count / self.response_count) * 100
         return round(score, 2)
     
-    def update_score_and_status(self):
-        """Update score and status based on responses."""
+    def update_score_and_status(self, save=True, update_fields=()):
+        """
+        Update score and status based on the response counters.
+        
+        Only the score fields (plus update_fields) are saved, so counters
+        updated concurrently in the database are never overwritten.
+        """
         self.score = self.calculate_score()
         
         if self.status == self.STATUS_IN_PROGRESS:
             # Check if all required items are answered
-            required_items = self.template.items.filter(required=True).count()
-            answered_required = self.item_responses.filter(
-                template_item__required=True
-            ).exclude(response_value='').count()
-            
-            if answered_required >= required_items:
+            if self.required_answered_count >= self.required_items:
                 self.status = self.STATUS_COMPLETED
                 self.completed_at = timezone.now()
                 
@@ -273,16 +403,20 @@ class ChecklistResponse(models.Model):
                 else:
                     self.status = self.STATUS_REJECTED
         
-        self.save()
+        if save:
+            self.save(update_fields=self.SCORE_FIELDS + list(update_fields))
+    
+    @property
+    def has_signature(self):
+        """Whether the checklist was signed (as a file or still as base64)."""
+        return bool(self.signature_file or self.signature_data)
     
     def completion_percentage(self):
         """Calculate completion percentage."""
-        total_items = self.template.total_items()
-        if total_items == 0:
+        if self.total_items == 0:
             return 0
         
-        answered_items = self.item_responses.exclude(response_value='').count()
-        return round((answered_items / total_items) * 100, 2)
+        return round((self.answered_count / self.total_items) * 100, 2)
 
 
 class ChecklistItemResponse(models.Model):
@@ -313,6 +447,20 @@ class ChecklistItemResponse(models.Model):
         verbose_name='Foto'
     )
     
+    # Resized variants generated by apps.checklists.media
+    photo_medium = models.ImageField(
+        upload_to='checklists/photos/%Y/%m/medium/',
+        null=True,
+        blank=True,
+        verbose_name='Foto (Mediana)'
+    )
+    photo_thumbnail = models.ImageField(
+        upload_to='checklists/photos/%Y/%m/thumbnails/',
+        null=True,
+        blank=True,
+        verbose_name='Foto (Miniatura)'
+    )
+    
     # Metadata
     answered_at = models.DateTimeField(auto_now=True, verbose_name='Fecha de Respuesta')
     
@@ -328,3 +476,48 @@ class ChecklistItemResponse(models.Model):
     
     def __str__(self):
         return f"{self.checklist_response} - {self.template_item.order}"
+
+
+class ChecklistSyncOperation(models.Model):
+    """
+    Idempotency key of an operation applied by the offline sync endpoint.
+    
+    Mobile clients generate a key for every checklist they create and every
+    answer they record while offline; replaying a batch skips the keys that
+    were already applied.
+    """
+    KIND_CHECKLIST = 'CHECKLIST'
+    KIND_ITEM = 'ITEM'
+    
+    KINDS = [
+        (KIND_CHECKLIST, 'Checklist'),
+        (KIND_ITEM, 'Respuesta de Item'),
+    ]
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='checklist_sync_operations',
+        verbose_name='Usuario'
+    )
+    key = models.CharField(max_length=64, verbose_name='Clave de Idempotencia')
+    kind = models.CharField(max_length=20, choices=KINDS, verbose_name='Tipo')
+    checklist_response = models.ForeignKey(
+        ChecklistResponse,
+        on_delete=models.CASCADE,
+        related_name='sync_operations',
+        verbose_name='Respuesta de Checklist'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Sincronización')
+    
+    class Meta:
+        db_table = 'checklist_sync_operations'
+        verbose_name = 'Operación de Sincronización'
+        verbose_name_plural = 'Operaciones de Sincronización'
+        unique_together = ['user', 'key']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} - {self.key}"
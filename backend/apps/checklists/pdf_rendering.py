@@ -0,0 +1,317 @@
+"""
+Compiled checklist PDF layouts.
+
+The structure of a checklist PDF (styles, table styles, title, section
+headings and the ordered questions of each section) depends only on the
+ChecklistTemplate, so it is compiled once per template version and cached
+in-process. Rendering a response then only fills in the header values,
+the answers and the signature.
+
+A template's version is its updated_at; saving or deleting one of its items
+touches the template (see apps.checklists.signals), so every process picks
+up layout changes on its next render.
+"""
+import base64
+import copy
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+MAX_COMPILED_TEMPLATES = 64
+
+HEADER_COL_WIDTHS = [1.5*inch, 2.5*inch, 1.5*inch, 2*inch]
+SECTION_COL_WIDTHS = [0.4*inch, 3.5*inch, 1*inch, 2.5*inch]
+SECTION_HEADER_ROW = ['#', 'Pregunta', 'Respuesta', 'Observaciones']
+
+HEADER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+    ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0f0f0')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+SECTION_TABLE_STYLE = TableStyle([
+    # Header row
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4a90e2')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('TOPPADDING', (0, 0), (-1, 0), 8),
+
+    # Data rows
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('ALIGN', (2, 1), (2, -1), 'CENTER'),
+    ('ALIGN', (3, 1), (3, -1), 'LEFT'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 1), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+
+    # Alternating row colors
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
+])
+
+SIGNATURE_TABLE_STYLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (0, 0), 10),
+    ('FONTSIZE', (0, 2), (0, 2), 9),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('LINEABOVE', (0, 2), (0, 2), 1, colors.black),
+])
+
+RESPONSE_LABELS = {
+    'yes': '✓ Sí',
+    'no': '✗ No',
+    'na': '○ N/A'
+}
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Paragraph styles shared by every checklist PDF."""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=12,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#333333'),
+            spaceAfter=6,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ),
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#1a1a1a'),
+            spaceAfter=6
+        ),
+        'footer': ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ),
+    }
+
+
+def format_response_value(response_value):
+    """Format response value for display in PDF."""
+    if not response_value:
+        return '-'
+    return RESPONSE_LABELS.get(response_value.lower(), response_value)
+
+
+class CompiledChecklistTemplate:
+    """
+    Static part of the PDF layout of one ChecklistTemplate version.
+
+    Paragraphs are parsed once and shallow-copied per render, so concurrent
+    renders never share the wrap/split state ReportLab stores on flowables.
+    """
+
+    def __init__(self, template, items):
+        styles = get_styles()
+        self.template_id = template.pk
+        self.version = template.updated_at
+        self.code = template.code
+        self.passing_score = f"{template.passing_score}%"
+        self.title = Paragraph(f"<b>{template.name}</b>", styles['title'])
+        self.signature_heading = Paragraph("<b>Firma Digital</b>", styles['heading'])
+
+        # Consecutive items with the same section form one table
+        self.sections = []
+        for item in items:
+            if not self.sections or self.sections[-1][0] != item.section:
+                self.sections.append((item.section, []))
+            self.sections[-1][1].append((item.pk, str(item.order), item.question))
+        self.headings = {
+            section: Paragraph(f"<b>{section}</b>", styles['heading'])
+            for section, _ in self.sections
+        }
+
+    def render(self, checklist_response):
+        """Render the PDF of a response and return its bytes."""
+        styles = get_styles()
+        answers = {
+            row[0]: row[1:]
+            for row in checklist_response.item_responses.values_list(
+                'template_item_id', 'response_value', 'observations'
+            )
+        }
+
+        elements = [copy.copy(self.title), Spacer(1, 0.2*inch)]
+        elements.append(self._header_table(checklist_response))
+        elements.append(Spacer(1, 0.3*inch))
+
+        for section, items in self.sections:
+            rows = []
+            for item_id, order, question in items:
+                if item_id not in answers:
+                    continue
+                response_value, observations = answers[item_id]
+                observations = observations or '-'
+                rows.append([
+                    order,
+                    question,
+                    format_response_value(response_value),
+                    observations[:50] + '...' if len(observations) > 50 else observations
+                ])
+            if rows:
+                elements.append(copy.copy(self.headings[section]))
+                table = Table([SECTION_HEADER_ROW] + rows, colWidths=SECTION_COL_WIDTHS, repeatRows=1)
+                table.setStyle(SECTION_TABLE_STYLE)
+                elements.append(table)
+                elements.append(Spacer(1, 0.2*inch))
+
+        if checklist_response.has_signature:
+            elements.append(Spacer(1, 0.3*inch))
+            elements.append(copy.copy(self.signature_heading))
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(_signature_flowable(checklist_response, styles))
+
+        elements.append(Spacer(1, 0.3*inch))
+        elements.append(Paragraph(
+            f"Documento generado el {datetime.now().strftime('%d/%m/%Y %H:%M')} - Sistema CMMS",
+            styles['footer']
+        ))
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=letter,
+            rightMargin=0.5*inch,
+            leftMargin=0.5*inch,
+            topMargin=0.75*inch,
+            bottomMargin=0.75*inch
+        )
+        doc.build(elements)
+        return buffer.getvalue()
+
+    def _header_table(self, checklist_response):
+        completed_by = checklist_response.completed_by
+        header_data = [
+            ['Código:', self.code, 'Fecha:', checklist_response.created_at.strftime('%d/%m/%Y %H:%M')],
+            ['Activo:', checklist_response.asset.name, 'Patente:', checklist_response.asset.license_plate or 'N/A'],
+            ['Operador:', completed_by.get_full_name() if completed_by else 'N/A',
+             'Estado:', checklist_response.get_status_display()],
+            ['Puntuación:', f"{checklist_response.score}%" if checklist_response.score else 'N/A',
+             'Mínimo Requerido:', self.passing_score],
+        ]
+        table = Table(header_data, colWidths=HEADER_COL_WIDTHS)
+        table.setStyle(HEADER_TABLE_STYLE)
+        return table
+
+
+def _signature_bytes(checklist_response):
+    """Signature image: the processed file, or the base64 string not yet moved."""
+    if checklist_response.signature_file:
+        with checklist_response.signature_file.open('rb') as signature:
+            return signature.read()
+    # signature_data is a base64 image string (data:image/png;base64,...)
+    signature_data = checklist_response.signature_data
+    base64_data = signature_data.split(',')[1] if ',' in signature_data else signature_data
+    return base64.b64decode(base64_data)
+
+
+def _signature_flowable(checklist_response, styles):
+    """Signature image table, or a text line for placeholder/invalid signatures."""
+    signer = checklist_response.completed_by.get_full_name() if checklist_response.completed_by else 'N/A'
+    fallback = Paragraph(f"<b>Firmado digitalmente por:</b><br/>{signer}", styles['normal'])
+
+    try:
+        from PIL import Image as PILImage
+
+        image_data = _signature_bytes(checklist_response)
+
+        img_width, img_height = PILImage.open(BytesIO(image_data)).size
+
+        # Placeholder signatures (10x10 or smaller) are shown as text
+        if img_width <= 10 or img_height <= 10:
+            return fallback
+
+        aspect = img_width / img_height
+        display_height = 1*inch
+        display_width = display_height * aspect
+        if display_width > 3*inch:
+            display_width = 3*inch
+            display_height = display_width / aspect
+
+        signature_img = Image(BytesIO(image_data), width=display_width, height=display_height)
+        table = Table(
+            [['Firma del Operador:'], [signature_img], [signer]],
+            colWidths=[4*inch]
+        )
+        table.setStyle(SIGNATURE_TABLE_STYLE)
+        return table
+    except Exception:
+        return fallback
+
+
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_template(template):
+    """Compiled layout for the current version of a template (cached in-process)."""
+    with _compiled_lock:
+        compiled = _compiled.get(template.pk)
+        if compiled is not None and compiled.version == template.updated_at:
+            _compiled.move_to_end(template.pk)
+            return compiled
+
+    compiled = CompiledChecklistTemplate(template, list(template.items.order_by('order', 'pk')))
+
+    with _compiled_lock:
+        _compiled[template.pk] = compiled
+        _compiled.move_to_end(template.pk)
+        while len(_compiled) > MAX_COMPILED_TEMPLATES:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_templates():
+    """Drop every compiled layout (tests and benchmarks)."""
+    with _compiled_lock:
+        _compiled.clear()
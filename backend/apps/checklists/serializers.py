@@ -1,6 +1,8 @@
 """
 Serializers for checklists app.
 """
+from collections import Counter
+from django.conf import settings
 from rest_framework import serializers
 from apps.checklists.models import (
     ChecklistTemplate,
@@ -86,6 +88,7 @@ class ChecklistItemResponseSerializer(serializers.ModelSerializer):
     template_item = ChecklistTemplateItemSerializer(read_only=True)
     template_item_id = serializers.IntegerField(write_only=True)
     photo_url = serializers.SerializerMethodField()
+    photo_thumbnail_url = serializers.SerializerMethodField()
     
     class Meta:
         model = ChecklistItemResponse
@@ -97,18 +100,26 @@ class ChecklistItemResponseSerializer(serializers.ModelSerializer):
             'observations',
             'photo',
             'photo_url',
+            'photo_thumbnail_url',
             'answered_at',
         ]
         read_only_fields = ['id', 'answered_at']
     
-    def get_photo_url(self, obj):
-        """Get the full URL for the photo."""
-        if obj.photo:
+    def _build_url(self, field_file):
+        if field_file:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.photo.url)
+                return request.build_absolute_uri(field_file.url)
         return None
     
+    def get_photo_url(self, obj):
+        """Get the full URL for the photo (medium variant once processed)."""
+        return self._build_url(obj.photo_medium or obj.photo)
+    
+    def get_photo_thumbnail_url(self, obj):
+        """Get the full URL for the photo thumbnail (falls back to the photo)."""
+        return self._build_url(obj.photo_thumbnail or obj.photo_medium or obj.photo)
+    
     def validate(self, data):
         """Validate response based on template item type."""
         template_item_id = data.get('template_item_id')
@@ -135,6 +146,8 @@ class ChecklistItemResponseSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     'template_item_id': 'Item de plantilla no encontrado.'
                 })
+            
+            data['template_item'] = template_item
         
         return data
 
@@ -150,6 +163,7 @@ class ChecklistResponseSerializer(serializers.ModelSerializer):
     completed_by_name = serializers.SerializerMethodField()
     completion_percentage = serializers.SerializerMethodField()
     pdf_url = serializers.SerializerMethodField()
+    signature_url = serializers.SerializerMethodField()
     
     def get_completed_by_name(self, obj):
         """Get the name of the user who completed the checklist."""
@@ -176,8 +190,11 @@ class ChecklistResponseSerializer(serializers.ModelSerializer):
             'score',
             'status',
             'signature_data',
+            'signature_url',
             'pdf_file',
             'pdf_url',
+            'pdf_status',
+            'pdf_generated_at',
             'item_responses',
             'completion_percentage',
             'created_at',
@@ -190,6 +207,8 @@ class ChecklistResponseSerializer(serializers.ModelSerializer):
             'score',
             'status',
             'pdf_file',
+            'pdf_status',
+            'pdf_generated_at',
             'created_at',
             'updated_at',
         ]
@@ -198,6 +217,14 @@ class ChecklistResponseSerializer(serializers.ModelSerializer):
         """Get completion percentage."""
         return obj.completion_percentage()
     
+    def get_signature_url(self, obj):
+        """Get the full URL for the signature image once moved to a file."""
+        if obj.signature_file:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.signature_file.url)
+        return None
+    
     def get_pdf_url(self, obj):
         """Get the full URL for the PDF."""
         if obj.pdf_file:
@@ -292,9 +319,17 @@ class ChecklistCompletionSerializer(serializers.Serializer):
                               f'pero el activo es {asset.get_vehicle_type_display()}.'
             })
         
-        # Validate all required items are present
-        required_items = template.items.filter(required=True).values_list('id', flat=True)
-        provided_item_ids = [item.get('template_item_id') for item in item_responses]
+        # Load the template items once and validate the payload in memory
+        template_items = {item.id: item for item in template.items.all()}
+        required_items = [item_id for item_id, item in template_items.items() if item.required]
+        for item_response in item_responses:
+            try:
+                item_response['template_item_id'] = int(item_response.get('template_item_id'))
+            except (TypeError, ValueError):
+                raise serializers.ValidationError({
+                    'item_responses': f'Item de plantilla {item_response.get("template_item_id")} no encontrado.'
+                })
+        provided_item_ids = [item['template_item_id'] for item in item_responses]
         
         missing_items = set(required_items) - set(provided_item_ids)
         if missing_items:
@@ -302,35 +337,85 @@ class ChecklistCompletionSerializer(serializers.Serializer):
                 'item_responses': f'Faltan respuestas para items requeridos: {list(missing_items)}'
             })
         
+        duplicated = [item_id for item_id, count in Counter(provided_item_ids).items() if count > 1]
+        if duplicated:
+            raise serializers.ValidationError({
+                'item_responses': f'Items con más de una respuesta: {sorted(duplicated)}'
+            })
+        
         # Validate each item response
         for item_response in item_responses:
             template_item_id = item_response.get('template_item_id')
             response_value = item_response.get('response_value', '')
             
-            try:
-                template_item = ChecklistTemplateItem.objects.get(
-                    id=template_item_id,
-                    template=template
-                )
-                
-                # Validate response type
-                if template_item.response_type == ChecklistTemplateItem.RESPONSE_YES_NO_NA:
-                    if response_value and response_value not in ['yes', 'no', 'na']:
-                        raise serializers.ValidationError({
-                            'item_responses': f'Item {template_item_id}: Debe ser "yes", "no" o "na".'
-                        })
-                
-                # Validate required fields
-                if template_item.required and not response_value:
+            template_item = template_items.get(template_item_id)
+            if template_item is None:
+                raise serializers.ValidationError({
+                    'item_responses': f'Item de plantilla {template_item_id} no encontrado.'
+                })
+            
+            # Validate response type
+            if template_item.response_type == ChecklistTemplateItem.RESPONSE_YES_NO_NA:
+                if response_value and response_value not in ['yes', 'no', 'na']:
                     raise serializers.ValidationError({
-                        'item_responses': f'Item {template_item_id}: Este campo es requerido.'
+                        'item_responses': f'Item {template_item_id}: Debe ser "yes", "no" o "na".'
                     })
-                
-            except ChecklistTemplateItem.DoesNotExist:
+            
+            # Validate required fields
+            if template_item.required and not response_value:
                 raise serializers.ValidationError({
-                    'item_responses': f'Item de plantilla {template_item_id} no encontrado.'
+                    'item_responses': f'Item {template_item_id}: Este campo es requerido.'
                 })
         
+        data['template_items'] = template_items
         data['template'] = template
         data['asset'] = asset
         return data
+
+
+class ChecklistSyncItemSerializer(serializers.Serializer):
+    """One offline answer; key is generated by the client for idempotency."""
+    key = serializers.CharField(max_length=64)
+    template_item_id = serializers.IntegerField()
+    response_value = serializers.CharField(max_length=50, required=False, allow_blank=True, default='')
+    observations = serializers.CharField(required=False, allow_blank=True, default='')
+    photo = serializers.CharField(required=False, allow_blank=True, help_text='Imagen en base64 o data URI')
+
+
+class ChecklistSyncChecklistSerializer(serializers.Serializer):
+    """
+    One checklist of an offline batch.
+    
+    Existing checklists are referenced by id; checklists created offline
+    carry a key plus template_id and asset_id.
+    """
+    id = serializers.IntegerField(required=False)
+    key = serializers.CharField(max_length=64, required=False)
+    template_id = serializers.IntegerField(required=False)
+    asset_id = serializers.CharField(required=False)
+    work_order_id = serializers.IntegerField(required=False, allow_null=True)
+    signature_data = serializers.CharField(required=False, allow_blank=True)
+    item_responses = ChecklistSyncItemSerializer(many=True, required=False, default=list)
+    
+    def validate(self, data):
+        if not data.get('id'):
+            missing = [field for field in ('key', 'template_id', 'asset_id') if not data.get(field)]
+            if missing:
+                raise serializers.ValidationError(
+                    f'Se requiere id, o bien {", ".join(missing)} para crear el checklist.'
+                )
+        return data
+
+
+class ChecklistSyncSerializer(serializers.Serializer):
+    """Batch of offline checklist operations."""
+    checklists = ChecklistSyncChecklistSerializer(many=True)
+    
+    def validate_checklists(self, value):
+        max_items = getattr(settings, 'CHECKLIST_SYNC_MAX_ITEMS', 2000)
+        total = sum(len(checklist.get('item_responses', [])) for checklist in value)
+        if total > max_items:
+            raise serializers.ValidationError(
+                f'El lote tiene {total} respuestas; el máximo es {max_items}.'
+            )
+        return value
@@ -0,0 +1,19 @@
+"""
+Signals for checklist templates.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.checklists.models import ChecklistTemplate, ChecklistTemplateItem
+
+
+@receiver(post_save, sender=ChecklistTemplateItem)
+@receiver(post_delete, sender=ChecklistTemplateItem)
+def touch_checklist_template(sender, instance, **kwargs):
+    """
+    Bump the template's updated_at when one of its items changes.
+
+    updated_at versions the compiled PDF layouts cached by every worker
+    (apps.checklists.pdf_rendering), so they are rebuilt on the next render.
+    """
+    ChecklistTemplate.objects.filter(pk=instance.template_id).update(updated_at=timezone.now())
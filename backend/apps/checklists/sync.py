@@ -0,0 +1,291 @@
+"""
+Offline batch sync of mobile checklists.
+
+Field operators keep filling checklists without coverage; when they
+reconnect the app sends every pending operation in a single request:
+checklist creations, item answers (with photos) and signatures, each with
+a client-generated idempotency key.
+
+Every checklist in the batch is applied in its own transaction: item
+responses are written with one bulk insert/update, counters are recomputed
+once and the checklist is scored once. Keys that were already applied are
+reported as duplicates, so replaying a batch after a dropped connection is
+safe. Photos are decoded while validating but only written to storage once
+the checklist's transaction commits, so a rolled-back checklist leaves no
+orphaned files.
+"""
+import base64
+import binascii
+import logging
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.assets.models import Asset
+from apps.checklists.models import (
+    ChecklistItemResponse,
+    ChecklistResponse,
+    ChecklistSyncOperation,
+    ChecklistTemplate,
+    ChecklistTemplateItem,
+)
+from apps.checklists.services import request_checklist_media, request_checklist_pdf
+
+logger = logging.getLogger(__name__)
+
+RESULT_APPLIED = 'applied'
+RESULT_CREATED = 'created'
+RESULT_DUPLICATE = 'duplicate'
+RESULT_ERROR = 'error'
+
+ITEM_UPDATE_FIELDS = [
+    'response_value', 'observations', 'photo', 'photo_medium', 'photo_thumbnail', 'answered_at',
+]
+
+
+class SyncError(Exception):
+    """A checklist of the batch cannot be applied."""
+
+
+def decode_photo(data, name):
+    """Build a ContentFile from a base64 image (optionally a data URI)."""
+    extension = 'jpg'
+    if data.startswith('data:'):
+        header, _, data = data.partition(',')
+        mime = header[5:].split(';')[0]
+        if mime.startswith('image/'):
+            extension = mime[6:].replace('jpeg', 'jpg') or extension
+    try:
+        content = base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('Foto inválida: no es base64.')
+    return ContentFile(content, name=f'{name}.{extension}')
+
+
+def store_photos(photos):
+    """
+    Write synced photos to storage and attach them to their item responses.
+
+    Runs once the checklist's transaction has committed.
+
+    Args:
+        photos: (ChecklistItemResponse, ContentFile) pairs
+    """
+    for item_response, photo in photos:
+        try:
+            item_response.photo.save(photo.name, photo, save=False)
+            ChecklistItemResponse.objects.filter(pk=item_response.pk).update(
+                photo=item_response.photo.name,
+                photo_medium=None,
+                photo_thumbnail=None
+            )
+        except Exception as e:
+            logger.error(f"Could not store synced photo for item response {item_response.pk}: {e}")
+
+
+def validate_answer(template_item, response_value):
+    """Same rules as ChecklistItemResponseSerializer. Returns an error message or None."""
+    if template_item.response_type == ChecklistTemplateItem.RESPONSE_YES_NO_NA:
+        if response_value and response_value not in ['yes', 'no', 'na']:
+            return 'Debe ser "yes", "no" o "na".'
+    if template_item.required and not response_value:
+        return 'Este campo es requerido.'
+    return None
+
+
+def sync_checklists(user, checklists, queryset):
+    """
+    Apply a batch of offline checklist operations.
+
+    Args:
+        user: User sending the batch
+        checklists: Validated ChecklistSyncSerializer 'checklists' entries
+        queryset: ChecklistResponse queryset the user may modify
+
+    Returns:
+        list: One result dict per checklist, with per-item results
+    """
+    results = []
+    for data in checklists:
+        try:
+            with transaction.atomic():
+                result = _sync_checklist(user, data, queryset)
+        except SyncError as e:
+            result = _error_result(data, str(e))
+        except IntegrityError as e:
+            # A concurrent sync applied the same keys; the client retries
+            logger.warning(f"Conflicting checklist sync for user {user.id}: {e}")
+            result = _error_result(data, 'Operación en conflicto con otra sincronización; reintente.')
+        results.append(result)
+    return results
+
+
+def _error_result(data, error):
+    return {
+        'key': data.get('key'),
+        'id': data.get('id'),
+        'status': RESULT_ERROR,
+        'error': error,
+        'items': [],
+    }
+
+
+def _resolve_checklist(user, data, queryset):
+    """Return (checklist_response, status) for an entry of the batch."""
+    if data.get('id'):
+        checklist_response = queryset.select_for_update().filter(pk=data['id']).first()
+        if checklist_response is None:
+            raise SyncError('Checklist no encontrado.')
+        return checklist_response, RESULT_APPLIED
+
+    operation = ChecklistSyncOperation.objects.filter(user=user, key=data['key']).first()
+    if operation is not None:
+        checklist_response = queryset.select_for_update().filter(pk=operation.checklist_response_id).first()
+        if checklist_response is None:
+            raise SyncError('Checklist no encontrado.')
+        return checklist_response, RESULT_DUPLICATE
+
+    template = ChecklistTemplate.objects.filter(id=data['template_id'], is_active=True).first()
+    if template is None:
+        raise SyncError('Plantilla no encontrada o inactiva.')
+    asset = Asset.objects.filter(id=data['asset_id']).first()
+    if asset is None:
+        raise SyncError('Activo no encontrado.')
+    if asset.vehicle_type != template.vehicle_type:
+        raise SyncError(
+            f'Esta plantilla es para {template.get_vehicle_type_display()}, '
+            f'pero el activo es {asset.get_vehicle_type_display()}.'
+        )
+
+    checklist_response = ChecklistResponse.objects.create(
+        template=template,
+        asset=asset,
+        work_order_id=data.get('work_order_id'),
+        completed_by=user,
+        status=ChecklistResponse.STATUS_IN_PROGRESS
+    )
+    ChecklistSyncOperation.objects.create(
+        user=user,
+        key=data['key'],
+        kind=ChecklistSyncOperation.KIND_CHECKLIST,
+        checklist_response=checklist_response
+    )
+    return checklist_response, RESULT_CREATED
+
+
+def _sync_checklist(user, data, queryset):
+    checklist_response, checklist_result = _resolve_checklist(user, data, queryset)
+    items_data = data.get('item_responses', [])
+    signature_data = data.get('signature_data')
+
+    keys = [item['key'] for item in items_data]
+    applied_keys = set(
+        ChecklistSyncOperation.objects.filter(user=user, key__in=keys).values_list('key', flat=True)
+    )
+    template_items = {item.id: item for item in checklist_response.template.items.all()}
+    existing = {
+        response.template_item_id: response
+        for response in checklist_response.item_responses.select_for_update()
+    }
+    in_progress = checklist_response.status == ChecklistResponse.STATUS_IN_PROGRESS
+
+    item_results = []
+    to_create = {}
+    to_update = {}
+    photos = {}
+    new_keys = []
+    has_media = False
+    now = timezone.now()
+
+    for item_data in items_data:
+        key = item_data['key']
+        if key in applied_keys:
+            item_results.append({'key': key, 'status': RESULT_DUPLICATE})
+            continue
+        if not in_progress:
+            item_results.append({
+                'key': key,
+                'status': RESULT_ERROR,
+                'error': 'No se pueden modificar checklists completados.'
+            })
+            continue
+
+        template_item = template_items.get(item_data['template_item_id'])
+        response_value = item_data.get('response_value', '')
+        error = 'Item de plantilla no encontrado.' if template_item is None else \
+            validate_answer(template_item, response_value)
+        photo = None
+        if error is None and item_data.get('photo'):
+            try:
+                photo = decode_photo(item_data['photo'], key)
+            except ValueError as e:
+                error = str(e)
+        if error:
+            item_results.append({'key': key, 'status': RESULT_ERROR, 'error': error})
+            continue
+
+        # Later answers for the same item in the batch win
+        item_response = existing.get(template_item.id) or to_create.get(template_item.id)
+        if item_response is None:
+            item_response = ChecklistItemResponse(
+                checklist_response=checklist_response,
+                template_item=template_item
+            )
+            to_create[template_item.id] = item_response
+        elif item_response.pk:
+            to_update[template_item.id] = item_response
+        item_response.response_value = response_value
+        item_response.observations = item_data.get('observations', '')
+        item_response.answered_at = now
+        if photo is not None:
+            photos[template_item.id] = (item_response, photo)
+            has_media = True
+
+        applied_keys.add(key)
+        new_keys.append(key)
+        item_results.append({'key': key, 'status': RESULT_APPLIED})
+
+    if to_create:
+        ChecklistItemResponse.objects.bulk_create(to_create.values())
+    if to_update:
+        ChecklistItemResponse.objects.bulk_update(to_update.values(), ITEM_UPDATE_FIELDS)
+    ChecklistSyncOperation.objects.bulk_create([
+        ChecklistSyncOperation(
+            user=user,
+            key=key,
+            kind=ChecklistSyncOperation.KIND_ITEM,
+            checklist_response=checklist_response
+        )
+        for key in new_keys
+    ])
+    if photos:
+        # Registered before the media/PDF callbacks, which run after it
+        transaction.on_commit(lambda: store_photos(photos.values()))
+
+    # Score once for the whole batch
+    update_fields = []
+    if signature_data and in_progress:
+        checklist_response.signature_data = signature_data
+        update_fields.append('signature_data')
+        has_media = True
+    if new_keys or update_fields:
+        checklist_response.refresh_counters()
+        checklist_response.update_score_and_status(
+            update_fields=['total_items', 'required_items'] + ChecklistResponse.RESPONSE_COUNTER_FIELDS + update_fields
+        )
+        if checklist_response.status != ChecklistResponse.STATUS_IN_PROGRESS and in_progress:
+            request_checklist_pdf(checklist_response, force=True)
+    if has_media:
+        request_checklist_media(checklist_response)
+
+    return {
+        'key': data.get('key'),
+        'id': checklist_response.id,
+        'status': checklist_result,
+        'checklist_status': checklist_response.status,
+        'score': checklist_response.score,
+        'completion_percentage': checklist_response.completion_percentage(),
+        'pdf_status': checklist_response.pdf_status,
+        'items': item_results,
+    }
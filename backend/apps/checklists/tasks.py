@@ -0,0 +1,156 @@
+"""
+Tareas de Celery para checklists
+"""
+from celery import shared_task
+from django.utils import timezone
+from .models import ChecklistResponse
+from .exports import cached_bundle_path, purge_export_cache, release_build_lock, write_bundle
+from .media import process_checklist_media as process_media
+from .services import requeue_stale_pdfs, store_checklist_pdf
+import logging
+
+logger = logging.getLogger(__name__)
+
+PDF_MAX_RETRIES = 3
+PDF_RETRY_BACKOFF = 30  # segundos, se duplica en cada reintento
+
+
+@shared_task(
+    bind=True,
+    name='apps.checklists.tasks.render_checklist_pdf',
+    max_retries=PDF_MAX_RETRIES,
+    acks_late=True,
+    soft_time_limit=120,
+    time_limit=180
+)
+def render_checklist_pdf(self, response_id, force=False):
+    """
+    Genera el PDF de un checklist fuera del ciclo request/response
+    
+    Se enruta a la cola settings.CHECKLIST_PDF_QUEUE, atendida por un worker
+    con concurrencia acotada (CHECKLIST_PDF_WORKERS).
+    """
+    try:
+        checklist_response = store_checklist_pdf(response_id, force=force)
+    except ChecklistResponse.DoesNotExist:
+        logger.warning(f"Checklist {response_id} no existe, PDF omitido")
+        return {'status': 'skipped', 'response_id': response_id}
+    except Exception as e:
+        logger.error(f"Error generando PDF del checklist {response_id}: {str(e)}")
+        raise self.retry(exc=e, countdown=PDF_RETRY_BACKOFF * 2 ** self.request.retries)
+    
+    return {
+        'status': 'success',
+        'response_id': response_id,
+        'pdf_file': checklist_response.pdf_file.name,
+        'timestamp': timezone.now().isoformat()
+    }
+
+
+@shared_task(name='apps.checklists.tasks.requeue_stale_checklist_pdfs')
+def requeue_stale_checklist_pdfs():
+    """
+    Vuelve a encolar los PDFs en cola o generándose por más de
+    CHECKLIST_PDF_LEASE_SECONDS (tarea o mensaje perdido)
+    """
+    try:
+        requeued = requeue_stale_pdfs()
+        return {
+            'status': 'success',
+            'requeued': requeued,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error reencolando PDFs de checklists: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+
+@shared_task(
+    bind=True,
+    name='apps.checklists.tasks.process_checklist_media',
+    max_retries=PDF_MAX_RETRIES,
+    acks_late=True,
+    soft_time_limit=120,
+    time_limit=180
+)
+def process_checklist_media(self, response_id):
+    """
+    Genera variantes de las fotos de un checklist y mueve la firma a un archivo
+    
+    Se enruta a la misma cola que los PDFs (settings.CHECKLIST_MEDIA_QUEUE).
+    """
+    try:
+        result = process_media(response_id)
+    except ChecklistResponse.DoesNotExist:
+        logger.warning(f"Checklist {response_id} no existe, imágenes omitidas")
+        return {'status': 'skipped', 'response_id': response_id}
+    except Exception as e:
+        logger.error(f"Error procesando imágenes del checklist {response_id}: {str(e)}")
+        raise self.retry(exc=e, countdown=PDF_RETRY_BACKOFF * 2 ** self.request.retries)
+    
+    return {
+        'status': 'success',
+        'response_id': response_id,
+        **result,
+        'timestamp': timezone.now().isoformat()
+    }
+
+
+@shared_task(
+    name='apps.checklists.tasks.build_checklist_export',
+    acks_late=True,
+    soft_time_limit=600,
+    time_limit=660
+)
+def build_checklist_export(response_ids, key):
+    """
+    Escribe el ZIP de exportación de checklists en la caché de bundles
+    
+    Los PDFs ya están generados; la vista de exportación sirve el archivo
+    cuando existe. Se enruta a settings.CHECKLIST_PDF_QUEUE.
+    """
+    try:
+        responses = list(
+            ChecklistResponse.objects.filter(pk__in=response_ids)
+            .select_related('asset', 'template').order_by('created_at', 'pk')
+        )
+        path = write_bundle(responses, cached_bundle_path(key))
+        logger.info(f"Bundle de checklists {key} generado con {len(responses)} PDFs")
+        return {
+            'status': 'success',
+            'key': key,
+            'path': str(path),
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error generando bundle de checklists {key}: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+    finally:
+        release_build_lock(key)
+
+
+@shared_task(name='apps.checklists.tasks.purge_checklist_exports')
+def purge_checklist_exports():
+    """
+    Elimina bundles ZIP de exportación de checklists expirados
+    """
+    try:
+        removed = purge_export_cache()
+        logger.info(f"Bundles de exportación eliminados: {removed}")
+        return {
+            'status': 'success',
+            'removed': removed,
+            'timestamp': timezone.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Error eliminando bundles de exportación: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
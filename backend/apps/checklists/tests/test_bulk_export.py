@@ -0,0 +1,171 @@
+"""
+Tests for the bulk checklist PDF ZIP export.
+"""
+import io
+import zipfile
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.checklists import exports
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+
+
+@pytest.fixture(autouse=True)
+def export_settings(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.CHECKLIST_EXPORT_ROOT = tmp_path / 'exports'
+    settings.CHECKLIST_PDF_ASYNC = False
+    settings.CHECKLIST_EXPORT_ASYNC = False
+    return settings
+
+
+@pytest.fixture
+def template(db):
+    template = ChecklistTemplate.objects.create(
+        code='EXP-TEST',
+        name='Checklist Export Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+    )
+    ChecklistTemplateItem.objects.create(template=template, section='Motor', order=1, question='Aceite')
+    return template
+
+
+@pytest.fixture
+def responses(db, admin_user, template):
+    """Two finished checklists on different assets and one in progress."""
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    result = []
+    for i, checklist_status in enumerate([
+        ChecklistResponse.STATUS_APPROVED,
+        ChecklistResponse.STATUS_REJECTED,
+        ChecklistResponse.STATUS_IN_PROGRESS,
+    ]):
+        asset = Asset.objects.create(
+            name=f'Export Asset {i}',
+            vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+            model='Test Model',
+            serial_number=f'EXP-{i:03d}',
+            location=location,
+            installation_date=timezone.now().date(),
+            created_by=admin_user
+        )
+        result.append(ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user, status=checklist_status
+        ))
+    return result
+
+
+def read_zip(response):
+    return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+
+def export(client, capture, params=None):
+    """GET the export, running the PDF renders queued on commit."""
+    with capture(execute=True):
+        return client.get('/api/v1/checklists/responses/export/', params or {})
+
+
+@pytest.mark.django_db
+class TestBulkExport:
+    """Test ZIP export of checklist PDFs."""
+
+    def test_exports_finished_checklists(self, api_client, admin_user, responses,
+                                         django_capture_on_commit_callbacks):
+        api_client.force_authenticate(user=admin_user)
+
+        pending = export(api_client, django_capture_on_commit_callbacks)
+        response = export(api_client, django_capture_on_commit_callbacks)
+
+        assert pending.status_code == status.HTTP_202_ACCEPTED
+        assert pending.data['pending_pdfs'] == 2
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/zip'
+        bundle = read_zip(response)
+        names = bundle.namelist()
+        assert len(names) == 2
+        assert all(bundle.read(name).startswith(b'%PDF') for name in names)
+        assert ChecklistResponse.objects.filter(pdf_status=ChecklistResponse.PDF_READY).count() == 2
+
+    def test_filters_by_asset(self, api_client, admin_user, responses, django_capture_on_commit_callbacks):
+        api_client.force_authenticate(user=admin_user)
+        params = {'asset': str(responses[1].asset_id)}
+
+        export(api_client, django_capture_on_commit_callbacks, params)
+        response = export(api_client, django_capture_on_commit_callbacks, params)
+
+        assert read_zip(response).namelist()[0].startswith('Export_Asset_1/')
+
+    def test_second_request_is_served_from_cache(self, api_client, admin_user, responses, monkeypatch,
+                                                 django_capture_on_commit_callbacks):
+        api_client.force_authenticate(user=admin_user)
+        export(api_client, django_capture_on_commit_callbacks)
+        first = read_zip(export(api_client, django_capture_on_commit_callbacks))
+
+        def fail(*args, **kwargs):
+            raise AssertionError('bundle should come from the cache')
+
+        monkeypatch.setattr(exports, 'iter_zip', fail)
+        second = export(api_client, django_capture_on_commit_callbacks)
+
+        assert read_zip(second).namelist() == first.namelist()
+
+    def test_work_is_queued_not_done_in_the_request(self, api_client, admin_user, responses, settings,
+                                                   monkeypatch, django_capture_on_commit_callbacks):
+        from apps.checklists import tasks
+
+        settings.CHECKLIST_PDF_ASYNC = True
+        settings.CHECKLIST_EXPORT_ASYNC = True
+        rendered, built = [], []
+        monkeypatch.setattr(tasks.render_checklist_pdf, 'delay', lambda pk, force=False: rendered.append(pk))
+        monkeypatch.setattr(tasks.build_checklist_export, 'delay', lambda ids, key: built.append((ids, key)))
+        api_client.force_authenticate(user=admin_user)
+
+        first = export(api_client, django_capture_on_commit_callbacks)
+        again = export(api_client, django_capture_on_commit_callbacks)
+
+        assert first.status_code == again.status_code == status.HTTP_202_ACCEPTED
+        assert sorted(rendered) == sorted(r.pk for r in responses[:2])
+        assert built == []
+
+        for pk in rendered:
+            tasks.render_checklist_pdf(pk)
+        queued = export(api_client, django_capture_on_commit_callbacks)
+        export(api_client, django_capture_on_commit_callbacks)
+
+        assert queued.status_code == status.HTTP_202_ACCEPTED
+        assert len(built) == 1
+
+        tasks.build_checklist_export(*built[0])
+        response = export(api_client, django_capture_on_commit_callbacks)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(read_zip(response).namelist()) == 2
+
+    def test_failed_pdfs_are_left_out(self, api_client, admin_user, responses,
+                                      django_capture_on_commit_callbacks):
+        ChecklistResponse.objects.filter(pk=responses[0].pk).update(
+            pdf_status=ChecklistResponse.PDF_FAILED, pdf_error='boom'
+        )
+        api_client.force_authenticate(user=admin_user)
+
+        export(api_client, django_capture_on_commit_callbacks)
+        response = export(api_client, django_capture_on_commit_callbacks)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Missing-Pdfs'] == str(responses[0].pk)
+        assert len(read_zip(response).namelist()) == 1
+
+    def test_invalid_date(self, api_client, admin_user, responses):
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get('/api/v1/checklists/responses/export/', {'start_date': 'ayer'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_empty_selection(self, api_client, admin_user, template):
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get('/api/v1/checklists/responses/export/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,116 @@
+"""
+Tests for completing a checklist in a single request.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+from apps.checklists.tasks import render_checklist_pdf
+
+
+@pytest.fixture(autouse=True)
+def no_pdf_queue(monkeypatch):
+    monkeypatch.setattr(render_checklist_pdf, 'delay', lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def asset(db, admin_user):
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    return Asset.objects.create(
+        name='Completion Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='CMP-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+
+
+def make_template(code, items):
+    """Template whose last item is optional."""
+    template = ChecklistTemplate.objects.create(
+        code=code,
+        name=f'Checklist {code}',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        passing_score=50
+    )
+    ChecklistTemplateItem.objects.bulk_create([
+        ChecklistTemplateItem(
+            template=template,
+            section=f'Sección {order // 10}',
+            order=order,
+            question=f'Pregunta {order}',
+            required=order < items
+        )
+        for order in range(1, items + 1)
+    ])
+    return template
+
+
+def payload(template, asset, values):
+    items = list(template.items.order_by('order'))
+    return {
+        'template_id': template.id,
+        'asset_id': str(asset.id),
+        'item_responses': [
+            {'template_item_id': item.id, 'response_value': value}
+            for item, value in zip(items, values)
+        ],
+    }
+
+
+@pytest.mark.django_db
+class TestChecklistCompletion:
+    """Test bulk creation and in-memory scoring on complete."""
+
+    url = '/api/v1/checklists/responses/complete/'
+
+    def test_score_and_counters(self, api_client, admin_user, asset):
+        template = make_template('CMP-4', 4)
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.post(self.url, payload(template, asset, ['yes', 'no', 'na', '']), format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert float(response.data['score']) == 50.0
+        assert response.data['status'] == ChecklistResponse.STATUS_APPROVED
+        assert response.data['completion_percentage'] == 75.0
+        assert len(response.data['item_responses']) == 4
+
+        checklist = ChecklistResponse.objects.get(pk=response.data['id'])
+        assert (checklist.total_items, checklist.required_items) == (4, 3)
+        assert (checklist.response_count, checklist.answered_count) == (4, 3)
+        assert (checklist.passed_count, checklist.required_answered_count) == (2, 3)
+
+        # The counters agree with a recount from the database
+        expected = [getattr(checklist, field) for field in ('response_count', 'answered_count', 'passed_count')]
+        checklist.refresh_counters()
+        assert [checklist.response_count, checklist.answered_count, checklist.passed_count] == expected
+
+    def test_query_count_does_not_grow_with_items(self, api_client, admin_user, asset):
+        api_client.force_authenticate(user=admin_user)
+        counts = []
+        for code, size in (('CMP-5', 5), ('CMP-60', 60)):
+            template = make_template(code, size)
+            data = payload(template, asset, ['yes'] * size)
+            with CaptureQueriesContext(connection) as queries:
+                response = api_client.post(self.url, data, format='json')
+            assert response.status_code == status.HTTP_201_CREATED
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+
+    def test_duplicate_items_are_rejected(self, api_client, admin_user, asset):
+        template = make_template('CMP-DUP', 2)
+        data = payload(template, asset, ['yes', 'yes'])
+        data['item_responses'].append(dict(data['item_responses'][0]))
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.post(self.url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not ChecklistResponse.objects.exists()
@@ -0,0 +1,122 @@
+"""
+Tests for incremental checklist counters.
+"""
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+
+
+@pytest.fixture
+def template(db):
+    """Template with two required items and one optional item."""
+    template = ChecklistTemplate.objects.create(
+        code='CNT-TEST',
+        name='Checklist Counter Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        passing_score=50
+    )
+    for order in (1, 2, 3):
+        ChecklistTemplateItem.objects.create(
+            template=template, section='Motor', order=order,
+            question=f'Pregunta {order}', required=order < 3
+        )
+    return template
+
+
+@pytest.fixture
+def checklist(db, admin_user, template):
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    asset = Asset.objects.create(
+        name='Counter Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='CNT-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+    return ChecklistResponse.objects.create(template=template, asset=asset, completed_by=admin_user)
+
+
+def answer(api_client, checklist, order, value):
+    item = checklist.template.items.get(order=order)
+    return api_client.post(
+        f'/api/v1/checklists/responses/{checklist.id}/add_item_response/',
+        {'template_item_id': item.id, 'response_value': value},
+        format='json'
+    )
+
+
+@pytest.mark.django_db
+class TestChecklistCounters:
+    """Test that single answers update the counters incrementally."""
+
+    def test_new_response_snapshots_template(self, checklist):
+        assert (checklist.total_items, checklist.required_items) == (3, 2)
+
+    def test_answers_update_counters(self, api_client, admin_user, checklist):
+        api_client.force_authenticate(user=admin_user)
+
+        assert answer(api_client, checklist, 3, 'no').status_code == status.HTTP_200_OK
+        assert answer(api_client, checklist, 1, 'no').status_code == status.HTTP_200_OK
+        answer(api_client, checklist, 1, 'yes')
+
+        checklist.refresh_from_db()
+        assert checklist.response_count == 2
+        assert checklist.answered_count == 2
+        assert checklist.passed_count == 1
+        assert checklist.required_answered_count == 1
+        assert float(checklist.score) == 50.0
+        assert checklist.status == ChecklistResponse.STATUS_IN_PROGRESS
+
+        answer(api_client, checklist, 2, 'na')
+
+        checklist.refresh_from_db()
+        assert checklist.required_answered_count == 2
+        assert checklist.status == ChecklistResponse.STATUS_APPROVED
+        assert checklist.completion_percentage() == 100.0
+
+    def test_answer_does_not_recount_items(self, api_client, admin_user, checklist):
+        api_client.force_authenticate(user=admin_user)
+        answer(api_client, checklist, 1, 'yes')
+
+        with CaptureQueriesContext(connection) as queries:
+            answer(api_client, checklist, 3, 'no')
+
+        assert not [query for query in queries if 'COUNT(' in query['sql'].upper()]
+
+    def test_item_from_other_template_is_rejected(self, api_client, admin_user, checklist):
+        other = ChecklistTemplate.objects.create(
+            code='CNT-OTHER', name='Other', vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+        )
+        item = ChecklistTemplateItem.objects.create(template=other, section='X', order=1, question='Q')
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.post(
+            f'/api/v1/checklists/responses/{checklist.id}/add_item_response/',
+            {'template_item_id': item.id, 'response_value': 'yes'},
+            format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reconcile_command_fixes_drift(self, checklist):
+        item = checklist.template.items.get(order=1)
+        checklist.item_responses.create(template_item=item, response_value='yes')
+
+        out = StringIO()
+        call_command('reconcile_checklist_counters', stdout=out)
+        assert 'Checklist #' in out.getvalue()
+        checklist.refresh_from_db()
+        assert checklist.response_count == 0
+
+        call_command('reconcile_checklist_counters', '--fix', stdout=StringIO())
+        checklist.refresh_from_db()
+        assert (checklist.response_count, checklist.passed_count) == (1, 1)
+        assert float(checklist.score) == 100.0
@@ -0,0 +1,121 @@
+"""
+Tests for the checklist photo and signature pipeline.
+"""
+import base64
+from io import BytesIO, StringIO
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from PIL import Image
+from reportlab.platypus import Table
+from apps.assets.models import Asset, Location
+from apps.checklists import media, pdf_rendering
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+from apps.checklists.services import generate_checklist_pdf
+
+
+@pytest.fixture(autouse=True)
+def media_settings(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.CHECKLIST_MEDIA_ASYNC = False
+    return settings
+
+
+def jpeg_with_exif(size=(3000, 2000)):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90°
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+def signature_png():
+    image = Image.new('RGBA', (400, 200), (0, 0, 0, 0))
+    for x in range(100, 300):
+        image.putpixel((x, 100), (0, 0, 0, 255))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+@pytest.fixture
+def checklist(db, admin_user):
+    template = ChecklistTemplate.objects.create(
+        code='MEDIA-TEST',
+        name='Checklist Media Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+    )
+    item = ChecklistTemplateItem.objects.create(template=template, section='Motor', order=1, question='Aceite')
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    asset = Asset.objects.create(
+        name='Media Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='MEDIA-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+    checklist = ChecklistResponse.objects.create(
+        template=template, asset=asset, completed_by=admin_user, signature_data=signature_png()
+    )
+    checklist.item_responses.create(
+        template_item=item,
+        response_value='yes',
+        photo=SimpleUploadedFile('foto.jpg', jpeg_with_exif(), content_type='image/jpeg')
+    )
+    return checklist
+
+
+@pytest.mark.django_db
+class TestChecklistMedia:
+    """Test photo variants, EXIF stripping and signature files."""
+
+    def test_photo_variants_without_exif(self, checklist):
+        result = media.process_checklist_media(checklist.id)
+
+        assert result == {'photos': 1, 'signature': True}
+        item_response = checklist.item_responses.get()
+        with Image.open(item_response.photo.open('rb')) as photo:
+            assert not photo.getexif()
+            assert photo.size == (1707, 2560)  # Rotated upright and capped
+        with Image.open(item_response.photo_thumbnail.open('rb')) as thumbnail:
+            assert max(thumbnail.size) == media.THUMBNAIL_SIZE
+        with Image.open(item_response.photo_medium.open('rb')) as medium:
+            assert max(medium.size) == media.MEDIUM_SIZE
+
+    def test_signature_moved_to_compact_file(self, checklist):
+        media.process_checklist_media(checklist.id)
+
+        checklist.refresh_from_db()
+        assert checklist.signature_data == ''
+        assert checklist.has_signature
+        with Image.open(checklist.signature_file.open('rb')) as signature:
+            assert signature.mode == 'LA'
+            assert signature.size == (200 + 2 * media.SIGNATURE_PADDING, 1 + 2 * media.SIGNATURE_PADDING)
+        assert isinstance(pdf_rendering._signature_flowable(checklist, pdf_rendering.get_styles()), Table)
+        assert generate_checklist_pdf(checklist).read(4) == b'%PDF'
+
+    def test_already_processed_photos_are_skipped(self, checklist):
+        media.process_checklist_media(checklist.id)
+
+        assert media.process_checklist_media(checklist.id) == {'photos': 0, 'signature': False}
+
+    def test_serializer_serves_variants(self, api_client, admin_user, checklist):
+        media.process_checklist_media(checklist.id)
+        api_client.force_authenticate(user=admin_user)
+
+        data = api_client.get(f'/api/v1/checklists/responses/{checklist.id}/').data
+
+        item = data['item_responses'][0]
+        assert '/medium/' in item['photo_url']
+        assert '/thumbnails/' in item['photo_thumbnail_url']
+        assert data['signature_url'].endswith('.png')
+
+    def test_backfill_command(self, checklist):
+        call_command('process_checklist_media', '--inline', stdout=StringIO())
+
+        assert checklist.item_responses.get().photo_thumbnail
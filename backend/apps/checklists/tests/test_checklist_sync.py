@@ -0,0 +1,166 @@
+"""
+Tests for the offline checklist sync endpoint.
+"""
+import base64
+from pathlib import Path
+
+import pytest
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.checklists.models import (
+    ChecklistResponse,
+    ChecklistSyncOperation,
+    ChecklistTemplate,
+    ChecklistTemplateItem,
+)
+from apps.checklists.tasks import render_checklist_pdf
+
+URL = '/api/v1/checklists/responses/sync/'
+PNG = 'data:image/png;base64,' + base64.b64encode(b'\x89PNG\r\n\x1a\nfake').decode()
+
+
+@pytest.fixture(autouse=True)
+def sync_settings(tmp_path, settings, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    monkeypatch.setattr(render_checklist_pdf, 'delay', lambda *args, **kwargs: None)
+
+
+@pytest.fixture
+def template(db):
+    template = ChecklistTemplate.objects.create(
+        code='SYNC-TEST',
+        name='Checklist Sync Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        passing_score=50
+    )
+    for order in (1, 2):
+        ChecklistTemplateItem.objects.create(
+            template=template, section='Motor', order=order, question=f'Pregunta {order}'
+        )
+    return template
+
+
+@pytest.fixture
+def asset(db, admin_user):
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    return Asset.objects.create(
+        name='Sync Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='SYNC-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+
+
+def batch(template, asset, answers, key='device-1'):
+    items = list(template.items.order_by('order'))
+    return {'checklists': [{
+        'key': key,
+        'template_id': template.id,
+        'asset_id': str(asset.id),
+        'item_responses': [
+            {'key': answer_key, 'template_item_id': items[index].id, 'response_value': value}
+            for answer_key, index, value in answers
+        ],
+    }]}
+
+
+@pytest.mark.django_db
+class TestChecklistSync:
+    """Test batch sync with idempotency keys."""
+
+    def test_creates_checklist_and_scores_once(self, api_client, operador_user, template, asset):
+        api_client.force_authenticate(user=operador_user)
+        data = batch(template, asset, [('a1', 0, 'no'), ('a2', 1, 'yes'), ('a3', 0, 'yes')])
+        data['checklists'][0]['signature_data'] = 'data:image/png;base64,AAAA'
+
+        response = api_client.post(URL, data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        result = response.data['checklists'][0]
+        assert result['status'] == 'created'
+        assert [item['status'] for item in result['items']] == ['applied'] * 3
+        assert result['checklist_status'] == ChecklistResponse.STATUS_APPROVED
+
+        checklist = ChecklistResponse.objects.get(pk=result['id'])
+        assert checklist.completed_by == operador_user
+        assert checklist.item_responses.count() == 2
+        assert (checklist.response_count, checklist.passed_count) == (2, 2)
+        assert checklist.signature_data.startswith('data:image/png')
+
+    def test_replayed_batch_is_idempotent(self, api_client, operador_user, template, asset):
+        api_client.force_authenticate(user=operador_user)
+        data = batch(template, asset, [('a1', 0, 'yes')])
+        first = api_client.post(URL, data, format='json').data['checklists'][0]
+
+        data['checklists'][0]['item_responses'].append(
+            {'key': 'a2', 'template_item_id': template.items.get(order=2).id, 'response_value': 'no'}
+        )
+        second = api_client.post(URL, data, format='json').data['checklists'][0]
+
+        assert second['status'] == 'duplicate'
+        assert second['id'] == first['id']
+        assert [item['status'] for item in second['items']] == ['duplicate', 'applied']
+        assert ChecklistResponse.objects.count() == 1
+        assert ChecklistSyncOperation.objects.filter(user=operador_user).count() == 3
+
+    def test_invalid_answers_are_reported_per_item(self, api_client, operador_user, template, asset,
+                                                   django_capture_on_commit_callbacks):
+        api_client.force_authenticate(user=operador_user)
+        data = batch(template, asset, [('a1', 0, 'maybe'), ('a2', 1, 'yes')])
+        data['checklists'][0]['item_responses'][1]['photo'] = PNG
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = api_client.post(URL, data, format='json').data['checklists'][0]
+
+        assert result['items'][0]['status'] == 'error'
+        assert result['items'][1]['status'] == 'applied'
+        assert result['checklist_status'] == ChecklistResponse.STATUS_IN_PROGRESS
+        checklist = ChecklistResponse.objects.get(pk=result['id'])
+        assert checklist.item_responses.get().photo.name.endswith('.png')
+
+    def test_rolled_back_checklist_leaves_no_photo_files(self, api_client, operador_user, template, asset,
+                                                         settings, monkeypatch, django_capture_on_commit_callbacks):
+        api_client.force_authenticate(user=operador_user)
+        data = batch(template, asset, [('a1', 0, 'yes')])
+        data['checklists'][0]['item_responses'][0]['photo'] = PNG
+
+        def conflict(*args, **kwargs):
+            raise IntegrityError('duplicate key')
+
+        monkeypatch.setattr(ChecklistSyncOperation.objects, 'bulk_create', conflict)
+        with django_capture_on_commit_callbacks(execute=True):
+            result = api_client.post(URL, data, format='json').data['checklists'][0]
+
+        assert result['status'] == 'error'
+        media = Path(settings.MEDIA_ROOT)
+        assert not media.exists() or not [path for path in media.rglob('*') if path.is_file()]
+
+    def test_failed_checklist_does_not_block_others(self, api_client, operador_user, template, asset):
+        api_client.force_authenticate(user=operador_user)
+        data = batch(template, asset, [('a1', 0, 'yes')])
+        data['checklists'].insert(0, {'key': 'bad', 'template_id': 999999, 'asset_id': str(asset.id)})
+
+        results = api_client.post(URL, data, format='json').data['checklists']
+
+        assert [result['status'] for result in results] == ['error', 'created']
+        assert not ChecklistSyncOperation.objects.filter(key='bad').exists()
+
+    def test_cannot_sync_other_operator_checklist(self, api_client, operador_user, admin_user, template, asset):
+        checklist = ChecklistResponse.objects.create(template=template, asset=asset, completed_by=admin_user)
+        api_client.force_authenticate(user=operador_user)
+
+        response = api_client.post(URL, {'checklists': [{'id': checklist.id}]}, format='json')
+
+        assert response.data['checklists'][0]['status'] == 'error'
+
+    def test_entry_without_id_or_key_is_rejected(self, api_client, operador_user):
+        api_client.force_authenticate(user=operador_user)
+
+        response = api_client.post(URL, {'checklists': [{'template_id': 1}]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
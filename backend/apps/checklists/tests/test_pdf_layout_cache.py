@@ -0,0 +1,85 @@
+"""
+Tests for the compiled checklist PDF layout cache.
+"""
+import pytest
+from django.utils import timezone
+from apps.assets.models import Asset, Location
+from apps.checklists import pdf_rendering
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+from apps.checklists.services import generate_checklist_pdf
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    pdf_rendering.clear_compiled_templates()
+    yield
+    pdf_rendering.clear_compiled_templates()
+
+
+@pytest.fixture
+def template(db):
+    """Template with two sections."""
+    template = ChecklistTemplate.objects.create(
+        code='LAYOUT-TEST',
+        name='Checklist Layout Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+    )
+    for order, section in enumerate(['Motor', 'Motor', 'Frenos'], start=1):
+        ChecklistTemplateItem.objects.create(
+            template=template, section=section, order=order, question=f'Pregunta {order}'
+        )
+    return ChecklistTemplate.objects.get(pk=template.pk)
+
+
+@pytest.fixture
+def checklist(db, admin_user, template):
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    asset = Asset.objects.create(
+        name='Layout Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='LAYOUT-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+    checklist = ChecklistResponse.objects.create(template=template, asset=asset, completed_by=admin_user)
+    for item in template.items.all():
+        checklist.item_responses.create(template_item=item, response_value='yes')
+    return checklist
+
+
+@pytest.mark.django_db
+class TestPdfLayoutCache:
+    """Test that the template layout is compiled once per template version."""
+
+    def test_sections_group_consecutive_items(self, template):
+        compiled = pdf_rendering.get_compiled_template(template)
+
+        assert [section for section, _ in compiled.sections] == ['Motor', 'Frenos']
+        assert [len(items) for _, items in compiled.sections] == [2, 1]
+
+    def test_compiled_template_is_reused(self, template):
+        first = pdf_rendering.get_compiled_template(template)
+
+        assert pdf_rendering.get_compiled_template(template) is first
+
+    def test_item_change_invalidates_layout(self, template):
+        first = pdf_rendering.get_compiled_template(template)
+
+        ChecklistTemplateItem.objects.create(
+            template=template, section='Luces', order=4, question='Pregunta 4'
+        )
+        template.refresh_from_db()
+        compiled = pdf_rendering.get_compiled_template(template)
+
+        assert compiled is not first
+        assert compiled.sections[-1][0] == 'Luces'
+
+    def test_renders_pdf_with_cached_layout(self, checklist, django_assert_max_num_queries):
+        generate_checklist_pdf(checklist)
+
+        with django_assert_max_num_queries(1):
+            pdf_file = generate_checklist_pdf(checklist)
+
+        assert pdf_file.read(4) == b'%PDF'
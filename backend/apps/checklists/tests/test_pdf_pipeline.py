@@ -0,0 +1,213 @@
+"""
+Tests for asynchronous checklist PDF rendering.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.checklists import services
+from apps.checklists.models import ChecklistResponse, ChecklistTemplate, ChecklistTemplateItem
+from apps.checklists.tasks import render_checklist_pdf, requeue_stale_checklist_pdfs
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def template(db):
+    """Template with two items in one section."""
+    template = ChecklistTemplate.objects.create(
+        code='PDF-TEST',
+        name='Checklist PDF Test',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA
+    )
+    for order in (1, 2):
+        ChecklistTemplateItem.objects.create(
+            template=template,
+            section='Motor',
+            order=order,
+            question=f'Pregunta {order}'
+        )
+    return template
+
+
+@pytest.fixture
+def asset(db, admin_user):
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    return Asset.objects.create(
+        name='PDF Asset',
+        vehicle_type=ChecklistTemplate.VEHICLE_TYPE_CAMIONETA,
+        model='Test Model',
+        serial_number='PDF-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Capture tasks sent to the broker."""
+    calls = []
+    monkeypatch.setattr(
+        render_checklist_pdf, 'delay', lambda *args, **kwargs: calls.append((args, kwargs))
+    )
+    return calls
+
+
+def completion_payload(template, asset):
+    return {
+        'template_id': template.id,
+        'asset_id': str(asset.id),
+        'item_responses': [
+            {'template_item_id': item.id, 'response_value': 'yes'}
+            for item in template.items.all()
+        ],
+    }
+
+
+@pytest.mark.django_db
+class TestChecklistPdfPipeline:
+    """Test that PDF rendering is queued instead of done in the request."""
+
+    def test_complete_queues_pdf(
+        self, api_client, admin_user, template, asset, queued, django_capture_on_commit_callbacks
+    ):
+        api_client.force_authenticate(user=admin_user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.post(
+                '/api/v1/checklists/responses/complete/',
+                completion_payload(template, asset),
+                format='json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['pdf_status'] == ChecklistResponse.PDF_PENDING
+        assert response.data['pdf_file'] is None
+        assert queued == [((response.data['id'],), {'force': False})]
+
+    def test_task_stores_pdf(self, admin_user, template, asset):
+        checklist = ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user
+        )
+
+        render_checklist_pdf.run(checklist.id)
+
+        checklist.refresh_from_db()
+        assert checklist.pdf_status == ChecklistResponse.PDF_READY
+        assert checklist.pdf_generated_at is not None
+        assert checklist.pdf_file.read(4) == b'%PDF'
+
+    def test_failed_render_is_recorded(self, admin_user, template, asset, monkeypatch):
+        checklist = ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user
+        )
+
+        def broken(checklist_response):
+            raise Exception('boom')
+
+        monkeypatch.setattr(services, 'generate_checklist_pdf', broken)
+
+        with pytest.raises(Exception):
+            services.store_checklist_pdf(checklist.id)
+
+        checklist.refresh_from_db()
+        assert checklist.pdf_status == ChecklistResponse.PDF_FAILED
+        assert checklist.pdf_error == 'boom'
+
+    def test_download_returns_accepted_until_ready(
+        self, api_client, admin_user, template, asset, settings, django_capture_on_commit_callbacks
+    ):
+        settings.CHECKLIST_PDF_ASYNC = False
+        checklist = ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user
+        )
+        api_client.force_authenticate(user=admin_user)
+        url = f'/api/v1/checklists/responses/{checklist.id}/download_pdf/'
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.get(url)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['pdf_status'] == ChecklistResponse.PDF_PENDING
+
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/pdf'
+
+    def test_inline_failure_is_logged(self, admin_user, template, asset, settings, monkeypatch, caplog,
+                                      django_capture_on_commit_callbacks):
+        settings.CHECKLIST_PDF_ASYNC = False
+        checklist = ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user
+        )
+
+        def broken(checklist_response):
+            raise Exception('boom')
+
+        monkeypatch.setattr(services, 'generate_checklist_pdf', broken)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            services.request_checklist_pdf(checklist)
+
+        assert any(record.exc_info for record in caplog.records if record.name == 'apps.checklists.services')
+        checklist.refresh_from_db()
+        assert checklist.pdf_status == ChecklistResponse.PDF_FAILED
+
+
+@pytest.mark.django_db
+class TestStalePdfRequeue:
+    """PDFs stuck in PENDING/PROCESSING are queued again after the lease."""
+
+    def stuck(self, admin_user, template, asset, pdf_status, age):
+        checklist = ChecklistResponse.objects.create(
+            template=template, asset=asset, completed_by=admin_user
+        )
+        requested_at = timezone.now() - timedelta(seconds=age) if age is not None else None
+        ChecklistResponse.objects.filter(pk=checklist.pk).update(
+            pdf_status=pdf_status, pdf_requested_at=requested_at
+        )
+        checklist.refresh_from_db()
+        return checklist
+
+    def test_recent_request_is_not_queued_twice(
+        self, admin_user, template, asset, queued, django_capture_on_commit_callbacks
+    ):
+        checklist = self.stuck(admin_user, template, asset, ChecklistResponse.PDF_PROCESSING, age=10)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert services.request_checklist_pdf(checklist) == ChecklistResponse.PDF_PROCESSING
+
+        assert queued == []
+
+    def test_expired_request_is_queued_again(
+        self, admin_user, template, asset, queued, settings, django_capture_on_commit_callbacks
+    ):
+        settings.CHECKLIST_PDF_LEASE_SECONDS = 60
+        checklist = self.stuck(admin_user, template, asset, ChecklistResponse.PDF_PENDING, age=120)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            assert services.request_checklist_pdf(checklist) == ChecklistResponse.PDF_PENDING
+
+        assert queued == [((checklist.id,), {'force': False})]
+        checklist.refresh_from_db()
+        assert checklist.pdf_requested_at > timezone.now() - timedelta(seconds=60)
+
+    def test_sweep_requeues_only_expired_rows(
+        self, admin_user, template, asset, queued, settings, django_capture_on_commit_callbacks
+    ):
+        settings.CHECKLIST_PDF_LEASE_SECONDS = 60
+        expired = self.stuck(admin_user, template, asset, ChecklistResponse.PDF_PROCESSING, age=120)
+        legacy = self.stuck(admin_user, template, asset, ChecklistResponse.PDF_PENDING, age=None)
+        self.stuck(admin_user, template, asset, ChecklistResponse.PDF_PENDING, age=10)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            result = requeue_stale_checklist_pdfs()
+
+        assert result['requeued'] == 2
+        assert sorted(args[0] for args, _ in queued) == sorted([expired.id, legacy.id])
@@ -7,7 +7,10 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.http import FileResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
 
 from apps.checklists.models import (
@@ -22,9 +25,13 @@ from apps.checklists.serializers import (
     ChecklistResponseSerializer,
     ChecklistResponseDetailSerializer,
     ChecklistItemResponseSerializer,
-    ChecklistCompletionSerializer
+    ChecklistCompletionSerializer,
+    ChecklistSyncSerializer
 )
 from apps.checklists.models import ChecklistTemplateItem
+from apps.checklists.exports import DEFAULT_MAX_RESPONSES, filter_responses, iter_file, request_bundle
+from apps.checklists.services import request_checklist_media, request_checklist_pdf
+from apps.checklists.sync import sync_checklists
 from apps.authentication.permissions import IsAdmin, IsSupervisorOrAdmin, IsOperadorOrAbove
 
 
@@ -114,55 +121,74 @@ class ChecklistResponseViewSet(viewsets.ModelViewSet):
         
         validated_data = serializer.validated_data
         template = validated_data['template']
-        asset = validated_data['asset']
-        work_order_id = validated_data.get('work_order_id')
-        signature_data = validated_data.get('signature_data', '')
+        template_items = validated_data['template_items']
         item_responses_data = validated_data['item_responses']
         
-        # Create ChecklistResponse
-        checklist_response = ChecklistResponse.objects.create(
+        checklist_response = ChecklistResponse(
             template=template,
-            asset=asset,
-            work_order_id=work_order_id,
+            asset=validated_data['asset'],
+            work_order_id=validated_data.get('work_order_id'),
             completed_by=request.user,
-            signature_data=signature_data,
+            signature_data=validated_data.get('signature_data', ''),
             status=ChecklistResponse.STATUS_IN_PROGRESS
         )
         
-        # Create ChecklistItemResponses
-        for item_data in item_responses_data:
-            ChecklistItemResponse.objects.create(
-                checklist_response=checklist_response,
-                template_item_id=item_data['template_item_id'],
-                response_value=item_data.get('response_value', ''),
-                observations=item_data.get('observations', ''),
-                photo=item_data.get('photo')
-            )
-        
-        # Update score and status
-        checklist_response.update_score_and_status()
+        # Score, status and counters come from the payload, so the response
+        # is inserted once and the items in a single bulk insert
+        checklist_response.set_counters(
+            template_items.values(),
+            [
+                (item_data.get('response_value', ''), template_items[item_data['template_item_id']].required)
+                for item_data in item_responses_data
+            ]
+        )
+        checklist_response.update_score_and_status(save=False)
         
-        # Generate PDF automatically when completing checklist
-        from apps.checklists.services import generate_checklist_pdf
-        try:
-            pdf_file = generate_checklist_pdf(checklist_response)
-            checklist_response.pdf_file = pdf_file
+        with transaction.atomic():
             checklist_response.save()
-        except Exception as e:
-            # Log the error but don't fail the completion
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error generating PDF for checklist {checklist_response.id}: {str(e)}")
-            # Add error info to response but don't fail
-            pass
+            ChecklistItemResponse.objects.bulk_create([
+                ChecklistItemResponse(
+                    checklist_response=checklist_response,
+                    template_item=template_items[item_data['template_item_id']],
+                    response_value=item_data.get('response_value', ''),
+                    observations=item_data.get('observations', ''),
+                    photo=item_data.get('photo')
+                )
+                for item_data in item_responses_data
+            ])
+            
+            # Queue PDF generation (rendered by a Celery worker, see pdf_status)
+            request_checklist_pdf(checklist_response)
+            if checklist_response.signature_data or any(item.get('photo') for item in item_responses_data):
+                request_checklist_media(checklist_response)
         
         # Return the created checklist response
+        prefetch_related_objects([checklist_response], 'item_responses__template_item')
         response_serializer = ChecklistResponseDetailSerializer(
             checklist_response,
             context={'request': request}
         )
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=False, methods=['post'])
+    def sync(self, request):
+        """
+        Apply a batch of offline checklist operations in one request.
+        
+        Each checklist is applied in its own transaction; operations whose
+        idempotency key was already applied are reported as duplicates.
+        Returns one result per checklist with per-item results.
+        """
+        serializer = ChecklistSyncSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        results = sync_checklists(
+            request.user,
+            serializer.validated_data['checklists'],
+            self.get_queryset().select_related(None).prefetch_related(None)
+        )
+        return Response({'checklists': results}, status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['post'])
     def add_item_response(self, request, pk=None):
         """Add or update a single item response."""
@@ -181,28 +207,50 @@ class ChecklistResponseViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         
-        # Check if response already exists
-        template_item_id = serializer.validated_data['template_item_id']
-        existing_response = checklist_response.item_responses.filter(
-            template_item_id=template_item_id
-        ).first()
+        validated_data = serializer.validated_data
+        template_item = validated_data.pop('template_item')
+        validated_data.pop('template_item_id')
+        if template_item.template_id != checklist_response.template_id:
+            return Response(
+                {'template_item_id': 'El item no pertenece a la plantilla de este checklist.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        if existing_response:
-            # Update existing response
-            for key, value in serializer.validated_data.items():
-                if key != 'template_item_id':
+        with transaction.atomic():
+            # Check if response already exists
+            existing_response = checklist_response.item_responses.select_for_update().filter(
+                template_item=template_item
+            ).first()
+            
+            if existing_response:
+                # Update existing response
+                previous_value = existing_response.response_value
+                for key, value in validated_data.items():
                     setattr(existing_response, key, value)
-            existing_response.save()
-            item_response = existing_response
-        else:
-            # Create new response
-            item_response = ChecklistItemResponse.objects.create(
-                checklist_response=checklist_response,
-                **serializer.validated_data
+                if 'photo' in validated_data:
+                    # Variants belong to the previous photo
+                    existing_response.photo_medium = None
+                    existing_response.photo_thumbnail = None
+                existing_response.save()
+                item_response = existing_response
+            else:
+                # Create new response
+                previous_value = None
+                item_response = ChecklistItemResponse.objects.create(
+                    checklist_response=checklist_response,
+                    template_item=template_item,
+                    **validated_data
+                )
+            
+            # Update counters incrementally, then score and status from them
+            checklist_response.record_item_response(
+                template_item.required,
+                item_response.response_value,
+                previous_value=previous_value
             )
-        
-        # Update score and status
-        checklist_response.update_score_and_status()
+            checklist_response.update_score_and_status()
+            if 'photo' in validated_data and item_response.photo:
+                request_checklist_media(checklist_response)
         
         response_serializer = ChecklistItemResponseSerializer(
             item_response,
@@ -230,13 +278,12 @@ class ChecklistResponseViewSet(viewsets.ModelViewSet):
             checklist_response.signature_data = signature_data
         
         # Update score and status
-        checklist_response.update_score_and_status()
+        checklist_response.update_score_and_status(update_fields=['signature_data'])
+        if signature_data:
+            request_checklist_media(checklist_response)
         
-        # Generate PDF
-        from apps.checklists.services import generate_checklist_pdf
-        pdf_file = generate_checklist_pdf(checklist_response)
-        checklist_response.pdf_file = pdf_file
-        checklist_response.save()
+        # Queue PDF generation
+        request_checklist_pdf(checklist_response, force=True)
         
         serializer = ChecklistResponseDetailSerializer(
             checklist_response,
@@ -246,21 +293,24 @@ class ChecklistResponseViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def download_pdf(self, request, pk=None):
-        """Download the PDF for a completed checklist."""
+        """
+        Download the PDF for a completed checklist.
+        
+        Returns 202 with the pdf_status while the PDF is still being
+        generated (queuing it if it was never requested or failed).
+        """
         checklist_response = self.get_object()
         
         if not checklist_response.pdf_file:
-            # Try to generate PDF if it doesn't exist
-            try:
-                from apps.checklists.services import generate_checklist_pdf
-                pdf_file = generate_checklist_pdf(checklist_response)
-                checklist_response.pdf_file = pdf_file
-                checklist_response.save()
-            except Exception as e:
-                return Response(
-                    {'error': f'Error generando PDF: {str(e)}'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+            pdf_status = request_checklist_pdf(checklist_response)
+            return Response(
+                {
+                    'id': checklist_response.id,
+                    'pdf_status': pdf_status,
+                    'message': 'El PDF se está generando. Intenta nuevamente en unos segundos.'
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
         
         try:
             return FileResponse(
@@ -276,26 +326,68 @@ class ChecklistResponseViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def regenerate_pdf(self, request, pk=None):
-        """Regenerate PDF for a checklist."""
+        """Queue regeneration of the PDF for a checklist."""
         checklist_response = self.get_object()
+        request_checklist_pdf(checklist_response, force=True)
+        
+        serializer = ChecklistResponseDetailSerializer(
+            checklist_response,
+            context={'request': request}
+        )
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Download the PDFs of many checklists as one ZIP.
         
+        Query params: asset, template, location, start_date, end_date
+        (YYYY-MM-DD). Missing PDFs and the ZIP itself are generated by the
+        Celery workers: while they are pending the endpoint answers 202 and
+        the client polls the same URL until the bundle is served.
+        """
         try:
-            from apps.checklists.services import generate_checklist_pdf
-            pdf_file = generate_checklist_pdf(checklist_response)
-            checklist_response.pdf_file = pdf_file
-            checklist_response.save()
-            
-            serializer = ChecklistResponseDetailSerializer(
-                checklist_response,
-                context={'request': request}
+            queryset = filter_responses(self.get_queryset(), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        total = queryset.count()
+        if total == 0:
+            return Response(
+                {'error': 'No hay checklists finalizados para los filtros indicados.'},
+                status=status.HTTP_404_NOT_FOUND
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
-            
-        except Exception as e:
+        
+        max_responses = getattr(settings, 'CHECKLIST_EXPORT_MAX_RESPONSES', DEFAULT_MAX_RESPONSES)
+        if total > max_responses:
             return Response(
-                {'error': f'Error regenerando PDF: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': f'La exportación está limitada a {max_responses} checklists ({total} seleccionados).'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        bundle = request_bundle(queryset)
+        if bundle['path'] is None:
+            response = Response(
+                {
+                    'bundle_key': bundle['key'],
+                    'total': total,
+                    'pending_pdfs': len(bundle['pending']),
+                    'failed_pdfs': bundle['failed'],
+                    'poll_url': request.build_absolute_uri(),
+                    'message': 'La exportación se está generando. Intenta nuevamente en unos segundos.'
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+            response['Retry-After'] = '5'
+            return response
+        
+        response = StreamingHttpResponse(iter_file(bundle['path']), content_type='application/zip')
+        filename = f'checklists_{timezone.now().strftime("%Y%m%d_%H%M%S")}.zip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Bundle-Key'] = bundle['key']
+        if bundle['failed']:
+            response['X-Missing-Pdfs'] = ','.join(str(response_id) for response_id in bundle['failed'])
+        return response
     
     @action(detail=False, methods=['get'])
     def my_checklists(self, request):
@@ -10,6 +10,7 @@ from django.utils import timezone
 from datetime import timedelta
 
 from apps.assets.models import Asset
+from apps.work_orders.access import filter_by_accessible_assets
 from apps.work_orders.models import WorkOrder
 from apps.ml_predictions.models import FailurePrediction
 
@@ -273,12 +274,11 @@ def dashboard_stats(request):
         # Operators only see their assigned work orders and related assets
         work_orders_qs = WorkOrder.objects.filter(assigned_to=user)
         
-        # Get assets from assigned work orders
-        assigned_asset_ids = work_orders_qs.values_list('asset_id', flat=True).distinct()
-        assets_qs = Asset.objects.filter(id__in=assigned_asset_ids)
+        # Assets from assigned work orders (materialized in UserAssetAccess)
+        assets_qs = filter_by_accessible_assets(Asset.objects.all(), user, lookup='pk')
         
         # Get predictions for accessible assets
-        predictions_qs = FailurePrediction.objects.filter(asset_id__in=assigned_asset_ids)
+        predictions_qs = filter_by_accessible_assets(FailurePrediction.objects.all(), user)
     else:
         # Unknown role - return empty data
         assets_qs = Asset.objects.none()
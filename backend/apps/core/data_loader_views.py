@@ -1,6 +1,7 @@
 """
 Views para cargar datos de producción sin necesidad de shell.
 """
+from django.conf import settings
 from django.core.management import call_command
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
@@ -92,9 +93,13 @@ def setup_telegram_bot(request):
         # Configurar webhook en Telegram
         import requests
         
+        webhook_params = {'url': webhook_url}
+        if settings.TELEGRAM_WEBHOOK_SECRET:
+            webhook_params['secret_token'] = settings.TELEGRAM_WEBHOOK_SECRET
+        
         response = requests.post(
             f'https://api.telegram.org/bot{telegram_token}/setWebhook',
-            json={'url': webhook_url}
+            json=webhook_params
         )
         
         telegram_response = response.json()
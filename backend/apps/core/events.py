@@ -0,0 +1,219 @@
+"""
+Real-time event bus feeding the server-sent events stream.
+
+Model signals publish small JSON events (asset status changes, new
+notifications, work-order transitions) addressed to users and/or roles.
+Each open SSE connection holds a Subscription that receives the events
+meant for its user.
+
+Two backends are available, selected with settings.REALTIME_EVENT_BUS:
+
+- InProcessEventBus (default): fan-out inside one process. Enough for a
+  single ASGI worker or for tests.
+- RedisEventBus: publishes through Redis pub/sub so events raised in any
+  web or Celery process reach subscribers connected to any ASGI worker.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 100
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+
+class Subscription:
+    """
+    Events pending for one connected client.
+
+    Events are pushed from any thread and consumed from the asyncio loop
+    that created the subscription.
+    """
+
+    def __init__(self, bus, user_id, role, max_size=DEFAULT_QUEUE_SIZE):
+        self.bus = bus
+        self.user_id = str(user_id)
+        self.role = role
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.closed = False
+
+    def matches(self, event):
+        """Check whether an event is addressed to this subscriber."""
+        users = event.get('users') or []
+        roles = event.get('roles') or []
+        return self.user_id in users or self.role in roles
+
+    def push(self, event):
+        """Thread-safe enqueue; drops the event if the client is too slow."""
+        if self.closed:
+            return
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Realtime queue full for user {self.user_id}, event dropped")
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.closed = True
+        self.bus.unsubscribe(self)
+
+
+class InProcessEventBus:
+    """Event bus delivering to subscribers of the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, user_id, role):
+        subscription = Subscription(self, user_id, role)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        self.dispatch(event)
+
+    def dispatch(self, event):
+        """Deliver an event to the matching local subscribers."""
+        with self._lock:
+            targets = [s for s in self._subscriptions if s.matches(event)]
+        for subscription in targets:
+            subscription.push(event)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+
+class RedisEventBus(InProcessEventBus):
+    """
+    Event bus shared across processes through Redis pub/sub.
+
+    publish() sends to Redis; a listener thread started with the first
+    subscription relays messages to the local subscribers. If Redis drops
+    the connection the listener reconnects with exponential backoff (and
+    subscribe() starts a new one should the thread have died anyway).
+    """
+
+    channel = 'cmms:realtime'
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis
+
+        self.url = url or getattr(settings, 'REALTIME_REDIS_URL', settings.CELERY_BROKER_URL)
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def subscribe(self, user_id, role):
+        subscription = super().subscribe(user_id, role)
+        self._ensure_listener()
+        return subscription
+
+    def publish(self, event):
+        try:
+            self._client.publish(self.channel, json.dumps(event, cls=DjangoJSONEncoder))
+        except Exception as e:
+            logger.error(f"Error publishing realtime event: {e}")
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._listen,
+                name='realtime-redis-listener',
+                daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self):
+        delay = RECONNECT_MIN_SECONDS
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                delay = RECONNECT_MIN_SECONDS
+                for message in pubsub.listen():
+                    try:
+                        self.dispatch(json.loads(message['data']))
+                    except Exception as e:
+                        logger.error(f"Invalid realtime event from Redis: {e}")
+            except Exception as e:
+                logger.error(f"Realtime Redis listener disconnected, retrying in {delay}s: {e}")
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Return the process-wide event bus configured in settings."""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                backend = getattr(
+                    settings, 'REALTIME_EVENT_BUS', 'apps.core.events.InProcessEventBus'
+                )
+                _bus = import_string(backend)()
+    return _bus
+
+
+def publish_event(event_type, data, users=None, roles=None):
+    """
+    Publish an event once the current transaction commits.
+
+    Args:
+        event_type: Event name sent as the SSE `event:` field
+        data: JSON-serializable payload
+        users: Ids of users that should receive the event
+        roles: Role names whose members should receive the event
+    """
+    if not getattr(settings, 'REALTIME_EVENTS_ENABLED', True):
+        return
+
+    event = {
+        'id': uuid.uuid4().hex,
+        'type': event_type,
+        'data': data,
+        'users': [str(user_id) for user_id in users or [] if user_id],
+        'roles': list(roles or []),
+        'timestamp': timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: get_event_bus().publish(event))
+
+
+def format_sse(event):
+    """Serialize an event in text/event-stream format."""
+    payload = json.dumps(event['data'], cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from apps.core.retention import apply_policy, get_policies
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete expired rows from history and log tables (settings.DATA_RETENTION)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables',
+            nargs='*',
+            help='Model labels or table names to process (default: all configured)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only count expired rows')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows per DELETE')
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=None,
+            help='Seconds to pause between chunks'
+        )
+
+    def handle(self, *args, **options):
+        policies = get_policies(options['tables'] or None)
+
+        if not policies:
+            self.stdout.write(self.style.WARNING("⚠️  No hay políticas de retención configuradas"))
+            return
+
+        self.stdout.write("🗄️  Aplicando políticas de retención...")
+        self.stdout.write("=" * 60)
+
+        total = 0
+        for policy in policies:
+            self.stdout.write(f"📋 {policy.table}: conservar {policy.days} días")
+
+            stats = apply_policy(
+                policy,
+                chunk_size=options['chunk_size'],
+                sleep=options['sleep'],
+                dry_run=options['dry_run'],
+                progress=self._progress
+            )
+
+            if options['dry_run']:
+                self.stdout.write(f"   {stats['expired']} registros expirados (dry run)")
+                continue
+
+            total += stats['deleted']
+            self.stdout.write(self.style.SUCCESS(
+                f"   ✅ {stats['deleted']} registros eliminados en {stats['chunks']} lotes"
+            ))
+            if stats['archive_file']:
+                self.stdout.write(f"   📦 Archivo: {stats['archive_file']}")
+            if stats.get('dropped_partitions'):
+                self.stdout.write(f"   🧹 Particiones eliminadas: {', '.join(stats['dropped_partitions'])}")
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(self.style.SUCCESS(f"🎉 Total eliminados: {total}"))
+
+    def _progress(self, stats):
+        if stats['chunks'] % 10 == 0:
+            self.stdout.write(f"   ... {stats['deleted']} registros procesados")
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.core import partitioning
+from apps.core.retention import get_policies
+
+
+class Command(BaseCommand):
+    help = 'Create monthly partitions (PostgreSQL) for tables with partition=True in DATA_RETENTION'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convert configured tables that are not partitioned yet (locks the table)'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=partitioning.DEFAULT_MONTHS_AHEAD,
+            help='Future monthly partitions to keep ready'
+        )
+
+    def handle(self, *args, **options):
+        if not partitioning.is_supported():
+            raise CommandError('El particionado de tablas requiere PostgreSQL')
+
+        for policy in get_policies():
+            if not policy.partition:
+                continue
+
+            table = policy.table
+            if not partitioning.is_partitioned(table):
+                if not options['convert']:
+                    self.stdout.write(self.style.WARNING(
+                        f"⚠️  {table} no está particionada (use --convert)"
+                    ))
+                    continue
+                try:
+                    created = partitioning.convert_to_partitioned(
+                        policy.model,
+                        policy.date_field,
+                        months_ahead=options['months_ahead']
+                    )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"❌ {table}: {str(e)}"))
+                    continue
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {table} convertida en {created} particiones mensuales"
+                ))
+                continue
+
+            names = partitioning.ensure_partitions(table, months_ahead=options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f"✅ {table}: {', '.join(names)}"))
@@ -280,7 +280,7 @@ class AssetAccessMixin:
         Returns:
             Filtered queryset based on asset access
         """
-        from apps.work_orders.models import WorkOrder
+        from apps.work_orders.access import filter_by_accessible_assets
         
         model = queryset.model
         
@@ -297,11 +297,6 @@ class AssetAccessMixin:
         
         elif user.role.name == Role.OPERADOR:
             # Operators only see assets from their assigned work orders
-            accessible_assets = WorkOrder.objects.filter(
-                assigned_to=user
-            ).values_list('asset_id', flat=True).distinct()
-            
-            filter_kwargs = {f'{self.asset_field}__id__in': accessible_assets}
-            return queryset.filter(**filter_kwargs)
+            return filter_by_accessible_assets(queryset, user, lookup=self.asset_field)
         
         return queryset
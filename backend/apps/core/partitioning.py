@@ -0,0 +1,292 @@
+"""
+Monthly range partitioning for append-only tables (PostgreSQL only).
+
+A converted table keeps its name, columns, indexes and foreign keys, and
+becomes the parent of one partition per month (`<table>_pYYYYMM`) plus a
+DEFAULT partition for out-of-range rows. Retention can then drop whole
+expired partitions instead of scanning the table, and recent partitions
+stay small enough for fast index scans.
+
+Django keeps treating `id` as the primary key; on the database side the
+primary key becomes (id, <date column>) because PostgreSQL requires the
+partition key in every unique constraint. For the same reason tables with
+other unique constraints or unique indexes are refused: they could only be
+kept by adding the date column, which would silently weaken them.
+"""
+import logging
+import re
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONTHS_AHEAD = 3
+
+PARTITION_SUFFIX = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def is_supported():
+    """Partitioning is only available on PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def is_partitioned(table):
+    """Check whether a table is already a partitioned parent."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+            """,
+            [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def unique_indexes(table, cursor):
+    """Names of the unique constraints and unique indexes other than the primary key."""
+    cursor.execute(
+        """
+        SELECT i.relname
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass AND x.indisunique AND NOT x.indisprimary
+        ORDER BY i.relname
+        """,
+        [table]
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def month_start(value):
+    """First instant of the month containing value."""
+    value = timezone.localtime(value) if timezone.is_aware(value) else value
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    """Shift a month start by a number of months."""
+    month_index = value.month - 1 + months
+    return value.replace(year=value.year + month_index // 12, month=month_index % 12 + 1)
+
+
+def partition_name(table, start):
+    return f'{table}_p{start.year:04d}{start.month:02d}'
+
+
+def list_partitions(table):
+    """
+    Return the monthly partitions of a table.
+
+    Returns:
+        list: (partition_name, month_start) tuples ordered by month; the
+        DEFAULT partition is not included
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+            """,
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_SUFFIX.search(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append((name, timezone.make_aware(start)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_partition(table, start, cursor=None):
+    """Create the partition covering the month that begins at start."""
+    quote = connection.ops.quote_name
+    end = add_months(start, 1)
+    sql = (
+        f'CREATE TABLE IF NOT EXISTS {quote(partition_name(table, start))} '
+        f'PARTITION OF {quote(table)} FOR VALUES FROM (%s) TO (%s)'
+    )
+    if cursor is not None:
+        cursor.execute(sql, [start, end])
+        return
+    with connection.cursor() as own_cursor:
+        own_cursor.execute(sql, [start, end])
+
+
+def ensure_partitions(table, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+    Create partitions for the current month and the next months_ahead.
+
+    Returns:
+        list: Names of the partitions that now exist for that window
+    """
+    current = month_start(timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        try:
+            with transaction.atomic():
+                create_partition(table, start)
+            created.append(partition_name(table, start))
+        except Exception as e:
+            # Usually rows for that month already landed in the DEFAULT partition
+            logger.error(f"Could not create partition {partition_name(table, start)}: {e}")
+    return created
+
+
+def drop_empty_partitions_before(table, cutoff):
+    """
+    Drop monthly partitions that end before cutoff and hold no rows.
+
+    Retention deletes (and archives) expired rows first, so by the time a
+    month is entirely past the cutoff its partition is empty and dropping
+    it returns the space immediately.
+
+    Returns:
+        list: Names of dropped partitions
+    """
+    quote = connection.ops.quote_name
+    dropped = []
+    for name, start in list_partitions(table):
+        if add_months(start, 1) > cutoff:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {quote(name)})')
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f'DROP TABLE {quote(name)}')
+        dropped.append(name)
+        logger.info(f"Dropped expired partition {name}")
+    return dropped
+
+
+def convert_to_partitioned(model, date_field, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+    Convert an existing table into a monthly range-partitioned table.
+
+    Runs in a single transaction: the table is renamed, a partitioned
+    parent with the same columns is created, data is copied into monthly
+    partitions and indexes/foreign keys are recreated on the new parent.
+
+    Args:
+        model: Django model whose table is converted
+        date_field: Name of the DateTimeField used as partition key
+
+    Returns:
+        int: Number of partitions created
+
+    Raises:
+        RuntimeError: Not on PostgreSQL, or the table is referenced by
+            foreign keys or has unique constraints besides the primary key
+    """
+    if not is_supported():
+        raise RuntimeError('Table partitioning requires PostgreSQL')
+
+    table = model._meta.db_table
+    if is_partitioned(table):
+        return 0
+
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(date_field).column
+    pk_column = model._meta.pk.column
+    legacy = f'{table}_legacy'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT conname FROM pg_constraint
+            WHERE confrelid = %s::regclass AND contype = 'f'
+            """,
+            [table]
+        )
+        if cursor.fetchone():
+            raise RuntimeError(f'{table} is referenced by foreign keys and cannot be partitioned')
+
+        unique = unique_indexes(table, cursor)
+        if unique:
+            raise RuntimeError(
+                f'{table} has unique constraints or indexes ({", ".join(unique)}) '
+                f'and cannot be partitioned'
+            )
+
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN ("
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u'))",
+            [table, table]
+        )
+        index_definitions = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+            """,
+            [table]
+        )
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute(f'SELECT min({quote(column)}) FROM {quote(table)}')
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {quote(table)} ('
+            f'LIKE {quote(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS'
+            f') PARTITION BY RANGE ({quote(column)})'
+        )
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ADD PRIMARY KEY ({quote(pk_column)}, {quote(column)})'
+        )
+
+        current = month_start(timezone.now())
+        start = month_start(oldest) if oldest else current
+        last = add_months(current, months_ahead)
+        partitions = 0
+        while start <= last:
+            create_partition(table, start, cursor=cursor)
+            start = add_months(start, 1)
+            partitions += 1
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {quote(table + "_default")} '
+            f'PARTITION OF {quote(table)} DEFAULT'
+        )
+
+        cursor.execute(f'INSERT INTO {quote(table)} SELECT * FROM {quote(legacy)}')
+
+        # Sequences backing serial (non-identity) ids must survive the drop
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, pk_column])
+        sequence = cursor.fetchone()[0]
+        if sequence is None:
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [legacy, pk_column])
+            legacy_sequence = cursor.fetchone()[0]
+            if legacy_sequence:
+                cursor.execute(
+                    f'ALTER SEQUENCE {legacy_sequence} OWNED BY {quote(table)}.{quote(pk_column)}'
+                )
+        else:
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE((SELECT max({quote(pk_column)}) '
+                f'FROM {quote(table)}), 0) + 1, false)',
+                [sequence]
+            )
+
+        cursor.execute(f'DROP TABLE {quote(legacy)}')
+
+        # Definitions were read before the rename, so they target the new parent
+        for definition in index_definitions:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}')
+
+    logger.info(f"Converted {table} to {partitions} monthly partitions")
+    return partitions
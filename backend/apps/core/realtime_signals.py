@@ -0,0 +1,106 @@
+"""
+Signals that publish real-time events for the SSE stream.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.authentication.models import Role
+from apps.core.events import publish_event
+from apps.machine_status.models import AssetStatus
+from apps.notifications.models import Notification
+from apps.work_orders.models import UserAssetAccess, WorkOrder
+
+STAFF_ROLES = [Role.ADMIN, Role.SUPERVISOR]
+
+
+def publish_asset_statuses(statuses):
+    """
+    Publish asset_status events for saved AssetStatus instances.
+    
+    Staff roles receive every event; operators receive events for assets
+    they have open work orders on (resolved with a single query).
+    """
+    if not statuses:
+        return
+    
+    operators_by_asset = {}
+    assignments = UserAssetAccess.objects.filter(
+        asset_id__in={status.asset_id for status in statuses},
+        open_work_order_count__gt=0
+    ).values_list('asset_id', 'user_id')
+    for asset_id, user_id in assignments:
+        operators_by_asset.setdefault(asset_id, []).append(user_id)
+    
+    for status in statuses:
+        publish_event(
+            'asset_status',
+            {
+                'id': status.id,
+                'asset_id': status.asset_id,
+                'status_type': status.status_type,
+                'status_type_display': status.get_status_type_display(),
+                'odometer_reading': status.odometer_reading,
+                'fuel_level': status.fuel_level,
+                'updated_at': status.updated_at,
+            },
+            users=operators_by_asset.get(status.asset_id, []),
+            roles=STAFF_ROLES
+        )
+
+
+@receiver(post_save, sender=AssetStatus)
+def publish_asset_status(sender, instance, created, **kwargs):
+    """Push asset status changes to staff and operators working on the asset."""
+    publish_asset_statuses([instance])
+
+
+def publish_notifications(notifications):
+    """Publish notification events for new Notification instances (e.g. from bulk_create)."""
+    for notification in notifications:
+        publish_event(
+            'notification',
+            {
+                'id': notification.id,
+                'notification_type': notification.notification_type,
+                'title': notification.title,
+                'message': notification.message,
+                'related_object_type': notification.related_object_type,
+                'related_object_id': notification.related_object_id,
+                'created_at': notification.created_at,
+            },
+            users=[notification.user_id]
+        )
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created, **kwargs):
+    """Push new notifications to their recipient."""
+    if not created:
+        return
+
+    publish_notifications([instance])
+
+
+@receiver(post_save, sender=WorkOrder)
+def publish_work_order(sender, instance, created, **kwargs):
+    """Push work order creation and status transitions."""
+    previous_status = getattr(instance, '_previous_status', None)
+    if not created and previous_status == instance.status:
+        return
+
+    publish_event(
+        'work_order',
+        {
+            'id': instance.id,
+            'work_order_number': instance.work_order_number,
+            'title': instance.title,
+            'status': instance.status,
+            'previous_status': previous_status,
+            'priority': instance.priority,
+            'asset_id': instance.asset_id,
+            'assigned_to_id': instance.assigned_to_id,
+            'created': created,
+        },
+        users=[instance.assigned_to_id, instance.created_by_id],
+        roles=STAFF_ROLES
+    )
@@ -0,0 +1,212 @@
+"""
+Data lifecycle: retention, archival and purge of history and log tables.
+
+Policies are configured per model in settings.DATA_RETENTION:
+
+    DATA_RETENTION = {
+        'configuration.AccessLog': {
+            'days': 180,              # keep rows newer than this
+            'date_field': 'timestamp',
+            'archive': True,          # write purged rows to NDJSON.gz first
+            'partition': True,        # monthly range partitions on PostgreSQL
+            'filters': {},            # extra lookups restricting expired rows
+        },
+    }
+
+Expired rows are processed in bounded primary-key chunks so each DELETE is
+short and never holds long locks on hot tables. When archiving is enabled
+every chunk is appended to a compressed NDJSON file under
+settings.DATA_ARCHIVE_ROOT before it is deleted.
+"""
+import gzip
+import json
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_SLEEP = 0.1
+
+
+class RetentionPolicy:
+    """Retention settings for a single model."""
+
+    def __init__(self, label, days, date_field, archive=True, partition=False, filters=None):
+        self.label = label
+        self.days = days
+        self.date_field = date_field
+        self.archive = archive
+        self.partition = partition
+        self.filters = filters or {}
+
+    def __repr__(self):
+        return f"RetentionPolicy({self.label}, {self.days} days)"
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    def cutoff(self, now=None):
+        """Rows with date_field older than this are expired."""
+        return (now or timezone.now()) - timedelta(days=self.days)
+
+
+def get_policies(labels=None):
+    """
+    Build RetentionPolicy objects from settings.
+
+    Args:
+        labels: Optional list of model labels or table names to restrict to
+
+    Returns:
+        list: RetentionPolicy instances, skipping models that are not installed
+    """
+    policies = []
+    for label, options in getattr(settings, 'DATA_RETENTION', {}).items():
+        try:
+            apps.get_model(label)
+        except LookupError:
+            logger.warning(f"Retention policy for unknown model {label} skipped")
+            continue
+
+        policy = RetentionPolicy(
+            label=label,
+            days=options['days'],
+            date_field=options['date_field'],
+            archive=options.get('archive', True),
+            partition=options.get('partition', False),
+            filters=options.get('filters'),
+        )
+        if labels and label not in labels and policy.table not in labels:
+            continue
+        policies.append(policy)
+    return policies
+
+
+def archive_path(policy, now=None):
+    """Archive file for one run of a policy."""
+    now = now or timezone.now()
+    root = Path(getattr(settings, 'DATA_ARCHIVE_ROOT', Path(settings.MEDIA_ROOT) / 'archive'))
+    return root / policy.table / f"{policy.table}-{now.strftime('%Y%m%dT%H%M%S')}.ndjson.gz"
+
+
+def apply_policy(policy, now=None, chunk_size=None, sleep=None, dry_run=False, progress=None):
+    """
+    Archive and delete expired rows for one policy.
+
+    Args:
+        policy: RetentionPolicy
+        now: Reference time (default: now)
+        chunk_size: Rows per DELETE (default: settings.DATA_RETENTION_CHUNK_SIZE)
+        sleep: Seconds to pause between chunks to throttle I/O
+        dry_run: Only count expired rows
+        progress: Optional callable receiving the running stats after each chunk
+
+    Returns:
+        dict: Stats with table, cutoff, expired/deleted counts and archive file
+    """
+    chunk_size = chunk_size or getattr(settings, 'DATA_RETENTION_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    if sleep is None:
+        sleep = getattr(settings, 'DATA_RETENTION_SLEEP', DEFAULT_CHUNK_SLEEP)
+
+    model = policy.model
+    cutoff = policy.cutoff(now)
+    expired = model._base_manager.filter(**{f'{policy.date_field}__lt': cutoff}, **policy.filters)
+
+    stats = {
+        'table': policy.table,
+        'cutoff': cutoff.isoformat(),
+        'deleted': 0,
+        'chunks': 0,
+        'archive_file': None,
+    }
+
+    if dry_run:
+        stats['expired'] = expired.count()
+        return stats
+
+    path = archive_path(policy, now) if policy.archive else None
+    archive = None
+
+    try:
+        while True:
+            ids = list(expired.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            chunk = model._base_manager.filter(pk__in=ids)
+
+            if path is not None:
+                if archive is None:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    archive = gzip.open(path, 'at', encoding='utf-8')
+                    stats['archive_file'] = str(path)
+                for row in chunk.values().iterator():
+                    archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                archive.flush()
+
+            with transaction.atomic():
+                deleted, _ = chunk.delete()
+
+            stats['deleted'] += deleted
+            stats['chunks'] += 1
+            if progress:
+                progress(stats)
+
+            if len(ids) < chunk_size:
+                break
+            if sleep:
+                time.sleep(sleep)
+    finally:
+        if archive is not None:
+            archive.close()
+
+    if policy.partition:
+        from apps.core import partitioning
+        if partitioning.is_supported() and partitioning.is_partitioned(policy.table):
+            stats['dropped_partitions'] = partitioning.drop_empty_partitions_before(
+                policy.table, cutoff
+            )
+            partitioning.ensure_partitions(policy.table)
+
+    logger.info(
+        f"Retention {policy.table}: {stats['deleted']} rows older than "
+        f"{stats['cutoff']} removed in {stats['chunks']} chunks"
+    )
+    return stats
+
+
+def apply_all(labels=None, now=None, dry_run=False, chunk_size=None, sleep=None, progress=None):
+    """Apply every configured retention policy and return their stats."""
+    return [
+        apply_policy(
+            policy,
+            now=now,
+            chunk_size=chunk_size,
+            sleep=sleep,
+            dry_run=dry_run,
+            progress=progress
+        )
+        for policy in get_policies(labels)
+    ]
+
+
+def read_archive(path):
+    """Iterate rows stored in an archive file (used for restores and audits)."""
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            if line.strip():
+                yield json.loads(line)
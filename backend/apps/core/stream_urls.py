@@ -0,0 +1,9 @@
+"""
+Real-time stream URL Configuration
+"""
+from django.urls import path
+from . import stream_views
+
+urlpatterns = [
+    path('events/', stream_views.event_stream, name='event-stream'),
+]
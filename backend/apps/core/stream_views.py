@@ -0,0 +1,220 @@
+"""
+Server-sent events stream for real-time updates.
+
+The stream is served by a small raw ASGI application (`sse_application`,
+mounted by config/sse_asgi.py and run by uvicorn as its own process, see
+start.sh) so an open stream costs a coroutine rather than a worker thread,
+while the rest of the API stays on WSGI (where Django 4.2 streams files in
+constant memory). Talking ASGI directly also lets the stream watch for
+`http.disconnect`, which Django 4.2's ASGI handler ignores once the request
+body has been read: a closed tab releases its Subscription at once instead
+of on the next failed write. Streams are also closed after
+REALTIME_MAX_STREAM_SECONDS; EventSource reconnects on its own.
+
+Under WSGI the `/api/v1/stream/events/` Django view only answers 503.
+Browsers connect with EventSource, which cannot set headers, so the JWT
+access token may also be passed as `?token=`.
+
+Events:
+- asset_status: an AssetStatus was saved
+- notification: a Notification was created for the user
+- work_order: a WorkOrder was created or changed status
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.core.events import format_sse, get_event_bus
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/v1/stream/events/'
+DEFAULT_HEARTBEAT_SECONDS = 15
+DEFAULT_MAX_STREAM_SECONDS = 3600
+RETRY_MILLISECONDS = 5000
+
+
+def _authenticate(raw_token):
+    """
+    Resolve the user for a raw JWT access token.
+
+    Returns:
+        tuple: (user, role name) or None if the token is missing or invalid
+    """
+    if not raw_token:
+        return None
+
+    authenticator = JWTAuthentication()
+    try:
+        validated = authenticator.get_validated_token(raw_token)
+        user = authenticator.get_user(validated)
+        if not user.is_active:
+            return None
+        # Load the role while still in a sync context
+        return user, user.role.name
+    except (InvalidToken, TokenError):
+        return None
+
+
+def _raw_token(authorization, query_token):
+    """Token from an `Authorization: Bearer ...` header, else from ?token=."""
+    parts = (authorization or '').split()
+    if len(parts) == 2 and parts[0] in api_settings.AUTH_HEADER_TYPES:
+        return parts[1]
+    return query_token
+
+
+async def _event_source(subscription, heartbeat, disconnected=None, max_seconds=None):
+    """
+    Yield SSE frames until the client disconnects or the stream expires.
+
+    Args:
+        subscription: Subscription feeding the stream
+        heartbeat: Seconds without events before a keepalive comment
+        disconnected: asyncio.Event set when the client goes away
+        max_seconds: Maximum stream lifetime (None = unlimited)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds if max_seconds else None
+    disconnected = disconnected or asyncio.Event()
+    watcher = asyncio.ensure_future(disconnected.wait())
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while not disconnected.is_set():
+            timeout = heartbeat
+            if deadline is not None:
+                timeout = min(timeout, deadline - loop.time())
+                if timeout <= 0:
+                    break
+
+            getter = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {getter, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if getter in done:
+                yield format_sse(getter.result())
+                continue
+            getter.cancel()
+            if watcher in done or (deadline is not None and loop.time() >= deadline):
+                break
+            # Comment frame keeps proxies from closing idle connections
+            yield ": keepalive\n\n"
+    finally:
+        watcher.cancel()
+        subscription.close()
+
+
+async def _watch_disconnect(receive, disconnected):
+    """Consume ASGI messages until the client disconnects."""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            disconnected.set()
+            return
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def sse_application(scope, receive, send):
+    """
+    ASGI application serving the event stream for the authenticated user.
+    """
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    if scope['path'] != STREAM_PATH:
+        return await _send_json(send, 404, {'error': 'Not found'})
+    if scope['method'] != 'GET':
+        return await _send_json(send, 405, {'error': 'Method not allowed'})
+
+    headers = dict(scope.get('headers') or [])
+    query = parse_qs(scope.get('query_string', b'').decode())
+    raw_token = _raw_token(
+        headers.get(b'authorization', b'').decode('latin-1'),
+        (query.get('token') or [None])[0]
+    )
+    authenticated = await sync_to_async(_authenticate)(raw_token)
+    # No request_finished signal here: release the connection ourselves
+    await sync_to_async(close_old_connections)()
+    if authenticated is None:
+        return await _send_json(send, 401, {'error': 'Authentication required'})
+
+    user, role = authenticated
+    subscription = get_event_bus().subscribe(user.id, role)
+    disconnected = asyncio.Event()
+    watcher = asyncio.ensure_future(_watch_disconnect(receive, disconnected))
+    frames = _event_source(
+        subscription,
+        getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS),
+        disconnected=disconnected,
+        max_seconds=getattr(settings, 'REALTIME_MAX_STREAM_SECONDS', DEFAULT_MAX_STREAM_SECONDS)
+    )
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        async for frame in frames:
+            await send({'type': 'http.response.body', 'body': frame.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    except Exception as e:
+        # The client went away between the disconnect check and the write
+        logger.debug(f"Event stream for user {user.id} closed: {e}")
+    finally:
+        await frames.aclose()
+        subscription.close()
+        watcher.cancel()
+
+
+def event_stream(request):
+    """
+    Placeholder for the stream under WSGI.
+
+    Authenticates like the ASGI application so clients get the same 401,
+    then answers 503: the stream is served by the SSE process.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    raw_token = _raw_token(request.META.get('HTTP_AUTHORIZATION'), request.GET.get('token'))
+    if _authenticate(raw_token) is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    return JsonResponse(
+        {'error': 'Event stream is served by the SSE ASGI process (config.sse_asgi)'},
+        status=503
+    )
@@ -0,0 +1,38 @@
+"""
+Tareas de Celery para el ciclo de vida de los datos
+"""
+from celery import shared_task
+from django.utils import timezone
+from .retention import apply_all
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.core.tasks.apply_data_retention')
+def apply_data_retention(labels=None):
+    """
+    Archiva y elimina registros antiguos de tablas de historial y logs
+    según settings.DATA_RETENTION
+    """
+    logger.info("Aplicando políticas de retención de datos...")
+    
+    try:
+        results = apply_all(labels=labels)
+        deleted = sum(result['deleted'] for result in results)
+        
+        logger.info(f"Retención aplicada: {deleted} registros eliminados")
+        
+        return {
+            'status': 'success',
+            'deleted_count': deleted,
+            'tables': results,
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Error aplicando retención de datos: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
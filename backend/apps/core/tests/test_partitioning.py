@@ -0,0 +1,40 @@
+"""
+Tests for monthly table partitioning.
+"""
+import pytest
+from django.db import connection
+from apps.core import partitioning
+from apps.configuration.models import AccessLog
+from apps.omnichannel_bot.models import TelegramUpdate
+
+requires_postgresql = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='Table partitioning requires PostgreSQL'
+)
+
+
+@pytest.mark.django_db
+class TestConvertToPartitioned:
+    """Test the table conversion guards."""
+
+    def test_requires_postgresql(self):
+        if partitioning.is_supported():
+            pytest.skip('Running on PostgreSQL')
+
+        with pytest.raises(RuntimeError, match='PostgreSQL'):
+            partitioning.convert_to_partitioned(AccessLog, 'timestamp')
+
+    @requires_postgresql
+    def test_refuses_tables_with_unique_constraints(self):
+        with connection.cursor() as cursor:
+            unique = partitioning.unique_indexes(TelegramUpdate._meta.db_table, cursor)
+        assert unique
+
+        with pytest.raises(RuntimeError, match='unique'):
+            partitioning.convert_to_partitioned(TelegramUpdate, 'received_at')
+
+        assert not partitioning.is_partitioned(TelegramUpdate._meta.db_table)
+
+    @requires_postgresql
+    def test_primary_key_is_not_a_unique_constraint(self):
+        with connection.cursor() as cursor:
+            assert partitioning.unique_indexes(AccessLog._meta.db_table, cursor) == []
@@ -0,0 +1,265 @@
+"""
+Tests for the real-time event bus and SSE stream.
+"""
+import asyncio
+import json
+import threading
+
+import pytest
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.assets.models import Asset, Location
+from apps.core import events
+from apps.core.events import InProcessEventBus, RedisEventBus, format_sse
+from apps.core import stream_views
+from apps.core.stream_views import _event_source, sse_application
+from apps.machine_status.models import AssetStatus
+from apps.notifications.models import Notification
+
+
+class RecordingBus:
+    """Bus that keeps published events in memory."""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def recording_bus(monkeypatch):
+    bus = RecordingBus()
+    monkeypatch.setattr(events, '_bus', bus)
+    return bus
+
+
+class TestInProcessEventBus:
+    """Test fan-out to subscribers."""
+
+    def test_delivers_by_user_and_role(self):
+        async def scenario():
+            bus = InProcessEventBus()
+            operator = bus.subscribe('user-1', 'OPERADOR')
+            admin = bus.subscribe('user-2', 'ADMIN')
+            other = bus.subscribe('user-3', 'OPERADOR')
+
+            bus.publish({'id': '1', 'type': 'notification', 'data': {}, 'users': ['user-1'], 'roles': []})
+            bus.publish({'id': '2', 'type': 'asset_status', 'data': {}, 'users': [], 'roles': ['ADMIN']})
+            await asyncio.sleep(0)
+
+            assert (await operator.get())['id'] == '1'
+            assert (await admin.get())['id'] == '2'
+            assert other.queue.empty()
+
+            operator.close()
+            assert bus.subscriber_count == 2
+
+        asyncio.run(scenario())
+
+    def test_stream_yields_sse_frames_and_heartbeats(self):
+        async def scenario():
+            bus = InProcessEventBus()
+            subscription = bus.subscribe('user-1', 'ADMIN')
+            stream = _event_source(subscription, heartbeat=0.01)
+
+            assert (await stream.__anext__()).startswith('retry:')
+            assert await stream.__anext__() == ': keepalive\n\n'
+
+            bus.publish({'id': 'abc', 'type': 'work_order', 'data': {'status': 'Pendiente'}, 'users': ['user-1']})
+            frame = await stream.__anext__()
+            assert frame == 'id: abc\nevent: work_order\ndata: {"status": "Pendiente"}\n\n'
+
+            await stream.aclose()
+            assert bus.subscriber_count == 0
+
+        asyncio.run(scenario())
+
+    def test_stream_ends_after_max_lifetime(self):
+        async def scenario():
+            bus = InProcessEventBus()
+            subscription = bus.subscribe('user-1', 'ADMIN')
+
+            frames = [frame async for frame in _event_source(subscription, heartbeat=0.01, max_seconds=0.05)]
+
+            assert frames[0].startswith('retry:')
+            assert bus.subscriber_count == 0
+
+        asyncio.run(scenario())
+
+
+class FlakyRedis:
+    """Redis stand-in whose first pub/sub connection drops."""
+
+    def __init__(self, event):
+        self.event = event
+        self.connections = 0
+        self.idle = threading.Event()  # never set: the listener parks here
+
+    def pubsub(self, **kwargs):
+        return self
+
+    def subscribe(self, channel):
+        self.connections += 1
+
+    def listen(self):
+        if self.connections == 1:
+            raise ConnectionError('Connection closed by server.')
+        yield {'data': json.dumps(self.event)}
+        self.idle.wait()
+
+    def close(self):
+        pass
+
+
+class TestRedisEventBus:
+    """Test the Redis listener thread."""
+
+    def test_listener_reconnects_after_connection_loss(self, monkeypatch):
+        monkeypatch.setattr(events, 'RECONNECT_MIN_SECONDS', 0)
+        redis = FlakyRedis({'id': 'r1', 'type': 'notification', 'data': {}, 'users': ['user-1']})
+        bus = RedisEventBus.__new__(RedisEventBus)
+        InProcessEventBus.__init__(bus)
+        bus._client, bus._listener = redis, None
+
+        async def scenario():
+            subscription = bus.subscribe('user-1', 'ADMIN')
+            try:
+                return await asyncio.wait_for(subscription.get(), timeout=5)
+            finally:
+                subscription.close()
+
+        assert asyncio.run(scenario())['id'] == 'r1'
+        assert redis.connections == 2
+
+
+class FakeAsgiClient:
+    """Drives an ASGI app: records sent messages and disconnects on demand."""
+
+    def __init__(self):
+        self.sent = []
+        self.gone = asyncio.Event()
+
+    async def receive(self):
+        if not getattr(self, '_requested', False):
+            self._requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def bodies(self):
+        return [m['body'].decode() for m in self.sent if m['type'] == 'http.response.body']
+
+
+def http_scope(path='/api/v1/stream/events/', query=b''):
+    return {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': []}
+
+
+class TestSseApplication:
+    """Test the raw ASGI stream served by the SSE process."""
+
+    def test_requires_authentication(self):
+        async def scenario():
+            client = FakeAsgiClient()
+            await sse_application(http_scope(), client.receive, client.send)
+            return client.sent[0]['status']
+
+        assert asyncio.run(scenario()) == 401
+
+    def test_unknown_path(self):
+        async def scenario():
+            client = FakeAsgiClient()
+            await sse_application(http_scope('/api/v1/assets/'), client.receive, client.send)
+            return client.sent[0]['status']
+
+        assert asyncio.run(scenario()) == 404
+
+    def test_client_disconnect_removes_subscription(self, monkeypatch, settings):
+        settings.REALTIME_HEARTBEAT_SECONDS = 60
+        bus = InProcessEventBus()
+        monkeypatch.setattr(events, '_bus', bus)
+        monkeypatch.setattr(stream_views, '_authenticate', lambda raw_token: (type('U', (), {'id': 7})(), 'ADMIN'))
+
+        async def scenario():
+            client = FakeAsgiClient()
+            app = asyncio.ensure_future(sse_application(http_scope(query=b'token=t'), client.receive, client.send))
+            while bus.subscriber_count == 0:
+                await asyncio.sleep(0.01)
+
+            bus.publish({'id': 'e1', 'type': 'notification', 'data': {}, 'users': ['7']})
+            while len(client.bodies()) < 2:
+                await asyncio.sleep(0.01)
+
+            client.gone.set()
+            await asyncio.wait_for(app, timeout=2)
+            return client
+
+        client = asyncio.run(scenario())
+
+        assert client.sent[0]['status'] == 200
+        assert client.bodies()[1].startswith('id: e1\nevent: notification')
+        assert bus.subscriber_count == 0
+
+
+@pytest.mark.django_db
+class TestRealtimeSignals:
+    """Test events published from model signals."""
+
+    def test_notification_event_after_commit(self, admin_user, recording_bus,
+                                             django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            notification = Notification.objects.create(
+                user=admin_user,
+                notification_type=Notification.TYPE_SYSTEM,
+                title='Hola',
+                message='Mensaje'
+            )
+
+        assert len(recording_bus.events) == 1
+        event = recording_bus.events[0]
+        assert event['type'] == 'notification'
+        assert event['users'] == [str(admin_user.id)]
+        assert event['data']['id'] == notification.id
+
+    def test_asset_status_event_targets_staff(self, admin_user, recording_bus,
+                                              django_capture_on_commit_callbacks):
+        location = Location.objects.create(name='Loc', address='Addr')
+        asset = Asset.objects.create(
+            name='Asset RT',
+            vehicle_type='Camioneta MDO',
+            model='M',
+            serial_number='RT-1',
+            location=location,
+            installation_date=timezone.now().date(),
+            created_by=admin_user
+        )
+
+        with django_capture_on_commit_callbacks(execute=True):
+            AssetStatus.objects.create(asset=asset, last_updated_by=admin_user)
+
+        event = recording_bus.events[-1]
+        assert event['type'] == 'asset_status'
+        assert 'ADMIN' in event['roles']
+        assert 'SUPERVISOR' in event['roles']
+        assert 'data: ' in format_sse(event)
+
+
+@pytest.mark.django_db
+class TestEventStreamView:
+    """Test the SSE endpoint."""
+
+    def test_requires_authentication(self, client):
+        response = client.get('/api/v1/stream/events/')
+        assert response.status_code == 401
+
+    def test_rejects_invalid_token(self, client):
+        response = client.get('/api/v1/stream/events/?token=invalid')
+        assert response.status_code == 401
+
+    def test_refuses_to_stream_under_wsgi(self, client, admin_user):
+        token = AccessToken.for_user(admin_user)
+        response = client.get(f'/api/v1/stream/events/?token={token}')
+        assert response.status_code == 503
@@ -0,0 +1,82 @@
+"""
+Tests for data retention and archival.
+"""
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from apps.configuration.models import AccessLog
+from apps.core.retention import apply_policy, get_policies, read_archive, RetentionPolicy
+
+
+@pytest.fixture
+def access_logs(db):
+    """Ten expired and five recent access log entries."""
+    logs = AccessLog.objects.bulk_create([
+        AccessLog(resource_type='assets', resource_id=str(i), action='view')
+        for i in range(15)
+    ])
+    old = timezone.now() - timedelta(days=200)
+    AccessLog.objects.filter(id__in=[log.id for log in logs[:10]]).update(timestamp=old)
+    return logs
+
+
+@pytest.fixture
+def archive_root(tmp_path, settings):
+    settings.DATA_ARCHIVE_ROOT = tmp_path / 'archive'
+    return settings.DATA_ARCHIVE_ROOT
+
+
+@pytest.mark.django_db
+class TestRetention:
+    """Test chunked archive and purge of expired rows."""
+
+    def test_purges_expired_rows_in_chunks(self, access_logs, archive_root):
+        policy = RetentionPolicy('configuration.AccessLog', days=180, date_field='timestamp')
+        progress = []
+
+        stats = apply_policy(policy, chunk_size=3, sleep=0, progress=lambda s: progress.append(s['deleted']))
+
+        assert stats['deleted'] == 10
+        assert stats['chunks'] == 4
+        assert progress == [3, 6, 9, 10]
+        assert AccessLog.objects.count() == 5
+
+    def test_archives_rows_before_delete(self, access_logs, archive_root):
+        policy = RetentionPolicy('configuration.AccessLog', days=180, date_field='timestamp')
+
+        stats = apply_policy(policy, chunk_size=4, sleep=0)
+
+        rows = list(read_archive(stats['archive_file']))
+        assert stats['archive_file'].startswith(str(archive_root))
+        assert len(rows) == 10
+        assert {row['resource_type'] for row in rows} == {'assets'}
+
+    def test_without_archive_writes_no_file(self, access_logs, archive_root):
+        policy = RetentionPolicy(
+            'configuration.AccessLog', days=180, date_field='timestamp', archive=False
+        )
+
+        stats = apply_policy(policy, sleep=0)
+
+        assert stats['archive_file'] is None
+        assert not archive_root.exists()
+
+    def test_dry_run_only_counts(self, access_logs, archive_root):
+        policy = RetentionPolicy('configuration.AccessLog', days=180, date_field='timestamp')
+
+        stats = apply_policy(policy, dry_run=True)
+
+        assert stats['expired'] == 10
+        assert AccessLog.objects.count() == 15
+
+    def test_policies_from_settings(self, settings):
+        settings.DATA_RETENTION = {
+            'configuration.AccessLog': {'days': 30, 'date_field': 'timestamp'},
+            'missing.Model': {'days': 30, 'date_field': 'created_at'},
+        }
+
+        policies = get_policies()
+
+        assert len(policies) == 1
+        assert policies[0].table == 'access_logs'
+        assert get_policies(['access_logs'])[0].days == 30
@@ -99,15 +99,20 @@ class SparePart(models.Model):
         """Calculate total value of stock."""
         return self.quantity * self.unit_cost
     
-    def adjust_stock(self, quantity_change, movement_type, user, notes=''):
+    def adjust_stock(self, quantity_change, movement_type, user, notes='', reference_type='', reference_id=''):
         """
         Adjust stock quantity and create a stock movement record.
         
+        The change is applied with an atomic conditional UPDATE (see
+        apps.inventory.services), so concurrent adjustments are not lost.
+        
         Args:
             quantity_change: Positive for additions, negative for removals
             movement_type: Type of movement (see StockMovement.MOVEMENT_TYPES)
             user: User performing the adjustment
             notes: Optional notes about the movement
+            reference_type: Optional reference type (e.g. 'work_order')
+            reference_id: Optional reference ID
         
         Returns:
             StockMovement instance
@@ -115,32 +120,17 @@ class SparePart(models.Model):
         Raises:
             ValueError: If adjustment would result in negative quantity
         """
-        new_quantity = self.quantity + quantity_change
-        
-        if new_quantity < 0:
-            raise ValueError(
-                f"No se puede ajustar el stock. "
-                f"Cantidad actual: {self.quantity}, "
-                f"Cambio solicitado: {quantity_change}"
-            )
+        from apps.inventory.services import adjust_stock
         
-        old_quantity = self.quantity
-        self.quantity = new_quantity
-        self.save()
-        
-        # Create stock movement record
-        movement = StockMovement.objects.create(
-            spare_part=self,
-            movement_type=movement_type,
-            quantity=abs(quantity_change),
-            quantity_before=old_quantity,
-            quantity_after=new_quantity,
-            unit_cost=self.unit_cost,
-            user=user,
-            notes=notes
+        return adjust_stock(
+            self,
+            quantity_change,
+            movement_type,
+            user,
+            notes=notes,
+            reference_type=reference_type,
+            reference_id=reference_id
         )
-        
-        return movement
 
 
 class StockMovement(models.Model):
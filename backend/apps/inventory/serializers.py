@@ -228,6 +228,52 @@ class StockAdjustmentSerializer(serializers.Serializer):
         return data
 
 
+class StockBatchLineSerializer(StockAdjustmentSerializer):
+    """Serializer for one line of a stock batch."""
+    
+    spare_part = serializers.IntegerField(help_text="ID del repuesto")
+
+
+class StockBatchSerializer(serializers.Serializer):
+    """Serializer for batch stock adjustments (goods receipts, kit issues)."""
+    
+    MAX_LINES = 1000
+    
+    lines = StockBatchLineSerializer(many=True, allow_empty=False)
+    notes = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Notas comunes a todas las líneas"
+    )
+    reference_type = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Tipo de referencia común (ej: purchase_order)"
+    )
+    reference_id = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="ID de la referencia común"
+    )
+    
+    def validate_lines(self, value):
+        """Validate the batch size and that every spare part exists."""
+        if len(value) > self.MAX_LINES:
+            raise serializers.ValidationError(
+                f"Un lote no puede tener más de {self.MAX_LINES} líneas."
+            )
+        
+        part_ids = {line['spare_part'] for line in value}
+        existing = set(SparePart.objects.filter(pk__in=part_ids).values_list('pk', flat=True))
+        missing = sorted(part_ids - existing)
+        if missing:
+            raise serializers.ValidationError(
+                f"Repuestos inexistentes: {', '.join(str(part_id) for part_id in missing)}"
+            )
+        
+        return value
+
+
 class LowStockAlertSerializer(serializers.ModelSerializer):
     """Serializer for low stock alerts."""
     
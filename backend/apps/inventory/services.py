@@ -0,0 +1,226 @@
+"""
+Stock ledger service for spare parts.
+
+Every stock change goes through a single conditional UPDATE
+(`quantity = quantity + n ... WHERE quantity + n >= 0`), so concurrent
+adjustments never lose updates and stock never goes negative, and the
+StockMovement row is written once with its references. Batches (goods
+receipts, kit issues) apply all their lines with one UPDATE and one
+bulk INSERT inside a single transaction.
+"""
+import logging
+from typing import Dict, List, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from apps.inventory.models import SparePart, StockMovement
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStockError(ValueError):
+    """Raised when an adjustment would leave a spare part with negative stock."""
+
+    def __init__(self, message, spare_part_ids=()):
+        super().__init__(message)
+        self.spare_part_ids = list(spare_part_ids)
+
+
+def _supports_update_returning():
+    """UPDATE ... RETURNING is available on PostgreSQL and SQLite >= 3.35."""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _apply_deltas(deltas: Dict[int, int]) -> Dict[int, Tuple[int, object]]:
+    """
+    Atomically add quantity deltas to spare parts.
+
+    Must run inside a transaction: if any part lacks stock nothing is
+    kept once InsufficientStockError rolls the transaction back.
+
+    Args:
+        deltas: {spare_part_id: quantity_change}
+
+    Returns:
+        dict: {spare_part_id: (quantity_after, unit_cost)}
+
+    Raises:
+        InsufficientStockError: If a part does not exist or lacks stock
+    """
+    now = timezone.now()
+
+    if _supports_update_returning():
+        qn = connection.ops.quote_name
+        pk, quantity = qn('id'), qn('quantity')
+        whens = ' '.join(['WHEN %s THEN %s'] * len(deltas))
+        delta_params = [value for item in deltas.items() for value in item]
+        placeholders = ', '.join(['%s'] * len(deltas))
+        sql = (
+            f"UPDATE {qn(SparePart._meta.db_table)} "
+            f"SET {quantity} = {quantity} + (CASE {pk} {whens} END), {qn('updated_at')} = %s "
+            f"WHERE {pk} IN ({placeholders}) AND {quantity} + (CASE {pk} {whens} END) >= 0 "
+            f"RETURNING {pk}, {quantity}, {qn('unit_cost')}"
+        )
+        params = delta_params + [connection.ops.adapt_datetimefield_value(now)] + list(deltas) + delta_params
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        unit_cost_field = SparePart._meta.get_field('unit_cost')
+        applied = {row[0]: (row[1], unit_cost_field.to_python(row[2])) for row in rows}
+    else:
+        # Fallback: lock the rows (in pk order, to avoid deadlocks) and check them
+        parts = SparePart.objects.select_for_update().filter(pk__in=deltas).order_by('pk')
+        applied = {
+            part.pk: (part.quantity + deltas[part.pk], part.unit_cost)
+            for part in parts.only('pk', 'quantity', 'unit_cost')
+            if part.quantity + deltas[part.pk] >= 0
+        }
+        if len(applied) == len(deltas):
+            SparePart.objects.filter(pk__in=deltas).update(
+                quantity=F('quantity') + Case(
+                    *[When(pk=part_id, then=Value(change)) for part_id, change in deltas.items()],
+                    output_field=IntegerField()
+                ),
+                updated_at=now
+            )
+
+    if len(applied) < len(deltas):
+        raise _insufficient_stock(deltas, applied)
+    return applied
+
+
+def _insufficient_stock(deltas, applied) -> InsufficientStockError:
+    """Build the error for the parts that could not be adjusted."""
+    failed = [part_id for part_id in deltas if part_id not in applied]
+    current = dict(SparePart.objects.filter(pk__in=failed).values_list('pk', 'quantity'))
+    details = [
+        f"{part_id}: cantidad actual {current[part_id]}, cambio solicitado {deltas[part_id]}"
+        if part_id in current else f"{part_id}: no existe"
+        for part_id in failed
+    ]
+    return InsufficientStockError(
+        f"No se puede ajustar el stock. {'; '.join(details)}",
+        spare_part_ids=failed
+    )
+
+
+def adjust_stock(
+    spare_part: SparePart,
+    quantity_change: int,
+    movement_type: str,
+    user,
+    notes: str = '',
+    reference_type: str = '',
+    reference_id: str = ''
+) -> StockMovement:
+    """
+    Adjust the stock of one spare part and record the movement.
+
+    Args:
+        spare_part: SparePart instance (its quantity is refreshed)
+        quantity_change: Positive for additions, negative for removals
+        movement_type: Type of movement (see StockMovement.MOVEMENT_TYPES)
+        user: User performing the adjustment
+        notes: Optional notes about the movement
+        reference_type: Optional reference type (e.g. 'work_order')
+        reference_id: Optional reference ID
+
+    Returns:
+        StockMovement instance
+
+    Raises:
+        InsufficientStockError: If the adjustment would leave negative stock
+    """
+    with transaction.atomic():
+        quantity_after, unit_cost = _apply_deltas({spare_part.pk: quantity_change})[spare_part.pk]
+        movement = StockMovement.objects.create(
+            spare_part=spare_part,
+            movement_type=movement_type,
+            quantity=abs(quantity_change),
+            quantity_before=quantity_after - quantity_change,
+            quantity_after=quantity_after,
+            unit_cost=unit_cost,
+            reference_type=reference_type or '',
+            reference_id=reference_id or '',
+            user=user,
+            notes=notes or ''
+        )
+
+    spare_part.quantity = quantity_after
+    return movement
+
+
+def apply_stock_batch(
+    lines: List[Dict],
+    user,
+    notes: str = '',
+    reference_type: str = '',
+    reference_id: str = ''
+) -> List[StockMovement]:
+    """
+    Apply many stock adjustments in one transaction.
+
+    Lines for the same part are netted into a single UPDATE and every
+    line gets its own movement, with running before/after quantities in
+    line order. If any part would go negative at any line, the whole
+    batch is rolled back.
+
+    Args:
+        lines: Dicts with spare_part_id, quantity_change, movement_type and
+            optionally notes, reference_type and reference_id (the batch
+            values are used when a line does not set them)
+        user: User performing the adjustments
+
+    Returns:
+        list: Created StockMovement instances, in line order
+
+    Raises:
+        InsufficientStockError: If any part would be left with negative stock
+    """
+    if not lines:
+        return []
+
+    deltas = {}
+    for line in lines:
+        deltas[line['spare_part_id']] = deltas.get(line['spare_part_id'], 0) + line['quantity_change']
+
+    with transaction.atomic():
+        applied = _apply_deltas(deltas)
+
+        # Replay the lines from the quantity each part had before the batch
+        running = {part_id: applied[part_id][0] - change for part_id, change in deltas.items()}
+        movements = []
+        for line in lines:
+            part_id = line['spare_part_id']
+            quantity_before = running[part_id]
+            running[part_id] += line['quantity_change']
+            if running[part_id] < 0:
+                raise InsufficientStockError(
+                    f"No se puede ajustar el stock. {part_id}: cantidad actual {quantity_before}, "
+                    f"cambio solicitado {line['quantity_change']}",
+                    spare_part_ids=[part_id]
+                )
+            movements.append(StockMovement(
+                spare_part_id=part_id,
+                movement_type=line['movement_type'],
+                quantity=abs(line['quantity_change']),
+                quantity_before=quantity_before,
+                quantity_after=running[part_id],
+                unit_cost=applied[part_id][1],
+                reference_type=line.get('reference_type') or reference_type or '',
+                reference_id=line.get('reference_id') or reference_id or '',
+                user=user,
+                notes=line.get('notes') or notes or ''
+            ))
+
+        StockMovement.objects.bulk_create(movements)
+
+    logger.info(f"Stock batch applied: {len(movements)} movements on {len(deltas)} spare parts")
+    return movements
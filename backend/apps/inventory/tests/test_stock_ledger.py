@@ -0,0 +1,189 @@
+"""
+Tests for the atomic stock ledger.
+"""
+import threading
+
+import pytest
+from django.db import OperationalError, connection
+from rest_framework import status
+
+from apps.inventory.models import SparePart, StockMovement
+from apps.inventory.services import InsufficientStockError, adjust_stock, apply_stock_batch
+
+BATCH_URL = '/api/v1/inventory/spare-parts/adjust-stock-batch/'
+
+
+@pytest.fixture
+def part(db):
+    return SparePart.objects.create(part_number='FLT-001', name='Filtro de aceite', quantity=10, unit_cost='12.50')
+
+
+@pytest.fixture
+def parts(db):
+    return SparePart.objects.bulk_create([
+        SparePart(part_number=f'P-{i:03d}', name=f'Repuesto {i}', quantity=100, unit_cost='5.00')
+        for i in range(150)
+    ])
+
+
+@pytest.mark.django_db
+class TestAdjustStock:
+    """Single adjustments are atomic and write the movement once."""
+
+    def test_adjustment_records_movement_with_references(self, part, operador_user, django_assert_max_num_queries):
+        # UPDATE ... RETURNING and one INSERT (plus the savepoint)
+        with django_assert_max_num_queries(4):
+            movement = adjust_stock(
+                part, -3, StockMovement.MOVEMENT_OUT, operador_user,
+                notes='Cambio de filtro', reference_type='work_order', reference_id='OT-1'
+            )
+
+        assert part.quantity == 7
+        part.refresh_from_db()
+        assert part.quantity == 7
+        movement.refresh_from_db()
+        assert (movement.quantity, movement.quantity_before, movement.quantity_after) == (3, 10, 7)
+        assert (movement.reference_type, movement.reference_id) == ('work_order', 'OT-1')
+        assert str(movement.unit_cost) == '12.50'
+
+    def test_insufficient_stock_changes_nothing(self, part, operador_user):
+        with pytest.raises(InsufficientStockError):
+            part.adjust_stock(-11, StockMovement.MOVEMENT_OUT, operador_user)
+
+        part.refresh_from_db()
+        assert part.quantity == 10
+        assert not StockMovement.objects.exists()
+
+    def test_stale_instances_do_not_lose_updates(self, part, operador_user):
+        # Two clerks loaded the part before either issued it
+        first = SparePart.objects.get(pk=part.pk)
+        second = SparePart.objects.get(pk=part.pk)
+
+        first.adjust_stock(-3, StockMovement.MOVEMENT_OUT, operador_user)
+        second.adjust_stock(-4, StockMovement.MOVEMENT_OUT, operador_user)
+
+        part.refresh_from_db()
+        assert part.quantity == 3
+        assert second.quantity == 3
+        assert list(StockMovement.objects.order_by('id').values_list('quantity_before', 'quantity_after')) == [
+            (10, 7), (7, 3)
+        ]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentAdjustments:
+    """Parallel issues of the same part never lose updates or go negative."""
+
+    def test_parallel_issues(self, part, operador_user):
+        SparePart.objects.filter(pk=part.pk).update(quantity=100)
+        results = []
+        lock = threading.Lock()
+
+        def issue():
+            while True:
+                try:
+                    SparePart.objects.get(pk=part.pk).adjust_stock(-1, StockMovement.MOVEMENT_OUT, operador_user)
+                    return 'ok'
+                except InsufficientStockError:
+                    return 'rejected'
+                except OperationalError:
+                    # The shared in-memory SQLite test database fails instead of
+                    # waiting on a locked table; the attempt was rolled back
+                    continue
+
+        def clerk():
+            for _ in range(15):
+                outcome = issue()
+                with lock:
+                    results.append(outcome)
+            connection.close()
+
+        threads = [threading.Thread(target=clerk) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        part.refresh_from_db()
+        # 120 attempts on 100 units: exactly 100 succeed
+        assert results.count('ok') == 100
+        assert results.count('rejected') == 20
+        assert part.quantity == 0
+        assert StockMovement.objects.count() == 100
+        assert sorted(StockMovement.objects.values_list('quantity_after', flat=True)) == list(range(100))
+
+
+@pytest.mark.django_db
+class TestStockBatch:
+    """Batches apply all their lines in one transaction, or none."""
+
+    def test_goods_receipt(self, api_client, supervisor_user, parts, django_assert_max_num_queries):
+        api_client.force_authenticate(user=supervisor_user)
+        lines = [{'spare_part': part.pk, 'quantity_change': 5, 'movement_type': 'IN'} for part in parts]
+        lines += [{'spare_part': parts[0].pk, 'quantity_change': 2, 'movement_type': 'IN', 'reference_id': 'PO-2'}]
+
+        # Independent of the number of lines
+        with django_assert_max_num_queries(12):
+            response = api_client.post(BATCH_URL, {
+                'reference_type': 'purchase_order',
+                'reference_id': 'PO-1',
+                'lines': lines,
+            }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['movements'] == 151
+        assert response.data['quantities'][parts[0].pk] == 107
+        assert SparePart.objects.filter(quantity=105).count() == 149
+        movements = StockMovement.objects.filter(spare_part=parts[0]).order_by('quantity_after')
+        assert [(m.quantity_before, m.quantity_after, m.reference_id) for m in movements] == [
+            (100, 105, 'PO-1'), (105, 107, 'PO-2')
+        ]
+        assert all(m.reference_type == 'purchase_order' and m.user == supervisor_user for m in movements)
+
+    def test_insufficient_line_rolls_back_the_batch(self, api_client, supervisor_user, parts):
+        api_client.force_authenticate(user=supervisor_user)
+
+        response = api_client.post(BATCH_URL, {'lines': [
+            {'spare_part': parts[0].pk, 'quantity_change': -10, 'movement_type': 'OUT'},
+            {'spare_part': parts[1].pk, 'quantity_change': -101, 'movement_type': 'OUT'},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['spare_parts'] == [parts[1].pk]
+        assert set(SparePart.objects.values_list('quantity', flat=True)) == {100}
+        assert not StockMovement.objects.exists()
+
+    def test_lines_are_checked_in_order(self, part, operador_user):
+        # Net +2, but the issue comes before the receipt
+        with pytest.raises(InsufficientStockError):
+            apply_stock_batch([
+                {'spare_part_id': part.pk, 'quantity_change': -12, 'movement_type': 'OUT'},
+                {'spare_part_id': part.pk, 'quantity_change': 14, 'movement_type': 'IN'},
+            ], operador_user)
+
+        part.refresh_from_db()
+        assert part.quantity == 10
+
+    def test_unknown_spare_part(self, api_client, supervisor_user, part):
+        api_client.force_authenticate(user=supervisor_user)
+
+        response = api_client.post(BATCH_URL, {'lines': [
+            {'spare_part': part.pk + 1000, 'quantity_change': 1, 'movement_type': 'IN'},
+        ]}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_locking_fallback(self, part, operador_user, monkeypatch):
+        # Backends without UPDATE ... RETURNING lock the rows instead
+        monkeypatch.setattr('apps.inventory.services._supports_update_returning', lambda: False)
+
+        movements = apply_stock_batch([
+            {'spare_part_id': part.pk, 'quantity_change': -4, 'movement_type': 'OUT'},
+            {'spare_part_id': part.pk, 'quantity_change': 1, 'movement_type': 'RETURN'},
+        ], operador_user)
+        with pytest.raises(InsufficientStockError):
+            adjust_stock(part, -8, StockMovement.MOVEMENT_OUT, operador_user)
+
+        part.refresh_from_db()
+        assert part.quantity == 7
+        assert [(m.quantity_before, m.quantity_after) for m in movements] == [(10, 6), (6, 7)]
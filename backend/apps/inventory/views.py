@@ -13,8 +13,10 @@ from .serializers import (
     SparePartListSerializer,
     StockMovementSerializer,
     StockAdjustmentSerializer,
+    StockBatchSerializer,
     LowStockAlertSerializer,
 )
+from .services import InsufficientStockError, apply_stock_batch
 from apps.authentication.permissions import IsSupervisorOrAdmin
 
 
@@ -81,16 +83,11 @@ class SparePartViewSet(viewsets.ModelViewSet):
                     quantity_change=serializer.validated_data['quantity_change'],
                     movement_type=serializer.validated_data['movement_type'],
                     user=request.user,
-                    notes=serializer.validated_data.get('notes', '')
+                    notes=serializer.validated_data.get('notes', ''),
+                    reference_type=serializer.validated_data.get('reference_type', ''),
+                    reference_id=serializer.validated_data.get('reference_id', '')
                 )
                 
-                # Update reference information if provided
-                if serializer.validated_data.get('reference_type'):
-                    movement.reference_type = serializer.validated_data['reference_type']
-                if serializer.validated_data.get('reference_id'):
-                    movement.reference_id = serializer.validated_data['reference_id']
-                movement.save()
-                
                 # Return updated spare part and movement
                 spare_part_serializer = SparePartSerializer(spare_part)
                 movement_serializer = StockMovementSerializer(movement)
@@ -109,6 +106,63 @@ class SparePartViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='adjust-stock-batch')
+    def adjust_stock_batch(self, request):
+        """
+        Apply many stock adjustments in one transaction.
+        
+        All lines are applied or none is (e.g. a goods receipt or a kit issue).
+        
+        POST /api/spare-parts/adjust-stock-batch/
+        Body: {
+            "reference_type": "purchase_order",
+            "reference_id": "PO-123",
+            "notes": "Received from supplier",
+            "lines": [
+                {"spare_part": 1, "quantity_change": 10, "movement_type": "IN"},
+                {"spare_part": 2, "quantity_change": 5, "movement_type": "IN", "notes": "Caja dañada"}
+            ]
+        }
+        """
+        serializer = StockBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        lines = [
+            {
+                'spare_part_id': line['spare_part'],
+                'quantity_change': line['quantity_change'],
+                'movement_type': line['movement_type'],
+                'notes': line.get('notes', ''),
+                'reference_type': line.get('reference_type', ''),
+                'reference_id': line.get('reference_id', ''),
+            }
+            for line in data['lines']
+        ]
+        
+        try:
+            movements = apply_stock_batch(
+                lines,
+                user=request.user,
+                notes=data.get('notes', ''),
+                reference_type=data.get('reference_type', ''),
+                reference_id=data.get('reference_id', '')
+            )
+        except InsufficientStockError as e:
+            return Response(
+                {'error': str(e), 'spare_parts': e.spare_part_ids},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Resulting stock per part: the last movement of each part
+        quantities = {movement.spare_part_id: movement.quantity_after for movement in movements}
+        
+        return Response({
+            'movements': len(movements),
+            'quantities': quantities,
+            'message': 'Stock ajustado exitosamente'
+        }, status=status.HTTP_200_OK)
+    
     @action(detail=True, methods=['get'], url_path='stock-history')
     def stock_history(self, request, pk=None):
         """
@@ -214,7 +268,8 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing stock movements (read-only).
     
-    Stock movements are created through the adjust_stock action on SparePartViewSet.
+    Stock movements are created through the adjust_stock and adjust_stock_batch
+    actions on SparePartViewSet.
     """
     queryset = StockMovement.objects.all()
     serializer_class = StockMovementSerializer
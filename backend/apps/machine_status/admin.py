@@ -2,7 +2,7 @@
 Admin configuration for machine status app.
 """
 from django.contrib import admin
-from .models import AssetStatus, AssetStatusHistory
+from .models import AssetStatus, AssetStatusHistory, AssetStatusRollup
 
 
 @admin.register(AssetStatus)
@@ -57,3 +57,27 @@ class AssetStatusHistoryAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Disable editing history records."""
         return False
+
+
+@admin.register(AssetStatusRollup)
+class AssetStatusRollupAdmin(admin.ModelAdmin):
+    """Admin for AssetStatusRollup model (read-only, maintained by Celery)."""
+    list_display = [
+        'asset',
+        'bucket',
+        'bucket_start',
+        'sample_count',
+        'odometer_last',
+        'fuel_last',
+    ]
+    list_filter = ['bucket']
+    search_fields = ['asset__name']
+    date_hierarchy = 'bucket_start'
+    
+    def has_add_permission(self, request):
+        """Rollups are generated from history."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Rollups are generated from history."""
+        return False
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_initial'),
+        ('machine_status', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssetStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('sample_count', models.IntegerField(default=0)),
+                ('odometer_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('odometer_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('odometer_avg', models.FloatField(blank=True, null=True)),
+                ('odometer_last', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('fuel_min', models.IntegerField(blank=True, null=True)),
+                ('fuel_max', models.IntegerField(blank=True, null=True)),
+                ('fuel_avg', models.FloatField(blank=True, null=True)),
+                ('fuel_last', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_rollups', to='assets.asset')),
+            ],
+            options={
+                'verbose_name': 'Asset Status Rollup',
+                'verbose_name_plural': 'Asset Status Rollups',
+                'db_table': 'asset_status_rollup',
+                'ordering': ['asset', 'bucket', 'bucket_start'],
+                'indexes': [models.Index(fields=['bucket', 'asset', 'bucket_start'], name='asset_statu_bucket_67deda_idx')],
+                'unique_together': {('asset', 'bucket', 'bucket_start')},
+            },
+        ),
+    ]
@@ -1,8 +1,9 @@
 """
 Machine Status models - AssetStatus and AssetStatusHistory.
 """
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 import uuid
 
 
@@ -66,27 +67,124 @@ class AssetStatus(models.Model):
     def __str__(self):
         return f"{self.asset.name} - {self.get_status_type_display()}"
     
+    # Fields copied into AssetStatusHistory when the status changes
+    HISTORY_FIELDS = [
+        'status_type',
+        'odometer_reading',
+        'fuel_level',
+        'condition_notes',
+        'last_updated_by_id',
+        'updated_at',
+    ]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Keep a snapshot of the loaded values to build history without re-reading the row."""
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values()
+        return instance
+    
+    def _snapshot_loaded_values(self):
+        self._loaded_values = {
+            field: getattr(self, field)
+            for field in self.HISTORY_FIELDS
+            if field in self.__dict__
+        }
+    
+    def _previous_values(self):
+        """Values as they were in the database before this save."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None and len(loaded) == len(self.HISTORY_FIELDS):
+            return loaded
+        
+        # Instance was not loaded from the database (or only partially)
+        return AssetStatus.objects.filter(pk=self.pk).values(*self.HISTORY_FIELDS).first()
+    
+    def build_history(self, previous=None):
+        """Build (unsaved) the history record for the state before this update."""
+        previous = previous or self._previous_values()
+        if previous is None:
+            return None
+        return AssetStatusHistory(
+            asset_id=self.asset_id,
+            status_type=previous['status_type'],
+            odometer_reading=previous['odometer_reading'],
+            fuel_level=previous['fuel_level'],
+            condition_notes=previous['condition_notes'],
+            updated_by_id=previous['last_updated_by_id'],
+            timestamp=previous['updated_at']
+        )
+    
     def save(self, *args, **kwargs):
-        """Override save to create history record."""
+        """Override save to create history record in the same transaction."""
         # Check if this is an update (not a new record)
-        if self.pk:
-            # Get the old status before saving
-            try:
-                old_status = AssetStatus.objects.get(pk=self.pk)
-                # Create history record
-                AssetStatusHistory.objects.create(
-                    asset=self.asset,
-                    status_type=old_status.status_type,
-                    odometer_reading=old_status.odometer_reading,
-                    fuel_level=old_status.fuel_level,
-                    condition_notes=old_status.condition_notes,
-                    updated_by=old_status.last_updated_by,
-                    timestamp=old_status.updated_at
-                )
-            except AssetStatus.DoesNotExist:
-                pass
+        if self.pk and not self._state.adding:
+            with transaction.atomic():
+                history = self.build_history()
+                if history is not None:
+                    history.save(force_insert=True)
+                super().save(*args, **kwargs)
+        else:
+            super().save(*args, **kwargs)
+        
+        self._snapshot_loaded_values()
+    
+    def changed_fields(self):
+        """Names of fields modified since the instance was loaded."""
+        loaded = getattr(self, '_loaded_values', {})
+        return [
+            field for field in self.HISTORY_FIELDS
+            if field in loaded and getattr(self, field) != loaded[field]
+        ]
+    
+    @classmethod
+    def bulk_set_status(cls, queryset, status_type, user, condition_notes=None):
+        """
+        Change the status of many assets at once (e.g. site shutdown).
+        
+        Writes one history row per asset with bulk_create and applies the
+        change with a single UPDATE, all in one transaction.
+        
+        Args:
+            queryset: AssetStatus queryset to update
+            status_type: New status type
+            user: User performing the change
+            condition_notes: Optional notes replacing the current ones
+        
+        Returns:
+            list: Updated AssetStatus instances (with previous status in
+            `previous_status_type`)
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            statuses = list(queryset.select_for_update(of=('self',)))
+            if not statuses:
+                return []
+            
+            AssetStatusHistory.objects.bulk_create(
+                [status.build_history() for status in statuses],
+                batch_size=500
+            )
+            
+            changes = {
+                'status_type': status_type,
+                'last_updated_by': user,
+                'updated_at': now,
+            }
+            if condition_notes is not None:
+                changes['condition_notes'] = condition_notes
+            AssetStatus.objects.filter(pk__in=[status.pk for status in statuses]).update(**changes)
         
-        super().save(*args, **kwargs)
+        for status in statuses:
+            status.previous_status_type = status.status_type
+            status.status_type = status_type
+            status.last_updated_by = user
+            status.updated_at = now
+            if condition_notes is not None:
+                status.condition_notes = condition_notes
+            status._snapshot_loaded_values()
+        
+        return statuses
 
 
 class AssetStatusHistory(models.Model):
@@ -127,3 +225,56 @@ class AssetStatusHistory(models.Model):
     
     def __str__(self):
         return f"{self.asset.name} - {self.status_type} at {self.timestamp}"
+
+
+class AssetStatusRollup(models.Model):
+    """
+    Pre-aggregated odometer/fuel readings per asset and time bucket.
+    
+    Populated from AssetStatusHistory by the refresh_status_rollups task so
+    long-range charts read a few rows per bucket instead of every raw record.
+    """
+    
+    BUCKET_HOUR = 'hour'
+    BUCKET_DAY = 'day'
+    BUCKET_WEEK = 'week'
+    
+    BUCKET_CHOICES = [
+        (BUCKET_HOUR, 'Hour'),
+        (BUCKET_DAY, 'Day'),
+        (BUCKET_WEEK, 'Week'),
+    ]
+    
+    asset = models.ForeignKey(
+        'assets.Asset',
+        on_delete=models.CASCADE,
+        related_name='status_rollups'
+    )
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    bucket_start = models.DateTimeField()
+    sample_count = models.IntegerField(default=0)
+    
+    odometer_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    odometer_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    odometer_avg = models.FloatField(null=True, blank=True)
+    odometer_last = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    
+    fuel_min = models.IntegerField(null=True, blank=True)
+    fuel_max = models.IntegerField(null=True, blank=True)
+    fuel_avg = models.FloatField(null=True, blank=True)
+    fuel_last = models.IntegerField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'asset_status_rollup'
+        verbose_name = 'Asset Status Rollup'
+        verbose_name_plural = 'Asset Status Rollups'
+        ordering = ['asset', 'bucket', 'bucket_start']
+        unique_together = ['asset', 'bucket', 'bucket_start']
+        indexes = [
+            models.Index(fields=['bucket', 'asset', 'bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.asset_id} - {self.bucket} {self.bucket_start}"
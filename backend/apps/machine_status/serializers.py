@@ -60,6 +60,27 @@ class AssetStatusUpdateSerializer(serializers.ModelSerializer):
         if value is not None and (value < 0 or value > 100):
             raise serializers.ValidationError('Fuel level must be between 0 and 100.')
         return value
+    
+    def update(self, instance, validated_data):
+        """Save only the status columns (history is written in the same transaction)."""
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        
+        update_fields = {'updated_at', 'last_updated_by'}
+        update_fields.update(validated_data)
+        instance.save(update_fields=sorted(update_fields))
+        return instance
+
+
+class AssetStatusBulkUpdateSerializer(serializers.Serializer):
+    """Serializer for changing the status of many assets at once."""
+    assets = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=1000
+    )
+    status_type = serializers.ChoiceField(choices=AssetStatus.STATUS_TYPE_CHOICES)
+    condition_notes = serializers.CharField(required=False, allow_blank=True)
 
 
 class AssetStatusHistorySerializer(serializers.ModelSerializer):
@@ -0,0 +1,39 @@
+"""
+Tareas de Celery para estado de máquinas
+"""
+from celery import shared_task
+from django.utils import timezone
+from .models import AssetStatusRollup
+from .timeseries import refresh_rollups
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.machine_status.tasks.refresh_status_rollups')
+def refresh_status_rollups():
+    """
+    Actualiza la tabla de agregados (hora/día/semana) del historial de estados
+    """
+    logger.info("Actualizando agregados de historial de estados...")
+    
+    try:
+        results = [
+            refresh_rollups(bucket)
+            for bucket, _ in AssetStatusRollup.BUCKET_CHOICES
+        ]
+        
+        logger.info(f"Agregados actualizados: {results}")
+        
+        return {
+            'status': 'success',
+            'buckets': results,
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Error actualizando agregados: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
@@ -0,0 +1,114 @@
+"""
+Tests for the asset status write path (history snapshot and bulk updates).
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.machine_status.models import AssetStatus, AssetStatusHistory
+
+
+@pytest.fixture
+def statuses(db, admin_user):
+    """Three assets with their current status."""
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    result = []
+    for i in range(3):
+        asset = Asset.objects.create(
+            name=f'Write Path Asset {i}',
+            vehicle_type='Camioneta MDO',
+            model='Test Model',
+            serial_number=f'WP-{i:03d}',
+            location=location,
+            installation_date=timezone.now().date(),
+            created_by=admin_user
+        )
+        result.append(AssetStatus.objects.create(
+            asset=asset,
+            status_type=AssetStatus.OPERANDO,
+            odometer_reading=1000.0 + i,
+            fuel_level=80,
+            last_updated_by=admin_user
+        ))
+    return result
+
+
+@pytest.mark.django_db
+class TestStatusSave:
+    """Test history creation on save."""
+
+    def test_update_does_not_reread_row(self, statuses, admin_user):
+        asset_status = AssetStatus.objects.get(pk=statuses[0].pk)
+        asset_status.status_type = AssetStatus.DETENIDA
+
+        with CaptureQueriesContext(connection) as context:
+            asset_status.save(update_fields=['status_type', 'updated_at'])
+
+        rereads = [
+            q['sql'] for q in context.captured_queries
+            if q['sql'].startswith('SELECT') and '"asset_status"' in q['sql']
+        ]
+        assert rereads == []
+
+        history = AssetStatusHistory.objects.get(asset=asset_status.asset)
+        assert history.status_type == AssetStatus.OPERANDO
+        assert history.odometer_reading == 1000.0
+
+    def test_snapshot_is_refreshed_after_save(self, statuses):
+        asset_status = AssetStatus.objects.get(pk=statuses[0].pk)
+        asset_status.status_type = AssetStatus.DETENIDA
+        assert asset_status.changed_fields() == ['status_type']
+
+        asset_status.save()
+        asset_status.status_type = AssetStatus.EN_MANTENIMIENTO
+        asset_status.save()
+
+        recorded = list(
+            AssetStatusHistory.objects.filter(asset=asset_status.asset)
+            .order_by('created_at')
+            .values_list('status_type', flat=True)
+        )
+        assert recorded == [AssetStatus.OPERANDO, AssetStatus.DETENIDA]
+
+    def test_bulk_set_status(self, statuses, supervisor_user):
+        updated = AssetStatus.bulk_set_status(
+            AssetStatus.objects.filter(pk__in=[s.pk for s in statuses[:2]]),
+            AssetStatus.FUERA_DE_SERVICIO,
+            supervisor_user,
+            condition_notes='Site shutdown'
+        )
+
+        assert len(updated) == 2
+        assert {s.previous_status_type for s in updated} == {AssetStatus.OPERANDO}
+        assert AssetStatus.objects.filter(status_type=AssetStatus.FUERA_DE_SERVICIO).count() == 2
+        assert AssetStatusHistory.objects.count() == 2
+        assert AssetStatus.objects.get(pk=statuses[2].pk).status_type == AssetStatus.OPERANDO
+
+
+@pytest.mark.django_db
+class TestBulkUpdateEndpoint:
+    """Test the bulk status update endpoint."""
+
+    def test_supervisor_can_bulk_update(self, api_client, supervisor_user, statuses):
+        api_client.force_authenticate(user=supervisor_user)
+        response = api_client.post('/api/v1/machine-status/status/bulk_update/', {
+            'assets': [str(s.asset_id) for s in statuses],
+            'status_type': AssetStatus.DETENIDA,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['updated'] == 3
+        assert response.data['not_found'] == []
+        assert AssetStatusHistory.objects.count() == 3
+
+    def test_operador_cannot_bulk_update(self, api_client, operador_user, statuses):
+        api_client.force_authenticate(user=operador_user)
+        response = api_client.post('/api/v1/machine-status/status/bulk_update/', {
+            'assets': [str(statuses[0].asset_id)],
+            'status_type': AssetStatus.DETENIDA,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert AssetStatusHistory.objects.count() == 0
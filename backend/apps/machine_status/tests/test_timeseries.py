@@ -0,0 +1,197 @@
+"""
+Tests for downsampled asset status time-series and rollups.
+"""
+import pytest
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.machine_status.models import AssetStatusHistory, AssetStatusRollup
+from apps.machine_status.timeseries import (
+    align_to_bucket,
+    lttb_indices,
+    query_series,
+    rebuild_rollups,
+    refresh_rollups,
+)
+
+
+@pytest.fixture
+def asset(db, admin_user):
+    """Create an asset."""
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    return Asset.objects.create(
+        name='Timeseries Asset',
+        vehicle_type='Camioneta MDO',
+        model='Test Model',
+        serial_number='TS-001',
+        location=location,
+        installation_date=timezone.now().date(),
+        created_by=admin_user
+    )
+
+
+@pytest.fixture
+def day_start():
+    """Start of a day safely in the past."""
+    return align_to_bucket(timezone.now() - timedelta(days=10), AssetStatusRollup.BUCKET_DAY)
+
+
+@pytest.fixture
+def history(asset, admin_user, day_start):
+    """Three readings per day over three days."""
+    records = []
+    for day in range(3):
+        for hour, odometer in ((6, 100), (12, 150), (18, 200)):
+            records.append(AssetStatusHistory(
+                asset=asset,
+                status_type='OPERANDO',
+                odometer_reading=odometer + day * 1000,
+                fuel_level=50 + day,
+                updated_by=admin_user,
+                timestamp=day_start + timedelta(days=day, hours=hour)
+            ))
+    return AssetStatusHistory.objects.bulk_create(records)
+
+
+@pytest.mark.django_db
+class TestQuerySeries:
+    """Test aggregation of history into buckets."""
+
+    def test_raw_daily_buckets(self, asset, history, day_start):
+        result = query_series(
+            [asset.id], AssetStatusRollup.BUCKET_DAY,
+            day_start, day_start + timedelta(days=3), source='raw'
+        )
+        points = result['series'][str(asset.id)]
+
+        assert len(points) == 3
+        first = points[0]
+        assert first['count'] == 3
+        assert first['odometer']['min'] == 100
+        assert first['odometer']['max'] == 200
+        assert first['odometer']['avg'] == 150
+        assert first['odometer']['last'] == 200
+        assert points[2]['fuel']['last'] == 52
+
+    def test_rollup_matches_raw(self, asset, history, day_start):
+        end = day_start + timedelta(days=3)
+        raw = query_series([asset.id], AssetStatusRollup.BUCKET_DAY, day_start, end, source='raw')
+
+        written = rebuild_rollups(AssetStatusRollup.BUCKET_DAY)
+        assert written == 3
+
+        rolled = query_series(
+            [asset.id], AssetStatusRollup.BUCKET_DAY, day_start, end, source='rollup'
+        )
+        assert rolled['series'] == raw['series']
+
+    def test_auto_combines_rollups_and_raw(self, asset, history, admin_user, day_start):
+        rebuild_rollups(AssetStatusRollup.BUCKET_DAY)
+
+        # New reading after the last materialized bucket
+        AssetStatusHistory.objects.create(
+            asset=asset,
+            status_type='OPERANDO',
+            odometer_reading=5000,
+            fuel_level=10,
+            updated_by=admin_user,
+            timestamp=day_start + timedelta(days=4, hours=1)
+        )
+
+        result = query_series(
+            [asset.id], AssetStatusRollup.BUCKET_DAY,
+            day_start, day_start + timedelta(days=5)
+        )
+        points = result['series'][str(asset.id)]
+
+        assert result['source'] == 'auto'
+        assert len(points) == 4
+        assert points[-1]['odometer']['last'] == 5000
+
+    def test_refresh_rebuilds_only_dirty_assets(self, asset, history, admin_user, day_start):
+        refresh_rollups(AssetStatusRollup.BUCKET_DAY)
+        assert AssetStatusRollup.objects.filter(bucket=AssetStatusRollup.BUCKET_DAY).count() == 3
+
+        AssetStatusHistory.objects.create(
+            asset=asset,
+            status_type='DETENIDA',
+            odometer_reading=120,
+            fuel_level=40,
+            updated_by=admin_user,
+            timestamp=day_start + timedelta(hours=7)
+        )
+        result = refresh_rollups(AssetStatusRollup.BUCKET_DAY)
+
+        assert result['assets'] == 1
+        first = AssetStatusRollup.objects.get(
+            bucket=AssetStatusRollup.BUCKET_DAY, bucket_start=day_start
+        )
+        assert first.sample_count == 4
+
+
+class TestLTTB:
+    """Test Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_endpoints_and_peak(self):
+        xs = list(range(100))
+        ys = [0] * 100
+        ys[42] = 500
+
+        indices = lttb_indices(xs, ys, 10)
+
+        assert len(indices) == 10
+        assert indices[0] == 0
+        assert indices[-1] == 99
+        assert 42 in indices
+
+    def test_no_reduction_when_under_threshold(self):
+        assert lttb_indices([0, 1, 2], [1, 2, 3], 10) == [0, 1, 2]
+
+
+@pytest.mark.django_db
+class TestTimeseriesEndpoint:
+    """Test the timeseries API endpoint."""
+
+    def test_returns_series_per_asset(self, api_client, admin_user, asset, history, day_start):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get('/api/v1/machine-status/history/timeseries/', {
+            'assets': str(asset.id),
+            'bucket': 'hour',
+            'start_date': day_start.isoformat(),
+            'end_date': (day_start + timedelta(days=3)).isoformat(),
+            'max_points': 4,
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['bucket'] == 'hour'
+        series = response.data['series']
+        assert len(series) == 1
+        assert len(series[0]['points']) == 4
+
+    def test_requires_asset(self, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get('/api/v1/machine-status/history/timeseries/')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rejects_invalid_bucket(self, api_client, admin_user, asset):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get('/api/v1/machine-status/history/timeseries/', {
+            'asset': str(asset.id),
+            'bucket': 'month',
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @pytest.mark.parametrize('param, value', [
+        ('start_date', '2024-02-30T00:00'),
+        ('end_date', '2024-13-01'),
+        ('start_date', 'ayer'),
+    ])
+    def test_rejects_invalid_dates(self, api_client, admin_user, asset, param, value):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get('/api/v1/machine-status/history/timeseries/', {
+            'asset': str(asset.id),
+            param: value,
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert value in response.data['error']
@@ -0,0 +1,374 @@
+"""
+Downsampled time-series queries over AssetStatusHistory.
+
+Readings are grouped into hour/day/week buckets in the database (Trunc*)
+and reduced to min/max/avg/last per bucket. Buckets that were already
+materialized in AssetStatusRollup are read from there, so long ranges for
+many assets return a few rows per bucket instead of every raw record.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+
+from .models import AssetStatusHistory, AssetStatusRollup
+
+
+TRUNC_FUNCTIONS = {
+    AssetStatusRollup.BUCKET_HOUR: TruncHour,
+    AssetStatusRollup.BUCKET_DAY: TruncDay,
+    AssetStatusRollup.BUCKET_WEEK: TruncWeek,
+}
+
+# Default range returned when the client does not send a start date
+DEFAULT_RANGES = {
+    AssetStatusRollup.BUCKET_HOUR: timedelta(days=7),
+    AssetStatusRollup.BUCKET_DAY: timedelta(days=90),
+    AssetStatusRollup.BUCKET_WEEK: timedelta(days=365),
+}
+
+METRICS = ('odometer', 'fuel')
+
+SOURCE_AUTO = 'auto'
+SOURCE_RAW = 'raw'
+SOURCE_ROLLUP = 'rollup'
+SOURCES = (SOURCE_AUTO, SOURCE_RAW, SOURCE_ROLLUP)
+
+# Maximum number of values in a single IN (...) lookup (SQLite limit friendly)
+IN_LOOKUP_CHUNK = 500
+
+# Rows created this long before the last refresh are re-checked, so records
+# written while a refresh was running are not skipped.
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+
+def align_to_bucket(value, bucket):
+    """Truncate a datetime to the start of its bucket in the current timezone."""
+    local = timezone.localtime(value)
+    local = local.replace(minute=0, second=0, microsecond=0)
+    if bucket in (AssetStatusRollup.BUCKET_DAY, AssetStatusRollup.BUCKET_WEEK):
+        local = local.replace(hour=0)
+    if bucket == AssetStatusRollup.BUCKET_WEEK:
+        local = local - timedelta(days=local.weekday())
+    return local
+
+
+def aggregate_history(bucket, asset_ids=None, start=None, end=None):
+    """
+    Aggregate raw history rows into buckets.
+
+    Args:
+        bucket: One of AssetStatusRollup.BUCKET_* values
+        asset_ids: Optional iterable of asset ids to restrict the query
+        start: Optional inclusive lower bound for the timestamp
+        end: Optional exclusive upper bound for the timestamp
+
+    Returns:
+        dict: {(asset_id, bucket_start): stats} where stats holds
+        sample_count and min/max/avg/last for odometer and fuel
+    """
+    queryset = AssetStatusHistory.objects.all()
+    if asset_ids is not None:
+        queryset = queryset.filter(asset_id__in=list(asset_ids))
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lt=end)
+
+    trunc = TRUNC_FUNCTIONS[bucket]
+    rows = (
+        queryset
+        .annotate(bucket_start=trunc('timestamp'))
+        .values('asset_id', 'bucket_start')
+        .annotate(
+            sample_count=Count('id'),
+            odometer_min=Min('odometer_reading'),
+            odometer_max=Max('odometer_reading'),
+            odometer_avg=Avg('odometer_reading'),
+            fuel_min=Min('fuel_level'),
+            fuel_max=Max('fuel_level'),
+            fuel_avg=Avg('fuel_level'),
+            last_timestamp=Max('timestamp'),
+        )
+        .order_by()
+    )
+
+    buckets = {}
+    for row in rows:
+        key = (row['asset_id'], row['bucket_start'])
+        buckets[key] = {
+            'sample_count': row['sample_count'],
+            'odometer_min': row['odometer_min'],
+            'odometer_max': row['odometer_max'],
+            'odometer_avg': _to_float(row['odometer_avg']),
+            'odometer_last': None,
+            'fuel_min': row['fuel_min'],
+            'fuel_max': row['fuel_max'],
+            'fuel_avg': _to_float(row['fuel_avg']),
+            'fuel_last': None,
+            'last_timestamp': row['last_timestamp'],
+        }
+
+    _fill_last_values(queryset, buckets, bucket)
+    return buckets
+
+
+def _fill_last_values(queryset, buckets, bucket):
+    """Resolve the reading at the latest timestamp of every bucket."""
+    last_timestamps = sorted({stats['last_timestamp'] for stats in buckets.values()})
+    trunc = TRUNC_FUNCTIONS[bucket]
+
+    for offset in range(0, len(last_timestamps), IN_LOOKUP_CHUNK):
+        chunk = last_timestamps[offset:offset + IN_LOOKUP_CHUNK]
+        rows = (
+            queryset
+            .filter(timestamp__in=chunk)
+            .annotate(bucket_start=trunc('timestamp'))
+            .values_list('asset_id', 'bucket_start', 'timestamp', 'odometer_reading', 'fuel_level')
+            .order_by()
+        )
+        for asset_id, bucket_start, timestamp, odometer, fuel in rows:
+            stats = buckets.get((asset_id, bucket_start))
+            if stats is None or stats['last_timestamp'] != timestamp:
+                continue
+            stats['odometer_last'] = odometer
+            stats['fuel_last'] = fuel
+
+
+def read_rollups(bucket, asset_ids=None, start=None, end=None):
+    """Read materialized buckets in the same shape as aggregate_history."""
+    queryset = AssetStatusRollup.objects.filter(bucket=bucket)
+    if asset_ids is not None:
+        queryset = queryset.filter(asset_id__in=list(asset_ids))
+    if start is not None:
+        queryset = queryset.filter(bucket_start__gte=align_to_bucket(start, bucket))
+    if end is not None:
+        queryset = queryset.filter(bucket_start__lt=end)
+
+    buckets = {}
+    for rollup in queryset.order_by():
+        buckets[(rollup.asset_id, rollup.bucket_start)] = {
+            'sample_count': rollup.sample_count,
+            'odometer_min': rollup.odometer_min,
+            'odometer_max': rollup.odometer_max,
+            'odometer_avg': rollup.odometer_avg,
+            'odometer_last': rollup.odometer_last,
+            'fuel_min': rollup.fuel_min,
+            'fuel_max': rollup.fuel_max,
+            'fuel_avg': rollup.fuel_avg,
+            'fuel_last': rollup.fuel_last,
+        }
+    return buckets
+
+
+def rebuild_rollups(bucket, asset_ids=None, start=None, end=None):
+    """
+    Recompute AssetStatusRollup rows for a bucket size and range.
+
+    The range is widened to whole buckets, existing rows in it are replaced.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    if start is not None:
+        start = align_to_bucket(start, bucket)
+
+    aggregated = aggregate_history(bucket, asset_ids=asset_ids, start=start, end=end)
+
+    rollups = []
+    for (asset_id, bucket_start), stats in aggregated.items():
+        stats.pop('last_timestamp', None)
+        rollups.append(AssetStatusRollup(
+            asset_id=asset_id,
+            bucket=bucket,
+            bucket_start=bucket_start,
+            **stats
+        ))
+
+    stale = AssetStatusRollup.objects.filter(bucket=bucket)
+    if asset_ids is not None:
+        stale = stale.filter(asset_id__in=list(asset_ids))
+    if start is not None:
+        stale = stale.filter(bucket_start__gte=start)
+    if end is not None:
+        stale = stale.filter(bucket_start__lt=end)
+
+    with transaction.atomic():
+        stale.delete()
+        AssetStatusRollup.objects.bulk_create(rollups, batch_size=1000)
+
+    return len(rollups)
+
+
+def refresh_rollups(bucket):
+    """
+    Bring the rollup table up to date for one bucket size.
+
+    Only assets with history rows created since the previous refresh are
+    rebuilt, starting at the oldest timestamp among those new rows (history
+    timestamps are the *previous* status time and can be far in the past).
+
+    Returns:
+        dict: Number of assets refreshed and rollup rows written
+    """
+    last_refresh = AssetStatusRollup.objects.filter(
+        bucket=bucket
+    ).aggregate(last=Max('updated_at'))['last']
+
+    if last_refresh is None:
+        written = rebuild_rollups(bucket)
+        return {'bucket': bucket, 'assets': None, 'rows': written}
+
+    dirty = (
+        AssetStatusHistory.objects
+        .filter(created_at__gte=last_refresh - REFRESH_OVERLAP)
+        .values('asset_id')
+        .annotate(oldest=Min('timestamp'))
+        .order_by()
+    )
+
+    written = 0
+    assets = 0
+    for row in dirty:
+        written += rebuild_rollups(bucket, asset_ids=[row['asset_id']], start=row['oldest'])
+        assets += 1
+
+    return {'bucket': bucket, 'assets': assets, 'rows': written}
+
+
+def query_series(asset_ids, bucket, start, end, source=SOURCE_AUTO, max_points=None,
+                 metric='odometer'):
+    """
+    Build downsampled series for one or many assets.
+
+    With source='auto' buckets older than the newest materialized rollup
+    are read from AssetStatusRollup and the remaining (possibly partial)
+    buckets are aggregated from raw history.
+
+    Args:
+        asset_ids: List of asset ids
+        bucket: One of AssetStatusRollup.BUCKET_* values
+        start: Inclusive lower bound
+        end: Exclusive upper bound
+        source: 'auto', 'raw' or 'rollup'
+        max_points: Optional per-asset point limit applied with LTTB
+        metric: Metric used to pick points when max_points is set
+
+    Returns:
+        dict: {'source': str, 'series': {asset_id: [point, ...]}}
+    """
+    buckets = {}
+    used_source = source
+
+    if source == SOURCE_RAW:
+        buckets = aggregate_history(bucket, asset_ids, start, end)
+    elif source == SOURCE_ROLLUP:
+        buckets = read_rollups(bucket, asset_ids, start, end)
+    else:
+        watermark = AssetStatusRollup.objects.filter(
+            bucket=bucket
+        ).aggregate(last=Max('bucket_start'))['last']
+
+        if watermark is None or watermark <= start:
+            used_source = SOURCE_RAW
+            buckets = aggregate_history(bucket, asset_ids, start, end)
+        else:
+            split = min(watermark, end)
+            buckets = read_rollups(bucket, asset_ids, start, split)
+            if split < end:
+                buckets.update(aggregate_history(bucket, asset_ids, split, end))
+
+    series = {str(asset_id): [] for asset_id in asset_ids}
+    for (asset_id, bucket_start), stats in sorted(buckets.items(), key=lambda item: item[0][1]):
+        series.setdefault(str(asset_id), []).append(_format_point(bucket_start, stats))
+
+    if max_points:
+        series = {
+            asset_id: downsample_points(points, max_points, metric)
+            for asset_id, points in series.items()
+        }
+
+    return {'source': used_source, 'series': series}
+
+
+def downsample_points(points, max_points, metric='odometer'):
+    """Reduce a list of formatted points to max_points using LTTB on the metric average."""
+    if len(points) <= max_points:
+        return points
+
+    valued = [point for point in points if point[metric]['avg'] is not None]
+    if len(valued) <= max_points:
+        return valued
+
+    xs = [point['t'].timestamp() for point in valued]
+    ys = [point[metric]['avg'] for point in valued]
+    return [valued[index] for index in lttb_indices(xs, ys, max_points)]
+
+
+def lttb_indices(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of the points to keep, always including the first
+    and last point, so the visual shape of the series is preserved.
+    """
+    length = len(xs)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+
+    selected = [0]
+    every = (length - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average point of the next bucket
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, length)
+        avg_x = sum(xs[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(ys[avg_start:avg_end]) / (avg_end - avg_start)
+
+        # Point in the current bucket forming the largest triangle
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        max_area = -1
+        next_a = range_start
+        for j in range(range_start, range_end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a])
+                - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > max_area:
+                max_area = area
+                next_a = j
+
+        selected.append(next_a)
+        a = next_a
+
+    selected.append(length - 1)
+    return selected
+
+
+def _format_point(bucket_start, stats):
+    """Shape bucket stats for the API response."""
+    return {
+        't': bucket_start,
+        'count': stats['sample_count'],
+        'odometer': {
+            'min': _to_float(stats['odometer_min']),
+            'max': _to_float(stats['odometer_max']),
+            'avg': _to_float(stats['odometer_avg']),
+            'last': _to_float(stats['odometer_last']),
+        },
+        'fuel': {
+            'min': stats['fuel_min'],
+            'max': stats['fuel_max'],
+            'avg': _to_float(stats['fuel_avg']),
+            'last': stats['fuel_last'],
+        },
+    }
+
+
+def _to_float(value):
+    return float(value) if value is not None else None
@@ -6,19 +6,25 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
+from django.core.exceptions import ValidationError
 from django.db.models import Q, Sum, Avg, Count
 from django.utils import timezone
-from datetime import timedelta
-from .models import AssetStatus, AssetStatusHistory
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+from . import timeseries
+from .models import AssetStatus, AssetStatusHistory, AssetStatusRollup
 from .serializers import (
     AssetStatusSerializer,
     AssetStatusUpdateSerializer,
+    AssetStatusBulkUpdateSerializer,
     AssetStatusHistorySerializer
 )
 from apps.authentication.models import Role
 from apps.work_orders.models import WorkOrder
 from apps.notifications.services import NotificationService
 from apps.assets.models import Asset
+from apps.core.realtime_signals import publish_asset_statuses
+from apps.work_orders.access import filter_by_accessible_assets
 
 
 class AssetStatusViewSet(viewsets.ModelViewSet):
@@ -38,13 +44,8 @@ class AssetStatusViewSet(viewsets.ModelViewSet):
         
         # OPERADOR can only see status for assigned assets
         if user.role.name == Role.OPERADOR:
-            # Get assets assigned to this user through active work orders
-            assigned_asset_ids = WorkOrder.objects.filter(
-                assigned_to=user,
-                status__in=['PENDING', 'IN_PROGRESS']
-            ).values_list('asset_id', flat=True)
-            
-            queryset = queryset.filter(asset_id__in=assigned_asset_ids)
+            # Assets assigned to this user through open work orders
+            queryset = filter_by_accessible_assets(queryset, user, open_only=True)
         
         # Filter by asset if provided
         asset_id = self.request.query_params.get('asset', None)
@@ -65,23 +66,15 @@ class AssetStatusViewSet(viewsets.ModelViewSet):
         return AssetStatusSerializer
     
     def perform_update(self, serializer):
-        """Update status and set last_updated_by."""
-        user = self.request.user
-        asset = serializer.instance.asset
+        """
+        Update status and set last_updated_by.
         
-        # Check if OPERADOR is updating an assigned asset
-        if user.role.name == Role.OPERADOR:
-            # Check if asset is assigned to this user
-            is_assigned = WorkOrder.objects.filter(
-                assigned_to=user,
-                asset=asset,
-                status__in=['PENDING', 'IN_PROGRESS']
-            ).exists()
-            
-            if not is_assigned:
-                raise PermissionError('You can only update status for assigned assets.')
+        OPERADOR users can only reach assigned assets: get_queryset() already
+        scopes them, so get_object() returns 404 for anything else.
+        """
+        user = self.request.user
         
-        # Save with updated_by
+        # Save with updated_by (previous state comes from the loaded instance)
         old_status = serializer.instance.status_type
         instance = serializer.save(last_updated_by=user)
         
@@ -112,15 +105,14 @@ class AssetStatusViewSet(viewsets.ModelViewSet):
         )
         
         # Create notifications
-        for user in admin_supervisor_users:
-            NotificationService.create_notification(
-                user=user,
-                notification_type='ALERT',
-                title='Activo Fuera de Servicio',
-                message=f'El activo {asset_status.asset.name} ha sido marcado como Fuera de Servicio.',
-                related_object_type='asset',
-                related_object_id=asset_status.asset.id
-            )
+        NotificationService.create_bulk_notifications(
+            users=list(admin_supervisor_users),
+            notification_type='ALERT',
+            title='Activo Fuera de Servicio',
+            message=f'El activo {asset_status.asset.name} ha sido marcado como Fuera de Servicio.',
+            related_object_type='asset',
+            related_object_id=asset_status.asset.id
+        )
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -138,6 +130,44 @@ class AssetStatusViewSet(viewsets.ModelViewSet):
             return Response(response_serializer.data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """
+        Change the status of many assets at once (SUPERVISOR/ADMIN only).
+        
+        Body: {"assets": [asset_id, ...], "status_type": "...", "condition_notes": "..."}
+        """
+        if request.user.role.name not in [Role.ADMIN, Role.SUPERVISOR]:
+            return Response(
+                {'error': 'Only supervisors and administrators can update assets in bulk.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = AssetStatusBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        statuses = AssetStatus.bulk_set_status(
+            AssetStatus.objects.filter(asset_id__in=data['assets']).select_related('asset'),
+            status_type=data['status_type'],
+            user=request.user,
+            condition_notes=data.get('condition_notes')
+        )
+        
+        publish_asset_statuses(statuses)
+        
+        for asset_status in statuses:
+            if (asset_status.status_type == AssetStatus.FUERA_DE_SERVICIO
+                    and asset_status.previous_status_type != AssetStatus.FUERA_DE_SERVICIO):
+                self._create_out_of_service_alert(asset_status)
+        
+        updated_assets = {str(asset_status.asset_id) for asset_status in statuses}
+        return Response({
+            'updated': len(statuses),
+            'not_found': [str(asset_id) for asset_id in data['assets'] if str(asset_id) not in updated_assets],
+            'results': AssetStatusSerializer(statuses, many=True).data,
+        })
 
 
 class AssetStatusHistoryViewSet(viewsets.ReadOnlyModelViewSet):
@@ -149,6 +179,9 @@ class AssetStatusHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = AssetStatusHistorySerializer
     permission_classes = [IsAuthenticated]
     
+    # Upper bound of assets per timeseries request
+    MAX_TIMESERIES_ASSETS = 500
+    
     def get_queryset(self):
         """Filter queryset based on query parameters."""
         queryset = super().get_queryset()
@@ -171,9 +204,134 @@ class AssetStatusHistoryViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(timestamp__gte=start_date)
         if end_date:
             queryset = queryset.filter(timestamp__lte=end_date)
-        
+
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def timeseries(self, request):
+        """
+        Downsampled odometer/fuel series for one or many assets.
+
+        Query params:
+        - assets: Comma-separated asset ids (or `asset` for a single one)
+        - bucket: hour, day or week (default: day)
+        - start_date / end_date: ISO date or datetime range
+        - source: auto, raw or rollup (default: auto)
+        - max_points: Optional per-asset limit, reduced with LTTB
+        - metric: odometer or fuel, drives max_points (default: odometer)
+        """
+        asset_param = request.query_params.get('assets') or request.query_params.get('asset', '')
+        asset_ids = [value.strip() for value in asset_param.split(',') if value.strip()]
+        if not asset_ids:
+            return Response(
+                {'error': 'At least one asset is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(asset_ids) > self.MAX_TIMESERIES_ASSETS:
+            return Response(
+                {'error': f'A maximum of {self.MAX_TIMESERIES_ASSETS} assets is allowed'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        bucket = request.query_params.get('bucket', AssetStatusRollup.BUCKET_DAY)
+        if bucket not in timeseries.TRUNC_FUNCTIONS:
+            return Response(
+                {'error': f'Invalid bucket. Use one of: {", ".join(timeseries.TRUNC_FUNCTIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        source = request.query_params.get('source', timeseries.SOURCE_AUTO)
+        if source not in timeseries.SOURCES:
+            return Response(
+                {'error': f'Invalid source. Use one of: {", ".join(timeseries.SOURCES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        metric = request.query_params.get('metric', 'odometer')
+        if metric not in timeseries.METRICS:
+            return Response(
+                {'error': f'Invalid metric. Use one of: {", ".join(timeseries.METRICS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_points = request.query_params.get('max_points')
+        if max_points is not None:
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if max_points < 3:
+                return Response(
+                    {'error': 'max_points must be an integer >= 3'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            end = self._parse_datetime(request.query_params.get('end_date'))
+            start = self._parse_datetime(request.query_params.get('start_date'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if end is None:
+            end = timezone.now()
+        if start is None:
+            start = end - timeseries.DEFAULT_RANGES[bucket]
+        if start >= end:
+            return Response(
+                {'error': 'start_date must be before end_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            result = timeseries.query_series(
+                asset_ids,
+                bucket,
+                start,
+                end,
+                source=source,
+                max_points=max_points,
+                metric=metric
+            )
+        except (ValueError, ValidationError):
+            return Response(
+                {'error': 'Invalid asset id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'bucket': bucket,
+            'source': result['source'],
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'series': [
+                {'asset': asset_id, 'points': points}
+                for asset_id, points in result['series'].items()
+            ],
+        })
+
+    def _parse_datetime(self, value):
+        """
+        Parse an ISO date or datetime query param into an aware datetime.
+
+        Returns None for an empty value.
+
+        Raises:
+            ValueError: If the value is not a valid date or datetime
+        """
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                parsed_date = parse_date(value)
+                if parsed_date is None:
+                    raise ValueError
+                parsed = datetime.combine(parsed_date, time.min)
+        except ValueError:
+            raise ValueError(f'Invalid date: {value}. Use YYYY-MM-DD or an ISO datetime')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
 
 
 class AssetHistoryPagination(PageNumberPagination):
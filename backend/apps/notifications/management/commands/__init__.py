@@ -0,0 +1 @@
+# Commands package for notifications app
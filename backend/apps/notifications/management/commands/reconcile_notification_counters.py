@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.models import NotificationCounter
+
+
+class Command(BaseCommand):
+    help = 'Verify the unread notification counters against the notifications table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Rewrite the counters that do not match'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔍 Verificando contadores de notificaciones no leídas...")
+        self.stdout.write("=" * 60)
+
+        drift = NotificationCounter.find_drift()
+        for user_id, (stored, actual) in drift.items():
+            self.stdout.write(self.style.WARNING(f"⚠️  Usuario #{user_id}: {stored} → {actual}"))
+
+        if drift and options['fix']:
+            NotificationCounter.rebuild(drift.keys())
+
+        self.stdout.write("")
+        self.stdout.write(f"📊 Contadores verificados: {NotificationCounter.objects.count()}")
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("✅ Todos los contadores son correctos"))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"🔧 Contadores corregidos: {len(drift)}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Usuarios con contadores incorrectos: {len(drift)} (use --fix para corregir)"
+            ))
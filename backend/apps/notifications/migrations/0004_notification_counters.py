@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_counters(apps, schema_editor):
+    """Create the counters of users with unread notifications."""
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationCounter = apps.get_model('notifications', 'NotificationCounter')
+
+    counts = Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(
+        count=Count('id')
+    ).values_list('user_id', 'count')
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread_count=count) for user_id, count in counts],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_add_rut_field'),
+        ('notifications', '0003_alter_notification_related_object_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Notification Counter',
+                'verbose_name_plural': 'Notification Counters',
+                'db_table': 'notification_counters',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
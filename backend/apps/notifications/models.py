@@ -2,6 +2,9 @@
 Notification models.
 """
 from django.db import models
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from apps.core.models import TimeStampedModel
 from apps.authentication.models import User
 
@@ -59,14 +62,152 @@ class Notification(TimeStampedModel):
     def __str__(self):
         return f"{self.user.username} - {self.title}"
     
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created and not self.is_read:
+            NotificationCounter.adjust({self.user_id: 1})
+    
     def mark_as_read(self):
         """Mark notification as read."""
-        from django.utils import timezone
+        if self.is_read:
+            return
+        
+        now = timezone.now()
+        # Conditional update: concurrent requests decrement the counter once
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+            is_read=True, read_at=now, updated_at=now
+        )
+        self.is_read = True
+        self.read_at = now
+        self.updated_at = now
+        if updated:
+            NotificationCounter.adjust({self.user_id: -1})
+    
+    @classmethod
+    def mark_all_as_read(cls, user):
+        """
+        Mark every unread notification of a user as read.
+        
+        Returns:
+            int: Number of notifications marked
+        """
+        now = timezone.now()
+        count = cls.objects.filter(user=user, is_read=False).update(
+            is_read=True, read_at=now, updated_at=now
+        )
+        NotificationCounter.adjust({user.id: -count})
+        return count
+
+
+class NotificationCounter(models.Model):
+    """
+    Denormalized unread notification count per user.
+    
+    Maintained on create and mark-as-read so the polled unread count
+    endpoint never runs a COUNT over the notifications table. Counters are
+    built lazily from the notifications table the first time they are
+    needed, and reconcile_notification_counters repairs any drift.
+    """
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'notification_counters'
+        verbose_name = 'Notification Counter'
+        verbose_name_plural = 'Notification Counters'
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_count} unread"
+    
+    @classmethod
+    def adjust(cls, deltas):
+        """
+        Apply unread count deltas ({user_id: delta}).
+        
+        Users sharing the same delta are updated with one statement, so a
+        fan-out to many users costs a single query. Missing counters are
+        built from the notifications table, which already includes the
+        change being applied.
+        """
+        by_delta = {}
+        for user_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(user_id)
         
-        if not self.is_read:
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save()
+        now = timezone.now()
+        missing = []
+        for delta, user_ids in by_delta.items():
+            updated = cls.objects.filter(user_id__in=user_ids).update(
+                unread_count=Greatest(F('unread_count') + delta, 0),
+                updated_at=now
+            )
+            if updated < len(user_ids):
+                existing = set(
+                    cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+                )
+                missing.extend(user_id for user_id in user_ids if user_id not in existing)
+        if missing:
+            cls.rebuild(missing)
+    
+    @classmethod
+    def actual_counts(cls, user_ids=None):
+        """Count unread notifications per user from the notifications table."""
+        notifications = Notification.objects.filter(is_read=False)
+        if user_ids is not None:
+            notifications = notifications.filter(user_id__in=user_ids)
+        return dict(
+            notifications.order_by().values('user_id').annotate(
+                count=Count('id')
+            ).values_list('user_id', 'count')
+        )
+    
+    @classmethod
+    def rebuild(cls, user_ids):
+        """Recompute (upsert) the counters of the given users in two queries."""
+        user_ids = list(user_ids)
+        counts = cls.actual_counts(user_ids)
+        now = timezone.now()
+        return cls.objects.bulk_create(
+            [cls(user_id=user_id, unread_count=counts.get(user_id, 0), updated_at=now) for user_id in user_ids],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['unread_count', 'updated_at']
+        )
+    
+    @classmethod
+    def find_drift(cls):
+        """
+        Compare the stored counters with the notifications table.
+        
+        Users with unread notifications but no counter yet are not drift:
+        their counter is built on first use.
+        
+        Returns:
+            dict: user_id -> (stored, actual) for counters that do not match
+        """
+        actual = cls.actual_counts()
+        drift = {}
+        for user_id, stored in cls.objects.values_list('user_id', 'unread_count').iterator(chunk_size=2000):
+            if stored != actual.get(user_id, 0):
+                drift[user_id] = (stored, actual.get(user_id, 0))
+        return drift
+    
+    @classmethod
+    def for_user(cls, user):
+        """Return the user's counter, building it if it does not exist yet."""
+        counter = cls.objects.filter(user=user).first()
+        if counter is None:
+            cls.rebuild([user.id])
+            counter = cls.objects.get(user=user)
+        return counter
 
 
 class NotificationPreference(TimeStampedModel):
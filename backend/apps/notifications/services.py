@@ -1,8 +1,8 @@
 """
 Notification service for creating and managing notifications.
 """
-from typing import List, Optional
-from apps.notifications.models import Notification, NotificationPreference
+from typing import Dict, List, Optional
+from apps.notifications.models import Notification, NotificationCounter, NotificationPreference
 from apps.authentication.models import User
 
 
@@ -56,6 +56,29 @@ class NotificationService:
         
         return notification
     
+    @staticmethod
+    def get_preferences(users: List[User]) -> Dict[int, NotificationPreference]:
+        """
+        Load the notification preferences of several users in one query.
+        
+        Missing preferences are created with the defaults in a single
+        bulk insert.
+        
+        Returns:
+            Dict of user id -> NotificationPreference
+        """
+        user_ids = {user.id for user in users}
+        preferences = {
+            preference.user_id: preference
+            for preference in NotificationPreference.objects.filter(user_id__in=user_ids)
+        }
+        missing = [NotificationPreference(user_id=user_id) for user_id in user_ids - preferences.keys()]
+        if missing:
+            # ignore_conflicts: another request may create them concurrently
+            NotificationPreference.objects.bulk_create(missing, ignore_conflicts=True)
+            preferences.update({preference.user_id: preference for preference in missing})
+        return preferences
+    
     @staticmethod
     def create_bulk_notifications(
         users: List[User],
@@ -68,6 +91,10 @@ class NotificationService:
         """
         Create notifications for multiple users.
         
+        Preferences are loaded in one query and the notifications are
+        inserted with a single bulk_create, so the cost does not grow in
+        queries with the number of recipients.
+        
         Args:
             users: List of users to receive the notification
             notification_type: Type of notification
@@ -79,19 +106,31 @@ class NotificationService:
         Returns:
             List of created Notifications
         """
-        notifications = []
-        for user in users:
-            notification = NotificationService.create_notification(
+        from apps.core.realtime_signals import publish_notifications
+        
+        recipients = list({user.id: user for user in users if user is not None}.values())
+        if not recipients:
+            return []
+        
+        preferences = NotificationService.get_preferences(recipients)
+        related_id_str = str(related_object_id) if related_object_id is not None else None
+        
+        notifications = Notification.objects.bulk_create([
+            Notification(
                 user=user,
                 notification_type=notification_type,
                 title=title,
                 message=message,
                 related_object_type=related_object_type,
-                related_object_id=related_object_id
+                related_object_id=related_id_str
             )
-            if notification:
-                notifications.append(notification)
+            for user in recipients
+            if preferences[user.id].is_enabled(notification_type)
+        ])
         
+        # bulk_create skips save() and post_save
+        NotificationCounter.adjust({notification.user_id: 1 for notification in notifications})
+        publish_notifications(notifications)
         return notifications
     
     @staticmethod
@@ -2,9 +2,10 @@
 Tareas de Celery para notificaciones
 """
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
-from datetime import timedelta
-from .models import Notification
+from apps.core.retention import RetentionPolicy, apply_policy
+from .models import NotificationCounter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,25 +14,41 @@ logger = logging.getLogger(__name__)
 @shared_task(name='apps.notifications.tasks.cleanup_old_notifications')
 def cleanup_old_notifications(days=30):
     """
-    Limpia notificaciones antiguas (más de 30 días)
+    Limpia notificaciones leídas antiguas (más de 30 días)
+    
+    Elimina en lotes acotados por clave primaria con una pausa entre lotes
+    (settings.NOTIFICATION_CLEANUP_CHUNK_SIZE / NOTIFICATION_CLEANUP_SLEEP),
+    para no bloquear la tabla con un único DELETE.
     """
     logger.info(f"Limpiando notificaciones de más de {days} días...")
     
     try:
-        cutoff_date = timezone.now() - timedelta(days=days)
+        # Solo notificaciones leídas: no afecta los contadores de no leídas
+        policy = RetentionPolicy(
+            label='notifications.Notification',
+            days=days,
+            date_field='created_at',
+            archive=False,
+            filters={'is_read': True}
+        )
+        
+        def report_progress(stats):
+            logger.info(f"Limpieza de notificaciones: {stats['deleted']} eliminadas en {stats['chunks']} lotes")
         
-        # Eliminar notificaciones leídas antiguas
-        deleted_count, _ = Notification.objects.filter(
-            is_read=True,
-            created_at__lt=cutoff_date
-        ).delete()
+        stats = apply_policy(
+            policy,
+            chunk_size=getattr(settings, 'NOTIFICATION_CLEANUP_CHUNK_SIZE', 1000),
+            sleep=getattr(settings, 'NOTIFICATION_CLEANUP_SLEEP', 0.1),
+            progress=report_progress
+        )
         
-        logger.info(f"Se eliminaron {deleted_count} notificaciones antiguas")
+        logger.info(f"Se eliminaron {stats['deleted']} notificaciones antiguas")
         
         return {
             'status': 'success',
-            'deleted_count': deleted_count,
-            'cutoff_date': cutoff_date.isoformat(),
+            'deleted_count': stats['deleted'],
+            'chunks': stats['chunks'],
+            'cutoff_date': stats['cutoff'],
             'timestamp': timezone.now().isoformat()
         }
     
@@ -47,41 +64,52 @@ def cleanup_old_notifications(days=30):
 def send_daily_summary():
     """
     Envía resumen diario de notificaciones no leídas
+    
+    Los conteos salen de una sola consulta sobre NotificationCounter y los
+    mensajes se encolan en lotes en la cola de salida del bot.
     """
     logger.info("Enviando resumen diario de notificaciones...")
     
     try:
-        from apps.authentication.models import User
         from apps.omnichannel_bot.message_router import MessageRouter
         
         router = MessageRouter()
+        batch_size = getattr(settings, 'NOTIFICATION_SUMMARY_BATCH_SIZE', 500)
         sent_count = 0
+        queued_count = 0
         
-        # Para cada usuario activo
-        for user in User.objects.filter(is_active=True):
-            unread_count = Notification.objects.filter(
-                user=user,
-                is_read=False
-            ).count()
-            
-            if unread_count > 0:
-                router.send_to_user(
-                    user=user,
-                    title='📊 Resumen Diario',
-                    message=(
-                        f'Tienes {unread_count} notificaciones sin leer.\n\n'
-                        'Revisa el sistema para mantenerte al día.'
-                    ),
-                    message_type='daily_summary',
-                    priority='normal'
-                )
-                sent_count += 1
+        # Usuarios activos con notificaciones sin leer, según los contadores
+        counters = NotificationCounter.objects.filter(
+            user__is_active=True,
+            unread_count__gt=0
+        ).select_related('user').order_by('pk')
         
-        logger.info(f"Resumen enviado a {sent_count} usuarios")
+        batch = []
+        for counter in counters.iterator(chunk_size=batch_size):
+            batch.append({
+                'user': counter.user,
+                'title': '📊 Resumen Diario',
+                'message': (
+                    f'Tienes {counter.unread_count} notificaciones sin leer.\n\n'
+                    'Revisa el sistema para mantenerte al día.'
+                ),
+                'message_type': 'daily_summary',
+                'priority': 'normal',
+            })
+            if len(batch) >= batch_size:
+                queued_count += len(router.enqueue(batch))
+                sent_count += len(batch)
+                batch = []
+        if batch:
+            queued_count += len(router.enqueue(batch))
+            sent_count += len(batch)
+        
+        logger.info(f"Resumen enviado a {sent_count} usuarios ({queued_count} mensajes encolados)")
         
         return {
             'status': 'success',
             'sent_to': sent_count,
+            'queued_messages': queued_count,
             'timestamp': timezone.now().isoformat()
         }
     
@@ -91,3 +119,30 @@ def send_daily_summary():
             'status': 'error',
             'error': str(e)
         }
+
+
+@shared_task(name='apps.notifications.tasks.reconcile_notification_counters')
+def reconcile_notification_counters():
+    """
+    Corrige los contadores de notificaciones no leídas que no coinciden con la tabla de notificaciones
+    """
+    logger.info("Verificando contadores de notificaciones no leídas...")
+    
+    try:
+        drift = NotificationCounter.find_drift()
+        if drift:
+            NotificationCounter.rebuild(drift.keys())
+            logger.warning(f"Se corrigieron {len(drift)} contadores de notificaciones")
+        
+        return {
+            'status': 'success',
+            'fixed': len(drift),
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Error verificando contadores de notificaciones: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
@@ -0,0 +1,79 @@
+"""
+Tests for bulk notification fan-out.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.authentication.models import User
+from apps.notifications.models import Notification, NotificationPreference
+from apps.notifications.services import NotificationService
+
+
+@pytest.fixture
+def recipients(db, create_roles):
+    def build(count):
+        return [
+            User.objects.create_user(
+                username=f'recipient{i}',
+                email=f'recipient{i}@test.com',
+                password='testpass123',
+                role=create_roles['supervisor']
+            )
+            for i in range(count)
+        ]
+    return build
+
+
+def fan_out(users):
+    with CaptureQueriesContext(connection) as queries:
+        notifications = NotificationService.create_bulk_notifications(
+            users=users,
+            notification_type=Notification.TYPE_WORK_ORDER_CREATED,
+            title='Nueva Orden',
+            message='Orden creada',
+            related_object_type='work_order',
+            related_object_id=7
+        )
+    return notifications, len(queries)
+
+
+@pytest.mark.django_db
+class TestBulkNotifications:
+    """Test NotificationService.create_bulk_notifications."""
+
+    def test_creates_notifications_and_default_preferences(self, recipients):
+        users = recipients(3)
+
+        notifications, _ = fan_out(users)
+
+        assert len(notifications) == 3
+        assert all(notification.pk for notification in notifications)
+        assert Notification.objects.filter(related_object_id='7').count() == 3
+        assert NotificationPreference.objects.filter(user__in=users).count() == 3
+
+    def test_respects_preferences(self, recipients):
+        users = recipients(3)
+        NotificationPreference.objects.create(user=users[0], work_order_created=False)
+
+        notifications, _ = fan_out(users)
+
+        assert {notification.user_id for notification in notifications} == {users[1].id, users[2].id}
+
+    def test_query_count_does_not_grow_with_recipients(self, recipients):
+        users = recipients(32)
+        _, few_queries = fan_out(users[:2])
+        many = users[2:]
+        _, many_queries = fan_out(many)
+
+        assert many_queries == few_queries
+        # Existing preferences: no insert needed
+        _, repeat_queries = fan_out(many)
+        assert repeat_queries < many_queries
+
+    def test_empty_and_duplicate_recipients(self, recipients):
+        user = recipients(1)[0]
+
+        assert NotificationService.create_bulk_notifications([], 'ALERT', 'T', 'M') == []
+        notifications = NotificationService.create_bulk_notifications([user, user], 'ALERT', 'T', 'M')
+        assert len(notifications) == 1
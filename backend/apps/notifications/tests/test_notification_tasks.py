@@ -0,0 +1,72 @@
+"""
+Tests for the notification cleanup and daily summary tasks.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from apps.notifications.tasks import cleanup_old_notifications, send_daily_summary
+from apps.omnichannel_bot.models import ChannelConfig, MessageLog, UserChannelPreference
+
+
+def notify(user, is_read=False, age_days=0):
+    notification = Notification.objects.create(
+        user=user,
+        notification_type=Notification.TYPE_SYSTEM,
+        title='Aviso',
+        message='Mensaje',
+        is_read=is_read
+    )
+    if age_days:
+        Notification.objects.filter(pk=notification.pk).update(
+            created_at=timezone.now() - timedelta(days=age_days)
+        )
+    return notification
+
+
+@pytest.mark.django_db
+class TestCleanupOldNotifications:
+    """Test chunked cleanup."""
+
+    def test_deletes_old_read_notifications_in_chunks(self, admin_user, settings):
+        settings.NOTIFICATION_CLEANUP_CHUNK_SIZE = 2
+        settings.NOTIFICATION_CLEANUP_SLEEP = 0
+        for _ in range(5):
+            notify(admin_user, is_read=True, age_days=40)
+        recent = notify(admin_user, is_read=True)
+        unread = notify(admin_user, age_days=40)
+
+        result = cleanup_old_notifications(days=30)
+
+        assert result['status'] == 'success'
+        assert result['deleted_count'] == 5
+        assert result['chunks'] == 3
+        assert set(Notification.objects.values_list('pk', flat=True)) == {recent.pk, unread.pk}
+
+
+@pytest.mark.django_db
+class TestSendDailySummary:
+    """Test the set-based daily summary."""
+
+    def test_queues_one_message_per_user_with_unread(
+        self, admin_user, supervisor_user, operador_user, settings, django_assert_max_num_queries
+    ):
+        settings.NOTIFICATION_SUMMARY_BATCH_SIZE = 1
+        ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True)
+        for i, user in enumerate([admin_user, supervisor_user, operador_user]):
+            UserChannelPreference.objects.create(user=user, channel_type='TELEGRAM', channel_user_id=str(i))
+        notify(admin_user)
+        notify(admin_user)
+        notify(supervisor_user)
+        notify(operador_user, is_read=True)
+
+        # One counter query plus a fixed number of queries per batch
+        with django_assert_max_num_queries(1 + 2 * 3):
+            result = send_daily_summary()
+
+        assert result['sent_to'] == 2
+        messages = dict(MessageLog.objects.values_list('user_id', 'message'))
+        assert set(messages) == {admin_user.id, supervisor_user.id}
+        assert 'Tienes 2 notificaciones' in messages[admin_user.id]
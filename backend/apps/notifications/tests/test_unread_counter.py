@@ -0,0 +1,119 @@
+"""
+Tests for the denormalized unread notification counters.
+"""
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework import status
+
+from apps.notifications.models import Notification, NotificationCounter
+from apps.notifications.services import NotificationService
+
+UNREAD_COUNT_URL = '/api/v1/notifications/notifications/unread_count/'
+
+
+def notify(user, title='Aviso'):
+    return Notification.objects.create(
+        user=user,
+        notification_type=Notification.TYPE_SYSTEM,
+        title=title,
+        message='Mensaje'
+    )
+
+
+def stored_count(user):
+    return NotificationCounter.objects.get(user=user).unread_count
+
+
+@pytest.mark.django_db
+class TestUnreadCounter:
+    """Test counter maintenance."""
+
+    def test_create_and_mark_as_read(self, admin_user):
+        first = notify(admin_user)
+        notify(admin_user)
+        assert stored_count(admin_user) == 2
+
+        first.mark_as_read()
+        first.mark_as_read()
+
+        assert stored_count(admin_user) == 1
+        first.refresh_from_db()
+        assert first.is_read and first.read_at
+
+    def test_stale_instance_does_not_decrement_twice(self, admin_user):
+        notification = notify(admin_user)
+        stale = Notification.objects.get(pk=notification.pk)
+
+        notification.mark_as_read()
+        stale.mark_as_read()
+
+        assert stored_count(admin_user) == 0
+
+    def test_bulk_notifications(self, admin_user, supervisor_user):
+        notify(admin_user)
+
+        NotificationService.create_bulk_notifications(
+            [admin_user, supervisor_user], Notification.TYPE_SYSTEM, 'Aviso', 'Mensaje'
+        )
+
+        assert stored_count(admin_user) == 2
+        assert stored_count(supervisor_user) == 1
+
+    def test_mark_all_as_read(self, api_client, admin_user):
+        notify(admin_user)
+        notify(admin_user)
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.post('/api/v1/notifications/notifications/mark_all_as_read/')
+
+        assert response.data['count'] == 2
+        assert stored_count(admin_user) == 0
+        assert not Notification.objects.filter(user=admin_user, is_read=False).exists()
+
+    def test_reconcile_repairs_drift(self, admin_user):
+        notify(admin_user)
+        NotificationCounter.objects.filter(user=admin_user).update(unread_count=7)
+
+        assert NotificationCounter.find_drift() == {admin_user.id: (7, 1)}
+        call_command('reconcile_notification_counters', '--fix', stdout=StringIO())
+
+        assert stored_count(admin_user) == 1
+        assert NotificationCounter.find_drift() == {}
+
+
+@pytest.mark.django_db
+class TestUnreadCountEndpoint:
+    """Test the unread_count endpoint."""
+
+    def test_returns_count_with_etag(self, api_client, admin_user, django_assert_max_num_queries):
+        notify(admin_user)
+        api_client.force_authenticate(user=admin_user)
+
+        with django_assert_max_num_queries(1):
+            response = api_client.get(UNREAD_COUNT_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'count': 1}
+        assert response['ETag']
+
+    def test_not_modified_until_count_changes(self, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        etag = api_client.get(UNREAD_COUNT_URL)['ETag']
+
+        assert api_client.get(UNREAD_COUNT_URL, HTTP_IF_NONE_MATCH=etag).status_code == \
+            status.HTTP_304_NOT_MODIFIED
+
+        notify(admin_user)
+        response = api_client.get(UNREAD_COUNT_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'count': 1}
+
+    def test_builds_missing_counter(self, api_client, admin_user):
+        notify(admin_user)
+        NotificationCounter.objects.all().delete()
+        api_client.force_authenticate(user=admin_user)
+
+        assert api_client.get(UNREAD_COUNT_URL).data == {'count': 1}
+        assert stored_count(admin_user) == 1
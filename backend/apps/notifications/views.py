@@ -5,10 +5,11 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.utils.http import parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
-from apps.notifications.models import Notification, NotificationPreference
+from apps.notifications.models import Notification, NotificationCounter, NotificationPreference
 from apps.notifications.serializers import (
     NotificationSerializer,
     NotificationPreferenceSerializer
@@ -42,11 +43,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Mark all notifications as read for the current user."""
-        notifications = self.get_queryset().filter(is_read=False)
-        count = notifications.count()
-        
-        for notification in notifications:
-            notification.mark_as_read()
+        count = Notification.mark_all_as_read(request.user)
         
         return Response({
             'message': f'{count} notifications marked as read',
@@ -55,9 +52,23 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        """Get count of unread notifications."""
-        count = self.get_queryset().filter(is_read=False).count()
-        return Response({'count': count})
+        """
+        Get count of unread notifications.
+        
+        Answered from the user's NotificationCounter. Clients polling with
+        If-None-Match get 304 Not Modified while the count is unchanged.
+        """
+        count = NotificationCounter.for_user(request.user).unread_count
+        etag = quote_etag(f'unread-{request.user.id}-{count}')
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({'count': count})
+        response['ETag'] = etag
+        # Let browsers revalidate instead of reusing a stale count
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class NotificationPreferenceViewSet(viewsets.ModelViewSet):
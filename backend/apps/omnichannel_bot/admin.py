@@ -2,7 +2,9 @@
 Admin para el bot omnicanal
 """
 from django.contrib import admin
-from .models import ChannelConfig, UserChannelPreference, MessageLog
+from django.utils import timezone
+from . import outbound
+from .models import ChannelConfig, ChannelDeliveryStats, UserChannelPreference, MessageLog
 
 
 @admin.register(ChannelConfig)
@@ -23,8 +25,33 @@ class UserChannelPreferenceAdmin(admin.ModelAdmin):
 
 @admin.register(MessageLog)
 class MessageLogAdmin(admin.ModelAdmin):
-    list_display = ['user', 'channel_type', 'title', 'status', 'message_type', 'created_at']
+    list_display = ['user', 'channel_type', 'title', 'status', 'attempts', 'message_type', 'created_at']
     list_filter = ['channel_type', 'status', 'message_type', 'created_at']
     search_fields = ['user__username', 'title', 'message']
-    readonly_fields = ['created_at', 'sent_at', 'delivered_at', 'read_at']
+    readonly_fields = ['created_at', 'sent_at', 'delivered_at', 'read_at', 'attempts', 'next_attempt_at']
     date_hierarchy = 'created_at'
+    actions = ['requeue_messages']
+    
+    @admin.action(description='Reencolar mensajes fallidos')
+    def requeue_messages(self, request, queryset):
+        """Devuelve mensajes FAILED (dead letter) a la cola de salida"""
+        count = queryset.filter(status='FAILED').update(
+            status='PENDING',
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        outbound.schedule_dispatch()
+        self.message_user(request, f'{count} mensajes reencolados')
+
+
+@admin.register(ChannelDeliveryStats)
+class ChannelDeliveryStatsAdmin(admin.ModelAdmin):
+    list_display = ['minute', 'channel_type', 'sent', 'failed', 'avg_latency_ms', 'max_latency_ms']
+    list_filter = ['channel_type']
+    date_hierarchy = 'minute'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,7 @@ class OmnichannelBotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.omnichannel_bot'
     verbose_name = 'Omnichannel Bot'
+    
+    def ready(self):
+        """Conectar signals de invalidación del cache"""
+        import apps.omnichannel_bot.signals
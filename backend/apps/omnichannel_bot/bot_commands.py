@@ -1,13 +1,30 @@
 """
 Comandos interactivos del bot de Telegram
+
+Los datos salen de bot_queries.py (a lo sumo dos consultas por comando) y
+las respuestas de consulta se cachean por usuario durante
+OMNICHANNEL_BOT_RESPONSE_CACHE_SECONDS.
 """
 from typing import Dict, Optional
 from apps.authentication.models import User
 from apps.work_orders.models import WorkOrder
-from apps.ml_predictions.models import FailurePrediction
-from apps.assets.models import Asset
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta
+from . import bot_queries
+
+# Comandos de sólo lectura cuya respuesta se cachea
+CACHED_COMMANDS = {'/status', '/workorders', '/predictions', '/assets', '/myinfo'}
+RESPONSE_CACHE_KEY = 'omnichannel:bot_response:{user_id}:{command}'
+
+
+def _response_cache_key(command: str, user: Optional[User]) -> str:
+    return RESPONSE_CACHE_KEY.format(user_id=user.pk if user else 0, command=command)
+
+
+def invalidate_user_responses(user: Optional[User], commands=('/workorders', '/myinfo')):
+    """Descarta las respuestas cacheadas de un usuario tras un cambio propio"""
+    cache.delete_many([_response_cache_key(command, user) for command in commands])
 
 
 class BotCommandHandler:
@@ -38,7 +55,15 @@ class BotCommandHandler:
         
         handler = self.commands.get(command)
         if handler:
-            return handler(user)
+            if command not in CACHED_COMMANDS:
+                return handler(user)
+            
+            key = _response_cache_key(command, user)
+            response = cache.get(key)
+            if response is None:
+                response = handler(user)
+                cache.set(key, response, getattr(settings, 'OMNICHANNEL_BOT_RESPONSE_CACHE_SECONDS', 30))
+            return response
         else:
             return {
                 'text': (
@@ -89,19 +114,14 @@ class BotCommandHandler:
     def cmd_status(self, user: Optional[User] = None) -> Dict:
         """Comando /status - Estado general del sistema"""
         # Estadísticas generales
-        total_assets = Asset.objects.filter(is_archived=False).count()
-        active_wo = WorkOrder.objects.filter(status__in=['Pendiente', 'En Progreso']).count()
-        high_risk = FailurePrediction.objects.filter(
-            risk_level__in=['HIGH', 'CRITICAL'],
-            prediction_date__gte=timezone.now() - timedelta(days=7)
-        ).count()
+        stats = bot_queries.system_status()
         
         return {
             'text': (
                 '📊 *Estado del Sistema CMMS*\n\n'
-                f'🔧 Activos activos: {total_assets}\n'
-                f'📋 Órdenes de trabajo activas: {active_wo}\n'
-                f'⚠️ Predicciones de alto riesgo: {high_risk}\n\n'
+                f'🔧 Activos activos: {stats["total_assets"]}\n'
+                f'📋 Órdenes de trabajo activas: {stats["active_work_orders"]}\n'
+                f'⚠️ Predicciones de alto riesgo: {stats["high_risk_predictions"]}\n\n'
                 f'🕐 Última actualización: {timezone.now().strftime("%d/%m/%Y %H:%M")}'
             ),
             'buttons': [
@@ -116,12 +136,9 @@ class BotCommandHandler:
             return {'text': '❌ Usuario no identificado. Contacta al administrador.'}
         
         # Órdenes asignadas al usuario
-        my_workorders = WorkOrder.objects.filter(
-            assigned_to=user,
-            status__in=['Pendiente', 'En Progreso']
-        ).order_by('scheduled_date', '-priority')[:5]
+        my_workorders = bot_queries.active_work_orders(user)
         
-        if not my_workorders.exists():
+        if not my_workorders:
             return {
                 'text': (
                     '✅ *Mis Órdenes de Trabajo*\n\n'
@@ -134,7 +151,7 @@ class BotCommandHandler:
             }
         
         text = f'📋 *Mis Órdenes de Trabajo*\n\n'
-        text += f'Tienes *{my_workorders.count()}* órdenes activas:\n\n'
+        text += f'Tienes *{len(my_workorders)}* órdenes activas:\n\n'
         
         for i, wo in enumerate(my_workorders, 1):
             priority_emoji = {
@@ -142,29 +159,29 @@ class BotCommandHandler:
                 'Media': '🟡',
                 'Alta': '🟠',
                 'Urgente': '🔴'
-            }.get(wo.priority, '⚪')
+            }.get(wo['priority'], '⚪')
             
             status_emoji = {
                 'Pendiente': '⏳',
                 'En Progreso': '🔄',
                 'Completada': '✅',
                 'Cancelada': '❌'
-            }.get(wo.status, '⚪')
+            }.get(wo['status'], '⚪')
             
             text += (
-                f'{priority_emoji} *{wo.work_order_number}*\n'
-                f'{wo.title}\n'
-                f'Activo: {wo.asset.name}\n'
-                f'Estado: {status_emoji} {wo.status}\n'
-                f'Programada: {wo.scheduled_date.strftime("%d/%m/%Y")}\n\n'
+                f'{priority_emoji} *{wo["work_order_number"]}*\n'
+                f'{wo["title"]}\n'
+                f'Activo: {wo["asset__name"]}\n'
+                f'Estado: {status_emoji} {wo["status"]}\n'
+                f'Programada: {wo["scheduled_date"].strftime("%d/%m/%Y")}\n\n'
             )
         
         # Crear botones para cada OT
         buttons = []
         for wo in my_workorders[:3]:  # Máximo 3 botones
             buttons.append([{
-                'text': f'Ver {wo.work_order_number}',
-                'callback_data': f'wo_detail_{wo.id}'
+                'text': f'Ver {wo["work_order_number"]}',
+                'callback_data': f'wo_detail_{wo["id"]}'
             }])
         
         buttons.append([{'text': '« Volver', 'callback_data': 'cmd_start'}])
@@ -174,12 +191,9 @@ class BotCommandHandler:
     def cmd_predictions(self, user: Optional[User] = None) -> Dict:
         """Comando /predictions - Ver predicciones de alto riesgo"""
         # Predicciones recientes de alto riesgo
-        predictions = FailurePrediction.objects.filter(
-            risk_level__in=['HIGH', 'CRITICAL'],
-            prediction_date__gte=timezone.now() - timedelta(days=7)
-        ).order_by('-failure_probability')[:5]
+        predictions = bot_queries.high_risk_predictions(user)
         
-        if not predictions.exists():
+        if not predictions:
             return {
                 'text': (
                     '✅ *Predicciones de Alto Riesgo*\n\n'
@@ -192,7 +206,7 @@ class BotCommandHandler:
             }
         
         text = f'⚠️ *Predicciones de Alto Riesgo*\n\n'
-        text += f'Se detectaron *{predictions.count()}* activos en riesgo:\n\n'
+        text += f'Se detectaron *{len(predictions)}* activos en riesgo:\n\n'
         
         for i, pred in enumerate(predictions, 1):
             risk_emoji = {
@@ -200,14 +214,14 @@ class BotCommandHandler:
                 'MEDIUM': '🟡',
                 'HIGH': '🟠',
                 'CRITICAL': '🔴'
-            }.get(pred.risk_level, '⚪')
+            }.get(pred['risk_level'], '⚪')
             
             text += (
-                f'{risk_emoji} *{pred.asset.name}*\n'
-                f'Probabilidad: {pred.failure_probability:.1%}\n'
-                f'Riesgo: {pred.risk_level}\n'
-                f'Días estimados: {pred.estimated_days_to_failure}\n'
-                f'Fecha: {pred.prediction_date.strftime("%d/%m/%Y")}\n\n'
+                f'{risk_emoji} *{pred["asset__name"]}*\n'
+                f'Probabilidad: {pred["failure_probability"]:.1%}\n'
+                f'Riesgo: {pred["risk_level"]}\n'
+                f'Días estimados: {pred["estimated_days_to_failure"]}\n'
+                f'Fecha: {pred["prediction_date"].strftime("%d/%m/%Y")}\n\n'
             )
         
         return {
@@ -221,10 +235,7 @@ class BotCommandHandler:
         """Comando /assets - Ver estado de activos"""
         try:
             # Activos por estado
-            assets_by_status = {}
-            for asset in Asset.objects.filter(is_archived=False):
-                status = asset.status
-                assets_by_status[status] = assets_by_status.get(status, 0) + 1
+            assets_by_status = bot_queries.asset_status_counts(user)
             
             if not assets_by_status:
                 return {
@@ -286,20 +297,7 @@ class BotCommandHandler:
         
         try:
             # Estadísticas del usuario
-            my_wo_pending = WorkOrder.objects.filter(
-                assigned_to=user,
-                status='Pendiente'
-            ).count()
-            
-            my_wo_in_progress = WorkOrder.objects.filter(
-                assigned_to=user,
-                status='En Progreso'
-            ).count()
-            
-            my_wo_completed = WorkOrder.objects.filter(
-                assigned_to=user,
-                status='Completada'
-            ).count()
+            stats = bot_queries.work_order_stats(user)
             
             # Obtener rol de forma segura
             role_name = 'Sin rol'
@@ -312,9 +310,9 @@ class BotCommandHandler:
                 f'Usuario: @{user.username}\n'
                 f'Rol: {role_name}\n\n'
                 f'📊 *Mis Estadísticas*\n\n'
-                f'⏳ Pendientes: {my_wo_pending}\n'
-                f'🔄 En progreso: {my_wo_in_progress}\n'
-                f'✅ Completadas: {my_wo_completed}\n'
+                f'⏳ Pendientes: {stats["pending"]}\n'
+                f'🔄 En progreso: {stats["in_progress"]}\n'
+                f'✅ Completadas: {stats["completed"]}\n'
             )
             
             return {
@@ -366,7 +364,9 @@ class BotCommandHandler:
     def get_workorder_detail(self, wo_id: str, user: Optional[User] = None) -> Dict:
         """Obtiene el detalle de una orden de trabajo"""
         try:
-            wo = WorkOrder.objects.get(id=wo_id)
+            wo = bot_queries.work_order_detail(wo_id)
+            if wo is None:
+                raise WorkOrder.DoesNotExist
             
             priority_emoji = {
                 'Baja': '🟢',
@@ -384,8 +384,9 @@ class BotCommandHandler:
             
             # Verificar si hay predicción asociada
             prediction_info = ''
-            if hasattr(wo, 'triggering_prediction') and wo.triggering_prediction.exists():
-                pred = wo.triggering_prediction.first()
+            predictions = wo.triggering_prediction.all()
+            if predictions:
+                pred = predictions[0]
                 prediction_info = (
                     f'\n🤖 *Orden generada automáticamente por sistema de predicción ML*\n\n'
                     f'📊 Probabilidad de fallo: {pred.failure_probability:.1%}\n'
@@ -410,12 +411,13 @@ class BotCommandHandler:
             
             # Botones según el estado
             buttons = []
-            if wo.status == 'Pendiente' and wo.assigned_to == user:
+            is_assignee = user is not None and wo.assigned_to_id == user.pk
+            if wo.status == 'Pendiente' and is_assignee:
                 buttons.append([
                     {'text': '✅ Aceptar', 'callback_data': f'wo_accept_{wo.id}'},
                     {'text': '🔄 Iniciar', 'callback_data': f'wo_start_{wo.id}'}
                 ])
-            elif wo.status == 'En Progreso' and wo.assigned_to == user:
+            elif wo.status == 'En Progreso' and is_assignee:
                 buttons.append([
                     {'text': '✅ Completar', 'callback_data': f'wo_complete_{wo.id}'}
                 ])
@@ -434,34 +436,32 @@ class BotCommandHandler:
     
     def accept_workorder(self, wo_id: str, user: Optional[User] = None) -> Dict:
         """Acepta una orden de trabajo"""
-        try:
-            wo = WorkOrder.objects.get(id=wo_id)
-            
-            if wo.assigned_to != user:
-                return {'text': '❌ Esta orden no está asignada a ti'}
-            
-            # Aquí podrías agregar lógica adicional de aceptación
-            
-            return {
-                'text': (
-                    f'✅ Orden {wo.work_order_number} aceptada\n\n'
-                    'Puedes iniciarla cuando estés listo.'
-                ),
-                'buttons': [
-                    [{'text': '🔄 Iniciar Ahora', 'callback_data': f'wo_start_{wo.id}'}],
-                    [{'text': '« Volver', 'callback_data': 'cmd_workorders'}]
-                ]
-            }
-        
-        except WorkOrder.DoesNotExist:
+        wo = bot_queries.work_order_summary(wo_id)
+        if wo is None:
             return {'text': '❌ Orden de trabajo no encontrada'}
+        
+        if user is None or wo['assigned_to_id'] != user.pk:
+            return {'text': '❌ Esta orden no está asignada a ti'}
+        
+        # Aquí podrías agregar lógica adicional de aceptación
+        
+        return {
+            'text': (
+                f'✅ Orden {wo["work_order_number"]} aceptada\n\n'
+                'Puedes iniciarla cuando estés listo.'
+            ),
+            'buttons': [
+                [{'text': '🔄 Iniciar Ahora', 'callback_data': f'wo_start_{wo["id"]}'}],
+                [{'text': '« Volver', 'callback_data': 'cmd_workorders'}]
+            ]
+        }
     
     def start_workorder(self, wo_id: str, user: Optional[User] = None) -> Dict:
         """Inicia una orden de trabajo"""
         try:
-            wo = WorkOrder.objects.get(id=wo_id)
+            wo = WorkOrder.objects.select_related('asset').get(id=wo_id)
             
-            if wo.assigned_to != user:
+            if user is None or wo.assigned_to_id != user.pk:
                 return {'text': '❌ Esta orden no está asignada a ti'}
             
             if wo.status == 'Completada':
@@ -469,6 +469,7 @@ class BotCommandHandler:
             
             wo.status = 'En Progreso'
             wo.save()
+            invalidate_user_responses(user)
             
             return {
                 'text': (
@@ -0,0 +1,129 @@
+"""
+Acceso a datos de los comandos del bot
+
+Cada función resuelve lo que muestra un comando con una sola consulta que
+trae sólo las columnas del mensaje (values()), así los comandos no evalúan
+el mismo queryset varias veces ni cargan relaciones fila por fila. Los
+operadores se limitan a sus activos con un JOIN a UserAssetAccess dentro de
+la misma consulta (filter_by_accessible_assets).
+"""
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.db.models import Count, F, Func, IntegerField, Prefetch, Q, Subquery
+from django.utils import timezone
+
+from apps.assets.models import Asset
+from apps.authentication.models import Role
+from apps.ml_predictions.models import FailurePrediction
+from apps.work_orders.access import filter_by_accessible_assets
+from apps.work_orders.models import WorkOrder
+
+ACTIVE_WORK_ORDER_STATUSES = [WorkOrder.STATUS_PENDING, WorkOrder.STATUS_IN_PROGRESS]
+HIGH_RISK_LEVELS = ['HIGH', 'CRITICAL']
+HIGH_RISK_WINDOW_DAYS = 7
+LIST_LIMIT = 5
+
+
+class SubqueryCount(Subquery):
+    """COUNT(*) de un queryset como subconsulta escalar"""
+    template = '(SELECT COUNT(*) FROM (%(subquery)s) _count)'
+    output_field = IntegerField()
+
+
+def _scope_to_user_assets(queryset, user, lookup: str):
+    """Limitar a los activos del operador"""
+    if user and user.role and user.role.name == Role.OPERADOR:
+        return filter_by_accessible_assets(queryset, user, lookup)
+    return queryset
+
+
+def _high_risk_predictions():
+    return FailurePrediction.objects.filter(
+        risk_level__in=HIGH_RISK_LEVELS,
+        prediction_date__gte=timezone.now() - timedelta(days=HIGH_RISK_WINDOW_DAYS)
+    )
+
+
+def system_status() -> Dict[str, int]:
+    """
+    Totales de /status en una consulta
+
+    Returns:
+        Dict con total_assets, active_work_orders y high_risk_predictions
+    """
+    return Asset.objects.filter(is_archived=False).order_by().annotate(
+        total_assets=Func(F('pk'), function='COUNT', output_field=IntegerField()),
+        active_work_orders=SubqueryCount(
+            WorkOrder.objects.filter(status__in=ACTIVE_WORK_ORDER_STATUSES).order_by().values('pk')
+        ),
+        high_risk_predictions=SubqueryCount(_high_risk_predictions().order_by().values('pk')),
+    ).values('total_assets', 'active_work_orders', 'high_risk_predictions')[0]
+
+
+def active_work_orders(user, limit: int = LIST_LIMIT) -> List[Dict]:
+    """Órdenes activas asignadas al usuario, las más próximas primero"""
+    return list(
+        WorkOrder.objects.filter(
+            assigned_to=user,
+            status__in=ACTIVE_WORK_ORDER_STATUSES
+        ).order_by('scheduled_date', '-priority').values(
+            'id', 'work_order_number', 'title', 'priority', 'status', 'scheduled_date', 'asset__name'
+        )[:limit]
+    )
+
+
+def high_risk_predictions(user, limit: int = LIST_LIMIT) -> List[Dict]:
+    """Predicciones de alto riesgo recientes, las más probables primero"""
+    return list(
+        _scope_to_user_assets(_high_risk_predictions(), user, 'asset').order_by(
+            '-failure_probability'
+        ).values(
+            'asset__name', 'failure_probability', 'risk_level', 'estimated_days_to_failure', 'prediction_date'
+        )[:limit]
+    )
+
+
+def asset_status_counts(user) -> Dict[str, int]:
+    """Activos no archivados por estado"""
+    return dict(
+        _scope_to_user_assets(Asset.objects.filter(is_archived=False), user, 'pk')
+        .order_by('status')
+        .values('status')
+        .annotate(count=Count('pk'))
+        .values_list('status', 'count')
+    )
+
+
+def work_order_stats(user) -> Dict[str, int]:
+    """Órdenes del usuario pendientes, en progreso y completadas"""
+    return WorkOrder.objects.filter(assigned_to=user).aggregate(
+        pending=Count('pk', filter=Q(status=WorkOrder.STATUS_PENDING)),
+        in_progress=Count('pk', filter=Q(status=WorkOrder.STATUS_IN_PROGRESS)),
+        completed=Count('pk', filter=Q(status=WorkOrder.STATUS_COMPLETED)),
+    )
+
+
+def work_order_detail(wo_id) -> Optional[WorkOrder]:
+    """
+    Orden con activo, asignado y predicciones que la generaron (dos consultas)
+
+    Returns:
+        WorkOrder o None si no existe
+    """
+    return WorkOrder.objects.select_related('asset', 'assigned_to').prefetch_related(
+        Prefetch(
+            'triggering_prediction',
+            queryset=FailurePrediction.objects.only(
+                'id', 'work_order_created', 'failure_probability', 'risk_level',
+                'estimated_days_to_failure', 'recommended_action', 'prediction_date'
+            )
+        )
+    ).filter(pk=wo_id).first()
+
+
+def work_order_summary(wo_id) -> Optional[Dict]:
+    """Datos mínimos de una orden para las acciones de los botones"""
+    return WorkOrder.objects.filter(pk=wo_id).values(
+        'id', 'work_order_number', 'status', 'assigned_to_id', 'asset__name'
+    ).first()
@@ -1,3 +1,48 @@
 """
 Canales de comunicación del bot omnicanal
+
+Los canales disponibles se registran en settings.OMNICHANNEL_CHANNEL_CLASSES
+({channel_type: 'ruta.a.ClaseDelCanal'}); un canal nuevo sólo necesita una
+subclase de BaseChannel y su entrada en ese dict. Los envíos pasan siempre
+por la cola de salida (ver outbound.py), así que un canal nunca agrega I/O
+síncrona al camino de una petición.
 """
+import logging
+from functools import lru_cache
+from typing import Dict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL_CLASSES = {
+    'TELEGRAM': 'apps.omnichannel_bot.channels.telegram.TelegramChannel',
+    'EMAIL': 'apps.omnichannel_bot.channels.email.EmailChannel',
+}
+
+
+@lru_cache(maxsize=None)
+def get_channel_classes() -> Dict:
+    """
+    Clases de canal registradas, importadas una vez por proceso
+
+    Returns:
+        dict: {channel_type: clase}. Las rutas que no se pueden importar se
+        omiten (con un error en el log) para no tumbar los demás canales.
+    """
+    classes = {}
+    for channel_type, path in getattr(settings, 'OMNICHANNEL_CHANNEL_CLASSES', DEFAULT_CHANNEL_CLASSES).items():
+        try:
+            classes[channel_type] = import_string(path)
+        except ImportError as e:
+            logger.error(f"No se pudo cargar el canal {channel_type} ({path}): {e}")
+    return classes
+
+
+@receiver(setting_changed)
+def _reset_channel_classes(setting, **kwargs):
+    if setting == 'OMNICHANNEL_CHANNEL_CLASSES':
+        get_channel_classes.cache_clear()
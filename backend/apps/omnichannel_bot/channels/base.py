@@ -25,7 +25,8 @@ class BaseChannel(ABC):
         Envía un mensaje a través del canal
         
         Returns:
-            Dict con 'success': bool, 'message_id': str, 'error': str (opcional)
+            Dict con 'success': bool, 'message_id': str, 'error': str (opcional),
+            'retryable': bool y 'retry_after': segundos (opcionales, en errores)
         """
         pass
     
@@ -34,6 +35,11 @@ class BaseChannel(ABC):
         """Envía una notificación formateada"""
         pass
     
+    @classmethod
+    def default_recipient(cls, user) -> str:
+        """Destino a usar si la preferencia del usuario no indica channel_user_id"""
+        return ''
+    
     def format_message(self, title: str, message: str) -> str:
         """Formatea el mensaje según el canal"""
         return f"*{title}*\n\n{message}"
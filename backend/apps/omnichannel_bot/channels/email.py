@@ -0,0 +1,186 @@
+"""
+Canal de correo electrónico (SMTP) para el bot omnicanal
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.backends.smtp import EmailBackend
+from django.core.mail.message import make_msgid
+
+from .base import BaseChannel
+
+logger = logging.getLogger(__name__)
+
+# Opciones de ChannelConfig.config que se pasan al EmailBackend de Django;
+# las que faltan toman los valores de settings.EMAIL_*
+SMTP_OPTIONS = ('host', 'port', 'username', 'password', 'use_tls', 'use_ssl', 'timeout')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class SMTPConnectionPool:
+    """
+    Conexiones SMTP abiertas y reutilizables
+
+    Los hilos de la cola de salida toman una conexión, envían y la
+    devuelven, así que un lote sale por unas pocas conexiones persistentes
+    en vez de conectar y autenticarse por cada mensaje. Las conexiones
+    ociosas más de idle_timeout segundos se cierran y se reabren al usarlas
+    (los servidores SMTP cortan las conexiones ociosas).
+    """
+
+    def __init__(self, size: int, idle_timeout: float, **options):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.options = options
+        self._idle = queue.LifoQueue()
+
+    @contextmanager
+    def connection(self):
+        """Presta una conexión abierta; se descarta si el envío falla"""
+        backend = None
+        while backend is None:
+            try:
+                backend, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used > self.idle_timeout:
+                backend.close()
+                backend = None
+
+        if backend is None:
+            backend = EmailBackend(fail_silently=False, **self.options)
+            backend.open()
+
+        try:
+            yield backend
+        except Exception:
+            backend.close()
+            raise
+
+        if self._idle.qsize() < self.size:
+            self._idle.put((backend, time.monotonic()))
+        else:
+            backend.close()
+
+    def close(self):
+        """Cierra todas las conexiones ociosas"""
+        while True:
+            try:
+                backend, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            backend.close()
+
+
+def get_pool(options: Dict) -> SMTPConnectionPool:
+    """Pool compartido por servidor y usuario SMTP (sobrevive a los MessageRouter)"""
+    key = tuple(sorted(options.items()))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = SMTPConnectionPool(
+                    size=getattr(settings, 'OMNICHANNEL_SEND_CONCURRENCY', 8),
+                    idle_timeout=getattr(settings, 'OMNICHANNEL_SMTP_IDLE_SECONDS', 60),
+                    **options
+                )
+                _pools[key] = pool
+    return pool
+
+
+class EmailChannel(BaseChannel):
+    """
+    Canal de comunicación vía SMTP
+    
+    config admite host, port, username, password, use_tls, use_ssl,
+    timeout y from_email. El destino (chat_id) es la dirección de correo;
+    si la preferencia no la indica se usa el email del usuario.
+    """
+    
+    def __init__(self, config: Dict):
+        self.options = {name: config[name] for name in SMTP_OPTIONS if name in config}
+        self.from_email = config.get('from_email') or settings.DEFAULT_FROM_EMAIL
+        self.pool = get_pool(self.options)
+        super().__init__(config)
+    
+    def validate_config(self) -> bool:
+        """Valida la configuración sin conectar (la conexión se abre al enviar)"""
+        if not self.from_email or not self.options.get('host', settings.EMAIL_HOST):
+            logger.error("Canal de email sin host o from_email")
+            return False
+        return True
+    
+    @classmethod
+    def default_recipient(cls, user) -> str:
+        return user.email or ''
+    
+    def format_message(self, title: str, message: str) -> str:
+        """El título va en el asunto; el cuerpo es el mensaje"""
+        return message
+    
+    def send_message(self, chat_id: str, title: str, message: str, **kwargs) -> Dict:
+        """
+        Envía un correo por una conexión del pool
+        
+        Args:
+            chat_id: Dirección de correo del destinatario
+            title: Asunto
+            message: Cuerpo en texto plano
+        
+        Returns:
+            Dict con resultado del envío
+        """
+        if not self.is_configured:
+            return {'success': False, 'error': 'Canal de email no configurado correctamente'}
+        if not chat_id:
+            return {'success': False, 'error': 'Destinatario sin dirección de correo', 'retryable': False}
+        
+        message_id = make_msgid(domain=self.from_email.rpartition('@')[2] or None)
+        email = EmailMessage(
+            subject=title,
+            body=self.format_message(title, message),
+            from_email=self.from_email,
+            to=[chat_id],
+            headers={'Message-ID': message_id}
+        )
+        
+        try:
+            try:
+                with self.pool.connection() as backend:
+                    backend.send_messages([email])
+            except smtplib.SMTPServerDisconnected:
+                # La conexión reutilizada se cerró del lado del servidor: un reintento con una nueva
+                with self.pool.connection() as backend:
+                    backend.send_messages([email])
+        except smtplib.SMTPRecipientsRefused as e:
+            return {'success': False, 'error': f'Destinatario rechazado: {e.recipients}', 'retryable': False}
+        except smtplib.SMTPResponseException as e:
+            # 4xx son errores temporales del servidor; 5xx, permanentes
+            return {
+                'success': False,
+                'error': f'SMTP {e.smtp_code}: {e.smtp_error!r}',
+                'retryable': 400 <= e.smtp_code < 500
+            }
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Error enviando email a {chat_id}: {str(e)}")
+            return {'success': False, 'error': str(e), 'retryable': True}
+        
+        return {'success': True, 'message_id': message_id, 'chat_id': chat_id}
+    
+    def send_notification(self, chat_id: str, notification_data: Dict) -> Dict:
+        """Envía una notificación como correo (las acciones no aplican a email)"""
+        return self.send_message(
+            chat_id,
+            notification_data.get('title', 'Notificación'),
+            notification_data.get('message', '')
+        )
@@ -1,13 +1,41 @@
 """
 Canal de Telegram para el bot omnicanal
 """
+import threading
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional
 from .base import BaseChannel
 import logging
 
 logger = logging.getLogger(__name__)
 
+TELEGRAM_API_URL = 'https://api.telegram.org'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Sesión HTTP compartida con la Bot API
+    
+    Reutiliza conexiones keep-alive (sin un handshake TLS por mensaje) y su
+    pool admite los envíos concurrentes de la cola de salida.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'OMNICHANNEL_SEND_CONCURRENCY', 8)
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
 
 class TelegramChannel(BaseChannel):
     """
@@ -16,7 +44,9 @@ class TelegramChannel(BaseChannel):
     
     def __init__(self, config: Dict):
         self.bot_token = config.get('bot_token', '')
-        self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        # api_url permite apuntar a otro servidor de la Bot API (p. ej. fake_telegram)
+        self.api_url = f"{config.get('api_url', TELEGRAM_API_URL).rstrip('/')}/bot{self.bot_token}"
+        self.session = get_session()
         super().__init__(config)
     
     def validate_config(self) -> bool:
@@ -26,7 +56,7 @@ class TelegramChannel(BaseChannel):
             return False
         
         try:
-            response = requests.get(f"{self.api_url}/getMe", timeout=5)
+            response = self.session.get(f"{self.api_url}/getMe", timeout=5)
             if response.status_code == 200:
                 bot_info = response.json()
                 logger.info(f"Bot de Telegram conectado: {bot_info.get('result', {}).get('username')}")
@@ -81,7 +111,7 @@ class TelegramChannel(BaseChannel):
         
         try:
             logger.info("[TELEGRAM] Enviando petición POST a Telegram API...")
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/sendMessage",
                 json=payload,
                 timeout=10
@@ -99,25 +129,32 @@ class TelegramChannel(BaseChannel):
                     'chat_id': str(result['result']['chat']['id'])
                 }
             else:
-                error_msg = response.json().get('description', 'Error desconocido')
+                body = response.json()
+                error_msg = body.get('description', 'Error desconocido')
                 logger.error(f"[TELEGRAM] ❌ Error al enviar mensaje: {error_msg}")
                 logger.error(f"[TELEGRAM] Respuesta completa: {response.text}")
+                # 429 (límite de tasa) y 5xx son temporales; el resto (chat inexistente,
+                # bot bloqueado, Markdown inválido) no se corrige reintentando
                 return {
                     'success': False,
-                    'error': error_msg
+                    'error': error_msg,
+                    'retryable': response.status_code == 429 or response.status_code >= 500,
+                    'retry_after': body.get('parameters', {}).get('retry_after')
                 }
         
         except requests.exceptions.Timeout:
             logger.error("[TELEGRAM] ❌ Timeout al enviar mensaje a Telegram API")
             return {
                 'success': False,
-                'error': 'Timeout al conectar con Telegram'
+                'error': 'Timeout al conectar con Telegram',
+                'retryable': True
             }
         except requests.exceptions.ConnectionError as e:
             logger.error(f"[TELEGRAM] ❌ Error de conexión: {str(e)}")
             return {
                 'success': False,
-                'error': f'Error de conexión: {str(e)}'
+                'error': f'Error de conexión: {str(e)}',
+                'retryable': True
             }
         except Exception as e:
             logger.error(f"[TELEGRAM] ❌ Excepción al enviar mensaje: {str(e)}")
@@ -125,7 +162,8 @@ class TelegramChannel(BaseChannel):
             logger.error(f"[TELEGRAM] Traceback: {traceback.format_exc()}")
             return {
                 'success': False,
-                'error': str(e)
+                'error': str(e),
+                'retryable': True
             }
     
     def send_notification(self, chat_id: str, notification_data: Dict) -> Dict:
@@ -189,7 +227,7 @@ class TelegramChannel(BaseChannel):
                     'caption': caption
                 }
                 
-                response = requests.post(
+                response = self.session.post(
                     f"{self.api_url}/sendDocument",
                     data=data,
                     files=files,
@@ -0,0 +1,141 @@
+"""
+Servidor SMTP local para pruebas del canal de email
+
+Acepta el subconjunto de SMTP que usa EmailBackend de Django (EHLO/HELO,
+MAIL, RCPT, DATA, RSET, NOOP, QUIT) y guarda los correos en memoria en vez
+de entregarlos. Permite simular:
+
+- reject: {dirección: código} para rechazar destinatarios en RCPT
+  (4xx temporal, 5xx permanente)
+
+server.connections cuenta las conexiones abiertas, para verificar que los
+envíos reutilizan el pool. Para probar a mano contra cualquier servidor de
+depuración (este, `python -m aiosmtpd -n` o MailHog) basta con apuntar
+host y port de la config del canal EMAIL.
+"""
+import socketserver
+import threading
+from email import message_from_bytes, policy
+from typing import Dict, List
+
+
+class FakeSMTPServer:
+    """
+    Servidor SMTP falso en un hilo propio
+
+    Uso:
+        with FakeSMTPServer() as server:
+            channel = EmailChannel({'host': server.host, 'port': server.port, 'from_email': 'cmms@test.com'})
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.reject: Dict[str, int] = {}
+        self.messages: List[Dict] = []
+        self.connections = 0
+
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'FakeSMTPServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def emails(self, to=None) -> List:
+        """Correos recibidos (email.message.EmailMessage), opcionalmente de un destinatario"""
+        with self._lock:
+            return [
+                message_from_bytes(message['data'], policy=policy.default)
+                for message in self.messages
+                if to is None or to in message['rcpt_to']
+            ]
+
+    def _handler_class(self):
+        owner = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, code, text):
+                self.wfile.write(f'{code} {text}\r\n'.encode())
+
+            def handle(self):
+                with owner._lock:
+                    owner.connections += 1
+                self.reply(220, 'fake-smtp ESMTP')
+                mail_from, rcpt_to = None, []
+
+                for line in self.rfile:
+                    command = line.decode('utf-8', 'replace').rstrip('\r\n')
+                    verb = command[:4].upper()
+
+                    if verb == 'EHLO':
+                        self.wfile.write(b'250-fake-smtp\r\n250 8BITMIME\r\n')
+                    elif verb in ('HELO', 'NOOP'):
+                        self.reply(250, 'OK')
+                    elif verb == 'RSET':
+                        mail_from, rcpt_to = None, []
+                        self.reply(250, 'OK')
+                    elif verb == 'MAIL':
+                        mail_from, rcpt_to = _address(command), []
+                        self.reply(250, 'OK')
+                    elif verb == 'RCPT':
+                        address = _address(command)
+                        code = owner.reject.get(address)
+                        if code:
+                            self.reply(code, f'Recipient {address} rejected')
+                        else:
+                            rcpt_to.append(address)
+                            self.reply(250, 'OK')
+                    elif verb == 'DATA':
+                        if not rcpt_to:
+                            self.reply(503, 'RCPT first')
+                            continue
+                        self.reply(354, 'End data with <CR><LF>.<CR><LF>')
+                        data = self._read_data()
+                        with owner._lock:
+                            owner.messages.append({'mail_from': mail_from, 'rcpt_to': rcpt_to, 'data': data})
+                        mail_from, rcpt_to = None, []
+                        self.reply(250, 'OK: queued')
+                    elif verb == 'QUIT':
+                        self.reply(221, 'Bye')
+                        return
+                    else:
+                        self.reply(502, 'Command not implemented')
+
+            def _read_data(self):
+                lines = []
+                for line in self.rfile:
+                    if line in (b'.\r\n', b'.\n'):
+                        break
+                    # Dot-stuffing (RFC 5321 4.5.2)
+                    lines.append(line[1:] if line.startswith(b'..') else line)
+                return b''.join(lines)
+
+        return Handler
+
+
+def _address(command: str) -> str:
+    """Dirección de MAIL FROM:<...> o RCPT TO:<...>"""
+    value = command.split(':', 1)[1] if ':' in command else ''
+    return value.strip().split(' ', 1)[0].strip('<>')
@@ -0,0 +1,289 @@
+"""
+Servidor local que imita la Telegram Bot API
+
+Sirve para pruebas de carga y de integración sin tocar Telegram: un
+TelegramChannel con config {'api_url': server.url} le envía todas sus
+llamadas. Implementa los métodos que usa el bot (sendMessage,
+editMessageText, answerCallbackQuery, setMyCommands, getMe, getUpdates,
+setWebhook, deleteWebhook, getWebhookInfo) y permite simular:
+
+- latency: segundos de espera antes de responder cada llamada
+- error_rate: fracción de llamadas que responden 500
+- rate_limit: envíos por segundo admitidos; el exceso recibe 429 con
+  parameters.retry_after, como la API real
+
+Las llamadas recibidas quedan en server.calls para verificar respuestas y
+medir latencias (ver load_test.py). Ejecutar standalone con
+`manage.py fake_telegram_api`.
+"""
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlparse
+
+# Métodos limitados por rate_limit (los que envían mensajes al chat)
+SEND_METHODS = {'sendMessage', 'sendDocument', 'editMessageText'}
+
+
+class FakeTelegramServer:
+    """
+    Bot API falsa en un hilo propio
+
+    Uso:
+        with FakeTelegramServer(latency=0.05, rate_limit=30) as server:
+            channel = TelegramChannel({'bot_token': 'x', 'api_url': server.url})
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = 0,
+        retry_after: int = 1,
+        seed: Optional[int] = None
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.calls: List[Dict] = []
+        self.webhook = {'url': '', 'secret_token': ''}
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._updates_ready = threading.Condition(self._lock)
+        self._updates: List[Dict] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._sent_window = deque()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeTelegramServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Inspección y updates entrantes
+    # ------------------------------------------------------------------
+
+    def add_update(self, update: Dict) -> Dict:
+        """Encola un update para getUpdates (asigna update_id si falta)"""
+        with self._updates_ready:
+            update = dict(update)
+            update.setdefault('update_id', self._next_update_id)
+            self._next_update_id = max(self._next_update_id, update['update_id']) + 1
+            self._updates.append(update)
+            self._updates_ready.notify_all()
+        return update
+
+    def sent_messages(self, chat_id=None) -> List[Dict]:
+        """Llamadas sendMessage respondidas con éxito (opcionalmente de un chat)"""
+        with self._lock:
+            return [
+                call for call in self.calls
+                if call['method'] == 'sendMessage' and call['status'] == 200
+                and (chat_id is None or str(call['params'].get('chat_id')) == str(chat_id))
+            ]
+
+    def wait_for_messages(self, count: int, timeout: float = 10.0) -> bool:
+        """Espera hasta recibir count mensajes enviados con éxito"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if len(self.sent_messages()) >= count:
+                return True
+            time.sleep(0.01)
+        return len(self.sent_messages()) >= count
+
+    # ------------------------------------------------------------------
+    # Métodos de la Bot API
+    # ------------------------------------------------------------------
+
+    def dispatch(self, method: str, params: Dict):
+        """
+        Resuelve una llamada
+
+        Returns:
+            Tupla (status HTTP, cuerpo JSON)
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 500, _error(500, 'Internal Server Error: injected by fake_telegram')
+
+            if method in SEND_METHODS and self.rate_limit and not self._acquire_send_slot():
+                body = _error(429, f'Too Many Requests: retry after {self.retry_after}')
+                body['parameters'] = {'retry_after': self.retry_after}
+                return 429, body
+
+        if method == 'getUpdates':
+            return self._get_updates(params)
+
+        with self._lock:
+            handler = getattr(self, f'_api_{method}', None)
+            if handler is None:
+                return 404, _error(404, 'Not Found: method not found')
+            return handler(params)
+
+    def _acquire_send_slot(self) -> bool:
+        now = time.monotonic()
+        while self._sent_window and now - self._sent_window[0] >= 1.0:
+            self._sent_window.popleft()
+        if len(self._sent_window) >= self.rate_limit:
+            return False
+        self._sent_window.append(now)
+        return True
+
+    def _message(self, params: Dict) -> Dict:
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': _as_int(params.get('chat_id')), 'type': 'private'},
+            'text': params.get('text', ''),
+        }
+
+    def _api_sendMessage(self, params):
+        if not params.get('chat_id') or not params.get('text'):
+            return 400, _error(400, 'Bad Request: chat_id and text are required')
+        return 200, _ok(self._message(params))
+
+    def _api_sendDocument(self, params):
+        return 200, _ok(self._message(params))
+
+    def _api_editMessageText(self, params):
+        return 200, _ok(self._message(params))
+
+    def _api_answerCallbackQuery(self, params):
+        return 200, _ok(True)
+
+    def _api_setMyCommands(self, params):
+        return 200, _ok(True)
+
+    def _api_getMe(self, params):
+        return 200, _ok({'id': 1, 'is_bot': True, 'first_name': 'Fake CMMS', 'username': 'fake_cmms_bot'})
+
+    def _api_setWebhook(self, params):
+        self.webhook = {'url': params.get('url', ''), 'secret_token': params.get('secret_token', '')}
+        return 200, _ok(True)
+
+    def _api_deleteWebhook(self, params):
+        self.webhook = {'url': '', 'secret_token': ''}
+        return 200, _ok(True)
+
+    def _api_getWebhookInfo(self, params):
+        return 200, _ok({'url': self.webhook['url'], 'pending_update_count': len(self._updates)})
+
+    def _get_updates(self, params):
+        """getUpdates con long polling: confirma los updates < offset y espera hasta timeout"""
+        offset = _as_int(params.get('offset', 0))
+        limit = _as_int(params.get('limit', 100)) or 100
+        timeout = float(params.get('timeout', 0) or 0)
+        deadline = time.monotonic() + timeout
+
+        with self._updates_ready:
+            if self.webhook['url']:
+                return 409, _error(409, "Conflict: can't use getUpdates method while webhook is active")
+
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._updates_ready.wait(remaining)
+                self._updates = [update for update in self._updates if update['update_id'] >= offset]
+            return 200, _ok(self._updates[:limit])
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self._handle()
+
+            def do_POST(self):
+                self._handle()
+
+            def _handle(self):
+                parsed = urlparse(self.path)
+                parts = parsed.path.strip('/').split('/')
+                params = dict(parse_qsl(parsed.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    body = self.rfile.read(length)
+                    if 'json' in (self.headers.get('Content-Type') or ''):
+                        params.update(json.loads(body or b'{}'))
+                    else:
+                        params.update(parse_qsl(body.decode('utf-8')))
+
+                if len(parts) != 2 or not parts[0].startswith('bot'):
+                    status, payload = 404, _error(404, 'Not Found')
+                    method = parsed.path
+                else:
+                    method = parts[1]
+                    status, payload = server.dispatch(method, params)
+
+                with server._lock:
+                    server.calls.append({
+                        'method': method,
+                        'params': params,
+                        'status': status,
+                        'at': time.monotonic(),
+                    })
+
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _ok(result) -> Dict:
+    return {'ok': True, 'result': result}
+
+
+def _error(code: int, description: str) -> Dict:
+    return {'ok': False, 'error_code': code, 'description': description}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
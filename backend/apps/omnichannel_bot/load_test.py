@@ -0,0 +1,221 @@
+"""
+Prueba de carga del camino comando -> respuesta del bot
+
+Genera updates sintéticos (un chat por update, con comandos variados), los
+envía a telegram_webhook y mide:
+
+- ack: lo que tarda el webhook en responder a Telegram
+- reply: desde el envío del update hasta que el sendMessage de respuesta
+  llega a la Bot API (normalmente FakeTelegramServer)
+
+Sin webhook_url los updates se envían en proceso con el test client de
+Django y se procesan en línea (TELEGRAM_UPDATES_ASYNC desactivado), así que
+el ack incluye el procesamiento, y la Bot API falsa se configura sólo en
+memoria. Con webhook_url se mide un despliegue real (servidor web + workers
+de Celery apuntando a la Bot API falsa): eso exige escribir el api_url en
+ChannelConfig, así que bot_load_test sólo lo hace con DEBUG o
+--i-know-this-is-not-production.
+"""
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.test import Client, override_settings
+
+from .lookups import get_channel_configs
+from .models import ChannelConfig, TelegramUpdate
+
+WEBHOOK_PATH = '/api/v1/bot/webhook/telegram/'
+DEFAULT_COMMANDS = ['/status', '/help', '/workorders', '/predictions', '/assets', '/start', 'hola']
+
+# Chats sintéticos, fuera del rango de ids reales de Telegram
+SYNTHETIC_CHAT_BASE = 9_000_000_000_000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (0 si no hay valores)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_updates(count: int, first_update_id: int, commands: List[str] = None) -> List[Dict]:
+    """Updates de mensaje, cada uno en su propio chat sintético"""
+    commands = commands or DEFAULT_COMMANDS
+    now = int(time.time())
+    return [
+        {
+            'update_id': first_update_id + i,
+            'message': {
+                'message_id': i + 1,
+                'date': now,
+                'chat': {'id': SYNTHETIC_CHAT_BASE + first_update_id + i, 'type': 'private'},
+                'from': {'id': SYNTHETIC_CHAT_BASE + first_update_id + i, 'first_name': 'Carga'},
+                'text': commands[i % len(commands)],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def next_update_id() -> int:
+    return (TelegramUpdate.objects.aggregate(last=Max('update_id'))['last'] or 0) + 1
+
+
+@contextmanager
+def telegram_api(api_url: str, persist: bool = False):
+    """
+    Apunta el canal de Telegram a otra Bot API mientras dura el bloque
+
+    Por defecto el cambio es sólo en memoria de este proceso
+    (OMNICHANNEL_CHANNEL_OVERRIDES): el ChannelConfig real no se toca y el
+    tráfico de los demás procesos sigue yendo a Telegram. Con persist=True
+    se escribe en ChannelConfig para que un despliegue (webhook_url) use la
+    Bot API falsa, y se restaura al salir; nunca en producción.
+    """
+    if not persist:
+        override = {'api_url': api_url}
+        if not get_channel_configs().get('TELEGRAM', {}).get('bot_token'):
+            override['bot_token'] = 'load-test'
+        overrides = {**getattr(settings, 'OMNICHANNEL_CHANNEL_OVERRIDES', {}), 'TELEGRAM': override}
+        with override_settings(OMNICHANNEL_CHANNEL_OVERRIDES=overrides):
+            yield override
+        return
+
+    config, created = ChannelConfig.objects.get_or_create(channel_type='TELEGRAM')
+    original = (config.is_enabled, dict(config.config))
+    config.is_enabled = True
+    config.config = {**config.config, 'bot_token': config.config.get('bot_token') or 'load-test', 'api_url': api_url}
+    config.save(update_fields=['is_enabled', 'config', 'updated_at'])
+    try:
+        yield config.config
+    finally:
+        if created:
+            config.delete()
+        else:
+            config.is_enabled, config.config = original
+            config.save(update_fields=['is_enabled', 'config', 'updated_at'])
+
+
+class LoadTest:
+    """
+    Envía updates al webhook y cruza cada uno con su respuesta en la Bot API
+
+    Args:
+        api: FakeTelegramServer que recibe las respuestas del bot
+        concurrency: Envíos simultáneos al webhook
+        webhook_url: URL de un servidor desplegado (None = en proceso)
+        reply_timeout: Segundos a esperar las respuestas pendientes al final
+    """
+
+    def __init__(self, api, concurrency: int = 8, webhook_url: Optional[str] = None, reply_timeout: float = 30.0):
+        self.api = api
+        self.concurrency = max(1, concurrency)
+        self.webhook_url = webhook_url
+        self.reply_timeout = reply_timeout
+        self._local = threading.local()
+
+    def run(self, updates: List[Dict]) -> Dict:
+        """Ejecuta la prueba y devuelve el informe (ver report)"""
+        sent_at = {}
+        ack_ms = []
+        errors = []
+        lock = threading.Lock()
+
+        def send(update):
+            chat_id = str(update['message']['chat']['id'])
+            started = time.monotonic()
+            try:
+                status = self._post(update)
+            except Exception as e:
+                status = str(e)
+            elapsed = (time.monotonic() - started) * 1000
+            with lock:
+                sent_at[chat_id] = started
+                if status == 200:
+                    ack_ms.append(elapsed)
+                else:
+                    errors.append(status)
+
+        started = time.monotonic()
+        with self._settings():
+            if self.concurrency == 1:
+                for update in updates:
+                    send(update)
+            else:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    list(executor.map(self._in_thread(send), updates))
+        acked = time.monotonic()
+
+        self.api.wait_for_messages(len(updates) - len(errors), timeout=self.reply_timeout)
+        return self.report(updates, sent_at, ack_ms, errors, started, acked)
+
+    def report(self, updates, sent_at, ack_ms, errors, started, acked) -> Dict:
+        """
+        Returns:
+            Dict con updates, acked, replied, errors, duration_s,
+            ack_throughput, reply_throughput y latencias p50/p95/max en ms
+        """
+        reply_ms = []
+        last_reply = acked
+        for message in self.api.sent_messages():
+            chat_id = str(message['params'].get('chat_id'))
+            if chat_id in sent_at:
+                reply_ms.append((message['at'] - sent_at.pop(chat_id)) * 1000)
+                last_reply = max(last_reply, message['at'])
+
+        duration = max(last_reply - started, 1e-9)
+        return {
+            'updates': len(updates),
+            'acked': len(ack_ms),
+            'replied': len(reply_ms),
+            'errors': len(errors),
+            'duration_s': round(duration, 3),
+            'ack_throughput': round(len(ack_ms) / max(acked - started, 1e-9), 1),
+            'reply_throughput': round(len(reply_ms) / duration, 1),
+            'ack_p50_ms': round(percentile(ack_ms, 50), 1),
+            'ack_p95_ms': round(percentile(ack_ms, 95), 1),
+            'reply_p50_ms': round(percentile(reply_ms, 50), 1),
+            'reply_p95_ms': round(percentile(reply_ms, 95), 1),
+            'reply_max_ms': round(max(reply_ms, default=0), 1),
+        }
+
+    def _settings(self):
+        if self.webhook_url:
+            return override_settings()
+        # En proceso no hay workers: el update se procesa al confirmar su transacción
+        return override_settings(TELEGRAM_UPDATES_ASYNC=False, ALLOWED_HOSTS=['*'])
+
+    def _headers(self) -> Dict:
+        secret = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
+        return {'X-Telegram-Bot-Api-Secret-Token': secret} if secret else {}
+
+    def _post(self, update: Dict):
+        if self.webhook_url:
+            response = requests.post(self.webhook_url, json=update, headers=self._headers(), timeout=30)
+            return response.status_code
+
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client()
+        response = client.post(WEBHOOK_PATH, data=update, content_type='application/json', headers=self._headers())
+        return response.status_code
+
+    @staticmethod
+    def _in_thread(func):
+        """Cierra la conexión a la base de datos de cada hilo del pool"""
+        def wrapper(*args):
+            try:
+                return func(*args)
+            finally:
+                connection.close()
+        return wrapper
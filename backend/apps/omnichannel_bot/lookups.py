@@ -0,0 +1,115 @@
+"""
+Búsquedas cacheadas del bot omnicanal
+
+Cada interacción con el bot necesitaba la configuración de los canales
+habilitados y el usuario vinculado a un chat. Ambas cosas cambian muy poco,
+así que se guardan en el cache de Django y se invalidan desde signals.py al
+guardar o borrar ChannelConfig y UserChannelPreference.
+
+La invalidación sólo llega a todos los procesos (gunicorn, cola de salida,
+workers de updates) si el cache es compartido: en producción CACHES apunta
+a Redis (CACHE_REDIS_URL). Con LocMemCache, pensado para un solo proceso de
+desarrollo, los demás procesos verían valores viejos hasta el timeout.
+
+Los cambios con QuerySet.update() o bulk_create() no disparan signals: en
+esos casos se expiran por OMNICHANNEL_CACHE_TIMEOUT o con invalidate_*().
+"""
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import ChannelConfig, UserChannelPreference
+
+CHANNEL_CONFIGS_KEY = 'omnichannel:channel_configs'
+CHAT_USER_KEY = 'omnichannel:chat_user:{channel_type}:{chat_id}'
+
+_MISSING = object()
+
+
+def _timeout() -> int:
+    return getattr(settings, 'OMNICHANNEL_CACHE_TIMEOUT', 300)
+
+
+def _chat_user_key(channel_type: str, chat_id) -> str:
+    return CHAT_USER_KEY.format(channel_type=channel_type, chat_id=chat_id)
+
+
+def _delete(keys):
+    """Borra las claves ahora y otra vez al confirmar la transacción"""
+    cache.delete_many(keys)
+    # Una lectura concurrente pudo volver a cachear el valor anterior
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_channel_configs() -> Dict[str, dict]:
+    """
+    Configuración de los canales habilitados
+
+    settings.OMNICHANNEL_CHANNEL_OVERRIDES ({channel_type: config}) se aplica
+    en memoria sobre la de la base de datos, habilitando el canal si hace
+    falta; la usa la prueba de carga para apuntar a la Bot API falsa sin
+    tocar ChannelConfig.
+
+    Returns:
+        Dict {channel_type: config}
+    """
+    configs = cache.get(CHANNEL_CONFIGS_KEY)
+    if configs is None:
+        configs = dict(
+            ChannelConfig.objects.filter(is_enabled=True).values_list('channel_type', 'config')
+        )
+        cache.set(CHANNEL_CONFIGS_KEY, configs, _timeout())
+
+    overrides = getattr(settings, 'OMNICHANNEL_CHANNEL_OVERRIDES', None)
+    if overrides:
+        configs = {**configs}
+        for channel_type, override in overrides.items():
+            configs[channel_type] = {**configs.get(channel_type, {}), **override}
+    return configs
+
+
+def get_chat_user_id(channel_type: str, chat_id) -> Optional[int]:
+    """ID del usuario vinculado a un chat (None si el chat no está vinculado)"""
+    key = _chat_user_key(channel_type, chat_id)
+    user_id = cache.get(key, _MISSING)
+    if user_id is _MISSING:
+        user_id = UserChannelPreference.objects.filter(
+            channel_type=channel_type,
+            channel_user_id=str(chat_id)
+        ).values_list('user_id', flat=True).first()
+        # Los chats sin vincular también se cachean
+        cache.set(key, user_id, _timeout())
+    return user_id
+
+
+def get_chat_user(channel_type: str, chat_id):
+    """
+    Usuario vinculado a un chat, con su rol cargado
+
+    Returns:
+        User o None si el chat no está vinculado
+    """
+    user_id = get_chat_user_id(channel_type, chat_id)
+    if user_id is None:
+        return None
+    return get_user_model().objects.select_related('role').filter(pk=user_id).first()
+
+
+def invalidate_channel_configs():
+    """Descarta la configuración cacheada de los canales"""
+    _delete([CHANNEL_CONFIGS_KEY])
+
+
+def invalidate_chat_users(chats):
+    """
+    Descarta los usuarios cacheados de varios chats
+
+    Args:
+        chats: Iterable de tuplas (channel_type, chat_id)
+    """
+    keys = {_chat_user_key(channel_type, chat_id) for channel_type, chat_id in chats if chat_id}
+    if keys:
+        _delete(list(keys))
@@ -0,0 +1,98 @@
+"""
+Comando para medir throughput y latencia del bot contra una Bot API falsa
+"""
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.omnichannel_bot.fake_telegram import FakeTelegramServer
+from apps.omnichannel_bot.load_test import LoadTest, build_updates, next_update_id, telegram_api
+from apps.omnichannel_bot.models import TelegramUpdate
+
+
+class Command(BaseCommand):
+    help = 'Reproduce updates sintéticos por telegram_webhook y reporta throughput y p95 del camino comando -> respuesta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--updates', type=int, default=1000, help='Cantidad de updates sintéticos')
+        parser.add_argument('--concurrency', type=int, default=8, help='Envíos simultáneos al webhook')
+        parser.add_argument('--commands', type=str, default='', help='Comandos a alternar, separados por coma')
+        parser.add_argument('--webhook-url', type=str, default='', help='Webhook de un servidor desplegado (por defecto en proceso)')
+        parser.add_argument('--api-host', type=str, default='127.0.0.1', help='Interfaz de la Bot API falsa')
+        parser.add_argument('--api-port', type=int, default=0, help='Puerto de la Bot API falsa (0 = libre)')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latencia simulada de la Bot API en ms')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fracción de llamadas a la Bot API que fallan con 500')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Envíos por segundo antes de responder 429 (0 = sin límite)')
+        parser.add_argument('--reply-timeout', type=float, default=60, help='Segundos a esperar respuestas pendientes')
+        parser.add_argument('--keep', action='store_true', help='Conservar los TelegramUpdate sintéticos')
+        parser.add_argument('--verbose-logs', action='store_true', help='No silenciar los logs INFO del bot')
+        parser.add_argument(
+            '--i-know-this-is-not-production', action='store_true', dest='not_production',
+            help='Permite escribir el api_url falso en ChannelConfig (necesario con --webhook-url)'
+        )
+
+    def handle(self, *args, **options):
+        # Un despliegue sólo ve la Bot API falsa si se escribe en ChannelConfig
+        persist = bool(options['webhook_url'])
+        if persist and not (settings.DEBUG or options['not_production']):
+            raise CommandError(
+                '--webhook-url redirige el ChannelConfig de Telegram a la Bot API falsa. '
+                'Usa DEBUG o --i-know-this-is-not-production.'
+            )
+
+        commands = [command.strip() for command in options['commands'].split(',') if command.strip()]
+        first_update_id = next_update_id()
+        updates = build_updates(options['updates'], first_update_id, commands or None)
+
+        bot_logger = logging.getLogger('apps.omnichannel_bot')
+        previous_level = bot_logger.level
+        if not options['verbose_logs']:
+            bot_logger.setLevel(logging.WARNING)
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS('🚀 PRUEBA DE CARGA DEL BOT'))
+        self.stdout.write('=' * 60)
+
+        try:
+            with FakeTelegramServer(
+                host=options['api_host'],
+                port=options['api_port'],
+                latency=options['latency_ms'] / 1000,
+                error_rate=options['error_rate'],
+                rate_limit=options['rate_limit']
+            ) as api, telegram_api(api.url, persist=persist):
+                self.stdout.write(f'\n🤖 Bot API falsa: {api.url}')
+                self.stdout.write(f"📨 Enviando {len(updates)} updates con concurrencia {options['concurrency']}...\n")
+
+                report = LoadTest(
+                    api,
+                    concurrency=options['concurrency'],
+                    webhook_url=options['webhook_url'] or None,
+                    reply_timeout=options['reply_timeout']
+                ).run(updates)
+        finally:
+            bot_logger.setLevel(previous_level)
+            if not options['keep']:
+                TelegramUpdate.objects.filter(
+                    update_id__gte=first_update_id,
+                    update_id__lt=first_update_id + len(updates)
+                ).delete()
+
+        self.stdout.write('📊 Resultados:')
+        self.stdout.write(f"   Updates:        {report['updates']}")
+        self.stdout.write(f"   Confirmados:    {report['acked']} ({report['errors']} errores)")
+        self.stdout.write(f"   Respondidos:    {report['replied']}")
+        self.stdout.write(f"   Duración:       {report['duration_s']} s")
+        self.stdout.write(f"   Throughput:     {report['ack_throughput']} acks/s, {report['reply_throughput']} respuestas/s")
+        self.stdout.write(f"   Ack p50/p95:    {report['ack_p50_ms']} / {report['ack_p95_ms']} ms")
+        self.stdout.write(
+            f"   Reply p50/p95:  {report['reply_p50_ms']} / {report['reply_p95_ms']} ms "
+            f"(máx {report['reply_max_ms']} ms)"
+        )
+
+        if report['replied'] < report['updates']:
+            self.stdout.write(self.style.WARNING(
+                f"\n⚠️  {report['updates'] - report['replied']} updates sin respuesta"
+            ))
+        self.stdout.write('')
@@ -88,7 +88,8 @@ class Command(BaseCommand):
                     '¡El sistema CMMS está listo para mantenerte informado!'
                 ),
                 message_type='configuration',
-                priority='normal'
+                priority='normal',
+                immediate=True
             )
             
             if results.get('TELEGRAM'):
@@ -0,0 +1,52 @@
+"""
+Comando para levantar una Telegram Bot API falsa en local
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.omnichannel_bot.fake_telegram import FakeTelegramServer
+
+
+class Command(BaseCommand):
+    help = 'Levanta un servidor local que imita la Telegram Bot API (latencia, errores y 429 configurables)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1', help='Interfaz a escuchar')
+        parser.add_argument('--port', type=int, default=8081, help='Puerto a escuchar')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Latencia por llamada en ms')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fracción de llamadas que responden 500')
+        parser.add_argument('--rate-limit', type=int, default=0, help='Envíos por segundo antes de responder 429 (0 = sin límite)')
+        parser.add_argument('--retry-after', type=int, default=1, help='retry_after de las respuestas 429')
+
+    def handle(self, *args, **options):
+        server = FakeTelegramServer(
+            host=options['host'],
+            port=options['port'],
+            latency=options['latency_ms'] / 1000,
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            retry_after=options['retry_after']
+        ).start()
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS(f'🤖 Bot API falsa escuchando en {server.url}'))
+        self.stdout.write('=' * 60)
+        self.stdout.write(
+            f"\n💡 Configura el canal con \"api_url\": \"{server.url}\" en ChannelConfig.config\n"
+            '   Ctrl+C para detener\n'
+        )
+
+        reported = 0
+        try:
+            while True:
+                time.sleep(5)
+                total = len(server.calls)
+                if total != reported:
+                    self.stdout.write(f'📨 Llamadas recibidas: {total} (mensajes enviados: {len(server.sent_messages())})')
+                    reported = total
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            self.stdout.write(self.style.SUCCESS('\n✓ Servidor detenido\n'))
@@ -0,0 +1,54 @@
+"""
+Comando para recibir updates de Telegram por long polling (sin webhook)
+"""
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.omnichannel_bot.polling import TelegramPoller, WebhookActiveError
+from apps.omnichannel_bot.updates import get_telegram_channel
+
+
+class Command(BaseCommand):
+    help = 'Consume los updates de Telegram con getUpdates y los procesa en un pool de workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Hilos de procesamiento (TELEGRAM_POLLING_WORKERS)')
+        parser.add_argument('--timeout', type=int, default=None, help='Segundos de long polling (TELEGRAM_POLLING_TIMEOUT)')
+        parser.add_argument(
+            '--delete-webhook',
+            action='store_true',
+            help='Quitar el webhook configurado (getUpdates no funciona mientras exista)'
+        )
+
+    def handle(self, *args, **options):
+        telegram = get_telegram_channel()
+        if telegram is None or not telegram.bot_token:
+            raise CommandError('El canal de Telegram no está habilitado o no tiene bot_token')
+
+        poller = TelegramPoller(telegram, workers=options['workers'], poll_timeout=options['timeout'])
+
+        if options['delete_webhook']:
+            poller.delete_webhook()
+            self.stdout.write(self.style.SUCCESS('✓ Webhook eliminado'))
+
+        signal.signal(signal.SIGINT, poller.stop)
+        signal.signal(signal.SIGTERM, poller.stop)
+
+        self.stdout.write('\n' + '=' * 60)
+        self.stdout.write(self.style.SUCCESS('📡 LONG POLLING DE TELEGRAM'))
+        self.stdout.write('=' * 60)
+        self.stdout.write(
+            f'\n👷 Workers: {poller.workers}   ⏱️  Timeout: {poller.poll_timeout}s\n'
+            '   Ctrl+C para detener (termina el getUpdates en curso y los chats pendientes)\n'
+        )
+
+        try:
+            poller.run()
+        except WebhookActiveError as e:
+            raise CommandError(f'{e}. Usa --delete-webhook para cambiar a long polling.')
+
+        stats = poller.stats
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ Detenido: {stats['updates']} updates en {stats['polls']} llamadas ({stats['errors']} errores)\n"
+        ))
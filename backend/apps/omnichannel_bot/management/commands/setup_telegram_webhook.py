@@ -1,6 +1,7 @@
 """
 Comando para configurar el webhook de Telegram
 """
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from apps.omnichannel_bot.models import ChannelConfig
 import requests
@@ -56,9 +57,13 @@ class Command(BaseCommand):
             # Configurar webhook
             self.stdout.write(f'\n🔗 Configurando webhook: {webhook_url}\n')
             
+            webhook_params = {'url': webhook_url}
+            if settings.TELEGRAM_WEBHOOK_SECRET:
+                webhook_params['secret_token'] = settings.TELEGRAM_WEBHOOK_SECRET
+            
             response = requests.post(
                 f"{api_url}/setWebhook",
-                json={'url': webhook_url}
+                json=webhook_params
             )
             
             if response.status_code == 200:
@@ -98,7 +98,8 @@ class Command(BaseCommand):
                     '  • Notificaciones críticas'
                 ),
                 message_type='test',
-                priority='normal'
+                priority='normal',
+                immediate=True
             )
             
             if results:
@@ -1,10 +1,14 @@
 """
 Servicio de enrutamiento de mensajes a través de múltiples canales
 """
+from datetime import timedelta
 from typing import List, Dict, Optional
+from django.conf import settings
 from django.utils import timezone
-from .models import ChannelConfig, UserChannelPreference, MessageLog
-from .channels.telegram import TelegramChannel
+from . import outbound
+from .channels import get_channel_classes
+from .lookups import get_channel_configs
+from .models import UserChannelPreference, MessageLog
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,22 +17,36 @@ logger = logging.getLogger(__name__)
 class MessageRouter:
     """
     Enruta mensajes a través de los canales configurados
+    
+    Los envíos se encolan como MessageLog en PENDING y los entrega la cola
+    de salida (ver outbound.py), así que quien llama no espera al canal.
+    En modo resumen los mensajes no críticos esperan a la ventana de su chat.
     """
     
     def __init__(self):
-        self.channels = {}
-        self._load_channels()
+        self._channels = None
+    
+    @property
+    def channels(self) -> Dict:
+        """Instancias de los canales habilitados (se crean al primer uso)"""
+        if self._channels is None:
+            self._channels = {}
+            self._load_channels()
+        return self._channels
     
     def _load_channels(self):
-        """Carga los canales habilitados"""
-        configs = ChannelConfig.objects.filter(is_enabled=True)
+        """Carga los canales habilitados (configuración cacheada, ver lookups.py)"""
+        channel_classes = get_channel_classes()
+        for channel_type, config in get_channel_configs().items():
+            channel_class = channel_classes.get(channel_type)
+            if channel_class:
+                self._channels[channel_type] = channel_class(config)
         
-        for config in configs:
-            if config.channel_type == 'TELEGRAM':
-                self.channels['TELEGRAM'] = TelegramChannel(config.config)
-            # Aquí se agregarían otros canales (WhatsApp, Email, SMS)
-        
-        logger.info(f"Canales cargados: {list(self.channels.keys())}")
+        logger.info(f"Canales cargados: {list(self._channels.keys())}")
+    
+    def get_channel(self, channel_type: str):
+        """Devuelve la instancia del canal o None si no está habilitado"""
+        return self.channels.get(channel_type)
     
     def send_to_user(
         self,
@@ -38,7 +56,8 @@ class MessageRouter:
         message_type: str = 'notification',
         priority: str = 'normal',
         related_object_type: str = '',
-        related_object_id: str = ''
+        related_object_id: str = '',
+        immediate: bool = False
     ) -> Dict[str, bool]:
         """
         Envía un mensaje a un usuario a través de todos sus canales habilitados
@@ -51,78 +70,113 @@ class MessageRouter:
             priority: Prioridad (normal, high, critical)
             related_object_type: Tipo de objeto relacionado (work_order, prediction, etc.)
             related_object_id: ID del objeto relacionado
+            immediate: Enviar en línea y esperar el resultado (comandos de diagnóstico)
         
         Returns:
-            Dict con el resultado por canal: {'TELEGRAM': True, 'EMAIL': False}
+            Dict con el resultado por canal: {'TELEGRAM': True, 'EMAIL': False}.
+            Sin immediate, True significa que el mensaje quedó encolado.
         """
-        results = {}
+        message_logs = self.enqueue([{
+            'user': user,
+            'title': title,
+            'message': message,
+            'message_type': message_type,
+            'priority': priority,
+            'related_object_type': related_object_type,
+            'related_object_id': related_object_id,
+        }], immediate=immediate)
         
-        # Obtener preferencias del usuario
-        preferences = UserChannelPreference.objects.filter(
-            user=user,
-            is_enabled=True
-        )
+        if immediate:
+            return {log.channel_type: log.status == 'SENT' for log in message_logs}
+        return {log.channel_type: True for log in message_logs}
+    
+    def enqueue(self, messages: List[Dict], immediate: bool = False) -> List[MessageLog]:
+        """
+        Encola mensajes para varios usuarios con un número fijo de consultas
         
-        # Si no hay preferencias, intentar enviar por todos los canales disponibles
-        if not preferences.exists():
-            logger.warning(f"Usuario {user.username} no tiene preferencias de canal configuradas")
-            return results
+        Args:
+            messages: Dicts con user, title, message y opcionalmente message_type,
+                priority, related_object_type y related_object_id
+            immediate: Enviar en línea en vez de agendar la cola de salida
         
-        for pref in preferences:
-            channel_type = pref.channel_type
-            
-            # Verificar si el canal está disponible
-            if channel_type not in self.channels:
-                logger.warning(f"Canal {channel_type} no está disponible")
-                continue
+        Los mensajes no críticos se retienen hasta que cierra la ventana de
+        resumen de su chat (OMNICHANNEL_DIGEST_WINDOW_SECONDS) y los envía
+        la pasada del consumidor que sigue; los críticos salen de inmediato.
+        
+        Returns:
+            Lista de MessageLog creados (uno por usuario y canal)
+        """
+        if not messages:
+            return []
+        
+        channel_classes = get_channel_classes()
+        enabled = set(get_channel_configs()) & set(channel_classes)
+        preferences = {}
+        for pref in UserChannelPreference.objects.filter(
+            user__in={data['user'].id for data in messages},
+            is_enabled=True
+        ):
+            preferences.setdefault(pref.user_id, []).append(pref)
+        
+        now = timezone.now()
+        if immediate:
+            # Reclamados por este proceso: la cola de salida no los toma
+            now += timedelta(seconds=getattr(settings, 'OMNICHANNEL_SEND_LEASE_SECONDS', 300))
+        message_logs = []
+        for data in messages:
+            user = data['user']
+            priority = data.get('priority', 'normal')
+            user_preferences = preferences.get(user.id)
             
-            # Verificar si el usuario quiere recibir este tipo de notificación
-            if pref.notify_critical_only and priority != 'critical':
-                logger.info(f"Usuario {user.username} solo recibe notificaciones críticas en {channel_type}")
+            if not user_preferences:
+                logger.warning(f"Usuario {user.username} no tiene preferencias de canal configuradas")
                 continue
             
-            # Enviar mensaje
-            try:
-                channel = self.channels[channel_type]
-                result = channel.send_message(
-                    chat_id=pref.channel_user_id,
-                    title=title,
-                    message=message
-                )
+            for pref in user_preferences:
+                channel_type = pref.channel_type
                 
-                # Registrar en log
-                message_log = MessageLog.objects.create(
-                    user=user,
-                    channel_type=channel_type,
-                    title=title,
-                    message=message,
-                    message_type=message_type,
-                    status='SENT' if result['success'] else 'FAILED',
-                    error_message=result.get('error', ''),
-                    external_message_id=result.get('message_id', ''),
-                    related_object_type=related_object_type,
-                    related_object_id=related_object_id,
-                    sent_at=timezone.now() if result['success'] else None
-                )
-                
-                results[channel_type] = result['success']
+                # Verificar si el canal está disponible
+                if channel_type not in enabled:
+                    logger.warning(f"Canal {channel_type} no está disponible")
+                    continue
                 
-                # Actualizar estadísticas del canal
-                config = ChannelConfig.objects.get(channel_type=channel_type)
-                if result['success']:
-                    config.messages_sent += 1
-                else:
-                    config.messages_failed += 1
-                config.last_used = timezone.now()
-                config.save()
+                # Verificar si el usuario quiere recibir este tipo de notificación
+                if pref.notify_critical_only and priority != 'critical':
+                    logger.info(f"Usuario {user.username} solo recibe notificaciones críticas en {channel_type}")
+                    continue
                 
-                logger.info(f"Mensaje enviado a {user.username} vía {channel_type}: {result['success']}")
-            
-            except Exception as e:
-                logger.error(f"Error al enviar mensaje vía {channel_type}: {str(e)}")
-                results[channel_type] = False
+                message_logs.append(MessageLog(
+                    user=user,
+                    channel_type=channel_type,
+                    chat_id=pref.channel_user_id or channel_classes[channel_type].default_recipient(user),
+                    title=data['title'],
+                    message=data['message'],
+                    message_type=data.get('message_type', 'notification'),
+                    priority=priority,
+                    status='PENDING',
+                    related_object_type=data.get('related_object_type', ''),
+                    related_object_id=data.get('related_object_id', '') or '',
+                    next_attempt_at=now
+                ))
+        
+        if not message_logs:
+            return []
+        
+        held = []
+        if not immediate and outbound.digest_window():
+            held = [log for log in message_logs if log.priority != 'critical']
+            due_times = outbound.digest_due_times([(log.channel_type, log.chat_id) for log in held], now)
+            for log in held:
+                log.next_attempt_at = due_times[(log.channel_type, log.chat_id)]
         
-        return results
+        MessageLog.objects.bulk_create(message_logs)
+        
+        if immediate:
+            outbound.deliver_now(message_logs, self)
+        elif len(held) < len(message_logs):
+            outbound.schedule_dispatch()
+        logger.info(f"{len(message_logs)} mensajes encolados")
+        return message_logs
     
     def send_notification(
         self,
@@ -166,24 +220,26 @@ class MessageRouter:
         
         try:
             role = Role.objects.get(name=role_name)
-            users = User.objects.filter(role=role, is_active=True)
+            users = list(User.objects.filter(role=role, is_active=True))
             
-            stats = {'total': 0, 'success': 0, 'failed': 0}
+            message_logs = self.enqueue([
+                {
+                    'user': user,
+                    'title': title,
+                    'message': message,
+                    'message_type': message_type,
+                    'priority': priority,
+                }
+                for user in users
+            ])
             
-            for user in users:
-                stats['total'] += 1
-                results = self.send_to_user(
-                    user=user,
-                    title=title,
-                    message=message,
-                    message_type=message_type,
-                    priority=priority
-                )
-                
-                if any(results.values()):
-                    stats['success'] += 1
-                else:
-                    stats['failed'] += 1
+            # success: usuarios con al menos un mensaje encolado
+            queued_users = {log.user_id for log in message_logs}
+            stats = {
+                'total': len(users),
+                'success': len(queued_users),
+                'failed': len(users) - len(queued_users)
+            }
             
             logger.info(f"Broadcast a rol {role_name}: {stats}")
             return stats
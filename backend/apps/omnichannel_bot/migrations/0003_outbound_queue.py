@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('omnichannel_bot', '0002_telegram_link_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagelog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='messagelog',
+            name='chat_id',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='messagelog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Próximo intento de envío (cola de salida)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='messagelog',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='message_log_status_113736_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('omnichannel_bot', '0003_outbound_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChannelDeliveryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel_type', models.CharField(choices=[('TELEGRAM', 'Telegram'), ('WHATSAPP', 'WhatsApp'), ('EMAIL', 'Email'), ('SMS', 'SMS'), ('IN_APP', 'In-App')], max_length=20)),
+                ('minute', models.DateTimeField(help_text='Inicio del minuto')),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('total_latency_ms', models.PositiveBigIntegerField(default=0)),
+                ('max_latency_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Channel Delivery Stats',
+                'verbose_name_plural': 'Channel Delivery Stats',
+                'db_table': 'channel_delivery_stats',
+                'ordering': ['-minute'],
+                'unique_together': {('channel_type', 'minute')},
+            },
+        ),
+    ]
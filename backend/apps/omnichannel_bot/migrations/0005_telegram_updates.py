@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('omnichannel_bot', '0004_channel_delivery_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('update_id', models.BigIntegerField(unique=True)),
+                ('chat_id', models.CharField(blank=True, max_length=200)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('RECEIVED', 'Received'), ('PROCESSING', 'Processing'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed')], default='RECEIVED', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('lease_until', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'telegram_updates',
+                'ordering': ['update_id'],
+                'indexes': [models.Index(fields=['chat_id', 'status', 'update_id'], name='telegram_up_chat_id_b8a694_idx'), models.Index(fields=['status'], name='telegram_up_status_11fbbe_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 19:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('omnichannel_bot', '0005_telegram_updates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='messagelog',
+            name='priority',
+            field=models.CharField(default='normal', help_text='normal, high o critical', max_length=20),
+        ),
+    ]
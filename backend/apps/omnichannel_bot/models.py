@@ -1,7 +1,9 @@
 """
 Modelos para el sistema de bot omnicanal
 """
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
 
@@ -97,9 +99,58 @@ class TelegramLinkCode(models.Model):
         return not self.is_used and self.expires_at > timezone.now()
 
 
+class TelegramUpdate(models.Model):
+    """
+    Actualización recibida de Telegram (webhook o long polling)
+    
+    El update_id es único: los reenvíos de Telegram se descartan. Un worker
+    procesa las actualizaciones de cada chat en orden de update_id.
+    """
+    STATUS_RECEIVED = 'RECEIVED'
+    STATUS_PROCESSING = 'PROCESSING'
+    STATUS_PROCESSED = 'PROCESSED'
+    STATUS_FAILED = 'FAILED'
+    
+    STATUS_CHOICES = [
+        (STATUS_RECEIVED, 'Received'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_PROCESSED, 'Processed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    update_id = models.BigIntegerField(unique=True)
+    chat_id = models.CharField(max_length=200, blank=True)
+    payload = models.JSONField()
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RECEIVED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    lease_until = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+    
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'telegram_updates'
+        ordering = ['update_id']
+        indexes = [
+            models.Index(fields=['chat_id', 'status', 'update_id']),
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return f"Update {self.update_id} ({self.chat_id}) - {self.status}"
+
+
 class MessageLog(models.Model):
     """
     Registro de mensajes enviados
+    
+    También es la cola de salida: los mensajes se crean en PENDING y los
+    envía la tarea dispatch_outbound_messages (ver outbound.py). Los que
+    agotan los reintentos o fallan de forma permanente quedan en FAILED
+    (dead letter). Los mensajes no críticos de un mismo chat pueden salir
+    juntos en un resumen (ver outbound.coalesce).
     """
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -117,10 +168,16 @@ class MessageLog(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     message_type = models.CharField(max_length=50)
+    priority = models.CharField(max_length=20, default='normal', help_text="normal, high o critical")
+    
+    # Destino en el canal (ej: chat_id de Telegram)
+    chat_id = models.CharField(max_length=200, blank=True)
     
     # Estado
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     error_message = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text="Próximo intento de envío (cola de salida)")
     
     # Metadata
     external_message_id = models.CharField(max_length=200, blank=True, help_text="ID del mensaje en el canal externo")
@@ -140,7 +197,67 @@ class MessageLog(models.Model):
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['channel_type', 'status']),
             models.Index(fields=['status']),
+            models.Index(fields=['status', 'next_attempt_at']),
         ]
     
     def __str__(self):
         return f"{self.channel_type} - {self.user.username} - {self.status}"
+
+
+class ChannelDeliveryStats(models.Model):
+    """
+    Estadísticas de envío por canal y minuto (throughput y latencia)
+    
+    La cola de salida acumula cada lote con un UPDATE atómico, así que
+    varios consumidores pueden escribir en el mismo minuto sin perder
+    conteos.
+    """
+    channel_type = models.CharField(max_length=20, choices=ChannelConfig.CHANNEL_TYPES)
+    minute = models.DateTimeField(help_text="Inicio del minuto")
+    
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    total_latency_ms = models.PositiveBigIntegerField(default=0)
+    max_latency_ms = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'channel_delivery_stats'
+        unique_together = ['channel_type', 'minute']
+        ordering = ['-minute']
+        verbose_name = 'Channel Delivery Stats'
+        verbose_name_plural = 'Channel Delivery Stats'
+    
+    def __str__(self):
+        return f"{self.channel_type} {self.minute:%Y-%m-%d %H:%M} - {self.sent} sent, {self.failed} failed"
+    
+    @property
+    def avg_latency_ms(self):
+        attempts = self.sent + self.failed
+        return round(self.total_latency_ms / attempts) if attempts else 0
+    
+    @classmethod
+    def record(cls, channel_type, when, sent=0, failed=0, total_latency_ms=0, max_latency_ms=0):
+        """Suma un lote de envíos al minuto de `when`"""
+        minute = when.replace(second=0, microsecond=0)
+        increments = {
+            'sent': F('sent') + sent,
+            'failed': F('failed') + failed,
+            'total_latency_ms': F('total_latency_ms') + total_latency_ms,
+            'max_latency_ms': Greatest(F('max_latency_ms'), max_latency_ms),
+        }
+        bucket = cls.objects.filter(channel_type=channel_type, minute=minute)
+        if bucket.update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    channel_type=channel_type,
+                    minute=minute,
+                    sent=sent,
+                    failed=failed,
+                    total_latency_ms=total_latency_ms,
+                    max_latency_ms=max_latency_ms
+                )
+        except IntegrityError:
+            # Otro consumidor creó el minuto entre el UPDATE y el INSERT
+            bucket.update(**increments)
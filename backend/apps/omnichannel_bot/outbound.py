@@ -0,0 +1,453 @@
+"""
+Cola de salida de mensajes del bot omnicanal
+
+MessageRouter no envía nada de forma síncrona: registra cada mensaje como
+un MessageLog en PENDING y agenda la tarea dispatch_outbound_messages, que
+corre en su propia cola (settings.OMNICHANNEL_OUTBOUND_QUEUE, un worker con
+concurrencia 1). Así un Telegram lento nunca bloquea el guardado de una
+orden de trabajo ni una petición HTTP.
+
+El consumidor:
+- Reclama lotes de mensajes vencidos (next_attempt_at <= ahora) moviendo su
+  next_attempt_at al final de un lease, de modo que un worker caído no deja
+  mensajes bloqueados y dos consumidores no envían el mismo mensaje.
+- Respeta un límite global (~30 msg/s en Telegram) y uno por chat (1 msg/s);
+  los mensajes de un chat ocupado se posponen sin consumir intentos.
+- Envía a distintos chats en paralelo con concurrencia acotada, de modo que
+  la latencia de la API no limite el throughput por debajo del límite.
+- Reintenta errores temporales con backoff exponencial (o el retry_after que
+  indique el canal) y deja en FAILED (dead letter) los errores permanentes y
+  los mensajes que agotan OMNICHANNEL_MAX_ATTEMPTS.
+- Guarda los resultados de cada lote con un solo bulk_update y suma los
+  totales a ChannelConfig y ChannelDeliveryStats (por minuto) con UPDATEs
+  atómicos.
+
+Modo resumen (OMNICHANNEL_DIGEST_WINDOW_SECONDS > 0): los mensajes no
+críticos de un chat se retienen hasta que cierra su ventana (se abre con el
+primer mensaje) y salen en un único mensaje agrupado por prioridad y tipo.
+Cada MessageLog conserva su propio estado; los críticos no esperan.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import ChannelConfig, ChannelDeliveryStats, MessageLog
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_SCHEDULED_KEY = 'omnichannel:outbound-dispatch-scheduled'
+DIGEST_DUE_KEY = 'omnichannel:digest-due:{channel_type}:{chat_id}'
+
+PRIORITY_ORDER = {'critical': 0, 'high': 1, 'normal': 2, 'low': 3}
+PRIORITY_ICONS = {'critical': '🚨', 'high': '⚠️', 'normal': '📌', 'low': '📎'}
+# Por debajo del límite de 4096 caracteres de Telegram
+DIGEST_MAX_LENGTH = 3500
+
+RESULT_FIELDS = ['status', 'error_message', 'external_message_id', 'sent_at', 'attempts', 'next_attempt_at']
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RateLimiter:
+    """
+    Límite de envío global (mensajes por segundo) y por chat (segundos entre
+    mensajes al mismo chat), en memoria del consumidor.
+
+    dispatch() usa una instancia por proceso (get_rate_limiter): pasadas
+    seguidas del consumidor comparten los turnos y la hora del último envío
+    a cada chat.
+    """
+
+    def __init__(self, rate=None, chat_interval=None, clock=time.monotonic, sleep=time.sleep):
+        rate = rate if rate is not None else _setting('OMNICHANNEL_GLOBAL_RATE', 30)
+        self.interval = 1.0 / rate if rate else 0
+        self.chat_interval = chat_interval if chat_interval is not None else _setting('OMNICHANNEL_CHAT_INTERVAL', 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = 0.0
+        self.chat_last = {}
+        self.lock = threading.Lock()
+
+    def chat_wait(self, chat):
+        """Segundos que faltan para poder volver a escribir a un chat"""
+        last = self.chat_last.get(chat)
+        if last is None:
+            return 0.0
+        return max(0.0, last + self.chat_interval - self.clock())
+
+    def acquire(self, chat):
+        """Espera un turno del límite global y registra el envío al chat (thread-safe)"""
+        with self.lock:
+            now = self.clock()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            self.chat_last[chat] = slot
+        if slot > now:
+            self.sleep(slot - now)
+
+    def prune(self):
+        """Olvida los chats cuyo intervalo ya pasó (acota la memoria)"""
+        with self.lock:
+            cutoff = self.clock() - self.chat_interval
+            self.chat_last = {chat: last for chat, last in self.chat_last.items() if last > cutoff}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """RateLimiter del proceso, creado la primera vez que se usa"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def retry_delay(attempts, retry_after=None):
+    """Backoff exponencial (base * 2^(intentos-1)) acotado, o el retry_after del canal"""
+    base = _setting('OMNICHANNEL_RETRY_BASE_SECONDS', 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), _setting('OMNICHANNEL_RETRY_MAX_SECONDS', 3600))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def digest_window():
+    return _setting('OMNICHANNEL_DIGEST_WINDOW_SECONDS', 0)
+
+
+def digest_due_times(chats, now=None):
+    """
+    Momento de envío del resumen abierto de cada chat
+
+    El primer mensaje de un chat abre la ventana; los siguientes comparten
+    su hora de envío, así el consumidor los reclama juntos. Las ventanas
+    viven en el cache: si se pierden sólo se abre una ventana nueva.
+
+    Args:
+        chats: (channel_type, chat_id) de los mensajes a retener
+
+    Returns:
+        dict: {(channel_type, chat_id): datetime}
+    """
+    now = now or timezone.now()
+    window = digest_window()
+    keys = {
+        DIGEST_DUE_KEY.format(channel_type=channel_type, chat_id=chat_id): (channel_type, chat_id)
+        for channel_type, chat_id in set(chats)
+    }
+    due_times = {keys[key]: due for key, due in cache.get_many(list(keys)).items() if due > now}
+
+    for key, chat in keys.items():
+        if chat in due_times:
+            continue
+        due = now + timedelta(seconds=window)
+        if not cache.add(key, due, timeout=window):
+            # Otro proceso abrió la ventana entre get_many y add
+            due = cache.get(key) or due
+        due_times[chat] = due
+    return due_times
+
+
+def coalesce(messages):
+    """
+    Agrupa los mensajes reclamados en unidades de envío
+
+    En modo resumen, los mensajes no críticos de un mismo chat forman una
+    sola unidad (en la posición del primero); los críticos salen solos.
+
+    Returns:
+        list: Listas de MessageLog, cada una se envía con una llamada al canal
+    """
+    if not digest_window():
+        return [[message_log] for message_log in messages]
+
+    units = []
+    digests = {}
+    for message_log in messages:
+        if message_log.priority == 'critical':
+            units.append([message_log])
+            continue
+        chat = (message_log.channel_type, message_log.chat_id)
+        if chat in digests:
+            digests[chat].append(message_log)
+        else:
+            digests[chat] = [message_log]
+            units.append(digests[chat])
+    return units
+
+
+def render_digest(messages):
+    """
+    Título y texto de un resumen: secciones por prioridad y tipo de mensaje
+
+    Returns:
+        tuple: (title, message)
+    """
+    groups = {}
+    for message_log in messages:
+        groups.setdefault((message_log.priority, message_log.message_type), []).append(message_log)
+
+    sections = []
+    length = 0
+    omitted = len(messages)
+    for (priority, message_type), group in sorted(
+        groups.items(), key=lambda item: (PRIORITY_ORDER.get(item[0][0], 2), item[0][1])
+    ):
+        label = message_type.replace('_', ' ').capitalize() or 'Notificación'
+        lines = [f"{PRIORITY_ICONS.get(priority, '📌')} *{label}* ({len(group)})"]
+        for message_log in group:
+            entry = f"\n• *{message_log.title}*\n{message_log.message}"
+            if length + len(entry) > DIGEST_MAX_LENGTH:
+                break
+            lines.append(entry)
+            length += len(entry)
+            omitted -= 1
+        sections.append('\n'.join(lines))
+
+    if omitted:
+        sections.append(f"… y {omitted} mensajes más. Revisa el sistema para verlos todos.")
+    return f"📬 Resumen: {len(messages)} notificaciones", '\n\n'.join(sections)
+
+
+def schedule_dispatch(countdown=0):
+    """
+    Agenda el consumidor cuando la transacción actual se confirme.
+
+    Las llamadas seguidas (ej: un broadcast) se agrupan en una sola tarea;
+    con OMNICHANNEL_OUTBOUND_ASYNC desactivado los mensajes se envían en
+    línea al confirmar.
+    """
+    transaction.on_commit(lambda: _enqueue_dispatch(countdown))
+
+
+def _enqueue_dispatch(countdown=0):
+    from .tasks import dispatch_outbound_messages
+
+    if not _setting('OMNICHANNEL_OUTBOUND_ASYNC', True):
+        dispatch()
+        return
+
+    if not cache.add(DISPATCH_SCHEDULED_KEY, True, timeout=int(countdown) + 1):
+        return
+    try:
+        dispatch_outbound_messages.apply_async(countdown=countdown)
+    except Exception as e:
+        # Los mensajes siguen en PENDING; el beat los recoge
+        cache.delete(DISPATCH_SCHEDULED_KEY)
+        logger.error(f"No se pudo agendar el envío de mensajes: {e}")
+
+
+def claim_batch(limit, now=None):
+    """
+    Reclama hasta `limit` mensajes vencidos para este consumidor.
+
+    Returns:
+        list: MessageLog en orden de creación
+    """
+    now = now or timezone.now()
+    lease = timedelta(seconds=_setting('OMNICHANNEL_SEND_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        ids = list(
+            MessageLog.objects.select_for_update(skip_locked=True).filter(
+                status='PENDING',
+                next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'created_at').values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        MessageLog.objects.filter(id__in=ids).update(next_attempt_at=now + lease)
+    return list(MessageLog.objects.filter(id__in=ids).order_by('created_at'))
+
+
+def send_batch(messages, router, limiter, stats, concurrency=None):
+    """
+    Envía un lote ya reclamado y guarda los resultados en un bulk_update
+
+    Cada chat es un trabajo: sus unidades (un mensaje o un resumen, ver
+    coalesce) salen en orden y los chats se envían en paralelo (hasta
+    OMNICHANNEL_SEND_CONCURRENCY hilos) sobre la sesión HTTP compartida del
+    canal. El RateLimiter reparte los turnos globales entre los hilos.
+    """
+    concurrency = concurrency or _setting('OMNICHANNEL_SEND_CONCURRENCY', 8)
+    deferred_chats = set()
+    jobs = {}
+
+    for unit in coalesce(messages):
+        chat = (unit[0].channel_type, unit[0].chat_id)
+        if chat not in deferred_chats:
+            if chat in jobs:
+                ready = not limiter.chat_interval
+            else:
+                ready = limiter.chat_wait(chat) == 0
+            if ready:
+                jobs.setdefault(chat, []).append(unit)
+                continue
+
+        # Chat ocupado: se pospone sin contar intento y sin adelantar a los anteriores
+        deferred_chats.add(chat)
+        delay = max(limiter.chat_wait(chat), limiter.chat_interval)
+        for message_log in unit:
+            message_log.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        stats['deferred'] += len(unit)
+
+    # Los canales se resuelven aquí: los hilos no tocan la base de datos
+    channels = {channel_type: router.get_channel(channel_type) for channel_type, _ in jobs}
+
+    def send_chat(chat, units):
+        channel = channels[chat[0]]
+        results = []
+        for unit in units:
+            if channel is None:
+                results.append({'success': False, 'error': f'Canal {chat[0]} no disponible', 'retryable': True})
+                continue
+            if len(unit) > 1:
+                title, text = render_digest(unit)
+            else:
+                title, text = unit[0].title, unit[0].message
+            limiter.acquire(chat)
+            started = time.perf_counter()
+            try:
+                result = channel.send_message(chat_id=chat[1], title=title, message=text)
+            except Exception as e:
+                result = {'success': False, 'error': str(e), 'retryable': True}
+            results.append(dict(result, latency_ms=round((time.perf_counter() - started) * 1000)))
+        return results
+
+    if concurrency > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(jobs))) as pool:
+            futures = {chat: pool.submit(send_chat, chat, units) for chat, units in jobs.items()}
+            outcomes = {chat: future.result() for chat, future in futures.items()}
+    else:
+        outcomes = {chat: send_chat(chat, units) for chat, units in jobs.items()}
+
+    # Las estadísticas del canal cuentan llamadas a la API; las de stats, mensajes
+    channel_totals = {}
+    for chat, units in jobs.items():
+        for unit, result in zip(units, outcomes[chat]):
+            for message_log in unit:
+                apply_result(message_log, result, stats)
+            totals = channel_totals.setdefault(
+                unit[0].channel_type,
+                {'sent': 0, 'failed': 0, 'total_latency_ms': 0, 'max_latency_ms': 0}
+            )
+            totals['sent' if result['success'] else 'failed'] += 1
+            latency = result.get('latency_ms', 0)
+            totals['total_latency_ms'] += latency
+            totals['max_latency_ms'] = max(totals['max_latency_ms'], latency)
+
+    MessageLog.objects.bulk_update(messages, RESULT_FIELDS)
+    record_channel_stats(channel_totals)
+
+
+def record_channel_stats(channel_totals, now=None):
+    """
+    Aplica los totales de un lote a ChannelConfig y ChannelDeliveryStats
+
+    Sólo UPDATEs atómicos (F()): varios consumidores pueden registrar a la
+    vez sin perder conteos.
+    """
+    now = now or timezone.now()
+    for channel_type, totals in channel_totals.items():
+        ChannelConfig.objects.filter(channel_type=channel_type).update(
+            messages_sent=F('messages_sent') + totals['sent'],
+            messages_failed=F('messages_failed') + totals['failed'],
+            last_used=now
+        )
+        ChannelDeliveryStats.record(channel_type, now, **totals)
+
+
+def apply_result(message_log, result, stats):
+    """Actualiza un MessageLog (sin guardar) según el resultado del canal"""
+    now = timezone.now()
+    message_log.attempts += 1
+
+    if result['success']:
+        message_log.status = 'SENT'
+        message_log.sent_at = now
+        message_log.external_message_id = result.get('message_id', '')
+        message_log.error_message = ''
+        message_log.next_attempt_at = None
+        stats['sent'] += 1
+        return
+
+    message_log.error_message = result.get('error', '')
+    max_attempts = _setting('OMNICHANNEL_MAX_ATTEMPTS', 5)
+    if result.get('retryable') and message_log.attempts < max_attempts:
+        message_log.next_attempt_at = now + timedelta(
+            seconds=retry_delay(message_log.attempts, result.get('retry_after'))
+        )
+        stats['retried'] += 1
+        return
+
+    message_log.status = 'FAILED'
+    message_log.next_attempt_at = None
+    stats['failed'] += 1
+    logger.warning(
+        f"Mensaje {message_log.id} a {message_log.user_id} vía {message_log.channel_type} "
+        f"descartado tras {message_log.attempts} intentos: {message_log.error_message}"
+    )
+
+
+def dispatch(router=None, limiter=None, batch_size=None, time_budget=None):
+    """
+    Envía mensajes pendientes hasta vaciar la cola o agotar el tiempo.
+
+    Si quedan mensajes que vencen pronto (chats ocupados, backlog) se agenda
+    otra pasada; los reintentos lejanos los recoge el beat.
+
+    Returns:
+        dict: Conteo de mensajes sent/retried/failed/deferred
+    """
+    from .message_router import MessageRouter
+
+    router = router or MessageRouter()
+    limiter = limiter or get_rate_limiter()
+    limiter.prune()
+    batch_size = batch_size or _setting('OMNICHANNEL_OUTBOUND_BATCH_SIZE', 100)
+    time_budget = time_budget if time_budget is not None else _setting('OMNICHANNEL_OUTBOUND_TIME_BUDGET', 50)
+    deadline = time.monotonic() + time_budget
+
+    stats = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+    while time.monotonic() < deadline:
+        messages = claim_batch(batch_size)
+        if not messages:
+            break
+        send_batch(messages, router, limiter, stats)
+
+    next_due = MessageLog.objects.filter(status='PENDING').aggregate(next_due=Min('next_attempt_at'))['next_due']
+    if next_due is not None:
+        countdown = max((next_due - timezone.now()).total_seconds(), 0)
+        if countdown < 60 and _setting('OMNICHANNEL_OUTBOUND_ASYNC', True):
+            cache.delete(DISPATCH_SCHEDULED_KEY)
+            _enqueue_dispatch(countdown)
+
+    if any(stats.values()):
+        logger.info(f"Cola de salida: {stats}")
+    return stats
+
+
+def deliver_now(messages, router):
+    """
+    Envía en línea mensajes recién encolados (comandos de diagnóstico).
+
+    Returns:
+        list: Los mismos MessageLog con su resultado
+    """
+    stats = {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+    if messages:
+        send_batch(messages, router, RateLimiter(chat_interval=0), stats)
+    return messages
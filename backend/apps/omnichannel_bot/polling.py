@@ -0,0 +1,218 @@
+"""
+Consumidor de updates de Telegram por long polling
+
+Alternativa al webhook para sitios que no pueden exponer una URL pública
+(ver `manage.py poll_telegram_updates`). Un único hilo hace getUpdates con
+long polling sobre una sesión keep-alive propia y guarda cada lote como
+TelegramUpdate antes de avanzar el offset; el offset se deriva del mayor
+update_id guardado, así que sobrevive a reinicios y los updates reentregados
+se descartan por update_id único.
+
+Un pool de hilos procesa los chats con updates.process_chat, igual que el
+worker del webhook: cada chat en orden de update_id y con un solo hilo a la
+vez. Todo corre en el mismo proceso y con un único TelegramChannel, sin
+encolar una tarea de Celery por update.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import updates
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_UPDATES = ['message', 'edited_message', 'callback_query']
+
+
+class WebhookActiveError(Exception):
+    """getUpdates no está disponible mientras haya un webhook configurado"""
+
+
+class ChatWorkerPool:
+    """
+    Pool de hilos con orden por chat
+
+    Un chat nunca se procesa en dos hilos a la vez: si llega trabajo para
+    un chat en curso, el mismo hilo vuelve a procesarlo al terminar.
+    """
+
+    def __init__(self, telegram, workers: int):
+        self.telegram = telegram
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='telegram-updates')
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._running = set()
+        self._dirty = set()
+
+    def submit(self, chat_id: str):
+        with self._lock:
+            if chat_id in self._running:
+                self._dirty.add(chat_id)
+                return
+            self._running.add(chat_id)
+        self._executor.submit(self._work, chat_id)
+
+    def wait_for_capacity(self, limit: int, stop: threading.Event):
+        """Espera a que haya menos de limit chats en curso (contrapresión)"""
+        with self._idle:
+            while len(self._running) >= limit and not stop.is_set():
+                self._idle.wait(0.5)
+
+    def join(self):
+        """Espera a que terminen todos los chats en curso"""
+        with self._idle:
+            while self._running:
+                self._idle.wait(0.5)
+
+    def shutdown(self):
+        self.join()
+        self._executor.shutdown(wait=True)
+
+    def _work(self, chat_id: str):
+        close_old_connections()
+        try:
+            while True:
+                try:
+                    updates.process_chat(chat_id, self.telegram)
+                except Exception as e:
+                    # Los updates quedan pendientes y se reintentan en la próxima pasada
+                    logger.error(f"Error processing telegram chat {chat_id}: {str(e)}")
+                with self._lock:
+                    if chat_id not in self._dirty:
+                        self._running.discard(chat_id)
+                        self._idle.notify_all()
+                        return
+                    self._dirty.discard(chat_id)
+        finally:
+            connection.close()
+
+
+class TelegramPoller:
+    """
+    Lee updates con getUpdates y los reparte al pool de workers
+
+    Args:
+        telegram: TelegramChannel (se reutiliza en todos los workers)
+        workers: Hilos de procesamiento
+        poll_timeout: Segundos de long polling por llamada
+        limit: Máximo de updates por llamada (1-100)
+        retry_interval: Cada cuántos segundos reintentar chats pendientes
+    """
+
+    def __init__(
+        self,
+        telegram,
+        workers: Optional[int] = None,
+        poll_timeout: Optional[int] = None,
+        limit: int = 100,
+        retry_interval: float = 60
+    ):
+        self.telegram = telegram
+        self.workers = workers or getattr(settings, 'TELEGRAM_POLLING_WORKERS', 8)
+        self.poll_timeout = poll_timeout if poll_timeout is not None else getattr(
+            settings, 'TELEGRAM_POLLING_TIMEOUT', 30
+        )
+        self.limit = limit
+        self.retry_interval = retry_interval
+        self.stop_event = threading.Event()
+        self.pool = ChatWorkerPool(telegram, self.workers)
+        # Sesión propia: una sola conexión keep-alive dedicada al long polling
+        self.session = requests.Session()
+        self.offset = None
+        self.stats = {'polls': 0, 'updates': 0, 'errors': 0}
+        self._last_retry = 0.0
+
+    def delete_webhook(self):
+        """Quita el webhook para poder usar getUpdates (conserva los updates pendientes)"""
+        response = self.session.post(f"{self.telegram.api_url}/deleteWebhook", timeout=10)
+        response.raise_for_status()
+
+    def stop(self, *args):
+        """Pide un apagado ordenado (sirve como handler de señales)"""
+        self.stop_event.set()
+
+    def run(self):
+        """Bucle principal: termina tras stop() y espera a los workers"""
+        self.resubmit_pending()
+        backoff = 1
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    self.poll_once()
+                    backoff = 1
+                except WebhookActiveError:
+                    raise
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    logger.error(f"Error polling telegram updates: {str(e)}")
+                    self.stop_event.wait(backoff)
+                    backoff = min(backoff * 2, 30)
+
+                if time.monotonic() - self._last_retry >= self.retry_interval:
+                    self.resubmit_pending()
+        finally:
+            self.pool.shutdown()
+            self.session.close()
+            connection.close()
+
+    def poll_once(self) -> int:
+        """
+        Una llamada a getUpdates: guarda el lote, avanza el offset y reparte los chats
+
+        Returns:
+            Número de updates recibidos
+        """
+        self.pool.wait_for_capacity(self.workers * 4, self.stop_event)
+        if self.offset is None:
+            last = updates.last_update_id()
+            self.offset = last + 1 if last is not None else None
+
+        params = {
+            'timeout': self.poll_timeout,
+            'limit': self.limit,
+            'allowed_updates': ALLOWED_UPDATES,
+        }
+        if self.offset is not None:
+            params['offset'] = self.offset
+
+        response = self.session.post(
+            f"{self.telegram.api_url}/getUpdates",
+            json=params,
+            timeout=self.poll_timeout + 10
+        )
+        self.stats['polls'] += 1
+
+        if response.status_code == 409:
+            raise WebhookActiveError(response.json().get('description', 'Conflict'))
+        if response.status_code == 429:
+            retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+            self.stop_event.wait(retry_after)
+            return 0
+        response.raise_for_status()
+
+        batch = response.json().get('result', [])
+        if not batch:
+            return 0
+
+        # Guardar antes de avanzar el offset: un corte no pierde updates
+        close_old_connections()
+        chat_ids = updates.store_updates(batch)
+        self.offset = max(update['update_id'] for update in batch) + 1
+        self.stats['updates'] += len(batch)
+
+        for chat_id in chat_ids:
+            self.pool.submit(chat_id)
+        return len(batch)
+
+    def resubmit_pending(self):
+        """Reparte los chats con updates pendientes (reinicios, fallos y leases vencidos)"""
+        self._last_retry = time.monotonic()
+        for chat_id in updates.pending_chat_ids():
+            self.pool.submit(chat_id)
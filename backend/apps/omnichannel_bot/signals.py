@@ -0,0 +1,36 @@
+"""
+Signals del bot omnicanal: mantienen al día las búsquedas cacheadas
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .lookups import invalidate_channel_configs, invalidate_chat_users
+from .models import ChannelConfig, UserChannelPreference
+
+
+@receiver(post_save, sender=ChannelConfig)
+@receiver(post_delete, sender=ChannelConfig)
+def channel_config_changed(sender, instance, **kwargs):
+    """Recargar la configuración de canales en la próxima búsqueda"""
+    invalidate_channel_configs()
+
+
+@receiver(pre_save, sender=UserChannelPreference)
+def track_previous_chat(sender, instance, **kwargs):
+    """Recordar el chat anterior para invalidarlo si la preferencia cambia de chat"""
+    instance._previous_chat = None
+    if not instance._state.adding:
+        instance._previous_chat = sender.objects.filter(pk=instance.pk).values_list(
+            'channel_type', 'channel_user_id'
+        ).first()
+
+
+@receiver(post_save, sender=UserChannelPreference)
+@receiver(post_delete, sender=UserChannelPreference)
+def chat_link_changed(sender, instance, **kwargs):
+    """Invalidar los chats afectados al vincular, cambiar o borrar una preferencia"""
+    chats = [(instance.channel_type, instance.channel_user_id)]
+    previous_chat = getattr(instance, '_previous_chat', None)
+    if previous_chat:
+        chats.append(previous_chat)
+    invalidate_chat_users(chats)
@@ -0,0 +1,59 @@
+"""
+Tareas de Celery para el bot omnicanal
+"""
+from celery import shared_task
+from django.utils import timezone
+from . import outbound, updates
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.omnichannel_bot.tasks.dispatch_outbound_messages', ignore_result=True)
+def dispatch_outbound_messages():
+    """
+    Envía los mensajes pendientes de la cola de salida respetando los límites de tasa
+    """
+    try:
+        stats = outbound.dispatch()
+        
+        return {
+            'status': 'success',
+            **stats,
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Error enviando mensajes pendientes: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
+
+
+@shared_task(name='apps.omnichannel_bot.tasks.process_telegram_updates', ignore_result=True)
+def process_telegram_updates(chat_id=None):
+    """
+    Procesa en orden los updates de Telegram recibidos por el webhook
+    
+    Args:
+        chat_id: Chat a procesar; sin chat se procesan todos los pendientes
+    """
+    try:
+        if chat_id is None:
+            processed = updates.process_pending()
+        else:
+            processed = updates.process_chat(chat_id)
+        
+        return {
+            'status': 'success',
+            'processed': processed,
+            'timestamp': timezone.now().isoformat()
+        }
+    
+    except Exception as e:
+        logger.error(f"Error procesando updates de Telegram: {str(e)}")
+        return {
+            'status': 'error',
+            'error': str(e)
+        }
@@ -0,0 +1,143 @@
+"""
+Tests for the query budget and response cache of the bot commands.
+"""
+import pytest
+from django.utils import timezone
+
+from apps.assets.models import Asset, Location
+from apps.ml_predictions.models import FailurePrediction
+from apps.omnichannel_bot.bot_commands import BotCommandHandler
+from apps.work_orders.models import WorkOrder
+
+COMMANDS = ['/start', '/help', '/status', '/workorders', '/predictions', '/assets', '/myinfo']
+
+
+@pytest.fixture
+def fleet(db, admin_user, operador_user):
+    """Assets with work orders for the operator and high risk predictions."""
+    location = Location.objects.create(name='Bot Location', address='Test Address')
+    assets = [
+        Asset.objects.create(
+            name=f'Bot Asset {i}',
+            vehicle_type='Camioneta MDO',
+            model='Test Model',
+            serial_number=f'BOT-{i:03d}',
+            location=location,
+            installation_date=timezone.now().date(),
+            status=Asset.STATUS_OPERANDO if i % 2 else Asset.STATUS_DETENIDA,
+            created_by=admin_user
+        )
+        for i in range(4)
+    ]
+    work_orders = [
+        WorkOrder.objects.create(
+            title=f'Bot Work Order {i}',
+            description='Test',
+            asset=assets[i % 2],
+            assigned_to=operador_user,
+            status=WorkOrder.STATUS_PENDING,
+            scheduled_date=timezone.now(),
+            created_by=admin_user
+        )
+        for i in range(7)
+    ]
+    # bulk_create skips the signal that opens a work order per prediction
+    FailurePrediction.objects.bulk_create([
+        FailurePrediction(
+            asset=asset,
+            failure_probability=0.9,
+            risk_level='CRITICAL',
+            model_version='test',
+            confidence_score=0.8,
+            work_order_created=work_orders[0]
+        )
+        for asset in assets
+    ])
+    return {'assets': assets, 'work_orders': work_orders}
+
+
+@pytest.mark.django_db
+class TestCommandQueries:
+    """Every command costs at most two queries."""
+
+    @pytest.mark.parametrize('command', COMMANDS)
+    def test_operator_commands(self, command, fleet, operador_user, django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = BotCommandHandler().handle_command(command, operador_user)
+
+        assert response['text']
+
+    @pytest.mark.parametrize('command', COMMANDS)
+    def test_admin_commands(self, command, fleet, admin_user, django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            response = BotCommandHandler().handle_command(command, admin_user)
+
+        assert response['text']
+
+    def test_work_order_callbacks(self, fleet, operador_user, django_assert_max_num_queries):
+        work_order = fleet['work_orders'][0]
+        handler = BotCommandHandler()
+
+        with django_assert_max_num_queries(2):
+            detail = handler.handle_callback(f'wo_detail_{work_order.id}', operador_user)
+        with django_assert_max_num_queries(1):
+            accepted = handler.handle_callback(f'wo_accept_{work_order.id}', operador_user)
+
+        assert 'generada automáticamente' in detail['text']
+        assert detail['buttons'][0][0]['callback_data'] == f'wo_accept_{work_order.id}'
+        assert work_order.work_order_number in accepted['text']
+
+
+@pytest.mark.django_db
+class TestCommandResponses:
+    """Responses keep their content on the projection-based queries."""
+
+    def test_workorders_lists_five(self, fleet, operador_user):
+        response = BotCommandHandler().handle_command('/workorders', operador_user)
+
+        assert 'Tienes *5* órdenes activas' in response['text']
+        assert 'Activo: Bot Asset 0' in response['text']
+        assert len(response['buttons']) == 4
+
+    def test_operator_sees_only_own_assets(self, fleet, operador_user, admin_user):
+        handler = BotCommandHandler()
+
+        assert 'Total: 2 activos' in handler.handle_command('/assets', operador_user)['text']
+        assert 'Total: 4 activos' in handler.handle_command('/assets', admin_user)['text']
+        assert '*2* activos en riesgo' in handler.handle_command('/predictions', operador_user)['text']
+
+    def test_status_and_myinfo(self, fleet, operador_user):
+        handler = BotCommandHandler()
+
+        status_text = handler.handle_command('/status', operador_user)['text']
+        assert 'Activos activos: 4' in status_text
+        assert 'Órdenes de trabajo activas: 7' in status_text
+        assert 'Predicciones de alto riesgo: 4' in status_text
+        assert 'Pendientes: 7' in handler.handle_command('/myinfo', operador_user)['text']
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    """Read-only replies are cached per user."""
+
+    def test_repeated_command_hits_cache(self, fleet, operador_user, django_assert_num_queries):
+        handler = BotCommandHandler()
+        first = handler.handle_command('/workorders', operador_user)
+
+        with django_assert_num_queries(0):
+            assert handler.handle_command('/workorders', operador_user) == first
+
+    def test_cache_is_per_user(self, fleet, operador_user, admin_user):
+        handler = BotCommandHandler()
+        handler.handle_command('/assets', operador_user)
+
+        assert 'Total: 4 activos' in handler.handle_command('/assets', admin_user)['text']
+
+    def test_starting_a_work_order_refreshes_lists(self, fleet, operador_user):
+        handler = BotCommandHandler()
+        work_order = fleet['work_orders'][0]
+        handler.handle_command('/myinfo', operador_user)
+
+        handler.handle_callback(f'wo_start_{work_order.id}', operador_user)
+
+        assert 'En progreso: 1' in handler.handle_command('/myinfo', operador_user)['text']
@@ -0,0 +1,96 @@
+"""
+Tests for atomic channel statistics and per-minute delivery stats.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.omnichannel_bot import outbound
+from apps.omnichannel_bot.models import ChannelConfig, ChannelDeliveryStats
+
+
+@pytest.fixture
+def telegram(db):
+    return ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True)
+
+
+@pytest.mark.django_db
+class TestChannelStats:
+    """Batch totals are applied with atomic updates."""
+
+    def test_batches_accumulate_in_the_same_minute(self, telegram):
+        now = timezone.now().replace(second=10)
+        outbound.record_channel_stats(
+            {'TELEGRAM': {'sent': 3, 'failed': 1, 'total_latency_ms': 400, 'max_latency_ms': 150}}, now=now
+        )
+        outbound.record_channel_stats(
+            {'TELEGRAM': {'sent': 2, 'failed': 0, 'total_latency_ms': 100, 'max_latency_ms': 60}},
+            now=now + timedelta(seconds=30)
+        )
+
+        telegram.refresh_from_db()
+        assert (telegram.messages_sent, telegram.messages_failed) == (5, 1)
+        bucket = ChannelDeliveryStats.objects.get()
+        assert bucket.minute == now.replace(second=0, microsecond=0)
+        assert (bucket.sent, bucket.failed) == (5, 1)
+        assert bucket.max_latency_ms == 150
+        assert bucket.avg_latency_ms == round(500 / 6)
+
+    def test_stale_instances_do_not_lose_counts(self, telegram):
+        stale = ChannelConfig.objects.get(pk=telegram.pk)
+
+        outbound.record_channel_stats(
+            {'TELEGRAM': {'sent': 1, 'failed': 0, 'total_latency_ms': 10, 'max_latency_ms': 10}}
+        )
+        stale.is_enabled = False
+        stale.save(update_fields=['is_enabled'])
+
+        telegram.refresh_from_db()
+        assert telegram.messages_sent == 1
+
+    def test_new_minute_gets_its_own_bucket(self, telegram):
+        now = timezone.now()
+        for offset in (0, 1, 2):
+            ChannelDeliveryStats.record('TELEGRAM', now + timedelta(minutes=offset), sent=1)
+
+        assert ChannelDeliveryStats.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestDeliveryStatsEndpoint:
+    """Test the delivery-stats endpoint."""
+
+    def test_reports_recent_buckets(self, api_client, supervisor_user, telegram):
+        api_client.force_authenticate(user=supervisor_user)
+        now = timezone.now()
+        ChannelDeliveryStats.record('TELEGRAM', now, sent=10, failed=2, total_latency_ms=1200, max_latency_ms=300)
+        ChannelDeliveryStats.record('TELEGRAM', now - timedelta(hours=3), sent=50)
+
+        response = api_client.get('/api/v1/bot/delivery-stats/', {'minutes': 30})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (data['sent'], data['failed']) == (10, 2)
+        assert data['avg_latency_ms'] == 100
+        assert data['max_latency_ms'] == 300
+        assert len(data['buckets']) == 1
+
+    def test_invalid_window(self, api_client, admin_user, telegram):
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get('/api/v1/bot/delivery-stats/', {'minutes': 'hora'})
+
+        assert response.status_code == 400
+
+    def test_requires_authentication(self, api_client, telegram):
+        response = api_client.get('/api/v1/bot/delivery-stats/')
+
+        assert response.status_code == 401
+
+    def test_operators_are_forbidden(self, api_client, operador_user, telegram):
+        api_client.force_authenticate(user=operador_user)
+
+        response = api_client.get('/api/v1/bot/delivery-stats/')
+
+        assert response.status_code == 403
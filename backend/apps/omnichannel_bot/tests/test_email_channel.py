@@ -0,0 +1,126 @@
+"""
+Tests for the channel registry and the SMTP email channel.
+"""
+import socket
+
+import pytest
+
+from apps.omnichannel_bot import outbound
+from apps.omnichannel_bot.channels import get_channel_classes
+from apps.omnichannel_bot.channels.email import EmailChannel
+from apps.omnichannel_bot.channels.telegram import TelegramChannel
+from apps.omnichannel_bot.fake_smtp import FakeSMTPServer
+from apps.omnichannel_bot.message_router import MessageRouter
+from apps.omnichannel_bot.models import ChannelConfig, MessageLog, UserChannelPreference
+from apps.omnichannel_bot.tasks import dispatch_outbound_messages
+
+
+@pytest.fixture
+def smtp():
+    with FakeSMTPServer() as server:
+        yield server
+
+
+@pytest.fixture
+def email_config(smtp):
+    return {'host': smtp.host, 'port': smtp.port, 'from_email': 'cmms@example.com'}
+
+
+@pytest.fixture
+def channel(email_config):
+    channel = EmailChannel(email_config)
+    yield channel
+    channel.pool.close()
+
+
+class TestChannelRegistry:
+    """Channel classes come from settings.OMNICHANNEL_CHANNEL_CLASSES."""
+
+    def test_default_channels(self):
+        assert get_channel_classes() == {'TELEGRAM': TelegramChannel, 'EMAIL': EmailChannel}
+
+    def test_channels_are_pluggable(self, settings):
+        settings.OMNICHANNEL_CHANNEL_CLASSES = {
+            'EMAIL': 'apps.omnichannel_bot.channels.email.EmailChannel',
+            'SMS': 'apps.omnichannel_bot.channels.sms.MissingChannel',
+        }
+
+        # Unimportable channels are skipped
+        assert get_channel_classes() == {'EMAIL': EmailChannel}
+
+
+class TestEmailChannel:
+    """Messages go out over pooled SMTP connections."""
+
+    def test_send_message(self, smtp, channel):
+        result = channel.send_message('ana@example.com', 'Orden Vencida', 'Revisa la orden OT-1')
+
+        assert result['success'] is True
+        email = smtp.emails(to='ana@example.com')[0]
+        assert email['Subject'] == 'Orden Vencida'
+        assert email['From'] == 'cmms@example.com'
+        assert email['Message-ID'] == result['message_id']
+        assert email.get_content().strip() == 'Revisa la orden OT-1'
+
+    def test_connection_is_reused(self, smtp, channel):
+        for i in range(5):
+            assert channel.send_message(f'user{i}@example.com', 'Aviso', 'Texto')['success']
+
+        assert len(smtp.messages) == 5
+        assert smtp.connections == 1
+
+    def test_dropped_connection_is_reopened(self, smtp, channel):
+        channel.send_message('ana@example.com', 'Aviso', 'Texto')
+        with channel.pool.connection() as backend:
+            backend.connection.sock.shutdown(socket.SHUT_RDWR)
+
+        assert channel.send_message('ana@example.com', 'Aviso', 'Texto')['success'] is True
+        assert smtp.connections == 2
+
+    def test_rejected_recipients(self, smtp, channel):
+        smtp.reject = {'full@example.com': 452, 'gone@example.com': 550}
+
+        temporary = channel.send_message('full@example.com', 'Aviso', 'Texto')
+        permanent = channel.send_message('gone@example.com', 'Aviso', 'Texto')
+
+        assert temporary['success'] is False and permanent['success'] is False
+        assert permanent['retryable'] is False
+        assert smtp.messages == []
+
+    def test_server_down_is_retryable(self, email_config):
+        with FakeSMTPServer() as server:
+            config = dict(email_config, port=server.port)
+
+        result = EmailChannel(config).send_message('ana@example.com', 'Aviso', 'Texto')
+
+        assert result['success'] is False
+        assert result['retryable'] is True
+
+
+@pytest.mark.django_db
+class TestEmailDelivery:
+    """EMAIL messages share the outbound queue with the other channels."""
+
+    def test_queued_messages_are_sent_by_the_consumer(
+        self, smtp, email_config, operador_user, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        settings.OMNICHANNEL_DIGEST_WINDOW_SECONDS = 0
+        scheduled = []
+        monkeypatch.setattr(dispatch_outbound_messages, 'apply_async', lambda **kwargs: scheduled.append(kwargs))
+        outbound.cache.delete(outbound.DISPATCH_SCHEDULED_KEY)
+        ChannelConfig.objects.create(channel_type='EMAIL', is_enabled=True, config=email_config)
+        # Without channel_user_id the user's own address is used
+        UserChannelPreference.objects.create(user=operador_user, channel_type='EMAIL')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            results = MessageRouter().send_to_user(user=operador_user, title='Aviso', message='Texto')
+
+        # Nothing is sent on the request path
+        assert results == {'EMAIL': True}
+        assert len(scheduled) == 1 and smtp.messages == []
+
+        stats = outbound.dispatch(limiter=outbound.RateLimiter(rate=0))
+
+        assert stats['sent'] == 1
+        assert MessageLog.objects.get().chat_id == operador_user.email
+        assert len(smtp.emails(to=operador_user.email)) == 1
@@ -0,0 +1,125 @@
+"""
+Tests for the local Bot API stand-in and the bot load-test harness.
+"""
+import threading
+import time
+
+import pytest
+import requests
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from apps.omnichannel_bot.channels.telegram import TelegramChannel
+from apps.omnichannel_bot.fake_telegram import FakeTelegramServer
+from apps.omnichannel_bot.load_test import LoadTest, build_updates, percentile, telegram_api
+from apps.omnichannel_bot.models import ChannelConfig, TelegramUpdate
+
+
+@pytest.fixture
+def api():
+    with FakeTelegramServer(seed=1) as server:
+        yield server
+
+
+def channel_for(server):
+    return TelegramChannel({'bot_token': 'fake', 'api_url': server.url})
+
+
+class TestFakeTelegramServer:
+    """TelegramChannel talks to the stand-in like to the real API."""
+
+    def test_send_message(self, api):
+        result = channel_for(api).send_message('42', 'Hola', 'Texto')
+
+        assert result['success'] is True
+        assert result['chat_id'] == '42'
+        assert len(api.sent_messages(chat_id=42)) == 1
+
+    def test_rate_limit_answers_429(self, api):
+        api.rate_limit = 2
+        api.retry_after = 3
+        channel = channel_for(api)
+
+        results = [channel.send_message('42', '', f'Mensaje {i}') for i in range(3)]
+
+        assert [result['success'] for result in results] == [True, True, False]
+        assert results[2]['retryable'] is True
+        assert results[2]['retry_after'] == 3
+
+    def test_injected_errors_are_retryable(self, api):
+        channel = channel_for(api)
+        api.error_rate = 1.0
+
+        result = channel.send_message('42', '', 'Texto')
+
+        assert result['success'] is False
+        assert result['retryable'] is True
+
+    def test_latency(self, api):
+        api.latency = 0.05
+        started = time.monotonic()
+
+        channel_for(api).send_message('42', '', 'Texto')
+
+        assert time.monotonic() - started >= 0.05
+
+    def test_get_updates_long_polls_and_confirms_offset(self, api):
+        url = f'{api.url}/botfake/getUpdates'
+        threading.Timer(0.1, api.add_update, args=[{'message': {'text': '/status'}}]).start()
+
+        first = requests.get(url, params={'timeout': 5}, timeout=10).json()['result']
+        api.add_update({'message': {'text': '/help'}})
+        second = requests.get(url, params={'offset': first[0]['update_id'] + 1}, timeout=10).json()['result']
+
+        assert [update['message']['text'] for update in first] == ['/status']
+        assert [update['message']['text'] for update in second] == ['/help']
+
+    def test_get_updates_conflicts_with_webhook(self, api):
+        requests.post(f'{api.url}/botfake/setWebhook', json={'url': 'https://example.com/hook', 'secret_token': 's'})
+
+        response = requests.get(f'{api.url}/botfake/getUpdates', timeout=10)
+
+        assert response.status_code == 409
+        assert api.webhook == {'url': 'https://example.com/hook', 'secret_token': 's'}
+
+
+class TestLoadTest:
+    """The harness replays updates through the webhook and matches replies."""
+
+    @pytest.mark.django_db(transaction=True)
+    def test_replays_updates_and_reports_latency(self, api):
+        updates = build_updates(20, first_update_id=1, commands=['/help', '/status', 'hola'])
+
+        with telegram_api(api.url):
+            report = LoadTest(api, concurrency=1, reply_timeout=5).run(updates)
+
+        assert report['updates'] == report['acked'] == report['replied'] == 20
+        assert report['errors'] == 0
+        assert 0 < report['reply_p50_ms'] <= report['reply_p95_ms'] <= report['reply_max_ms']
+        assert TelegramUpdate.objects.filter(status=TelegramUpdate.STATUS_PROCESSED).count() == 20
+
+    @pytest.mark.django_db(transaction=True)
+    def test_does_not_touch_the_live_channel_config(self, api):
+        live = ChannelConfig.objects.create(
+            channel_type='TELEGRAM', is_enabled=True, config={'bot_token': 'real-token'}
+        )
+        updates = build_updates(3, first_update_id=1, commands=['/help'])
+
+        with telegram_api(api.url):
+            assert ChannelConfig.objects.get(pk=live.pk).config == {'bot_token': 'real-token'}
+            report = LoadTest(api, concurrency=1, reply_timeout=5).run(updates)
+
+        assert report['replied'] == 3
+        assert ChannelConfig.objects.get(pk=live.pk).config == {'bot_token': 'real-token'}
+
+    @pytest.mark.django_db
+    def test_command_refuses_to_redirect_a_deployment(self, settings):
+        settings.DEBUG = False
+
+        with pytest.raises(CommandError):
+            call_command('bot_load_test', updates=1, webhook_url='http://localhost:8000/hook')
+
+    def test_percentile(self):
+        assert percentile(list(range(1, 101)), 95) == 95
+        assert percentile([5.0], 95) == 5.0
+        assert percentile([], 95) == 0.0
@@ -0,0 +1,105 @@
+"""
+Tests for the cached channel configuration and chat -> user lookups.
+"""
+import pytest
+
+from apps.omnichannel_bot import lookups, updates
+from apps.omnichannel_bot.message_router import MessageRouter
+from apps.omnichannel_bot.models import ChannelConfig, UserChannelPreference
+
+
+@pytest.fixture
+def telegram(db):
+    return ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True, config={'bot_token': 'test'})
+
+
+@pytest.fixture
+def linked(telegram, operador_user):
+    return UserChannelPreference.objects.create(user=operador_user, channel_type='TELEGRAM', channel_user_id='555')
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, title, message, **kwargs):
+        self.sent.append((chat_id, message))
+        return {'success': True}
+
+
+@pytest.mark.django_db
+class TestChannelConfigCache:
+    """Enabled channels are loaded once and reloaded after changes."""
+
+    def test_routers_reuse_cached_configs(self, telegram, django_assert_num_queries):
+        assert MessageRouter().get_channel('TELEGRAM').bot_token == 'test'
+
+        with django_assert_num_queries(0):
+            assert MessageRouter().get_channel('TELEGRAM') is not None
+
+    def test_saving_config_invalidates(self, telegram):
+        assert 'TELEGRAM' in lookups.get_channel_configs()
+
+        telegram.is_enabled = False
+        telegram.save()
+
+        assert MessageRouter().get_channel('TELEGRAM') is None
+
+    def test_deleting_config_invalidates(self, telegram):
+        lookups.get_channel_configs()
+
+        telegram.delete()
+
+        assert lookups.get_channel_configs() == {}
+
+
+@pytest.mark.django_db
+class TestChatUserCache:
+    """Chat links are cached, including unlinked chats."""
+
+    def test_resolves_user_with_role_in_one_query(self, linked, operador_user, django_assert_num_queries):
+        lookups.get_chat_user('TELEGRAM', '555')
+
+        with django_assert_num_queries(1):
+            user = lookups.get_chat_user('TELEGRAM', '555')
+            assert user.role.name == 'OPERADOR'
+        assert user == operador_user
+
+    def test_unlinked_chat_is_cached(self, telegram, django_assert_num_queries):
+        assert lookups.get_chat_user('TELEGRAM', '999') is None
+
+        with django_assert_num_queries(0):
+            assert lookups.get_chat_user('TELEGRAM', '999') is None
+
+    def test_linking_a_chat_invalidates(self, telegram, operador_user):
+        assert lookups.get_chat_user_id('TELEGRAM', '555') is None
+
+        UserChannelPreference.objects.create(user=operador_user, channel_type='TELEGRAM', channel_user_id='555')
+
+        assert lookups.get_chat_user_id('TELEGRAM', '555') == operador_user.id
+
+    def test_moving_link_invalidates_old_chat(self, linked, operador_user):
+        assert lookups.get_chat_user_id('TELEGRAM', '555') == operador_user.id
+
+        linked.channel_user_id = '777'
+        linked.save()
+
+        assert lookups.get_chat_user_id('TELEGRAM', '555') is None
+        assert lookups.get_chat_user_id('TELEGRAM', '777') == operador_user.id
+
+    def test_deleting_link_invalidates(self, linked):
+        lookups.get_chat_user_id('TELEGRAM', '555')
+
+        linked.delete()
+
+        assert lookups.get_chat_user_id('TELEGRAM', '555') is None
+
+    def test_repeated_messages_skip_lookups(self, linked, django_assert_num_queries):
+        channel = RecordingChannel()
+        message = {'chat': {'id': 555}, 'from': {'first_name': 'Ana'}, 'text': '/help'}
+        updates.handle_message(message, channel)
+
+        # /help needs no queries of its own: only the user is loaded
+        with django_assert_num_queries(1):
+            updates.handle_message(message, channel)
+        assert len(channel.sent) == 2
@@ -0,0 +1,130 @@
+"""
+Tests for coalescing non-critical bot messages into digests.
+"""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.omnichannel_bot import outbound
+from apps.omnichannel_bot.message_router import MessageRouter
+from apps.omnichannel_bot.models import ChannelConfig, MessageLog, UserChannelPreference
+from apps.omnichannel_bot.tasks import dispatch_outbound_messages
+
+
+class FakeChannel:
+    """Channel recording every API call."""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id, title, message, **kwargs):
+        self.sent.append((chat_id, title, message))
+        return {'success': True, 'message_id': str(len(self.sent))}
+
+
+@pytest.fixture(autouse=True)
+def scheduled(monkeypatch, settings):
+    """Hold messages for five minutes and record dispatch scheduling."""
+    settings.OMNICHANNEL_DIGEST_WINDOW_SECONDS = 300
+    calls = []
+    monkeypatch.setattr(dispatch_outbound_messages, 'apply_async', lambda **kwargs: calls.append(kwargs))
+    return calls
+
+
+@pytest.fixture
+def recipient(db, operador_user):
+    ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True, config={'bot_token': 'test'})
+    UserChannelPreference.objects.create(user=operador_user, channel_type='TELEGRAM', channel_user_id='555')
+    return operador_user
+
+
+def dispatch(channel):
+    router = MessageRouter()
+    router._channels = {'TELEGRAM': channel}
+    return outbound.dispatch(router=router, limiter=outbound.RateLimiter(rate=0))
+
+
+def close_windows():
+    MessageLog.objects.filter(status='PENDING').update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+
+@pytest.mark.django_db
+class TestDigest:
+    """Non-critical messages wait for the chat's window and go out together."""
+
+    def test_messages_share_the_window_of_the_first(self, recipient, scheduled, django_capture_on_commit_callbacks):
+        router = MessageRouter()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(3):
+                router.send_to_user(user=recipient, title=f'Aviso {i}', message='Texto', priority='high')
+
+        due_times = set(MessageLog.objects.values_list('next_attempt_at', flat=True))
+        assert len(due_times) == 1
+        assert (due_times.pop() - timezone.now()).total_seconds() > 290
+        # Nothing to send yet: the beat picks the digest up when the window closes
+        assert scheduled == []
+        assert dispatch(FakeChannel()) == {'sent': 0, 'retried': 0, 'failed': 0, 'deferred': 0}
+
+    def test_burst_is_sent_as_one_message(self, recipient):
+        router = MessageRouter()
+        for i in range(30):
+            router.send_to_user(
+                user=recipient,
+                title=f'Orden Vencida: OT-{i}',
+                message='Por favor, actualiza el estado de esta orden.',
+                message_type='overdue_reminder' if i % 2 else 'work_order_assigned',
+                priority='high' if i % 3 else 'normal'
+            )
+        close_windows()
+        channel = FakeChannel()
+
+        stats = dispatch(channel)
+
+        assert len(channel.sent) == 1
+        assert stats['sent'] == 30
+        assert MessageLog.objects.filter(status='SENT', external_message_id='1').count() == 30
+        chat_id, title, text = channel.sent[0]
+        assert chat_id == '555'
+        assert title == '📬 Resumen: 30 notificaciones'
+        # High priority sections come first
+        assert text.index('⚠️ *Overdue reminder*') < text.index('📌 *Overdue reminder*')
+        assert text.index('⚠️ *Work order assigned*') < text.index('📌 *Work order assigned*')
+
+    def test_critical_messages_bypass_the_buffer(self, recipient, scheduled, django_capture_on_commit_callbacks):
+        router = MessageRouter()
+        router.send_to_user(user=recipient, title='Aviso', message='Texto')
+
+        with django_capture_on_commit_callbacks(execute=True):
+            router.send_to_user(user=recipient, title='Alerta Crítica', message='Texto', priority='critical')
+        channel = FakeChannel()
+
+        dispatch(channel)
+
+        assert len(scheduled) == 1
+        assert [title for _, title, _ in channel.sent] == ['Alerta Crítica']
+        assert MessageLog.objects.get(title='Aviso').status == 'PENDING'
+
+    def test_single_message_is_sent_unchanged(self, recipient):
+        MessageRouter().send_to_user(user=recipient, title='Aviso', message='Texto')
+        close_windows()
+        channel = FakeChannel()
+
+        dispatch(channel)
+
+        assert channel.sent == [('555', 'Aviso', 'Texto')]
+
+    def test_long_digest_is_truncated(self, recipient):
+        MessageRouter().enqueue([
+            {'user': recipient, 'title': f'Aviso {i}', 'message': 'x' * 200}
+            for i in range(40)
+        ])
+        close_windows()
+        channel = FakeChannel()
+
+        dispatch(channel)
+
+        _, _, text = channel.sent[0]
+        assert len(text) < 4096
+        assert 'mensajes más' in text
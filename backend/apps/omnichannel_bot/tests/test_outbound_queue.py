@@ -0,0 +1,306 @@
+"""
+Tests for the outbound message queue.
+"""
+import threading
+import time
+
+import pytest
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.omnichannel_bot import outbound
+from apps.omnichannel_bot.channels.telegram import TelegramChannel
+from apps.omnichannel_bot.message_router import MessageRouter
+from apps.omnichannel_bot.models import ChannelConfig, ChannelDeliveryStats, MessageLog, UserChannelPreference
+from apps.omnichannel_bot.tasks import dispatch_outbound_messages
+
+
+class FakeChannel:
+    """Channel returning scripted results and recording the sends."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.sent = []
+
+    def send_message(self, chat_id, title, message, **kwargs):
+        self.sent.append((chat_id, title))
+        if self.results:
+            return self.results.pop(0)
+        return {'success': True, 'message_id': str(len(self.sent))}
+
+
+class SlowChannel(FakeChannel):
+    """Channel with a fixed API latency."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id, title, message, **kwargs):
+        time.sleep(self.latency)
+        with self.lock:
+            return super().send_message(chat_id, title, message, **kwargs)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def scheduled(monkeypatch):
+    """Record dispatch scheduling instead of reaching the broker."""
+    calls = []
+    monkeypatch.setattr(dispatch_outbound_messages, 'apply_async', lambda **kwargs: calls.append(kwargs))
+    outbound.cache.delete(outbound.DISPATCH_SCHEDULED_KEY)
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def no_digest(settings):
+    """Send every message on its own (digests are covered in test_message_digest.py)."""
+    settings.OMNICHANNEL_DIGEST_WINDOW_SECONDS = 0
+
+
+@pytest.fixture
+def telegram(db):
+    return ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True, config={'bot_token': 'test'})
+
+
+@pytest.fixture
+def recipient(telegram, operador_user):
+    UserChannelPreference.objects.create(user=operador_user, channel_type='TELEGRAM', channel_user_id='555')
+    return operador_user
+
+
+def router_with(channel):
+    router = MessageRouter()
+    router._channels = {'TELEGRAM': channel}
+    return router
+
+
+def queue(user, count=1):
+    router = MessageRouter()
+    for i in range(count):
+        router.send_to_user(user=user, title=f'Mensaje {i}', message='Texto')
+    return list(MessageLog.objects.order_by('created_at'))
+
+
+@pytest.mark.django_db
+class TestEnqueue:
+    """send_to_user only persists messages."""
+
+    def test_send_to_user_queues_without_sending(
+        self, recipient, scheduled, django_capture_on_commit_callbacks, monkeypatch
+    ):
+        monkeypatch.setattr(MessageRouter, '_load_channels', lambda self: pytest.fail('channels loaded'))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            results = MessageRouter().send_to_user(user=recipient, title='Hola', message='Texto')
+
+        assert results == {'TELEGRAM': True}
+        message_log = MessageLog.objects.get()
+        assert message_log.status == 'PENDING'
+        assert message_log.chat_id == '555'
+        assert len(scheduled) == 1
+
+    def test_critical_only_preference(self, recipient):
+        UserChannelPreference.objects.filter(user=recipient).update(notify_critical_only=True)
+
+        assert MessageRouter().send_to_user(user=recipient, title='Hola', message='Texto') == {}
+        assert MessageRouter().send_to_user(
+            user=recipient, title='Hola', message='Texto', priority='critical'
+        ) == {'TELEGRAM': True}
+
+    def test_broadcast_queues_in_bulk(self, recipient, create_roles, django_assert_max_num_queries):
+        with django_assert_max_num_queries(5):
+            stats = MessageRouter().broadcast_to_role('OPERADOR', 'Aviso', 'Texto')
+
+        assert stats == {'total': 1, 'success': 1, 'failed': 0}
+        assert MessageLog.objects.filter(status='PENDING').count() == 1
+
+    def test_immediate_delivery(self, recipient):
+        channel = FakeChannel()
+
+        results = router_with(channel).send_to_user(user=recipient, title='Hola', message='Texto', immediate=True)
+
+        assert results == {'TELEGRAM': True}
+        assert channel.sent == [('555', 'Hola')]
+        assert MessageLog.objects.get().status == 'SENT'
+
+
+@pytest.mark.django_db
+class TestDispatch:
+    """The consumer sends, retries and dead-letters queued messages."""
+
+    def test_sends_pending_messages(self, recipient, telegram):
+        queue(recipient)
+        channel = FakeChannel()
+
+        stats = outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(chat_interval=0))
+
+        assert stats['sent'] == 1
+        message_log = MessageLog.objects.get()
+        assert message_log.status == 'SENT'
+        assert message_log.attempts == 1
+        assert message_log.sent_at is not None
+        telegram.refresh_from_db()
+        assert telegram.messages_sent == 1
+        assert ChannelDeliveryStats.objects.get().sent == 1
+
+    def test_retryable_failure_backs_off(self, recipient):
+        queue(recipient)
+        channel = FakeChannel({'success': False, 'error': 'Too Many Requests', 'retryable': True, 'retry_after': 120})
+
+        stats = outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(chat_interval=0))
+
+        assert stats['retried'] == 1
+        message_log = MessageLog.objects.get()
+        assert message_log.status == 'PENDING'
+        assert message_log.attempts == 1
+        assert (message_log.next_attempt_at - timezone.now()).total_seconds() > 110
+
+    def test_permanent_failure_is_dead_lettered(self, recipient):
+        queue(recipient)
+        channel = FakeChannel({'success': False, 'error': 'chat not found', 'retryable': False})
+
+        outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(chat_interval=0))
+
+        assert MessageLog.objects.get().status == 'FAILED'
+
+    def test_exhausted_retries_are_dead_lettered(self, recipient, settings):
+        settings.OMNICHANNEL_MAX_ATTEMPTS = 2
+        settings.OMNICHANNEL_RETRY_BASE_SECONDS = 0
+        queue(recipient)
+        failure = {'success': False, 'error': 'Timeout', 'retryable': True}
+        channel = FakeChannel(failure, failure)
+
+        outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(chat_interval=0))
+
+        message_log = MessageLog.objects.get()
+        assert message_log.status == 'FAILED'
+        assert message_log.attempts == 2
+
+    def test_per_chat_limit_defers_without_reordering(self, recipient, scheduled):
+        first, second, third = queue(recipient, count=3)
+        channel = FakeChannel()
+
+        stats = outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(rate=0))
+
+        assert channel.sent == [('555', 'Mensaje 0')]
+        assert stats['deferred'] == 2
+        second.refresh_from_db()
+        assert second.status == 'PENDING' and second.attempts == 0
+        # The deferred messages are picked up again shortly
+        assert scheduled and scheduled[-1]['countdown'] <= 1
+
+    def test_consecutive_runs_share_the_process_limiter(self, recipient, monkeypatch):
+        monkeypatch.setattr(outbound, '_limiter', outbound.RateLimiter(rate=0, chat_interval=60))
+        channel = FakeChannel()
+        queue(recipient)
+        outbound.dispatch(router=router_with(channel))
+
+        MessageRouter().send_to_user(user=recipient, title='Otro', message='Texto')
+        stats = outbound.dispatch(router=router_with(channel))
+
+        assert channel.sent == [('555', 'Mensaje 0')]
+        assert stats['deferred'] == 1
+        assert outbound.get_rate_limiter() is outbound._limiter
+
+    def test_claimed_messages_are_not_sent_twice(self, recipient):
+        queue(recipient)
+        assert len(outbound.claim_batch(10)) == 1
+
+        assert outbound.claim_batch(10) == []
+
+
+@pytest.mark.django_db
+class TestConcurrentSending:
+    """Different chats are sent in parallel over one shared session."""
+
+    def test_broadcast_to_many_users(self, telegram, create_roles, settings):
+        settings.OMNICHANNEL_SEND_CONCURRENCY = 16
+        users = User.objects.bulk_create([
+            User(username=f'op{i}', email=f'op{i}@test.com', role=create_roles['operador'])
+            for i in range(200)
+        ])
+        UserChannelPreference.objects.bulk_create([
+            UserChannelPreference(user=user, channel_type='TELEGRAM', channel_user_id=str(1000 + i))
+            for i, user in enumerate(users)
+        ])
+        channel = SlowChannel(latency=0.02)
+
+        stats = MessageRouter().broadcast_to_role('OPERADOR', 'Aviso', 'Texto')
+        started = time.monotonic()
+        outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(rate=0))
+        elapsed = time.monotonic() - started
+
+        assert stats['success'] == 200
+        assert len(channel.sent) == 200
+        assert MessageLog.objects.filter(status='SENT').count() == 200
+        telegram.refresh_from_db()
+        assert telegram.messages_sent == 200
+        # Sequential sends would take 200 * 20 ms = 4 s
+        assert elapsed < 2
+
+    def test_same_chat_keeps_order(self, recipient, settings):
+        settings.OMNICHANNEL_SEND_CONCURRENCY = 4
+        queue(recipient, count=5)
+        channel = SlowChannel(latency=0.001)
+
+        outbound.dispatch(router=router_with(channel), limiter=outbound.RateLimiter(rate=0, chat_interval=0))
+
+        assert [title for _, title in channel.sent] == [f'Mensaje {i}' for i in range(5)]
+
+    def test_telegram_channels_share_session(self):
+        assert TelegramChannel({}).session is TelegramChannel({}).session
+
+
+class TestRateLimiter:
+    def test_global_rate(self):
+        clock = FakeClock()
+        limiter = outbound.RateLimiter(rate=2, chat_interval=0, clock=clock, sleep=clock.sleep)
+
+        for chat in range(5):
+            limiter.acquire(chat)
+
+        assert clock.slept == pytest.approx(2.0)
+
+    def test_chat_interval(self):
+        clock = FakeClock()
+        limiter = outbound.RateLimiter(rate=0, chat_interval=1.0, clock=clock, sleep=clock.sleep)
+
+        limiter.acquire('a')
+
+        assert limiter.chat_wait('a') == pytest.approx(1.0)
+        assert limiter.chat_wait('b') == 0
+        clock.now += 1.0
+        assert limiter.chat_wait('a') == 0
+
+    def test_prune_forgets_idle_chats(self):
+        clock = FakeClock()
+        limiter = outbound.RateLimiter(rate=0, chat_interval=1.0, clock=clock, sleep=clock.sleep)
+        limiter.acquire('a')
+        clock.now += 0.5
+        limiter.acquire('b')
+        clock.now += 0.6
+
+        limiter.prune()
+
+        assert list(limiter.chat_last) == ['b']
+
+    def test_retry_delay_is_exponential_and_capped(self, settings):
+        settings.OMNICHANNEL_RETRY_BASE_SECONDS = 30
+        settings.OMNICHANNEL_RETRY_MAX_SECONDS = 100
+
+        assert [outbound.retry_delay(n) for n in (1, 2, 3, 4)] == [30, 60, 100, 100]
+        assert outbound.retry_delay(1, retry_after=45) == 45
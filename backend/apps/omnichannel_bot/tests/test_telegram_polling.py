@@ -0,0 +1,167 @@
+"""
+Tests for the long-polling update consumer.
+"""
+import threading
+import time
+
+import pytest
+
+from apps.omnichannel_bot import updates
+from apps.omnichannel_bot.channels.telegram import TelegramChannel
+from apps.omnichannel_bot.fake_telegram import FakeTelegramServer
+from apps.omnichannel_bot.models import TelegramUpdate
+from apps.omnichannel_bot.polling import ChatWorkerPool, TelegramPoller, WebhookActiveError
+
+
+def message(chat_id, text):
+    return {'message': {'chat': {'id': chat_id}, 'from': {'first_name': 'Ana'}, 'text': text}}
+
+
+@pytest.fixture
+def api():
+    with FakeTelegramServer() as server:
+        yield server
+
+
+@pytest.fixture
+def telegram(api):
+    return TelegramChannel({'bot_token': 'fake', 'api_url': api.url})
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Record the handled (chat_id, update_id) pairs."""
+    calls = []
+    lock = threading.Lock()
+    monkeypatch.setattr(updates, '_commands_configured', True)
+
+    def handle_update(update, telegram):
+        time.sleep(0.01)
+        with lock:
+            calls.append((updates.update_chat_id(update), update['update_id']))
+
+    monkeypatch.setattr(updates, 'handle_update', handle_update)
+    return calls
+
+
+def poll(poller):
+    received = poller.poll_once()
+    poller.pool.join()
+    return received
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTelegramPoller:
+    """Updates are stored, processed per chat in order and confirmed."""
+
+    def test_processes_each_chat_in_order(self, api, telegram, handled):
+        for i in range(12):
+            api.add_update(message(100 + i % 3, f'/help {i}'))
+        # One worker: the in-memory SQLite test database locks tables across threads
+        poller = TelegramPoller(telegram, workers=1, poll_timeout=0)
+
+        try:
+            assert poll(poller) == 12
+        finally:
+            poller.pool.shutdown()
+
+        assert len(handled) == 12
+        for chat_id in ('100', '101', '102'):
+            chat_updates = [update_id for chat, update_id in handled if chat == chat_id]
+            assert chat_updates == sorted(chat_updates) and len(chat_updates) == 4
+        assert TelegramUpdate.objects.filter(status=TelegramUpdate.STATUS_PROCESSED).count() == 12
+
+    def test_offset_is_persisted_and_confirms_updates(self, api, telegram, handled):
+        api.add_update(message(100, '/help'))
+        first = TelegramPoller(telegram, workers=1, poll_timeout=0)
+        poll(first)
+        first.pool.shutdown()
+
+        # A restarted consumer continues after the last stored update
+        api.add_update(message(100, '/status'))
+        second = TelegramPoller(telegram, workers=1, poll_timeout=0)
+        try:
+            assert poll(second) == 1
+            assert poll(second) == 0
+        finally:
+            second.pool.shutdown()
+
+        assert [update_id for _, update_id in handled] == [1, 2]
+        assert second.offset == 3
+
+    def test_redelivered_updates_are_not_processed_twice(self, api, telegram, handled):
+        api.add_update(message(100, '/help'))
+        poller = TelegramPoller(telegram, workers=1, poll_timeout=0)
+        poll(poller)
+        poller.offset = 1
+
+        try:
+            poll(poller)
+        finally:
+            poller.pool.shutdown()
+
+        assert TelegramUpdate.objects.count() == 1
+        assert len(handled) == 1
+
+    def test_run_stops_gracefully(self, api, telegram, handled):
+        poller = TelegramPoller(telegram, workers=2, poll_timeout=1)
+        thread = threading.Thread(target=poller.run)
+        thread.start()
+
+        api.add_update(message(100, '/help'))
+        deadline = time.monotonic() + 5
+        while not handled and time.monotonic() < deadline:
+            time.sleep(0.02)
+        poller.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        assert handled == [('100', 1)]
+
+    def test_webhook_conflict(self, api, telegram):
+        api.webhook['url'] = 'https://example.com/hook'
+        poller = TelegramPoller(telegram, workers=1, poll_timeout=0)
+
+        try:
+            with pytest.raises(WebhookActiveError):
+                poller.poll_once()
+            poller.delete_webhook()
+            assert poller.poll_once() == 0
+        finally:
+            poller.pool.shutdown()
+
+
+class TestChatWorkerPool:
+    """Chats run in parallel, but never twice at the same time."""
+
+    def test_same_chat_is_never_processed_concurrently(self, monkeypatch):
+        lock = threading.Lock()
+        active = set()
+        runs = []
+        overlaps = []
+        peak = [0]
+
+        def process_chat(chat_id, telegram):
+            with lock:
+                if chat_id in active:
+                    overlaps.append(chat_id)
+                active.add(chat_id)
+                peak[0] = max(peak[0], len(active))
+            time.sleep(0.02)
+            with lock:
+                active.discard(chat_id)
+                runs.append(chat_id)
+
+        monkeypatch.setattr(updates, 'process_chat', process_chat)
+        pool = ChatWorkerPool(telegram=None, workers=4)
+
+        for _ in range(5):
+            for chat_id in ('a', 'b', 'c'):
+                pool.submit(chat_id)
+        pool.shutdown()
+
+        assert overlaps == []
+        assert peak[0] > 1
+        # Work submitted while a chat was running triggers one more pass
+        assert sorted(set(runs)) == ['a', 'b', 'c']
+        assert all(runs.count(chat_id) == 2 for chat_id in 'abc')
@@ -0,0 +1,143 @@
+"""
+Tests for the fast-ack Telegram webhook and per-chat update processing.
+"""
+import json
+
+import pytest
+
+from apps.omnichannel_bot import updates
+from apps.omnichannel_bot.models import ChannelConfig, TelegramUpdate
+from apps.omnichannel_bot.tasks import process_telegram_updates
+
+WEBHOOK_URL = '/api/v1/bot/webhook/telegram/'
+
+
+def make_update(update_id, chat_id=555, text='/status'):
+    return {
+        'update_id': update_id,
+        'message': {'message_id': update_id, 'chat': {'id': chat_id}, 'from': {'first_name': 'Ana'}, 'text': text},
+    }
+
+
+def post(client, payload, **headers):
+    body = payload if isinstance(payload, str) else json.dumps(payload)
+    return client.post(WEBHOOK_URL, data=body, content_type='application/json', **headers)
+
+
+@pytest.fixture(autouse=True)
+def queued(monkeypatch):
+    """Record processing jobs instead of reaching the broker."""
+    calls = []
+    monkeypatch.setattr(process_telegram_updates, 'delay', lambda chat_id: calls.append(chat_id))
+    monkeypatch.setattr(updates, '_commands_configured', True)
+    return calls
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Record handled updates instead of running the bot commands."""
+    calls = []
+    monkeypatch.setattr(updates, 'handle_update', lambda update, telegram: calls.append(update['update_id']))
+    return calls
+
+
+@pytest.fixture
+def telegram(db):
+    return ChannelConfig.objects.create(channel_type='TELEGRAM', is_enabled=True, config={'bot_token': 'test'})
+
+
+@pytest.mark.django_db
+class TestTelegramWebhook:
+    """The webhook only validates, stores and queues."""
+
+    def test_stores_update_and_queues_processing(
+        self, client, telegram, queued, handled, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = post(client, make_update(1))
+
+        assert response.status_code == 200
+        assert response.json() == {'ok': True}
+        stored = TelegramUpdate.objects.get()
+        assert (stored.update_id, stored.chat_id, stored.status) == (1, '555', TelegramUpdate.STATUS_RECEIVED)
+        assert queued == ['555']
+        assert handled == []
+
+    def test_duplicate_update_is_stored_once(self, client, telegram, queued, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            assert post(client, make_update(1)).status_code == 200
+            assert post(client, make_update(1)).status_code == 200
+
+        assert TelegramUpdate.objects.count() == 1
+        assert queued == ['555']
+
+    def test_rejects_invalid_secret(self, client, telegram, settings):
+        settings.TELEGRAM_WEBHOOK_SECRET = 's3cret'
+
+        assert post(client, make_update(1)).status_code == 403
+        assert post(client, make_update(1), HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='otro').status_code == 403
+        assert post(client, make_update(1), HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN='s3cret').status_code == 200
+        assert TelegramUpdate.objects.count() == 1
+
+    def test_rejects_invalid_payload(self, client, telegram):
+        assert post(client, '{no es json').status_code == 400
+        assert post(client, {'message': {}}).status_code == 400
+        assert not TelegramUpdate.objects.exists()
+
+
+@pytest.mark.django_db
+class TestUpdateProcessing:
+    """Updates are processed in order, one at a time per chat."""
+
+    def test_processes_chat_in_update_order(self, telegram, handled):
+        for update_id in (3, 1, 2):
+            updates.store_update(make_update(update_id))
+        updates.store_update(make_update(10, chat_id=777))
+
+        assert updates.process_chat('555') == 3
+
+        assert handled == [1, 2, 3]
+        assert set(
+            TelegramUpdate.objects.filter(chat_id='555').values_list('status', flat=True)
+        ) == {TelegramUpdate.STATUS_PROCESSED}
+        assert TelegramUpdate.objects.get(chat_id='777').status == TelegramUpdate.STATUS_RECEIVED
+
+    def test_chat_in_progress_is_not_claimed_twice(self, telegram):
+        updates.store_update(make_update(1))
+        updates.store_update(make_update(2))
+
+        assert updates.claim_next('555').update_id == 1
+        assert updates.claim_next('555') is None
+
+    def test_expired_lease_is_reclaimed(self, telegram, handled, settings):
+        settings.TELEGRAM_UPDATE_LEASE_SECONDS = -1
+        updates.store_update(make_update(1))
+        updates.claim_next('555')
+
+        assert updates.process_pending() == 1
+        assert handled == [1]
+
+    def test_failures_are_retried_then_marked_failed(self, telegram, settings, monkeypatch):
+        settings.TELEGRAM_UPDATE_MAX_ATTEMPTS = 2
+        attempts = []
+
+        def handle_update(update, channel):
+            attempts.append(update['update_id'])
+            if update['update_id'] == 1:
+                raise ValueError('boom')
+
+        monkeypatch.setattr(updates, 'handle_update', handle_update)
+        updates.store_update(make_update(1))
+        updates.store_update(make_update(2))
+
+        # The failing update blocks the chat until it is retried
+        assert updates.process_chat('555') == 0
+        assert TelegramUpdate.objects.get(update_id=1).status == TelegramUpdate.STATUS_RECEIVED
+
+        assert updates.process_chat('555') == 1
+        assert attempts == [1, 1, 2]
+        failed = TelegramUpdate.objects.get(update_id=1)
+        assert failed.status == TelegramUpdate.STATUS_FAILED
+        assert failed.attempts == 2
+        assert failed.error_message == 'boom'
+        assert TelegramUpdate.objects.get(update_id=2).status == TelegramUpdate.STATUS_PROCESSED
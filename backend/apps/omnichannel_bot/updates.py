@@ -0,0 +1,447 @@
+"""
+Recepción y procesamiento de actualizaciones de Telegram
+
+El webhook sólo valida la petición, guarda el update crudo como
+TelegramUpdate (update_id único, así los reenvíos de Telegram se descartan)
+y agenda la tarea process_telegram_updates para su chat; responde en
+milisegundos aunque lleguen ráfagas.
+
+El worker procesa cada chat en orden de update_id y de a un update a la
+vez: reclama el update más antiguo pendiente del chat sólo si ningún otro
+worker tiene uno en curso (con lease, para recuperar workers caídos). Los
+updates que fallan se reintentan hasta TELEGRAM_UPDATE_MAX_ATTEMPTS y luego
+quedan en FAILED sin bloquear al resto del chat.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .bot_commands import BotCommandHandler
+from .channels.telegram import TELEGRAM_API_URL, TelegramChannel, get_session
+from .lookups import get_channel_configs, get_chat_user
+from .models import TelegramUpdate
+
+logger = logging.getLogger(__name__)
+
+_commands_configured = False
+
+
+def update_chat_id(update: dict) -> str:
+    """Chat al que pertenece un update (vacío si no tiene chat)"""
+    message = (
+        update.get('message')
+        or update.get('edited_message')
+        or (update.get('callback_query') or {}).get('message')
+        or {}
+    )
+    chat_id = (message.get('chat') or {}).get('id')
+    return str(chat_id) if chat_id is not None else ''
+
+
+def store_update(update: dict):
+    """
+    Guarda un update y agenda su procesamiento al confirmar la transacción.
+    
+    Returns:
+        Tupla (TelegramUpdate o None, creado). Un update_id repetido
+        devuelve (None, False).
+    """
+    chat_id = update_chat_id(update)
+    try:
+        with transaction.atomic():
+            telegram_update = TelegramUpdate.objects.create(
+                update_id=update['update_id'],
+                chat_id=chat_id,
+                payload=update
+            )
+    except IntegrityError:
+        return None, False
+    
+    schedule_processing(chat_id)
+    return telegram_update, True
+
+
+def store_updates(batch) -> list:
+    """
+    Guarda un lote de updates en una consulta, sin agendar su procesamiento
+    (lo usa el consumidor de long polling, que procesa con sus propios workers).
+    
+    Returns:
+        Chats con updates nuevos, en orden de llegada
+    """
+    rows = [
+        TelegramUpdate(update_id=update['update_id'], chat_id=update_chat_id(update), payload=update)
+        for update in batch
+    ]
+    # Los update_id repetidos se descartan (reentregas tras un reinicio)
+    TelegramUpdate.objects.bulk_create(rows, ignore_conflicts=True)
+    return list(dict.fromkeys(row.chat_id for row in rows))
+
+
+def last_update_id():
+    """Mayor update_id guardado (None si no hay ninguno)"""
+    return TelegramUpdate.objects.order_by('-update_id').values_list('update_id', flat=True).first()
+
+
+def schedule_processing(chat_id: str):
+    """Agenda el worker del chat (en línea si TELEGRAM_UPDATES_ASYNC está desactivado)"""
+    transaction.on_commit(lambda: _enqueue_processing(chat_id))
+
+
+def _enqueue_processing(chat_id: str):
+    from .tasks import process_telegram_updates
+    
+    if not getattr(settings, 'TELEGRAM_UPDATES_ASYNC', True):
+        process_chat(chat_id)
+        return
+    
+    try:
+        process_telegram_updates.delay(chat_id)
+    except Exception as e:
+        # El update queda en RECEIVED; el beat lo procesa
+        logger.error(f"Could not queue telegram updates of chat {chat_id}: {e}")
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'TELEGRAM_UPDATE_LEASE_SECONDS', 120))
+
+
+def claim_next(chat_id: str):
+    """
+    Reclama el update pendiente más antiguo del chat.
+    
+    Returns:
+        TelegramUpdate o None si no hay pendientes o si otro worker está
+        procesando un update del chat
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Bloquear los pendientes del chat serializa a los workers que compiten por él
+        pending = list(
+            TelegramUpdate.objects.select_for_update().filter(
+                chat_id=chat_id,
+                status__in=[TelegramUpdate.STATUS_RECEIVED, TelegramUpdate.STATUS_PROCESSING]
+            ).order_by('update_id')[:1]
+        )
+        if not pending:
+            return None
+        
+        telegram_update = pending[0]
+        if telegram_update.status == TelegramUpdate.STATUS_PROCESSING and telegram_update.lease_until > now:
+            return None
+        
+        telegram_update.status = TelegramUpdate.STATUS_PROCESSING
+        telegram_update.attempts += 1
+        telegram_update.lease_until = now + _lease()
+        telegram_update.save(update_fields=['status', 'attempts', 'lease_until'])
+    return telegram_update
+
+
+def get_telegram_channel():
+    """Canal de Telegram habilitado o None"""
+    config = get_channel_configs().get('TELEGRAM')
+    if config is None:
+        return None
+    return TelegramChannel(config)
+
+
+def process_chat(chat_id: str, telegram=None) -> int:
+    """
+    Procesa en orden los updates pendientes de un chat.
+    
+    Returns:
+        Número de updates procesados
+    """
+    global _commands_configured
+    
+    processed = 0
+    while True:
+        telegram_update = claim_next(chat_id)
+        if telegram_update is None:
+            return processed
+        
+        if telegram is None:
+            telegram = get_telegram_channel()
+        if telegram is not None and telegram.bot_token and not _commands_configured:
+            # Configurar menú de comandos una vez por proceso
+            setup_bot_commands(telegram.bot_token, telegram.api_url)
+            _commands_configured = True
+        
+        try:
+            if telegram is None:
+                raise RuntimeError('Channel not configured')
+            handle_update(telegram_update.payload, telegram)
+        except Exception as e:
+            logger.error(f"Error processing telegram update {telegram_update.update_id}: {str(e)}")
+            max_attempts = getattr(settings, 'TELEGRAM_UPDATE_MAX_ATTEMPTS', 3)
+            failed = telegram_update.attempts >= max_attempts
+            TelegramUpdate.objects.filter(pk=telegram_update.pk).update(
+                status=TelegramUpdate.STATUS_FAILED if failed else TelegramUpdate.STATUS_RECEIVED,
+                error_message=str(e),
+                lease_until=None
+            )
+            if not failed:
+                # Se reintenta en la próxima pasada, sin adelantar a los siguientes
+                return processed
+            continue
+        
+        TelegramUpdate.objects.filter(pk=telegram_update.pk).update(
+            status=TelegramUpdate.STATUS_PROCESSED,
+            processed_at=timezone.now(),
+            lease_until=None,
+            error_message=''
+        )
+        processed += 1
+
+
+def pending_chat_ids() -> list:
+    """Chats con updates pendientes o con leases vencidos"""
+    now = timezone.now()
+    return list(
+        TelegramUpdate.objects.filter(
+            Q(status=TelegramUpdate.STATUS_RECEIVED)
+            | Q(status=TelegramUpdate.STATUS_PROCESSING, lease_until__lte=now)
+        ).order_by().values_list('chat_id', flat=True).distinct()
+    )
+
+
+def process_pending() -> int:
+    """
+    Procesa todos los chats con updates pendientes o con leases vencidos
+    (red de seguridad del beat).
+    """
+    telegram = get_telegram_channel()
+    return sum(process_chat(chat_id, telegram) for chat_id in pending_chat_ids())
+
+
+def handle_update(update: dict, telegram: TelegramChannel):
+    """Despacha un update al manejador correspondiente"""
+    message = update.get('message')
+    callback_query = update.get('callback_query')
+    
+    if message:
+        handle_message(message, telegram, telegram.bot_token)
+    elif callback_query:
+        handle_callback(callback_query, telegram)
+
+
+def setup_bot_commands(bot_token: str, api_url: str = None) -> bool:
+    """
+    Configura el menú de comandos del bot de Telegram
+    """
+    api_url = api_url or f"{TELEGRAM_API_URL}/bot{bot_token}"
+    try:
+        commands = [
+            {"command": "start", "description": "🏠 Iniciar el bot"},
+            {"command": "workorders", "description": "📋 Ver mis órdenes de trabajo"},
+            {"command": "predictions", "description": "⚠️ Ver predicciones de alto riesgo"},
+            {"command": "assets", "description": "🔧 Ver estado de activos"},
+            {"command": "status", "description": "📊 Estado general del sistema"},
+            {"command": "myinfo", "description": "👤 Ver mi información"},
+            {"command": "help", "description": "❓ Ver ayuda y comandos"},
+        ]
+        
+        response = get_session().post(
+            f"{api_url}/setMyCommands",
+            json={"commands": commands},
+            timeout=10
+        )
+        
+        if response.status_code == 200:
+            logger.info("Bot commands menu configured successfully")
+            return True
+        else:
+            logger.error(f"Failed to configure bot commands: {response.text}")
+            return False
+    
+    except Exception as e:
+        logger.error(f"Error configuring bot commands: {str(e)}")
+        return False
+
+
+def handle_message(message: dict, telegram: TelegramChannel, bot_token: str = None):
+    """
+    Procesa un mensaje recibido del usuario
+    """
+    chat_id = str(message['chat']['id'])
+    text = message.get('text', '')
+    from_user = message.get('from', {})
+    first_name = from_user.get('first_name', 'Usuario')
+    
+    logger.info(f"Message from {chat_id} ({first_name}): {text}")
+    
+    try:
+        # Buscar usuario del sistema asociado a este chat_id
+        user = get_chat_user('TELEGRAM', chat_id)
+        if user:
+            logger.info(f"User found: {user.username}")
+        else:
+            logger.warning(f"No user found for chat_id {chat_id}")
+        
+        # Procesar comando
+        if text.startswith('/'):
+            handler = BotCommandHandler()
+            
+            # Si es el comando /vincular, pasar parámetros adicionales
+            if text.lower().startswith('/vincular'):
+                response = handler.cmd_vincular(user=user, chat_id=chat_id, full_command=text)
+            else:
+                response = handler.handle_command(text, user)
+            
+            logger.info(f"Command response: {response['text'][:50]}...")
+            
+            # Enviar respuesta
+            result = telegram.send_message(
+                chat_id=chat_id,
+                title='',
+                message=response['text'],
+                reply_markup={'inline_keyboard': response.get('buttons', [])} if response.get('buttons') else None
+            )
+            
+            if result.get('success'):
+                logger.info(f"Message sent successfully to {chat_id}")
+            else:
+                logger.error(f"Failed to send message: {result.get('error')}")
+        else:
+            # Mensaje no es comando
+            if not user:
+                telegram.send_message(
+                    chat_id=chat_id,
+                    title='',
+                    message=(
+                        f'👋 ¡Hola {first_name}!\n\n'
+                        f'Para usar este bot, primero debes vincular tu cuenta.\n\n'
+                        f'🔗 *Opciones de vinculación:*\n\n'
+                        f'*1. Con código temporal:*\n'
+                        f'   • Genera un código desde la app web\n'
+                        f'   • Envía: `/vincular CODIGO`\n\n'
+                        f'*2. Con credenciales:*\n'
+                        f'   • Envía: `/vincular usuario contraseña`\n\n'
+                        f'📱 Tu Chat ID: `{chat_id}`\n\n'
+                        f'💡 Si tienes problemas, contacta al administrador.'
+                    ),
+                    reply_markup={'inline_keyboard': [
+                        [{'text': '❓ Ayuda', 'callback_data': 'cmd_help'}]
+                    ]}
+                )
+            else:
+                telegram.send_message(
+                    chat_id=chat_id,
+                    title='',
+                    message=(
+                        f'💬 Hola {user.get_full_name() or user.username}!\n\n'
+                        f'Usa /help para ver los comandos disponibles.\n\n'
+                        f'O usa los botones del menú para navegar.'
+                    ),
+                    reply_markup={'inline_keyboard': [
+                        [{'text': '📋 Mis Órdenes', 'callback_data': 'cmd_workorders'}],
+                        [{'text': '⚠️ Predicciones', 'callback_data': 'cmd_predictions'}],
+                        [{'text': '❓ Ayuda', 'callback_data': 'cmd_help'}]
+                    ]}
+                )
+    
+    except Exception as e:
+        logger.error(f"Error in handle_message: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        # Intentar enviar mensaje de error al usuario
+        try:
+            telegram.send_message(
+                chat_id=chat_id,
+                title='',
+                message=(
+                    f'❌ *Error procesando tu mensaje*\n\n'
+                    f'Ocurrió un error inesperado. Por favor intenta de nuevo.\n\n'
+                    f'Si el problema persiste, contacta al administrador.'
+                ),
+                reply_markup={'inline_keyboard': [
+                    [{'text': '🔄 Reiniciar', 'callback_data': 'cmd_start'}]
+                ]}
+            )
+        except:
+            pass
+
+
+def handle_callback(callback_query: dict, telegram: TelegramChannel):
+    """
+    Procesa un callback de botón presionado
+    """
+    callback_id = callback_query['id']
+    chat_id = str(callback_query['message']['chat']['id'])
+    message_id = callback_query['message']['message_id']
+    callback_data = callback_query['data']
+    
+    logger.info(f"Callback from {chat_id}: {callback_data}")
+    
+    try:
+        # Buscar usuario
+        user = get_chat_user('TELEGRAM', chat_id)
+        if user:
+            logger.info(f"User found: {user.username}")
+        else:
+            logger.warning(f"No user found for chat_id {chat_id}")
+        
+        # Procesar callback
+        handler = BotCommandHandler()
+        response = handler.handle_callback(callback_data, user)
+        
+        # Responder al callback (para quitar el "loading" del botón)
+        answer_response = telegram.session.post(
+            f"{telegram.api_url}/answerCallbackQuery",
+            json={'callback_query_id': callback_id},
+            timeout=5
+        )
+        logger.info(f"Answer callback response: {answer_response.status_code}")
+        
+        # Preparar payload para editar mensaje
+        edit_payload = {
+            'chat_id': chat_id,
+            'message_id': message_id,
+            'text': response['text'],
+            'parse_mode': 'Markdown',
+        }
+        
+        # Solo agregar reply_markup si hay botones
+        if response.get('buttons'):
+            edit_payload['reply_markup'] = {'inline_keyboard': response['buttons']}
+        
+        # Editar el mensaje con la nueva respuesta
+        edit_response = telegram.session.post(
+            f"{telegram.api_url}/editMessageText",
+            json=edit_payload,
+            timeout=10
+        )
+        
+        if edit_response.status_code == 200:
+            logger.info(f"Message edited successfully")
+        else:
+            logger.error(f"Error editing message: {edit_response.text}")
+            # Si falla la edición, enviar nuevo mensaje
+            send_kwargs = {
+                'chat_id': chat_id,
+                'title': '',
+                'message': response['text']
+            }
+            if response.get('buttons'):
+                send_kwargs['reply_markup'] = {'inline_keyboard': response['buttons']}
+            telegram.send_message(**send_kwargs)
+    
+    except Exception as e:
+        logger.error(f"Error in handle_callback: {str(e)}")
+        # Responder al callback aunque haya error
+        try:
+            telegram.session.post(
+                f"{telegram.api_url}/answerCallbackQuery",
+                json={
+                    'callback_query_id': callback_id,
+                    'text': '❌ Error procesando acción',
+                    'show_alert': True
+                },
+                timeout=5
+            )
+        except:
+            pass
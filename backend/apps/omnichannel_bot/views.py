@@ -1,291 +1,64 @@
 """
 Views para el bot omnicanal
 """
+from django.conf import settings
 from django.http import JsonResponse, HttpResponse
+from django.utils.crypto import constant_time_compare
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from datetime import timedelta
 import json
 import logging
-import requests
-from .models import ChannelConfig, UserChannelPreference
-from .channels.telegram import TelegramChannel
-from .bot_commands import BotCommandHandler
+from apps.authentication.permissions import IsSupervisorOrAdmin
+from .models import ChannelConfig, ChannelDeliveryStats, UserChannelPreference
+from . import updates
 
 logger = logging.getLogger(__name__)
 
 
-def setup_bot_commands(bot_token: str) -> bool:
-    """
-    Configura el menú de comandos del bot de Telegram
-    """
-    try:
-        commands = [
-            {"command": "start", "description": "🏠 Iniciar el bot"},
-            {"command": "workorders", "description": "📋 Ver mis órdenes de trabajo"},
-            {"command": "predictions", "description": "⚠️ Ver predicciones de alto riesgo"},
-            {"command": "assets", "description": "🔧 Ver estado de activos"},
-            {"command": "status", "description": "📊 Estado general del sistema"},
-            {"command": "myinfo", "description": "👤 Ver mi información"},
-            {"command": "help", "description": "❓ Ver ayuda y comandos"},
-        ]
-        
-        response = requests.post(
-            f"https://api.telegram.org/bot{bot_token}/setMyCommands",
-            json={"commands": commands},
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            logger.info("Bot commands menu configured successfully")
-            return True
-        else:
-            logger.error(f"Failed to configure bot commands: {response.text}")
-            return False
-    
-    except Exception as e:
-        logger.error(f"Error configuring bot commands: {str(e)}")
-        return False
-
-
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
 def telegram_webhook(request):
     """
     Webhook para recibir actualizaciones de Telegram
+    
+    Sólo valida y guarda el update; un worker lo procesa (ver updates.py),
+    así Telegram recibe la respuesta en milisegundos y no reintenta.
     """
     if request.method == 'GET':
         return HttpResponse("Telegram Webhook is active", status=200)
     
+    # Token secreto enviado por Telegram si el webhook se registró con secret_token
+    secret = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
+    if secret and not constant_time_compare(
+        request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), secret
+    ):
+        logger.warning("Telegram webhook called with an invalid secret token")
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    
     try:
-        # Obtener configuración del bot
-        config = ChannelConfig.objects.get(channel_type='TELEGRAM', is_enabled=True)
-        telegram = TelegramChannel(config.config)
-        bot_token = config.config.get('bot_token', '')
-        
-        # Configurar menú de comandos si no está configurado
-        # Esto se hace una vez cuando el bot recibe su primer mensaje
-        if bot_token and not hasattr(telegram_webhook, '_commands_configured'):
-            setup_bot_commands(bot_token)
-            telegram_webhook._commands_configured = True
-        
-        # Parsear el update de Telegram
         update = json.loads(request.body.decode('utf-8'))
-        logger.info(f"Telegram update received: {update}")
-        
-        # Extraer información del mensaje
-        message = update.get('message')
-        callback_query = update.get('callback_query')
-        
-        if message:
-            handle_message(message, telegram, bot_token)
-        elif callback_query:
-            handle_callback(callback_query, telegram)
-        
-        return JsonResponse({'ok': True})
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': 'Invalid update'}, status=400)
     
-    except ChannelConfig.DoesNotExist:
-        logger.error("Telegram channel not configured")
-        return JsonResponse({'error': 'Channel not configured'}, status=500)
-    except Exception as e:
-        logger.error(f"Error processing telegram webhook: {str(e)}")
-        return JsonResponse({'error': str(e)}, status=500)
-
-
-def handle_message(message: dict, telegram: TelegramChannel, bot_token: str = None):
-    """
-    Procesa un mensaje recibido del usuario
-    """
-    chat_id = str(message['chat']['id'])
-    text = message.get('text', '')
-    from_user = message.get('from', {})
-    first_name = from_user.get('first_name', 'Usuario')
-    
-    logger.info(f"Message from {chat_id} ({first_name}): {text}")
+    if not isinstance(update, dict) or not isinstance(update.get('update_id'), int):
+        return JsonResponse({'error': 'Invalid update'}, status=400)
     
     try:
-        # Buscar usuario del sistema asociado a este chat_id
-        try:
-            preference = UserChannelPreference.objects.get(
-                channel_type='TELEGRAM',
-                channel_user_id=chat_id
-            )
-            user = preference.user
-            logger.info(f"User found: {user.username}")
-        except UserChannelPreference.DoesNotExist:
-            user = None
-            logger.warning(f"No user found for chat_id {chat_id}")
-        
-        # Procesar comando
-        if text.startswith('/'):
-            handler = BotCommandHandler()
-            
-            # Si es el comando /vincular, pasar parámetros adicionales
-            if text.lower().startswith('/vincular'):
-                response = handler.cmd_vincular(user=user, chat_id=chat_id, full_command=text)
-            else:
-                response = handler.handle_command(text, user)
-            
-            logger.info(f"Command response: {response['text'][:50]}...")
-            
-            # Enviar respuesta
-            result = telegram.send_message(
-                chat_id=chat_id,
-                title='',
-                message=response['text'],
-                reply_markup={'inline_keyboard': response.get('buttons', [])} if response.get('buttons') else None
-            )
-            
-            if result.get('success'):
-                logger.info(f"Message sent successfully to {chat_id}")
-            else:
-                logger.error(f"Failed to send message: {result.get('error')}")
-        else:
-            # Mensaje no es comando
-            if not user:
-                telegram.send_message(
-                    chat_id=chat_id,
-                    title='',
-                    message=(
-                        f'👋 ¡Hola {first_name}!\n\n'
-                        f'Para usar este bot, primero debes vincular tu cuenta.\n\n'
-                        f'🔗 *Opciones de vinculación:*\n\n'
-                        f'*1. Con código temporal:*\n'
-                        f'   • Genera un código desde la app web\n'
-                        f'   • Envía: `/vincular CODIGO`\n\n'
-                        f'*2. Con credenciales:*\n'
-                        f'   • Envía: `/vincular usuario contraseña`\n\n'
-                        f'📱 Tu Chat ID: `{chat_id}`\n\n'
-                        f'💡 Si tienes problemas, contacta al administrador.'
-                    ),
-                    reply_markup={'inline_keyboard': [
-                        [{'text': '❓ Ayuda', 'callback_data': 'cmd_help'}]
-                    ]}
-                )
-            else:
-                telegram.send_message(
-                    chat_id=chat_id,
-                    title='',
-                    message=(
-                        f'💬 Hola {user.get_full_name() or user.username}!\n\n'
-                        f'Usa /help para ver los comandos disponibles.\n\n'
-                        f'O usa los botones del menú para navegar.'
-                    ),
-                    reply_markup={'inline_keyboard': [
-                        [{'text': '📋 Mis Órdenes', 'callback_data': 'cmd_workorders'}],
-                        [{'text': '⚠️ Predicciones', 'callback_data': 'cmd_predictions'}],
-                        [{'text': '❓ Ayuda', 'callback_data': 'cmd_help'}]
-                    ]}
-                )
-    
+        _, created = updates.store_update(update)
     except Exception as e:
-        logger.error(f"Error in handle_message: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
-        # Intentar enviar mensaje de error al usuario
-        try:
-            telegram.send_message(
-                chat_id=chat_id,
-                title='',
-                message=(
-                    f'❌ *Error procesando tu mensaje*\n\n'
-                    f'Ocurrió un error inesperado. Por favor intenta de nuevo.\n\n'
-                    f'Si el problema persiste, contacta al administrador.'
-                ),
-                reply_markup={'inline_keyboard': [
-                    [{'text': '🔄 Reiniciar', 'callback_data': 'cmd_start'}]
-                ]}
-            )
-        except:
-            pass
-
-
-def handle_callback(callback_query: dict, telegram: TelegramChannel):
-    """
-    Procesa un callback de botón presionado
-    """
-    import requests
-    
-    callback_id = callback_query['id']
-    chat_id = str(callback_query['message']['chat']['id'])
-    message_id = callback_query['message']['message_id']
-    callback_data = callback_query['data']
-    bot_token = telegram.bot_token
-    
-    logger.info(f"Callback from {chat_id}: {callback_data}")
-    
-    try:
-        # Buscar usuario
-        try:
-            preference = UserChannelPreference.objects.get(
-                channel_type='TELEGRAM',
-                channel_user_id=chat_id
-            )
-            user = preference.user
-            logger.info(f"User found: {user.username}")
-        except UserChannelPreference.DoesNotExist:
-            user = None
-            logger.warning(f"No user found for chat_id {chat_id}")
-        
-        # Procesar callback
-        handler = BotCommandHandler()
-        response = handler.handle_callback(callback_data, user)
-        
-        # Responder al callback (para quitar el "loading" del botón)
-        answer_response = requests.post(
-            f"https://api.telegram.org/bot{bot_token}/answerCallbackQuery",
-            json={'callback_query_id': callback_id},
-            timeout=5
-        )
-        logger.info(f"Answer callback response: {answer_response.status_code}")
-        
-        # Preparar payload para editar mensaje
-        edit_payload = {
-            'chat_id': chat_id,
-            'message_id': message_id,
-            'text': response['text'],
-            'parse_mode': 'Markdown',
-        }
-        
-        # Solo agregar reply_markup si hay botones
-        if response.get('buttons'):
-            edit_payload['reply_markup'] = {'inline_keyboard': response['buttons']}
-        
-        # Editar el mensaje con la nueva respuesta
-        edit_response = requests.post(
-            f"https://api.telegram.org/bot{bot_token}/editMessageText",
-            json=edit_payload,
-            timeout=10
-        )
-        
-        if edit_response.status_code == 200:
-            logger.info(f"Message edited successfully")
-        else:
-            logger.error(f"Error editing message: {edit_response.text}")
-            # Si falla la edición, enviar nuevo mensaje
-            send_kwargs = {
-                'chat_id': chat_id,
-                'title': '',
-                'message': response['text']
-            }
-            if response.get('buttons'):
-                send_kwargs['reply_markup'] = {'inline_keyboard': response['buttons']}
-            telegram.send_message(**send_kwargs)
+        # Telegram reintenta ante un error: el update no se pierde
+        logger.error(f"Error storing telegram update: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
     
-    except Exception as e:
-        logger.error(f"Error in handle_callback: {str(e)}")
-        # Responder al callback aunque haya error
-        try:
-            requests.post(
-                f"https://api.telegram.org/bot{bot_token}/answerCallbackQuery",
-                json={
-                    'callback_query_id': callback_id,
-                    'text': '❌ Error procesando acción',
-                    'show_alert': True
-                },
-                timeout=5
-            )
-        except:
-            pass
+    if not created:
+        logger.info(f"Duplicate telegram update {update['update_id']} ignored")
+    return JsonResponse({'ok': True})
 
 
 @require_http_methods(["GET"])
@@ -310,6 +83,51 @@ def bot_status(request):
         }, status=404)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsSupervisorOrAdmin])
+def delivery_stats(request):
+    """
+    Throughput y latencia de envío por minuto (supervisores y administradores)
+    
+    Query params:
+        channel: Tipo de canal (default: TELEGRAM)
+        minutes: Ventana en minutos hacia atrás (default: 60, máx: 1440)
+    """
+    channel_type = request.query_params.get('channel', 'TELEGRAM').upper()
+    try:
+        minutes = min(max(int(request.query_params.get('minutes', 60)), 1), 1440)
+    except ValueError:
+        return Response({'error': 'minutes debe ser un entero'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    since = timezone.now() - timedelta(minutes=minutes)
+    buckets = list(
+        ChannelDeliveryStats.objects.filter(channel_type=channel_type, minute__gte=since).order_by('minute')
+    )
+    sent = sum(bucket.sent for bucket in buckets)
+    failed = sum(bucket.failed for bucket in buckets)
+    total_latency = sum(bucket.total_latency_ms for bucket in buckets)
+    
+    return Response({
+        'channel': channel_type,
+        'minutes': minutes,
+        'sent': sent,
+        'failed': failed,
+        'messages_per_minute': round((sent + failed) / minutes, 2),
+        'avg_latency_ms': round(total_latency / (sent + failed)) if sent + failed else 0,
+        'max_latency_ms': max((bucket.max_latency_ms for bucket in buckets), default=0),
+        'buckets': [
+            {
+                'minute': bucket.minute.isoformat(),
+                'sent': bucket.sent,
+                'failed': bucket.failed,
+                'avg_latency_ms': bucket.avg_latency_ms,
+                'max_latency_ms': bucket.max_latency_ms,
+            }
+            for bucket in buckets
+        ]
+    })
+
+
 @csrf_exempt
 @require_http_methods(["POST", "GET"])
 def link_user_telegram(request):
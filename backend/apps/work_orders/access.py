@@ -0,0 +1,169 @@
+"""
+Materialized per-user asset access.
+
+Operators may only see the assets they have work orders for. Instead of
+re-deriving that set from WorkOrder on every request, UserAssetAccess keeps
+one row per (user, asset) with the number of total and open work orders.
+Work order signals call refresh_access() for the pairs a save or delete
+touched, and the id sets are cached per user for Python-side checks.
+
+Querysets should use filter_by_accessible_assets(), which joins against the
+indexed mapping table inside the same SQL statement.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+from apps.work_orders.models import UserAssetAccess, WorkOrder
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = [WorkOrder.STATUS_COMPLETED, WorkOrder.STATUS_CANCELLED]
+
+CACHE_KEY = 'user_asset_access:{user_id}'
+DEFAULT_CACHE_TIMEOUT = 300
+
+
+def _cache_key(user_id):
+    return CACHE_KEY.format(user_id=user_id)
+
+
+def _counts():
+    return {
+        'total': Count('id'),
+        'open': Count('id', filter=~Q(status__in=CLOSED_STATUSES)),
+    }
+
+
+def invalidate_user_cache(user_ids):
+    """Drop the cached asset sets of the given users once the transaction commits."""
+    keys = [_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def refresh_access(pairs):
+    """
+    Recompute the mapping rows for (user_id, asset_id) pairs.
+
+    Args:
+        pairs: Iterable of (user_id, asset_id) tuples touched by a change
+    """
+    pairs = {(user_id, asset_id) for user_id, asset_id in pairs if user_id and asset_id}
+    if not pairs:
+        return
+
+    user_ids = {user_id for user_id, _ in pairs}
+    asset_ids = {asset_id for _, asset_id in pairs}
+
+    counts = {
+        (row['assigned_to_id'], row['asset_id']): row
+        for row in WorkOrder.objects.filter(
+            assigned_to_id__in=user_ids,
+            asset_id__in=asset_ids
+        ).order_by().values('assigned_to_id', 'asset_id').annotate(**_counts())
+    }
+
+    with transaction.atomic():
+        for user_id, asset_id in pairs:
+            row = counts.get((user_id, asset_id))
+            if row is None:
+                UserAssetAccess.objects.filter(user_id=user_id, asset_id=asset_id).delete()
+                continue
+            UserAssetAccess.objects.update_or_create(
+                user_id=user_id,
+                asset_id=asset_id,
+                defaults={
+                    'work_order_count': row['total'],
+                    'open_work_order_count': row['open'],
+                }
+            )
+
+    invalidate_user_cache(user_ids)
+
+
+def rebuild_access(user_ids=None):
+    """
+    Rebuild the mapping from scratch (all users or only user_ids).
+
+    Returns:
+        int: Number of mapping rows written
+    """
+    work_orders = WorkOrder.objects.all()
+    existing = UserAssetAccess.objects.all()
+    if user_ids is not None:
+        work_orders = work_orders.filter(assigned_to_id__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+
+    rows = [
+        UserAssetAccess(
+            user_id=row['assigned_to_id'],
+            asset_id=row['asset_id'],
+            work_order_count=row['total'],
+            open_work_order_count=row['open']
+        )
+        for row in work_orders.order_by().values('assigned_to_id', 'asset_id').annotate(**_counts())
+    ]
+
+    with transaction.atomic():
+        affected = set(existing.values_list('user_id', flat=True))
+        existing.delete()
+        UserAssetAccess.objects.bulk_create(rows, batch_size=1000)
+
+    affected.update(row.user_id for row in rows)
+    invalidate_user_cache(affected)
+    logger.info(f"Rebuilt {len(rows)} user asset access rows")
+    return len(rows)
+
+
+def get_accessible_asset_ids(user, open_only=False):
+    """
+    Cached ids of the assets a user has work orders for.
+
+    Args:
+        user: User instance
+        open_only: Only assets with work orders that are not completed/cancelled
+
+    Returns:
+        frozenset: Asset ids
+    """
+    key = _cache_key(user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        cached = {'all': [], 'open': []}
+        for asset_id, open_count in UserAssetAccess.objects.filter(
+            user_id=user.pk
+        ).values_list('asset_id', 'open_work_order_count'):
+            cached['all'].append(asset_id)
+            if open_count:
+                cached['open'].append(asset_id)
+        cache.set(
+            key,
+            cached,
+            getattr(settings, 'USER_ASSET_ACCESS_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+        )
+    return frozenset(cached['open'] if open_only else cached['all'])
+
+
+def accessible_assets_subquery(user, open_only=False):
+    """Subquery of asset ids for use in `__in` lookups (evaluated by the database)."""
+    access = UserAssetAccess.objects.filter(user_id=user.pk)
+    if open_only:
+        access = access.filter(open_work_order_count__gt=0)
+    return access.values('asset_id')
+
+
+def filter_by_accessible_assets(queryset, user, lookup='asset', open_only=False):
+    """
+    Restrict a queryset to the assets a user has work orders for.
+
+    Args:
+        queryset: Queryset to filter
+        user: User whose access applies
+        lookup: Path from the queryset model to the asset ('pk' for Asset itself)
+        open_only: Only assets with open work orders
+    """
+    return queryset.filter(**{f'{lookup}__in': accessible_assets_subquery(user, open_only)})
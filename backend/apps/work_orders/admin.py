@@ -2,7 +2,7 @@
 Admin configuration for work orders app.
 """
 from django.contrib import admin
-from .models import WorkOrder
+from .models import UserAssetAccess, WorkOrder
 
 
 @admin.register(WorkOrder)
@@ -38,3 +38,19 @@ class WorkOrderAdmin(admin.ModelAdmin):
         if not change:
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(UserAssetAccess)
+class UserAssetAccessAdmin(admin.ModelAdmin):
+    """Admin for UserAssetAccess model (read-only, maintained by signals)."""
+    list_display = ['user', 'asset', 'work_order_count', 'open_work_order_count', 'updated_at']
+    search_fields = ['user__username', 'asset__name']
+    list_select_related = ['user', 'asset']
+    
+    def has_add_permission(self, request):
+        """Access rows are derived from work orders."""
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        """Access rows are derived from work orders."""
+        return False
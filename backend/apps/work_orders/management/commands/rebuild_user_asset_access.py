@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.work_orders.access import rebuild_access
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized user -> asset access mapping from work orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='users',
+            help='Only rebuild these user ids (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Reconstruyendo acceso de usuarios a activos...")
+        rows = rebuild_access(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} registros de acceso generados"))
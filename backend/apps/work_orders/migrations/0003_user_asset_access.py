@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+
+def populate_user_asset_access(apps, schema_editor):
+    """Build the initial mapping from existing work orders."""
+    WorkOrder = apps.get_model('work_orders', 'WorkOrder')
+    UserAssetAccess = apps.get_model('work_orders', 'UserAssetAccess')
+    
+    rows = WorkOrder.objects.order_by().values('assigned_to_id', 'asset_id').annotate(
+        total=Count('id'),
+        open=Count('id', filter=~Q(status__in=['Completada', 'Cancelada']))
+    )
+    UserAssetAccess.objects.bulk_create(
+        [
+            UserAssetAccess(
+                user_id=row['assigned_to_id'],
+                asset_id=row['asset_id'],
+                work_order_count=row['total'],
+                open_work_order_count=row['open']
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('work_orders', '0002_add_actual_hours_validator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAssetAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_order_count', models.PositiveIntegerField(default=0)),
+                ('open_work_order_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_access', to='assets.asset')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asset_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Asset Access',
+                'verbose_name_plural': 'User Asset Access',
+                'db_table': 'user_asset_access',
+                'indexes': [models.Index(fields=['user', 'open_work_order_count'], name='user_asset__user_id_dc9e8f_idx')],
+                'unique_together': {('user', 'asset')},
+            },
+        ),
+        migrations.RunPython(populate_user_asset_access, migrations.RunPython.noop),
+    ]
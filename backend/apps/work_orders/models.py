@@ -114,3 +114,39 @@ class WorkOrder(TimeStampedModel):
         self.completion_notes = completion_notes
         self.actual_hours = actual_hours
         self.save()
+
+
+class UserAssetAccess(models.Model):
+    """
+    Materialized mapping of the assets each user has work orders for.
+    
+    Maintained by work order signals (see apps.work_orders.access) so
+    role-scoped querysets can join against it instead of re-deriving the
+    asset set from WorkOrder on every request.
+    """
+    
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='asset_access'
+    )
+    asset = models.ForeignKey(
+        Asset,
+        on_delete=models.CASCADE,
+        related_name='user_access'
+    )
+    work_order_count = models.PositiveIntegerField(default=0)
+    open_work_order_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'user_asset_access'
+        verbose_name = 'User Asset Access'
+        verbose_name_plural = 'User Asset Access'
+        unique_together = [['user', 'asset']]
+        indexes = [
+            models.Index(fields=['user', 'open_work_order_count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} -> {self.asset_id} ({self.open_work_order_count} open)"
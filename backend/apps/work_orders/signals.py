@@ -1,8 +1,9 @@
 """
 Signals for Work Order notifications.
 """
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+from apps.work_orders.access import refresh_access
 from apps.work_orders.models import WorkOrder
 from apps.notifications.services import NotificationService
 
@@ -16,12 +17,15 @@ def track_work_order_changes(sender, instance, **kwargs):
             previous = WorkOrder.objects.get(pk=instance.pk)
             instance._previous_assigned_to = previous.assigned_to
             instance._previous_status = previous.status
+            instance._previous_asset_id = previous.asset_id
         except WorkOrder.DoesNotExist:
             instance._previous_assigned_to = None
             instance._previous_status = None
+            instance._previous_asset_id = None
     else:
         instance._previous_assigned_to = None
         instance._previous_status = None
+        instance._previous_asset_id = None
 
 
 @receiver(post_save, sender=WorkOrder)
@@ -55,3 +59,29 @@ def work_order_notification_handler(sender, instance, created, **kwargs):
                 # Get the user who made the update from the request context
                 # For now, we'll skip this as we need request context
                 pass
+
+
+@receiver(post_save, sender=WorkOrder)
+def update_user_asset_access(sender, instance, created, **kwargs):
+    """Keep UserAssetAccess in sync with assignment, asset and status changes."""
+    previous_assignee = getattr(instance, '_previous_assigned_to', None)
+    previous_assignee_id = previous_assignee.pk if previous_assignee else None
+    previous_asset_id = getattr(instance, '_previous_asset_id', None)
+    
+    if not created and (
+        previous_assignee_id == instance.assigned_to_id
+        and previous_asset_id == instance.asset_id
+        and getattr(instance, '_previous_status', None) == instance.status
+    ):
+        return
+    
+    refresh_access([
+        (instance.assigned_to_id, instance.asset_id),
+        (previous_assignee_id, previous_asset_id),
+    ])
+
+
+@receiver(post_delete, sender=WorkOrder)
+def remove_user_asset_access(sender, instance, **kwargs):
+    """Drop access granted only by a deleted work order."""
+    refresh_access([(instance.assigned_to_id, instance.asset_id)])
@@ -0,0 +1,106 @@
+"""
+Tests for the materialized user -> asset access mapping.
+"""
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from apps.assets.models import Asset, Location
+from apps.work_orders.access import get_accessible_asset_ids, rebuild_access
+from apps.work_orders.models import UserAssetAccess, WorkOrder
+
+
+@pytest.fixture
+def assets(db, admin_user):
+    """Two assets."""
+    location = Location.objects.create(name='Test Location', address='Test Address')
+    return [
+        Asset.objects.create(
+            name=f'Access Asset {i}',
+            vehicle_type='Camioneta MDO',
+            model='Test Model',
+            serial_number=f'ACC-{i:03d}',
+            location=location,
+            installation_date=timezone.now().date(),
+            created_by=admin_user
+        )
+        for i in range(2)
+    ]
+
+
+def create_work_order(asset, user, created_by, status=WorkOrder.STATUS_PENDING):
+    return WorkOrder.objects.create(
+        title='Access Work Order',
+        description='Test',
+        asset=asset,
+        assigned_to=user,
+        status=status,
+        scheduled_date=timezone.now(),
+        created_by=created_by
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestUserAssetAccess:
+    """Test that signals keep the mapping and cache in sync."""
+
+    def test_assignment_creates_access(self, assets, operador_user, admin_user):
+        create_work_order(assets[0], operador_user, admin_user)
+
+        access = UserAssetAccess.objects.get(user=operador_user)
+        assert access.asset == assets[0]
+        assert access.open_work_order_count == 1
+        assert get_accessible_asset_ids(operador_user) == {assets[0].id}
+
+    def test_completion_closes_but_keeps_access(self, assets, operador_user, admin_user):
+        work_order = create_work_order(assets[0], operador_user, admin_user)
+        assert get_accessible_asset_ids(operador_user, open_only=True) == {assets[0].id}
+
+        work_order.status = WorkOrder.STATUS_COMPLETED
+        work_order.save()
+
+        access = UserAssetAccess.objects.get(user=operador_user)
+        assert access.work_order_count == 1
+        assert access.open_work_order_count == 0
+        assert get_accessible_asset_ids(operador_user, open_only=True) == frozenset()
+        assert get_accessible_asset_ids(operador_user) == {assets[0].id}
+
+    def test_reassignment_moves_access(self, assets, operador_user, supervisor_user, admin_user):
+        work_order = create_work_order(assets[0], operador_user, admin_user)
+
+        work_order.assigned_to = supervisor_user
+        work_order.asset = assets[1]
+        work_order.save()
+
+        assert not UserAssetAccess.objects.filter(user=operador_user).exists()
+        assert get_accessible_asset_ids(operador_user) == frozenset()
+        assert get_accessible_asset_ids(supervisor_user) == {assets[1].id}
+
+    def test_delete_removes_access(self, assets, operador_user, admin_user):
+        work_order = create_work_order(assets[0], operador_user, admin_user)
+
+        work_order.delete()
+
+        assert not UserAssetAccess.objects.exists()
+
+    def test_rebuild_matches_signals(self, assets, operador_user, admin_user):
+        create_work_order(assets[0], operador_user, admin_user)
+        create_work_order(assets[0], operador_user, admin_user, WorkOrder.STATUS_COMPLETED)
+        create_work_order(assets[1], operador_user, admin_user, WorkOrder.STATUS_CANCELLED)
+        expected = set(UserAssetAccess.objects.values_list(
+            'asset_id', 'work_order_count', 'open_work_order_count'
+        ))
+
+        assert rebuild_access() == 2
+        assert set(UserAssetAccess.objects.values_list(
+            'asset_id', 'work_order_count', 'open_work_order_count'
+        )) == expected
+
+    def test_operator_asset_list_uses_mapping(self, api_client, assets, operador_user, admin_user):
+        create_work_order(assets[1], operador_user, admin_user)
+        api_client.force_authenticate(user=operador_user)
+
+        response = api_client.get('/api/v1/assets/assets/')
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data.get('results', response.data)
+        assert [item['id'] for item in results] == [str(assets[1].id)]
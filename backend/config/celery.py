@@ -32,12 +32,32 @@ app.conf.beat_schedule = {
         'schedule': crontab(minute=0, hour='*/4'),  # Cada 4 horas (0, 4, 8, 12, 16, 20)
     },
     
+    # Enviar mensajes pendientes y reintentos de la cola de salida cada minuto
+    'dispatch-outbound-messages': {
+        'task': 'apps.omnichannel_bot.tasks.dispatch_outbound_messages',
+        'schedule': crontab(),
+        'options': {'expires': 60}
+    },
+    
+    # Reprocesar updates de Telegram pendientes o con workers caídos cada minuto
+    'process-telegram-updates': {
+        'task': 'apps.omnichannel_bot.tasks.process_telegram_updates',
+        'schedule': crontab(),
+        'options': {'expires': 60}
+    },
+    
     # Limpiar notificaciones antiguas cada día a medianoche
     'cleanup-old-notifications': {
         'task': 'apps.notifications.tasks.cleanup_old_notifications',
         'schedule': crontab(hour=0, minute=0),
     },
     
+    # Corregir contadores de notificaciones no leídas cada día a la 1:15 AM
+    'reconcile-notification-counters': {
+        'task': 'apps.notifications.tasks.reconcile_notification_counters',
+        'schedule': crontab(hour=1, minute=15),
+    },
+    
     # Generar reporte semanal los lunes a las 8:00 AM
     'generate-weekly-report': {
         'task': 'apps.reports.tasks.generate_weekly_report',
@@ -49,6 +69,30 @@ app.conf.beat_schedule = {
         'task': 'apps.work_orders.tasks.check_overdue_workorders',
         'schedule': crontab(minute='*/30'),
     },
+    
+    # Actualizar agregados del historial de estados cada hora
+    'refresh-status-rollups': {
+        'task': 'apps.machine_status.tasks.refresh_status_rollups',
+        'schedule': crontab(minute=5),
+    },
+    
+    # Archivar y purgar historiales y logs antiguos cada día a las 2:30 AM
+    'apply-data-retention': {
+        'task': 'apps.core.tasks.apply_data_retention',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    
+    # Reencolar PDFs de checklists atascados en cola cada 5 minutos
+    'requeue-stale-checklist-pdfs': {
+        'task': 'apps.checklists.tasks.requeue_stale_checklist_pdfs',
+        'schedule': crontab(minute='*/5'),
+    },
+    
+    # Eliminar bundles ZIP de checklists expirados cada día a las 3:00 AM
+    'purge-checklist-exports': {
+        'task': 'apps.checklists.tasks.purge_checklist_exports',
+        'schedule': crontab(hour=3, minute=0),
+    },
 }
 
 # Configuración de zona horaria
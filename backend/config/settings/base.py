@@ -122,16 +122,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'authentication.User'
 
-# Caching
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'cmms-cache',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000
+# Caching: per-process LocMemCache unless CACHE_REDIS_URL is set. Cached
+# lookups are invalidated by signals (e.g. apps/omnichannel_bot/lookups.py),
+# so any deployment with more than one process (gunicorn workers + Celery)
+# needs the shared Redis cache; production and railway default to it.
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'cmms',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'cmms-cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000
+            }
         }
     }
-}
 
 # Cache timeout (in seconds)
 CACHE_MIDDLEWARE_SECONDS = 300  # 5 minutes
@@ -219,3 +232,153 @@ CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
 
 # Beat scheduler
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+
+# Checklist PDFs are rendered on their own queue so bursts (e.g. shift
+# changes) are absorbed by a bounded pool instead of web workers
+CHECKLIST_PDF_QUEUE = config('CHECKLIST_PDF_QUEUE', default='checklist_pdfs')
+CHECKLIST_PDF_ASYNC = config('CHECKLIST_PDF_ASYNC', default=True, cast=bool)
+# PDFs queued longer than this are queued again (lost task or broker message)
+CHECKLIST_PDF_LEASE_SECONDS = 900
+# Photo variants and signature files are CPU-bound too and share that queue
+CHECKLIST_MEDIA_QUEUE = config('CHECKLIST_MEDIA_QUEUE', default=CHECKLIST_PDF_QUEUE)
+CHECKLIST_MEDIA_ASYNC = config('CHECKLIST_MEDIA_ASYNC', default=True, cast=bool)
+# Channel implementations by ChannelConfig.channel_type. A new channel is a
+# BaseChannel subclass plus an entry here (see apps/omnichannel_bot/channels)
+OMNICHANNEL_CHANNEL_CLASSES = {
+    'TELEGRAM': 'apps.omnichannel_bot.channels.telegram.TelegramChannel',
+    'EMAIL': 'apps.omnichannel_bot.channels.email.EmailChannel',
+}
+# Outbound bot messages (Telegram, etc.) are queued as MessageLog rows and
+# sent by a single consumer (the outbound worker in start.sh, --concurrency=1)
+# that enforces the channel rate limits
+OMNICHANNEL_OUTBOUND_QUEUE = config('OMNICHANNEL_OUTBOUND_QUEUE', default='outbound_messages')
+OMNICHANNEL_OUTBOUND_ASYNC = config('OMNICHANNEL_OUTBOUND_ASYNC', default=True, cast=bool)
+OMNICHANNEL_GLOBAL_RATE = config('OMNICHANNEL_GLOBAL_RATE', default=30, cast=int)  # mensajes/segundo
+OMNICHANNEL_CHAT_INTERVAL = 1.0  # segundos entre mensajes al mismo chat
+OMNICHANNEL_SEND_CONCURRENCY = config('OMNICHANNEL_SEND_CONCURRENCY', default=8, cast=int)
+OMNICHANNEL_OUTBOUND_BATCH_SIZE = 100
+OMNICHANNEL_OUTBOUND_TIME_BUDGET = 50  # segundos por ejecución del consumidor
+OMNICHANNEL_MAX_ATTEMPTS = 5
+OMNICHANNEL_RETRY_BASE_SECONDS = 30
+OMNICHANNEL_RETRY_MAX_SECONDS = 3600
+OMNICHANNEL_SEND_LEASE_SECONDS = 300
+# Pooled SMTP connections of the EMAIL channel idle longer than this are reopened
+OMNICHANNEL_SMTP_IDLE_SECONDS = 60
+# Non-critical messages to the same chat are held for this window and sent
+# as one digest (0 sends every message on its own)
+OMNICHANNEL_DIGEST_WINDOW_SECONDS = config('OMNICHANNEL_DIGEST_WINDOW_SECONDS', default=300, cast=int)
+# Enabled channel configs and chat -> user links are cached (see
+# apps/omnichannel_bot/lookups.py) and invalidated by model signals
+OMNICHANNEL_CACHE_TIMEOUT = 300
+# In-memory overrides on top of ChannelConfig, per process ({channel_type: config})
+OMNICHANNEL_CHANNEL_OVERRIDES = {}
+# Read-only bot command replies (/status, /workorders...) are cached per user
+OMNICHANNEL_BOT_RESPONSE_CACHE_SECONDS = 30
+# Incoming Telegram updates are stored by the webhook and processed per chat,
+# in order, on their own queue (consumed by the telegram worker in start.sh).
+# Set TELEGRAM_WEBHOOK_SECRET to reject requests
+# without Telegram's X-Telegram-Bot-Api-Secret-Token header.
+TELEGRAM_WEBHOOK_SECRET = config('TELEGRAM_WEBHOOK_SECRET', default='')
+TELEGRAM_UPDATES_QUEUE = config('TELEGRAM_UPDATES_QUEUE', default='telegram_updates')
+TELEGRAM_UPDATES_ASYNC = config('TELEGRAM_UPDATES_ASYNC', default=True, cast=bool)
+TELEGRAM_UPDATE_MAX_ATTEMPTS = 3
+TELEGRAM_UPDATE_LEASE_SECONDS = 120
+# Long polling consumer (manage.py poll_telegram_updates) for sites without a
+# public webhook URL
+TELEGRAM_POLLING_WORKERS = config('TELEGRAM_POLLING_WORKERS', default=8, cast=int)
+TELEGRAM_POLLING_TIMEOUT = 30  # segundos de long polling por getUpdates
+CELERY_TASK_ROUTES = {
+    'apps.checklists.tasks.render_checklist_pdf': {'queue': CHECKLIST_PDF_QUEUE},
+    'apps.checklists.tasks.process_checklist_media': {'queue': CHECKLIST_MEDIA_QUEUE},
+    'apps.checklists.tasks.build_checklist_export': {'queue': CHECKLIST_PDF_QUEUE},
+    'apps.omnichannel_bot.tasks.dispatch_outbound_messages': {'queue': OMNICHANNEL_OUTBOUND_QUEUE},
+    'apps.omnichannel_bot.tasks.process_telegram_updates': {'queue': TELEGRAM_UPDATES_QUEUE},
+}
+
+# Bulk checklist PDF export (ZIP bundles, built by the PDF worker)
+CHECKLIST_EXPORT_ASYNC = config('CHECKLIST_EXPORT_ASYNC', default=CHECKLIST_PDF_ASYNC, cast=bool)
+CHECKLIST_EXPORT_MAX_RESPONSES = config('CHECKLIST_EXPORT_MAX_RESPONSES', default=2000, cast=int)
+CHECKLIST_EXPORT_CACHE_HOURS = 24
+
+# Offline sync: maximum item answers accepted in one batch
+CHECKLIST_SYNC_MAX_ITEMS = config('CHECKLIST_SYNC_MAX_ITEMS', default=2000, cast=int)
+
+
+# ============================================================================
+# REAL-TIME EVENTS (SSE)
+# ============================================================================
+
+# El stream lo sirve su propio proceso ASGI (config/sse_asgi.py). InProcessEventBus
+# sólo sirve si los eventos se emiten en ese mismo proceso (desarrollo, tests);
+# con gunicorn y Celery publicando hace falta 'apps.core.events.RedisEventBus',
+# que es el default en production y railway
+REALTIME_EVENTS_ENABLED = config('REALTIME_EVENTS_ENABLED', default=True, cast=bool)
+REALTIME_EVENT_BUS = config('REALTIME_EVENT_BUS', default='apps.core.events.InProcessEventBus')
+REALTIME_REDIS_URL = config('REALTIME_REDIS_URL', default=CELERY_BROKER_URL)
+REALTIME_HEARTBEAT_SECONDS = 15
+# Streams are closed after this long; EventSource reconnects by itself
+REALTIME_MAX_STREAM_SECONDS = 3600
+
+
+# ============================================================================
+# DATA RETENTION
+# ============================================================================
+
+# Retention per model: rows older than `days` (by `date_field`) are archived
+# to compressed NDJSON under DATA_ARCHIVE_ROOT (if `archive`) and deleted in
+# chunks. Tables with `partition` use monthly partitions on PostgreSQL
+# (see `manage.py partition_tables`).
+DATA_RETENTION = {
+    'machine_status.AssetStatusHistory': {
+        'days': config('RETENTION_STATUS_HISTORY_DAYS', default=1095, cast=int),
+        'date_field': 'timestamp',
+        'archive': True,
+        'partition': True,
+    },
+    'configuration.AccessLog': {
+        'days': config('RETENTION_ACCESS_LOG_DAYS', default=180, cast=int),
+        'date_field': 'timestamp',
+        'archive': True,
+        'partition': True,
+    },
+    'configuration.AuditLog': {
+        'days': config('RETENTION_AUDIT_LOG_DAYS', default=730, cast=int),
+        'date_field': 'timestamp',
+        'archive': True,
+        'partition': True,
+    },
+    'omnichannel_bot.MessageLog': {
+        'days': config('RETENTION_MESSAGE_LOG_DAYS', default=90, cast=int),
+        'date_field': 'created_at',
+        'archive': True,
+        'partition': True,
+    },
+    'omnichannel_bot.ChannelDeliveryStats': {
+        'days': config('RETENTION_DELIVERY_STATS_DAYS', default=30, cast=int),
+        'date_field': 'minute',
+        'archive': False,
+    },
+    'omnichannel_bot.TelegramUpdate': {
+        'days': config('RETENTION_TELEGRAM_UPDATE_DAYS', default=7, cast=int),
+        'date_field': 'received_at',
+        'archive': False,
+    },
+    'inventory.StockMovement': {
+        'days': config('RETENTION_STOCK_MOVEMENT_DAYS', default=1825, cast=int),
+        'date_field': 'created_at',
+        'archive': True,
+    },
+    'django_celery_results.TaskResult': {
+        'days': config('RETENTION_TASK_RESULT_DAYS', default=7, cast=int),
+        'date_field': 'date_done',
+        'archive': False,
+    },
+}
+DATA_RETENTION_CHUNK_SIZE = 1000
+DATA_RETENTION_SLEEP = 0.1  # segundos entre lotes
+DATA_ARCHIVE_ROOT = MEDIA_ROOT / 'archive'
+
+# Notifications: daily summary and cleanup batches
+NOTIFICATION_SUMMARY_BATCH_SIZE = 500
+NOTIFICATION_CLEANUP_CHUNK_SIZE = 1000
+NOTIFICATION_CLEANUP_SLEEP = 0.1  # segundos entre lotes
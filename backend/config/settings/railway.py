@@ -108,3 +108,18 @@ LOGGING = {
         },
     },
 }
+
+# Real-time events: the SSE stream runs in its own ASGI process while gunicorn
+# workers and Celery publish the events, so they must share the Redis bus
+REALTIME_EVENT_BUS = config('REALTIME_EVENT_BUS', default='apps.core.events.RedisEventBus')
+
+# Shared cache: signal-based invalidations must reach every gunicorn worker and
+# Celery process (defaults to the broker's Redis)
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=CELERY_BROKER_URL)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'KEY_PREFIX': 'cmms',
+    }
+}
@@ -0,0 +1,18 @@
+"""
+ASGI entry point for the real-time event stream (SSE).
+
+Runs as its own process next to the WSGI API, e.g.
+`uvicorn config.sse_asgi:application --port $SSE_PORT` (see start.sh).
+Only /api/v1/stream/events/ is served here; with several processes the
+events arrive through settings.REALTIME_EVENT_BUS (Redis in production).
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+django.setup()
+
+from apps.core.stream_views import sse_application  # noqa: E402
+
+application = sse_application
@@ -35,6 +35,7 @@ urlpatterns = [
     path('api/v1/celery/', include('apps.core.celery_urls')),
     path('api/v1/dashboard/', include('apps.core.dashboard_urls')),
     path('api/v1/search/', include('apps.core.search_urls')),
+    path('api/v1/stream/', include('apps.core.stream_urls')),
     
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
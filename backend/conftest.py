@@ -8,6 +8,13 @@ from apps.authentication.models import Role
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache (rolled back rows fire no invalidation signals)."""
+    from django.core.cache import cache
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """Return API client for testing."""
@@ -118,6 +118,9 @@ def generate_sample_checklists():
                 observations=observations
             )
         
+        # Keep the denormalized counters in sync
+        checklist.refresh_counters()
+        
         # Calculate score
         if total_items > 0:
             score = int((positive_responses / total_items) * 100)
@@ -249,11 +249,14 @@ const ChecklistViewer: React.FC<ChecklistViewerProps> = ({ checklistId, onClose
                       )}
                       {response.photo_url && (
                         <div className="mt-2">
-                          <img
-                            src={response.photo_url}
-                            alt="Foto de inspección"
-                            className="max-w-xs rounded-lg border border-gray-300"
-                          />
+                          <a href={response.photo_url} target="_blank" rel="noopener noreferrer">
+                            <img
+                              src={response.photo_thumbnail_url || response.photo_url}
+                              alt="Foto de inspección"
+                              loading="lazy"
+                              className="max-w-xs rounded-lg border border-gray-300"
+                            />
+                          </a>
                         </div>
                       )}
                     </div>
@@ -266,12 +269,12 @@ const ChecklistViewer: React.FC<ChecklistViewerProps> = ({ checklistId, onClose
       </div>
 
       {/* Signature */}
-      {checklist.signature_data && (
+      {(checklist.signature_url || checklist.signature_data) && (
         <div className="border-t border-gray-200 p-6">
           <h3 className="text-lg font-semibold text-gray-900 mb-3">Firma Digital</h3>
           <div className="bg-gray-50 p-4 rounded-lg inline-block">
             <img
-              src={checklist.signature_data}
+              src={checklist.signature_url || checklist.signature_data}
               alt="Firma digital"
               className="max-w-md border border-gray-300 rounded"
             />
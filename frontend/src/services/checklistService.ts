@@ -113,11 +113,18 @@ export const checklistService = {
     return response.data;
   },
 
-  async downloadPDF(id: number): Promise<Blob> {
-    const response = await api.get(`${CHECKLIST_BASE_URL}/responses/${id}/download_pdf/`, {
-      responseType: 'blob',
-    });
-    return response.data;
+  async downloadPDF(id: number, attempts = 20, intervalMs = 1500): Promise<Blob> {
+    // The PDF is rendered in the background: 202 means it is still being generated
+    for (let attempt = 0; attempt < attempts; attempt++) {
+      const response = await api.get(`${CHECKLIST_BASE_URL}/responses/${id}/download_pdf/`, {
+        responseType: 'blob',
+      });
+      if (response.status !== 202) {
+        return response.data;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    throw new Error('El PDF aún se está generando. Intenta nuevamente en unos momentos.');
   },
 
   async getMyChecklists(): Promise<ChecklistResponse[]> {
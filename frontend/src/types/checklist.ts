@@ -8,6 +8,8 @@ export type ResponseValue = 'yes' | 'no' | 'na' | string;
 
 export type ChecklistStatus = 'IN_PROGRESS' | 'COMPLETED' | 'APPROVED' | 'REJECTED';
 
+export type ChecklistPdfStatus = 'NOT_REQUESTED' | 'PENDING' | 'PROCESSING' | 'READY' | 'FAILED';
+
 export interface ChecklistTemplateItem {
   id: number;
   section: string;
@@ -44,6 +46,7 @@ export interface ChecklistItemResponse {
   observations: string;
   photo?: File | string | null;
   photo_url?: string | null;
+  photo_thumbnail_url?: string | null;
   answered_at?: string;
 }
 
@@ -66,8 +69,11 @@ export interface ChecklistResponse {
   score: number | null;
   status: ChecklistStatus;
   signature_data: string;
+  signature_url: string | null;
   pdf_file: string | null;
   pdf_url: string | null;
+  pdf_status: ChecklistPdfStatus;
+  pdf_generated_at: string | null;
   item_responses: ChecklistItemResponse[];
   completion_percentage: number;
   created_at: string;
@@ -19,10 +19,31 @@ python setup_media_dirs.py
 echo "Starting Celery Worker..."
 celery -A config worker -l info --pool=solo &
 
+# Worker dedicado a PDFs de checklists (concurrencia acotada)
+echo "Starting Celery PDF Worker..."
+celery -A config worker -l info -Q ${CHECKLIST_PDF_QUEUE:-checklist_pdfs} \
+    --concurrency=${CHECKLIST_PDF_WORKERS:-2} --prefetch-multiplier=1 -n pdf@%h &
+
+# Worker único de la cola de salida del bot: aplica los límites de envío
+# de los canales, por eso concurrencia 1
+echo "Starting Celery Outbound Messages Worker..."
+celery -A config worker -l info -Q ${OMNICHANNEL_OUTBOUND_QUEUE:-outbound_messages} \
+    --concurrency=1 --prefetch-multiplier=1 -n outbound@%h &
+
+# Worker de updates de Telegram recibidos por el webhook (cada chat en orden)
+echo "Starting Celery Telegram Updates Worker..."
+celery -A config worker -l info -Q ${TELEGRAM_UPDATES_QUEUE:-telegram_updates} \
+    --concurrency=${TELEGRAM_UPDATES_WORKERS:-2} --prefetch-multiplier=1 -n telegram@%h &
+
 # Iniciar Celery Beat en segundo plano
 echo "Starting Celery Beat..."
 celery -A config beat -l info &
 
+# Stream SSE (/api/v1/stream/events/) en su propio proceso ASGI; la API
+# sigue en WSGI, donde las descargas de archivos se transmiten por partes
+echo "Starting SSE server (ASGI)..."
+uvicorn config.sse_asgi:application --host 0.0.0.0 --port ${SSE_PORT:-8001} &
+
 # Iniciar Gunicorn (proceso principal)
 echo "Starting Gunicorn..."
 gunicorn config.wsgi:application --bind 0.0.0.0:$PORT --workers 3